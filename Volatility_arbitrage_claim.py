@@ -8,8 +8,16 @@
 1. 复用 `Volatility_arbitrage_main_rest.get_client()` 获取已鉴权的 `ClobClient`；
 2. 先尝试调用客户端自带的 positions 查询接口，失败则回落到 HTTP 查询；
 3. 从返回的仓位列表中筛选出可 claim 的市场；
-4. 依次尝试通过 `client.claim_positions` 或 HTTP 接口发起 claim；
-5. 打印每个市场的处理结果及累计 claim 金额。
+4. 按市场分组后并发 claim（trading/claim_pipeline.py）：每个市场先试 `client.claim_positions`，
+   再走 HTTP 接口；所有请求共享同一个令牌桶，失败按指数退避重试；
+5. 每个完成的市场写入进度文件，重跑时跳过近期（15 分钟内）已 claim 的市场；更早的记录不再可信，
+   持仓接口仍显示可 claim 的会重新 claim；打印处理结果、累计金额与吞吐统计。
+
+可选环境变量：
+- POLY_CLAIM_WORKERS（默认 4）：并发 claim 的市场数；
+- POLY_CLAIM_RATE / POLY_CLAIM_BURST（默认 1 次/秒、突发 1）：claim 相关请求的令牌桶；
+- POLY_CLAIM_ATTEMPTS（默认 3）：每个市场的最多尝试次数；
+- POLY_CLAIM_PROGRESS：进度文件路径（默认 data/claim_progress.jsonl，设为 off 关闭）。
 
 执行方式：
 >>> python Volatility_arbitrage_claim.py
@@ -17,27 +25,36 @@
 from __future__ import annotations
 
 import json
+import os
 import time
 from decimal import Decimal
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from urllib.parse import urlencode
 
-import requests
+from trading.claim_pipeline import (
+    ClaimJob,
+    ClaimLedger,
+    ClaimOutcome,
+    ClaimPipeline,
+    claim_amount as _extract_claim_amount,
+    group_by_market,
+    normalize_positions as _normalize_positions,
+    parse_claim_response as _parse_claim_response,
+)
+from trading.lazy_import import lazy_module
 
-_CLAIM_RATE_LIMIT_SEC = 1.0
-_last_claim_http_ts = 0.0
+requests = lazy_module("requests")
 
-def _enforce_claim_rate_limit() -> None:
-    global _last_claim_http_ts
-    now = time.monotonic()
-    elapsed = now - _last_claim_http_ts
-    remaining = _CLAIM_RATE_LIMIT_SEC - elapsed
-    if remaining > 0:
-        time.sleep(remaining)
-    _last_claim_http_ts = time.monotonic()
+CLAIM_WORKERS = int(os.getenv("POLY_CLAIM_WORKERS", "4"))
+CLAIM_ATTEMPTS = int(os.getenv("POLY_CLAIM_ATTEMPTS", "3"))
+CLAIM_PROGRESS_PATH = os.getenv(
+    "POLY_CLAIM_PROGRESS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "claim_progress.jsonl"),
+)
 
 from Volatility_arbitrage_main_rest import get_client
 from Volatility_arbitrage_run import (
+    _enforce_claim_rate_limit,
     _extract_api_creds,
     _resolve_client_host,
     _sign_payload,
@@ -82,30 +99,6 @@ def _pick_first(mapping: Dict[str, Any], *keys: str) -> Any:
     return None
 
 
-def _normalize_positions(raw: Any) -> List[Dict[str, Any]]:
-    """尝试将任意返回结构整理为仓位字典列表。"""
-    if raw is None:
-        return []
-    if isinstance(raw, dict):
-        for key in ("positions", "data", "results", "items", "list"):
-            val = raw.get(key)
-            if isinstance(val, list):
-                return [item for item in val if isinstance(item, dict)]
-        if all(k in raw for k in ("market", "token_id")):
-            return [raw]
-        # 某些接口返回 {"YES": {...}, "NO": {...}}
-        if all(isinstance(v, dict) for v in raw.values()):
-            return [dict(v, **{"token_side": k}) for k, v in raw.items()]
-        return []
-    if isinstance(raw, Iterable):
-        items: List[Dict[str, Any]] = []
-        for item in raw:
-            if isinstance(item, dict):
-                items.append(item)
-        return items
-    return []
-
-
 def _is_claimable(position: Dict[str, Any]) -> bool:
     bool_keys = [
         "claimable",
@@ -175,23 +168,6 @@ def _extract_token_id(position: Dict[str, Any]) -> Optional[str]:
     return None
 
 
-def _extract_claim_amount(position: Dict[str, Any]) -> Optional[float]:
-    keys = [
-        "claimableAmount",
-        "claimable_amount",
-        "pendingPayout",
-        "pending_payout",
-        "payout",
-        "amount",
-        "value",
-    ]
-    for key in keys:
-        val = _to_float(position.get(key))
-        if val is not None:
-            return val
-    return None
-
-
 # ---------------------------- HTTP 请求封装 ----------------------------
 
 
@@ -272,53 +248,14 @@ def _http_fetch_positions(client) -> List[Dict[str, Any]]:
     return []
 
 
-def _parse_claim_response(resp: Any) -> Tuple[bool, Optional[float]]:
-    if resp is None:
-        return False, None
-    if isinstance(resp, dict):
-        success_flags = {
-            str(resp.get("success")).lower(),
-            str(resp.get("status")).lower(),
-        }
-        if "true" in success_flags or "ok" in success_flags or "success" in success_flags:
-            amount = _extract_claim_amount(resp)
-            if amount is None:
-                amount = _to_float(_pick_first(resp, "claimedAmount", "amountClaimed", "payout"))
-            return True, amount
-        if resp.get("error"):
-            return False, None
-        if "positions" in resp:
-            try:
-                totals = []
-                for pos in _normalize_positions(resp["positions"]):
-                    amt = _extract_claim_amount(pos)
-                    if amt:
-                        totals.append(amt)
-                return bool(totals), sum(totals) if totals else None
-            except Exception:
-                pass
-    if isinstance(resp, list):
-        totals: List[float] = []
-        for item in resp:
-            amt = None
-            if isinstance(item, dict):
-                amt = _extract_claim_amount(item)
-            amt = amt or _to_float(item)
-            if amt:
-                totals.append(amt)
-        if totals:
-            return True, sum(totals)
-    return False, None
-
-
 def _http_claim(
     client,
     market_id: str,
-    token_id: Optional[str],
+    token_ids: Sequence[str],
 ) -> Tuple[bool, Optional[float]]:
-    payload = {"market": market_id}
-    if token_id:
-        payload["tokenIds"] = [token_id]
+    payload: Dict[str, Any] = {"market": market_id}
+    if token_ids:
+        payload["tokenIds"] = list(token_ids)
 
     paths = [
         "/v1/user/clob/positions/claim",
@@ -382,24 +319,26 @@ def _fetch_positions(client) -> List[Dict[str, Any]]:
 def _attempt_claim_via_client(
     client,
     market_id: str,
-    token_id: Optional[str],
+    token_ids: Sequence[str],
 ) -> Tuple[bool, Optional[float]]:
     claim_fn = getattr(client, "claim_positions", None)
     if not callable(claim_fn):
         return False, None
-    kwargs = {"market": market_id}
-    if token_id:
-        kwargs["token_ids"] = [token_id]
+    kwargs: Dict[str, Any] = {"market": market_id}
+    if token_ids:
+        kwargs["token_ids"] = list(token_ids)
     try:
         print(f"[CLAIM] 尝试调用 client.claim_positions({kwargs})…")
+        _enforce_claim_rate_limit()
         resp = claim_fn(**kwargs)
     except TypeError:
         # 可能参数命名不一致，尝试常见变体
         try:
-            kwargs_alt = {"market": market_id}
-            if token_id:
-                kwargs_alt["token_ids"] = token_id
+            kwargs_alt: Dict[str, Any] = {"market": market_id}
+            if token_ids:
+                kwargs_alt["token_ids"] = token_ids[0] if len(token_ids) == 1 else ",".join(token_ids)
             print(f"[CLAIM] 改用位置参数调用 client.claim_positions({kwargs_alt})…")
+            _enforce_claim_rate_limit()
             resp = claim_fn(**kwargs_alt)
         except Exception as exc:
             print(f"[CLAIM] 调用 client.claim_positions 失败：{exc}")
@@ -412,6 +351,16 @@ def _attempt_claim_via_client(
     return _parse_claim_response(resp)
 
 
+def _claim_market(client, job: ClaimJob) -> Tuple[bool, Optional[float]]:
+    """一次 claim 尝试：先 client.claim_positions，失败再走 HTTP 接口。"""
+    success, claimed_amt = _attempt_claim_via_client(client, job.market_id, job.token_ids)
+    if not success:
+        success, claimed_amt = _http_claim(client, job.market_id, job.token_ids)
+    if success and claimed_amt is None:
+        claimed_amt = job.amount_hint or 0.0
+    return success, claimed_amt
+
+
 def main() -> None:
     print("[INIT] 准备检查账户可 claim 仓位…")
     client = get_client()
@@ -426,47 +375,56 @@ def main() -> None:
         print("[CLAIM] 没有发现可 claim 的仓位。")
         return
 
-    print(f"[CLAIM] 共检测到 {len(claimable_positions)} 条可 claim 仓位。")
-    total_claimed = 0.0
-    results: List[str] = []
-
-    for idx, pos in enumerate(claimable_positions, start=1):
-        market_id = _extract_market_id(pos)
-        token_id = _extract_token_id(pos)
-        amount_hint = _extract_claim_amount(pos)
+    jobs, orphans = group_by_market(
+        claimable_positions,
+        market_of=_extract_market_id,
+        token_of=_extract_token_id,
+        amount_of=_extract_claim_amount,
+    )
+    print(f"[CLAIM] 共检测到 {len(claimable_positions)} 条可 claim 仓位，涉及 {len(jobs)} 个市场。")
+    for pos in orphans:
         outcome = _pick_first(pos, "outcome", "side", "position_side", "token_side")
-        print("-" * 60)
+        print(f"[CLAIM] 缺少 market_id，跳过：token={_extract_token_id(pos)} outcome={outcome}")
+
+    ledger: Optional[ClaimLedger] = None
+    done = 0
+    if CLAIM_PROGRESS_PATH and CLAIM_PROGRESS_PATH.lower() != "off":
+        ledger = ClaimLedger(CLAIM_PROGRESS_PATH)
+        done = sum(1 for job in jobs if ledger.is_claimed(job.market_id))
+        if done:
+            print(f"[CLAIM] 进度文件 {CLAIM_PROGRESS_PATH} 显示 {done} 个市场已 claim，本次跳过。")
+
+    finished = {"n": 0}
+    pending_total = len(jobs) - done
+
+    def _on_result(outcome: ClaimOutcome) -> None:
+        finished["n"] += 1
+        status = "成功" if outcome.ok else "失败"
+        amount = f"，到账金额≈{outcome.amount}" if outcome.ok else (f"，{outcome.error}" if outcome.error else "")
         print(
-            f"[CLAIM] ({idx}/{len(claimable_positions)}) 市场={market_id} token={token_id} outcome={outcome} "
-            f"可claim金额≈{amount_hint}"
+            f"[CLAIM] ({finished['n']}/{pending_total}) 市场 {outcome.market_id} claim {status}"
+            f"（{outcome.attempts} 次尝试，{outcome.elapsed:.2f}s）{amount}"
         )
-        if not market_id:
-            print("[CLAIM] 缺少 market_id，跳过。")
-            continue
-
-        success, claimed_amt = _attempt_claim_via_client(client, market_id, token_id)
-        if not success:
-            success, claimed_amt = _http_claim(client, market_id, token_id)
 
-        if success:
-            claimed_amt = claimed_amt if claimed_amt is not None else amount_hint or 0.0
-            if claimed_amt:
-                total_claimed += claimed_amt
-            msg = (
-                f"市场 {market_id} claim 成功，token={token_id}，到账金额≈{claimed_amt if claimed_amt is not None else '未知'}"
-            )
-            print(f"[CLAIM] {msg}")
-            results.append(msg)
-        else:
-            msg = f"市场 {market_id} claim 失败，token={token_id}"
-            print(f"[CLAIM] {msg}")
-            results.append(msg)
+    pipeline = ClaimPipeline(
+        lambda job: _claim_market(client, job),
+        workers=CLAIM_WORKERS,
+        max_attempts=CLAIM_ATTEMPTS,
+        ledger=ledger,
+        on_result=_on_result,
+    )
+    report = pipeline.run(jobs)
 
     print("=" * 60)
     print("[SUMMARY] 处理结果：")
-    for line in results:
-        print(f"  - {line}")
-    print(f"[SUMMARY] 累计 claim 金额≈{total_claimed:.6f}")
+    for outcome in report.outcomes:
+        if outcome.ok:
+            print(f"  - 市场 {outcome.market_id} claim 成功，到账金额≈{outcome.amount if outcome.amount is not None else '未知'}")
+        else:
+            print(f"  - 市场 {outcome.market_id} claim 失败（{outcome.attempts} 次尝试）")
+    for line in report.summary_lines():
+        print(f"[SUMMARY] {line}")
+    print(f"[SUMMARY] 累计 claim 金额≈{report.total_amount:.6f}")
 
 
 if __name__ == "__main__":
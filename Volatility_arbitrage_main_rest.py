@@ -13,14 +13,25 @@ Polymarket CLOB API 接入主模块（最小版）
 - POLY_HOST         : 默认 https://clob.polymarket.com
 - POLY_CHAIN_ID     : 默认 137（Polygon）
 - POLY_SIGNATURE    : 默认 2（EIP-712）
+- POLY_CREDS_CACHE  : L2 凭证加密缓存文件（默认 ~/.cache/polymarket_maker/clob_creds.json，设为 off 关闭）
 
 用法：
 >>> from Volatility_arbitrage_main import get_client
 >>> client = get_client()
 >>> # 之后在任意模块里复用 client 即可下单/询价
+>>> client = get_client(lazy=True)   # 立即返回，后台完成鉴权；首次使用时才等待
 """
-from py_clob_client.client import ClobClient
+from __future__ import annotations
+
+import functools
 import os
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from trading.creds_cache import CredsCache, creds_to_dict
+
+if TYPE_CHECKING:  # py_clob_client 较重（httpx/eth_account），仅在构造客户端时导入
+    from py_clob_client.client import ClobClient
 
 # ---- 默认配置 ----
 DEFAULT_HOST = "https://clob.polymarket.com"
@@ -35,15 +46,47 @@ def _normalize_privkey(k: str) -> str:
     return k[2:] if k.startswith(("0x", "0X")) else k
 
 
-def init_client() -> ClobClient:
+def _client_settings():
     host = os.getenv("POLY_HOST", DEFAULT_HOST)
     chain_id = int(os.getenv("POLY_CHAIN_ID", str(DEFAULT_CHAIN_ID)))
     signature_type = int(os.getenv("POLY_SIGNATURE", str(DEFAULT_SIGNATURE_TYPE)))
-
-    key = os.environ["POLY_KEY"]
+    key = _normalize_privkey(os.environ["POLY_KEY"])
     funder = os.environ["POLY_FUNDER"]
+    return host, chain_id, signature_type, key, funder
+
+
+def _apply_api_creds(client: ClobClient, api_creds: Any) -> None:
+    client.set_api_creds(api_creds)
+    try:
+        setattr(client, "api_creds", api_creds)
+    except Exception:
+        pass
+
+
+def _cached_api_creds(cache: CredsCache, key: str, host: str, funder: str, signature_type: int):
+    values = cache.load(key, host, funder, signature_type)
+    if not values:
+        return None
+    from py_clob_client.clob_types import ApiCreds
+
+    return ApiCreds(**values)
 
-    key = _normalize_privkey(key)
+
+def refresh_api_creds(client: ClobClient, cache: Optional[CredsCache] = None) -> Any:
+    """服务端拒绝缓存凭证时调用：作废缓存、重新派生并写回。"""
+    host, _chain_id, signature_type, key, funder = _client_settings()
+    cache = cache or CredsCache()
+    cache.invalidate(key, host, funder, signature_type)
+    api_creds = client.create_or_derive_api_creds()
+    _apply_api_creds(client, api_creds)
+    cache.store(key, host, funder, signature_type, api_creds)
+    return api_creds
+
+
+def _build_client(cache: Optional[CredsCache] = None) -> ClobClient:
+    from py_clob_client.client import ClobClient
+
+    host, chain_id, signature_type, key, funder = _client_settings()
 
     client = ClobClient(
         host,
@@ -52,21 +95,127 @@ def init_client() -> ClobClient:
         signature_type=signature_type,
         funder=funder,
     )
-    # 生成并设置 API 凭证（基于私钥派生）
-    api_creds = client.create_or_derive_api_creds()
-    client.set_api_creds(api_creds)
-    try:
-        setattr(client, "api_creds", api_creds)
-    except Exception:
-        pass
+    # 优先复用本地加密缓存的 L2 凭证，省去 create_or_derive 的网络往返
+    cache = cache or CredsCache()
+    api_creds = _cached_api_creds(cache, key, host, funder, signature_type)
+    if api_creds is None:
+        # 生成并设置 API 凭证（基于私钥派生）
+        api_creds = client.create_or_derive_api_creds()
+        if creds_to_dict(api_creds):
+            cache.store(key, host, funder, signature_type, api_creds)
+    _apply_api_creds(client, api_creds)
     return client
 
 
-def get_client() -> ClobClient:
-    """获取（或懒加载）单例客户端。"""
+def init_client(cache: Optional[CredsCache] = None) -> "LazyClobClient":
+    """同步构造已鉴权的客户端；返回的代理在凭证被拒（401/403）时同样会作废缓存并重试。"""
+    cache = cache or CredsCache()
+    return LazyClobClient(
+        factory=lambda: _build_client(cache),
+        refresh=lambda client: refresh_api_creds(client, cache),
+        background=False,
+    )
+
+
+def _is_auth_rejection(exc: BaseException) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status in (401, 403):
+        return True
+    text = str(exc).lower()
+    return "unauthorized" in text or "invalid api key" in text
+
+
+class LazyClobClient:
+    """构造 ClobClient 的代理（默认在后台线程构造）。
+
+    属性访问会阻塞到鉴权完成（构造失败则抛出原异常）。公开方法若因凭证被拒
+    （401/403）失败，会调用 ``refresh_api_creds`` 作废缓存并重试一次。
+    ``background=False`` 时在构造函数内同步完成鉴权，失败立即抛出。
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], ClobClient] = _build_client,
+        refresh: Callable[[ClobClient], Any] = refresh_api_creds,
+        *,
+        background: bool = True,
+    ) -> None:
+        self._factory = factory
+        self._refresh = refresh
+        self._client: Optional[ClobClient] = None
+        self._error: Optional[BaseException] = None
+        self._ready = threading.Event()
+        self._refresh_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        if background:
+            self._thread = threading.Thread(target=self._build, name="clob-auth", daemon=True)
+            self._thread.start()
+        else:
+            self._build()
+            self.wait()
+
+    def _build(self) -> None:
+        try:
+            self._client = self._factory()
+        except BaseException as exc:  # 延迟到首次使用时抛出
+            self._error = exc
+        finally:
+            self._ready.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> ClobClient:
+        if not self._ready.wait(timeout):
+            raise TimeoutError("ClobClient 鉴权尚未完成")
+        if self._error is not None:
+            raise self._error
+        return self._client  # type: ignore[return-value]
+
+    def _call_with_refresh(self, name: str, client: ClobClient, method: Callable) -> Callable:
+        @functools.wraps(method)
+        def _wrapped(*args, **kwargs):
+            try:
+                return method(*args, **kwargs)
+            except Exception as exc:
+                if not _is_auth_rejection(exc):
+                    raise
+                with self._refresh_lock:
+                    print(f"[AUTH] 凭证被拒（{name}），重新派生 API 凭证后重试…")
+                    self._refresh(client)
+                return getattr(client, name)(*args, **kwargs)
+
+        return _wrapped
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        client = self.wait()
+        attr = getattr(client, name)
+        if callable(attr) and name not in _NO_REFRESH_METHODS:
+            return self._call_with_refresh(name, client, attr)
+        return attr
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.wait(), name, value)
+
+
+# 本身就在处理凭证的方法不做“被拒即重派生”重试，避免递归
+_NO_REFRESH_METHODS = frozenset({"create_or_derive_api_creds", "set_api_creds", "create_api_key", "derive_api_key"})
+
+
+def get_client(lazy: bool = False):
+    """获取（或懒加载）单例客户端；lazy=True 时立即返回代理，鉴权在后台进行。
+
+    两种方式返回的都是 ``LazyClobClient``，凭证被拒时会自动重新派生。
+    """
     global _CLIENT_SINGLETON
     if _CLIENT_SINGLETON is None:
-        _CLIENT_SINGLETON = init_client()
+        _CLIENT_SINGLETON = LazyClobClient() if lazy else init_client()
     return _CLIENT_SINGLETON
 
 
@@ -8,19 +8,20 @@
   from Volatility_arbitrage_main_ws import ws_watch_by_ids
   ws_watch_by_ids([YES_id, NO_id], label="...", on_event=handler, verbose=False)
 
-依赖：pip install websocket-client
+依赖：pip install websocket-client（仅在真正建立连接时才导入，缺失时由 ws_watch_by_ids 报错）
+环境变量：POLY_WS_BASE 可覆盖 WS 地址（如本地压测替身 ws://127.0.0.1:8765）；
+也可按调用传 ws_base=...（benchmarks/ws_load_bench.py 同进程对比多个替身时使用）
 """
 from __future__ import annotations
 
-import json, time, threading, ssl
+import json, os, time, threading
 from typing import Callable, List, Optional, Any, Dict
 
-try:
-    import websocket  # websocket-client
-except Exception:
-    raise RuntimeError("缺少依赖，请先安装： pip install websocket-client")
+from trading.lazy_import import optional_import
+from trading.metrics import RATE_LIMIT_WAIT_SECONDS, WS_DECODE_SECONDS, WS_MESSAGES
+from trading.tracing import TRACER
 
-WS_BASE = "wss://ws-subscriptions-clob.polymarket.com"
+WS_BASE = os.getenv("POLY_WS_BASE", "wss://ws-subscriptions-clob.polymarket.com")
 CHANNEL = "market"
 
 _REST_RATE_LIMIT_SEC = 1.0
@@ -34,8 +35,23 @@ def _enforce_rest_rate_limit() -> None:
     remaining = _REST_RATE_LIMIT_SEC - elapsed
     if remaining > 0:
         time.sleep(remaining)
+    RATE_LIMIT_WAIT_SECONDS.labels("ws_rest").observe(max(remaining, 0.0))
     _last_rest_call_ts = time.monotonic()
 
+def _count_messages(data: Any) -> None:
+    """按 asset 统计收到的行情事件数（price_change 按其中每个 asset 计数）。"""
+    items = data if isinstance(data, list) else (data,)
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        asset = item.get("asset_id")
+        if asset is not None:
+            WS_MESSAGES.labels(asset).inc()
+            continue
+        for pc in item.get("price_changes") or ():
+            if isinstance(pc, dict) and pc.get("asset_id") is not None:
+                WS_MESSAGES.labels(pc["asset_id"]).inc()
+
 def _now() -> str:
     from datetime import datetime
     return datetime.now().strftime("%H:%M:%S")
@@ -44,18 +60,26 @@ def ws_watch_by_ids(asset_ids: List[str],
                     label: str = "",
                     on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
                     verbose: bool = False,
-                    stop_event: Optional[threading.Event] = None):
+                    stop_event: Optional[threading.Event] = None,
+                    *,
+                    ws_base: Optional[str] = None):
     """
     只负责：连接 → 订阅 → 将 WS 事件回调给 on_event（逐条 dict）。
     - asset_ids: 订阅的 token_ids（字符串）
     - label: 可选，仅用于启动打印（不参与逻辑）
     - on_event: 回调函数，参数是一条事件（dict）。若服务端下发 list，将按条回调。
     - verbose: 默认 False。为 True 时打印 OPEN/SUB/ERROR/CLOSED 及无回调时的事件。
+    - ws_base: 可选，覆盖模块级 WS_BASE（默认取 POLY_WS_BASE / 官方地址）。
     """
     ids = [str(x) for x in asset_ids if x]
     if not ids:
         raise ValueError("asset_ids 为空")
 
+    websocket = optional_import("websocket")  # websocket-client
+    if websocket is None or not hasattr(websocket, "WebSocketApp"):
+        raise RuntimeError("缺少依赖，请先安装： pip install websocket-client")
+    import ssl
+
     if verbose and label:
         print(f"[INIT] 订阅: {label}")
     if verbose:
@@ -63,6 +87,8 @@ def ws_watch_by_ids(asset_ids: List[str],
             print(f"  - token_id[{i}] = {tid}")
 
     stop_event = stop_event or threading.Event()
+    base = ws_base or WS_BASE
+    url = base + "/ws/" + CHANNEL
 
     reconnect_delay = 1
     max_reconnect_delay = 60
@@ -78,7 +104,7 @@ def ws_watch_by_ids(asset_ids: List[str],
         def on_open(ws):
             nonlocal reconnect_delay
             if verbose:
-                print(f"[{_now()}][WS][OPEN] -> {WS_BASE+'/ws/'+CHANNEL}")
+                print(f"[{_now()}][WS][OPEN] -> {url}")
             payload = {"type": CHANNEL, "assets_ids": ids}
             ws.send(json.dumps(payload))
             reconnect_delay = 1
@@ -95,10 +121,15 @@ def ws_watch_by_ids(asset_ids: List[str],
 
         def on_message(ws, message):
             # 忽略非 JSON 文本（如 PONG）
+            decode_started = time.perf_counter()
             try:
                 data = json.loads(message)
             except Exception:
                 return
+            decoded_at = time.perf_counter()
+            WS_DECODE_SECONDS.observe(decoded_at - decode_started)
+            TRACER.mark_frame(decode_started, decoded_at)
+            _count_messages(data)
 
             # 无回调：仅在 verbose=True 时打印，否则静默
             if on_event is None:
@@ -130,7 +161,7 @@ def ws_watch_by_ids(asset_ids: List[str],
                 print(f"[{_now()}][WS][CLOSED] {status_code} {msg}")
 
         wsa = websocket.WebSocketApp(
-            WS_BASE + "/ws/" + CHANNEL,
+            url,
             on_open=on_open,
             on_message=on_message,
             on_error=on_error,
@@ -140,7 +171,7 @@ def ws_watch_by_ids(asset_ids: List[str],
 
         try:
             wsa.run_forever(
-                sslopt={"cert_reqs": ssl.CERT_REQUIRED},
+                sslopt={"cert_reqs": ssl.CERT_REQUIRED} if base.startswith("wss://") else None,
                 ping_interval=25,
                 ping_timeout=10,
             )
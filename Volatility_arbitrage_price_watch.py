@@ -2,18 +2,19 @@
 # -*- coding: utf-8 -*-
 """
 只负责：解析 tokenIds + 订阅行情 + 每 N 秒节流输出一行（YES/NO 的 bid/ask/last）。
+--dashboard：多市场看板（一次订阅全部市场，按价差/波动/陈旧度排序，只重绘变化的单元格）。
 """
 
 from __future__ import annotations
 
-import re, time, threading, json
+import os, re, time, threading, json
 from datetime import datetime
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List
 
-try:
-    import requests
-except Exception:
-    requests = None
+from trading.lazy_import import lazy_module, module_available
+
+# requests 首次发请求时才导入，缩短 import 时间
+requests = lazy_module("requests") if module_available("requests") else None
 
 GAMMA_API = "https://gamma-api.polymarket.com/markets"
 
@@ -92,6 +93,16 @@ def watch_prices(source: str, interval: int = 1):
     # 延迟导入，避免循环依赖
     from Volatility_arbitrage_main_ws import ws_watch_by_ids
 
+    # 设置 POLY_FANOUT_ADDR 时改从 fan-out 服务取行情（连接即得快照，不再各自订阅 WS）
+    fanout_address = os.getenv("POLY_FANOUT_ADDR", "").strip()
+    watch = ws_watch_by_ids
+    watch_kwargs: Dict[str, Any] = {}
+    if fanout_address:
+        from trading.fanout import fanout_watch_by_ids
+
+        watch = fanout_watch_by_ids
+        watch_kwargs["address"] = fanout_address
+
     print(f"[INIT] 数据源: {label}")
     print(f"[INIT] YES token_id = {yes_id}")
     print(f"[INIT] NO  token_id = {no_id}")
@@ -175,11 +186,12 @@ def watch_prices(source: str, interval: int = 1):
             stale_warned["v"] = False
 
     # 启动 WS（静默，不打印原始事件）
-    t = threading.Thread(target=ws_watch_by_ids, kwargs={
+    t = threading.Thread(target=watch, kwargs={
         "asset_ids": asset_ids,
         "label": label,
         "on_event": _on_event,
-        "verbose": False
+        "verbose": False,
+        **watch_kwargs,
     }, daemon=True)
     t.start()
 
@@ -228,7 +240,107 @@ def watch_prices(source: str, interval: int = 1):
     except KeyboardInterrupt:
         print("\n[EXIT] 用户中断，程序结束。")
 
+# ============ 多市场看板 ============
+def _outcome_names(market: Optional[dict]) -> List[str]:
+    raw = (market or {}).get("outcomes")
+    try:
+        names = json.loads(raw) if isinstance(raw, str) else list(raw or [])
+    except (TypeError, ValueError):
+        names = []
+    return [str(x) for x in names]
+
+
+def _read_sources_file(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as fh:
+        return [line.strip() for line in fh if line.strip() and not line.lstrip().startswith("#")]
+
+
+def watch_dashboard(sources: List[str], refresh: float = 4.0, sort: str = "spread"):
+    """
+    一次订阅全部 sources 的 YES/NO，进入多市场看板（q 退出，s/v/t/n 切换排序，r 反序）。
+    行情写入 QuoteBoard 的数组；看板按 refresh 节流重绘，CPU 开销与消息速率无关。
+    """
+    from trading.dashboard import SORT_KEYS, QuoteBoard, run_dashboard
+
+    if sort not in SORT_KEYS:
+        print(f"[ERROR] --sort 只支持 {', '.join(SORT_KEYS)}")
+        return
+    asset_ids: List[str] = []
+    labels: List[str] = []
+    for source in sources:
+        try:
+            yes_id, no_id, label, market = resolve_token_ids(source)
+        except ValueError as exc:
+            print(f"[WARN] 跳过 {source}: {exc}")
+            continue
+        names = _outcome_names(market) or ["YES", "NO"]
+        for idx, aid in enumerate((yes_id, no_id)):
+            if aid and aid not in asset_ids:
+                asset_ids.append(aid)
+                outcome = names[idx] if idx < len(names) else ("YES", "NO")[idx]
+                labels.append(f"{label} · {outcome}")
+    if not asset_ids:
+        print("[ERROR] 没有可订阅的 token_id")
+        return
+
+    from Volatility_arbitrage_main_ws import ws_watch_by_ids
+
+    fanout_address = os.getenv("POLY_FANOUT_ADDR", "").strip()
+    watch = ws_watch_by_ids
+    watch_kwargs: Dict[str, Any] = {}
+    if fanout_address:
+        from trading.fanout import fanout_watch_by_ids
+
+        watch = fanout_watch_by_ids
+        watch_kwargs["address"] = fanout_address
+
+    print(f"[INIT] 看板订阅 {len(asset_ids)} 个 token（{len(sources)} 个来源）")
+    board = QuoteBoard(asset_ids, labels)
+    stop_event = threading.Event()
+    t = threading.Thread(target=watch, kwargs={
+        "asset_ids": asset_ids,
+        "label": f"dashboard:{len(asset_ids)}",
+        "on_event": board.on_event,
+        "verbose": False,
+        "stop_event": stop_event,
+        **watch_kwargs,
+    }, daemon=True)
+    t.start()
+    try:
+        run_dashboard(board, stop_event, refresh_hz=refresh, sort=sort)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+    print("[EXIT] 看板已退出。")
+
 # ============ CLI ============
+def _parse_dashboard_cli(argv):
+    """
+    --dashboard --source <url 或 YES,NO> [--source ...] [--sources-file PATH]
+    [--refresh 4] [--sort spread|volatility|staleness|name]
+    """
+    sources: List[str] = []
+    refresh = 4.0
+    sort = "spread"
+    i = 0
+    while i < len(argv):
+        a = argv[i]
+        if a == "--source" and i+1 < len(argv):
+            sources.append(argv[i+1]); i += 2; continue
+        if a == "--sources-file" and i+1 < len(argv):
+            sources.extend(_read_sources_file(argv[i+1])); i += 2; continue
+        if a == "--refresh" and i+1 < len(argv):
+            try:
+                refresh = float(argv[i+1])
+            except Exception:
+                refresh = 4.0
+            i += 2; continue
+        if a == "--sort" and i+1 < len(argv):
+            sort = argv[i+1]; i += 2; continue
+        i += 1
+    return sources, refresh, sort
+
 def _parse_cli(argv):
     """
     --source "<url 或 YES,NO>"
@@ -252,6 +364,14 @@ def _parse_cli(argv):
 
 if __name__ == "__main__":
     import sys as _sys
+    if "--dashboard" in _sys.argv[1:]:
+        srcs, refresh_hz, sort_key = _parse_dashboard_cli(_sys.argv[1:])
+        if not srcs:
+            print("用法: python Volatility_arbitrage_price_watch.py --dashboard --source <url 或 YES,NO> [--source ...] "
+                  "[--sources-file PATH] [--refresh 4] [--sort spread|volatility|staleness|name]")
+            _sys.exit(1)
+        watch_dashboard(srcs, refresh_hz, sort_key)
+        _sys.exit(0)
     src, itv = _parse_cli(_sys.argv[1:])
     if not src:
         print("用法: python Volatility_arbitrage_price_watch.py --source <url 或 YES_id,NO_id> [--interval 1]")
@@ -19,29 +19,41 @@ import hmac
 import hashlib
 import json
 import inspect
-from queue import Queue, Empty
-from typing import Dict, Any, Tuple, List, Optional
+from typing import TYPE_CHECKING, Dict, Any, Tuple, List, Optional, Sequence
 import math
-from decimal import Decimal, ROUND_UP, ROUND_DOWN
-import requests
+from dataclasses import asdict
 from datetime import datetime, timezone, timedelta, date, time as dtime
 from json import JSONDecodeError
-try:
-    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
-except Exception:  # pragma: no cover - 兼容无 zoneinfo 的环境
-    ZoneInfo = None  # type: ignore
-    class ZoneInfoNotFoundError(Exception):
-        pass
-from Volatility_arbitrage_strategy import (
-    StrategyConfig,
-    VolArbStrategy,
-    ActionType,
-    Action,
-)
-from maker_execution import (
-    maker_buy_follow_bid,
-    maker_sell_follow_ask_with_floor_wait,
+from trading.async_log import LOG
+from trading.claim_pipeline import ClaimJob, ClaimLedger, ClaimOutcome, parse_claim_response
+from trading.claim_worker import ClaimWorker, redeemable_jobs
+from trading.conflation import ConflatedTick, TickConflator, run_worker
+from trading.lazy_import import lazy_module, module_available
+from trading.metrics import (
+    ACTION_TO_ACK_SECONDS,
+    POSITION_SYNC_SECONDS,
+    RATE_LIMIT_WAIT_SECONDS,
+    REST_LATENCY_SECONDS,
+    TICK_TO_ACTION_SECONDS,
+    start_metrics_server,
 )
+from trading.rate_budget import HostRateBudget, TokenBucket
+from trading.signal_slot import SignalEntry, SignalSlot
+from trading.timer_wheel import TimerHandle, default_wheel
+from trading.ticks import decimals_of, grid_for
+from trading.tracing import TRACER
+from trading.order_store import default_store
+from trading.price_history import TickRing, fetch_prices_history
+
+# 重依赖延迟到首次使用时再导入（requests/zoneinfo 在此按需加载；
+# 策略、maker 执行栈、SQLite 市场目录在 main() / 对应函数内导入）。
+requests = lazy_module("requests")
+# zoneinfo 不可用时为 None，时区解析退化为固定偏移
+_zoneinfo = lazy_module("zoneinfo") if module_available("zoneinfo") else None
+
+if TYPE_CHECKING:
+    from Volatility_arbitrage_strategy import VolArbStrategy
+    from trading.market_catalog import MarketCatalog
 
 # ========== 1) Client：优先 ws 版，回退 rest 版 ==========
 def _get_client():
@@ -51,7 +63,8 @@ def _get_client():
     except Exception as e1:
         try:
             from Volatility_arbitrage_main_rest import get_client  # 退回
-            return get_client()
+            # 惰性客户端：鉴权在后台完成，市场解析与行情订阅可同时进行
+            return get_client(lazy=True)
         except Exception as e2:
             print("[ERR] 无法导入 get_client：", e1, "|", e2)
             sys.exit(1)
@@ -73,9 +86,43 @@ except Exception as e:
 CLOB_API_HOST = "https://clob.polymarket.com"
 GAMMA_ROOT = os.getenv("POLY_GAMMA_ROOT", "https://gamma-api.polymarket.com")
 DATA_API_ROOT = os.getenv("POLY_DATA_API_ROOT", "https://data-api.polymarket.com")
+# 本地市场目录（SQLite）；设为空串或 off 可关闭。
+MARKET_CATALOG_PATH = os.getenv(
+    "POLY_MARKET_CATALOG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "market_catalog.sqlite3"),
+)
+# 最近 tick 的本地持久化环（每个 token 一个文件），重启后用于预热跌幅窗口；设为 off 关闭。
+TICK_HISTORY_DIR = os.getenv(
+    "POLY_TICK_HISTORY_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "ticks"),
+)
 API_MIN_ORDER_SIZE = 5.0
 ORDERBOOK_STALE_AFTER_SEC = 5.0
 POSITION_SYNC_INTERVAL = 60.0
+# 已结束订单在进程内 OrderStore 中保留的时长（秒）；随持仓同步定期清理
+ORDER_STORE_RETENTION = float(os.getenv("POLY_ORDER_STORE_RETENTION", "3600"))
+# 策略信号最长有效期（秒）：主循环忙于下单/确认时积压的信号过期即作废，不按旧价格执行
+SIGNAL_MAX_AGE = float(os.getenv("POLY_SIGNAL_MAX_AGE", "3.0"))
+# 共享内存行情段名（由 python -m trading.shm_feed 启动的 feed-handler 创建）；为空则本进程直连 WS
+SHM_FEED_NAME = os.getenv("POLY_SHM_FEED", "").strip()
+# 行情 fan-out 服务地址（tcp://host:port 或 unix:///path，由 python -m trading.fanout 提供）
+FANOUT_ADDRESS = os.getenv("POLY_FANOUT_ADDR", "").strip()
+# 由协调器（trading/coordinator.py）派发市场时：上一任持有者未正常交接，开始报价前先撤掉该 token 的残留挂单
+CANCEL_STALE_ORDERS = os.getenv("POLY_CANCEL_STALE_ORDERS", "0") == "1"
+# 协调器交接：release 退出时把仍持有的仓位写入 POLY_HANDOVER_FILE；新持有者从 POLY_HANDOVER_STATE 读取上一任的仓位
+HANDOVER_FILE = os.getenv("POLY_HANDOVER_FILE", "").strip()
+HANDOVER_STATE_RAW = os.getenv("POLY_HANDOVER_STATE", "").strip()
+# 进程内自动 claim：市场结束（WS 关闭 / gamma resolved_ts）或持仓快照出现 redeemable 时由后台线程批量 claim；设为 0 关闭
+AUTO_CLAIM = os.getenv("POLY_AUTO_CLAIM", "1") != "0"
+# 后台扫描账户持仓 redeemable 标记的间隔（秒）；设为 0 只处理本进程交易过的市场
+AUTO_CLAIM_SCAN_SEC = float(os.getenv("POLY_AUTO_CLAIM_SCAN_SEC", "60"))
+# 退出前等待后台 claim 完成的最长时间（秒）
+AUTO_CLAIM_DRAIN_SEC = float(os.getenv("POLY_AUTO_CLAIM_DRAIN_SEC", "30"))
+# claim 进度文件，与 Volatility_arbitrage_claim.py 共用，已 claim 的市场两边都不会重复处理；设为 off 关闭
+CLAIM_PROGRESS_PATH = os.getenv(
+    "POLY_CLAIM_PROGRESS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "claim_progress.jsonl"),
+)
 POST_BUY_POSITION_CHECK_DELAY = 60.0
 POST_BUY_POSITION_CHECK_ATTEMPTS = 5
 POST_BUY_POSITION_CHECK_INTERVAL = 7.0
@@ -85,18 +132,60 @@ POST_BUY_POSITION_MATCH_ABS_TOL = 1e-6
 
 
 _REQUEST_RATE_LIMIT_SEC = 1.0
-_last_request_ts = 0.0
-_request_lock = threading.Lock()
-
-def _enforce_request_rate_limit() -> None:
-    global _last_request_ts
-    with _request_lock:
-        now = time.monotonic()
-        elapsed = now - _last_request_ts
-        remaining = _REQUEST_RATE_LIMIT_SEC - elapsed
-        if remaining > 0:
-            time.sleep(remaining)
-        _last_request_ts = time.monotonic()
+# 每个 host 独立令牌桶：持续速率仍为 1 次/秒；gamma 允许少量突发，供并发解析使用。
+_GAMMA_BURST = float(os.getenv("POLY_GAMMA_BURST", "4"))
+_request_budget = HostRateBudget(
+    rate=1.0 / _REQUEST_RATE_LIMIT_SEC,
+    burst=1.0,
+    overrides={GAMMA_ROOT: (1.0 / _REQUEST_RATE_LIMIT_SEC, _GAMMA_BURST)},
+)
+# claim 相关请求（client.claim_positions 与 HTTP 兜底）共享一个令牌桶，后台 claim 与 Volatility_arbitrage_claim.py 共用
+_claim_budget = TokenBucket(
+    rate=float(os.getenv("POLY_CLAIM_RATE", "1.0")),
+    capacity=float(os.getenv("POLY_CLAIM_BURST", "1")),
+)
+
+def _enforce_request_rate_limit(url: str = "", cancel: Optional[threading.Event] = None) -> bool:
+    """按 host 限速；cancel 被置位时放弃等待并返回 False（不占用额度）。"""
+    waited = _request_budget.acquire(url, cancel)
+    if waited is None:
+        return False
+    RATE_LIMIT_WAIT_SECONDS.labels("runner_rest").observe(waited)
+    return True
+
+
+def _enforce_claim_rate_limit() -> None:
+    waited = _claim_budget.acquire()
+    if waited:
+        RATE_LIMIT_WAIT_SECONDS.labels("claim").observe(waited)
+
+
+def _endpoint_label(url: str) -> str:
+    """REST 延迟指标的 endpoint 标签：host + 首段路径，避免 slug/id 造成标签爆炸。"""
+    match = re.match(r"https?://([^/?#]+)(/[^/?#]*)?", url or "")
+    if not match:
+        return "unknown"
+    return f"{match.group(1)}{match.group(2) or '/'}"
+
+
+def _watch_first_ack(token_id: str, side: str, emitted_at: Optional[float]):
+    """订阅本地订单簿，记录“信号发出 → 首张挂单确认”的延迟；返回取消订阅函数。"""
+    if emitted_at is None:
+        return lambda: None
+    fired = {"v": False}
+    trace_id = TRACER.current()
+
+    def _listener(state) -> None:
+        if fired["v"] or state.source != "create":
+            return
+        if state.token_id != str(token_id) or state.side != side:
+            return
+        fired["v"] = True
+        acked_at = time.perf_counter()
+        ACTION_TO_ACK_SECONDS.labels(side).observe(acked_at - emitted_at)
+        TRACER.record("signal.to_ack", emitted_at, acked_at, trace_id=trace_id, side=side)
+
+    return default_store().subscribe(_listener)
 
 def _strategy_accepts_total_position(strategy: VolArbStrategy) -> bool:
     """Return True when ``strategy.on_buy_filled`` can consume ``total_position``."""
@@ -201,12 +290,12 @@ def _timezone_from_hint(hint: Any) -> Optional[timezone]:
         "pdt": "America/Los_Angeles",
     }
     canonical = keyword_map.get(lowered)
-    if ZoneInfo and canonical:
+    if _zoneinfo and canonical:
         try:
-            return ZoneInfo(canonical)
-        except ZoneInfoNotFoundError:
+            return _zoneinfo.ZoneInfo(canonical)
+        except _zoneinfo.ZoneInfoNotFoundError:
             pass
-    if canonical and not ZoneInfo:
+    if canonical and not _zoneinfo:
         # zoneinfo 不可用时退化为标准时区（不考虑夏令时）
         offsets = {
             "America/New_York": -300,
@@ -236,10 +325,10 @@ def _timezone_from_hint(hint: Any) -> Optional[timezone]:
         minutes = value * 60 if abs(value) <= 24 else value
         return timezone(timedelta(minutes=minutes))
 
-    if ZoneInfo:
+    if _zoneinfo:
         try:
-            return ZoneInfo(text)
-        except ZoneInfoNotFoundError:
+            return _zoneinfo.ZoneInfo(text)
+        except _zoneinfo.ZoneInfoNotFoundError:
             return None
     return None
 
@@ -440,10 +529,10 @@ def _value_has_meaningful_time_component(value: Any) -> bool:
 
 
 def _get_zoneinfo_or_fallback(name: str, fallback_offset_minutes: int) -> timezone:
-    if ZoneInfo:
+    if _zoneinfo:
         try:
-            return ZoneInfo(name)  # type: ignore[arg-type]
-        except ZoneInfoNotFoundError:
+            return _zoneinfo.ZoneInfo(name)  # type: ignore[arg-type]
+        except _zoneinfo.ZoneInfoNotFoundError:
             pass
     return timezone(timedelta(minutes=fallback_offset_minutes))
 
@@ -507,7 +596,7 @@ def _prompt_common_deadline_override(
 
     choice = ""
     while choice not in options:
-        raw = input().strip()
+        raw = _read_input().strip()
         if allow_skip and not raw:
             print("[INFO] 已沿用自动识别的截止时间。")
             return None, False
@@ -536,14 +625,21 @@ def _prompt_common_deadline_override(
 
 def _count_decimal_places(value: Any) -> Optional[int]:
     try:
-        dec = Decimal(str(value))
-    except Exception:
+        # 先转 float 去掉字符串里的尾随 0（"0.010" -> 2 位）
+        num = float(value)
+    except (TypeError, ValueError):
         return None
-    dec = dec.normalize()
-    exponent = dec.as_tuple().exponent
-    if exponent >= 0:
+    # 整数值（"1"、100、0.0）没有小数位；float 的 repr "1.0" 不能算 1 位
+    if num.is_integer():
         return 0
-    return abs(int(exponent))
+    return decimals_of(num, max_dp=12)
+
+
+def _price_tick_from_precision(precision: Optional[int]) -> Optional[float]:
+    """价格精度（小数位）-> 策略比较用的 tick；未识别时返回 None，策略按浮点比较。"""
+    if precision is None or not 0 < precision <= 6:
+        return None
+    return grid_for(precision).step
 
 
 def _infer_market_price_precision_from_raw(raw: Any) -> Optional[int]:
@@ -630,6 +726,7 @@ def _market_meta_from_obj(m: dict, timezone_override: Optional[Any] = None) -> D
         or m.get("conditionId")
         or m.get("condition_id")
     )
+    meta["condition_id"] = m.get("conditionId") or m.get("condition_id")
 
     tz_hint = timezone_override if timezone_override is not None else _infer_timezone_hint(m)
     if tz_hint:
@@ -888,18 +985,18 @@ def _sign_payload(secret: str, timestamp: str, method: str, path: str, body: str
     return hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
 
 
-def _claim_via_http(client, market_id: str, token_id: Optional[str]) -> bool:
+def _claim_via_http(client, market_id: str, token_ids: Sequence[str]) -> Tuple[bool, Optional[float]]:
     creds = _extract_api_creds(client)
     if not creds:
         print("[CLAIM] 当前客户端缺少 API 凭证信息，无法调用 HTTP claim 接口。")
-        return False
+        return False, None
 
     host = _resolve_client_host(client)
     path = "/v1/user/clob/positions/claim"
     url = f"{host}{path}"
     payload: Dict[str, Any] = {"market": market_id}
-    if token_id:
-        payload["tokenIds"] = [token_id]
+    if token_ids:
+        payload["tokenIds"] = list(token_ids)
 
     body = json.dumps(payload, separators=(",", ":"))
     ts = str(int(time.time() * 1000))
@@ -912,21 +1009,23 @@ def _claim_via_http(client, market_id: str, token_id: Optional[str]) -> bool:
     }
 
     try:
-        _enforce_request_rate_limit()
-        resp = requests.post(url, data=body, headers=headers, timeout=10)
+        _enforce_claim_rate_limit()
+        _enforce_request_rate_limit(url)
+        with REST_LATENCY_SECONDS.labels(_endpoint_label(url)).time():
+            resp = requests.post(url, data=body, headers=headers, timeout=10)
     except Exception as exc:
         print(f"[CLAIM] 请求 {url} 时出现异常：{exc}")
-        return False
+        return False, None
 
     if resp.status_code == 404:
         print("[CLAIM] 目标 claim 接口返回 404，请确认所使用的 Clob API 版本是否支持自动 claim。")
-        return False
+        return False, None
     if resp.status_code >= 500:
         print(f"[CLAIM] 服务端 {resp.status_code} 错误：{resp.text}")
-        return False
+        return False, None
     if resp.status_code in (401, 403):
         print(f"[CLAIM] 接口拒绝访问（{resp.status_code}）：{resp.text}")
-        return False
+        return False, None
 
     try:
         data = resp.json()
@@ -934,9 +1033,9 @@ def _claim_via_http(client, market_id: str, token_id: Optional[str]) -> bool:
         data = resp.text
 
     print(f"[CLAIM] HTTP {path} 返回状态 {resp.status_code}，响应：{data}")
-    if isinstance(data, dict) and data.get("error"):
-        return False
-    return resp.ok
+    if not resp.ok:
+        return False, None
+    return parse_claim_response(data)
 
 
 def _extract_positions_from_data_api_response(payload: Any) -> Optional[List[dict]]:
@@ -1064,8 +1163,9 @@ def _fetch_positions_from_data_api(client) -> Tuple[List[dict], bool, str]:
             "sizeThreshold": 0,
         }
         try:
-            _enforce_request_rate_limit()
-            resp = requests.get(url, params=params, timeout=10)
+            _enforce_request_rate_limit(url)
+            with REST_LATENCY_SECONDS.labels(_endpoint_label(url)).time():
+                resp = requests.get(url, params=params, timeout=10)
         except requests.RequestException as exc:
             return [], False, f"数据接口请求失败：{exc}"
 
@@ -1270,6 +1370,28 @@ def _extract_avg_price_from_entry(entry: Dict[str, Any]) -> Optional[float]:
     return None
 
 
+def _log_order_store_summary(token_id: str, tag: str) -> None:
+    """打印进程内订单簿中该 token 的挂单与累计成交（不触发 REST 请求）。"""
+    store = default_store()
+    live = store.open_orders(token_id=token_id)
+    buy_filled, buy_notional = store.totals(token_id, "BUY")
+    sell_filled, sell_notional = store.totals(token_id, "SELL")
+    live_desc = ", ".join(
+        f"{state.side}@{state.price:.4f}x{state.remaining:.4f}" for state in live
+    ) or "-"
+    LOG.info(
+        "watchdog.orders",
+        f"[WATCHDOG][{tag}] 本地订单 -> 挂单={live_desc} "
+        f"买入成交={buy_filled:.4f}(${buy_notional:.2f}) 卖出成交={sell_filled:.4f}(${sell_notional:.2f})",
+        token=token_id,
+        tag=tag,
+        open_orders=[state.order_id for state in live],
+        buy_filled=buy_filled,
+        sell_filled=sell_filled,
+    )
+
+
+@TRACER.traced("position.probe")
 def _lookup_position_avg_price(
     client,
     token_id: str,
@@ -1307,6 +1429,43 @@ def _lookup_position_avg_price(
     return None, None, last_info or f"未在 positions 中找到 token {token_id}"
 
 
+def _live_position_size(client, token_id: str) -> Optional[float]:
+    """实时持仓份数：接口成功但没有该 token 视为 0；接口失败返回 None。"""
+    try:
+        positions, ok, _origin = _fetch_positions_from_data_api(client)
+    except Exception:
+        return None
+    if not ok:
+        return None
+    for pos in positions:
+        if isinstance(pos, dict) and _position_matches_token(pos, token_id):
+            return _extract_position_size_from_entry(pos)
+    return 0.0
+
+
+def _load_handover_state() -> Optional[Dict[str, Any]]:
+    """协调器随派发带来的上一任持有者仓位（position_size / entry_price）；没有或无法解析时返回 None。"""
+    if not HANDOVER_STATE_RAW:
+        return None
+    try:
+        state = json.loads(HANDOVER_STATE_RAW)
+    except ValueError:
+        print(f"[LEASE] 无法解析交接仓位：{HANDOVER_STATE_RAW!r}")
+        return None
+    return state if isinstance(state, dict) else None
+
+
+def _write_handover_state(token_id: str, position_size: Optional[float], entry_price: Optional[float]) -> None:
+    """交接退出时记录仍持有的仓位，由协调器随 release 上报并转交给新持有者。"""
+    if not HANDOVER_FILE:
+        return
+    state = {"token_id": token_id, "position_size": position_size or 0.0, "entry_price": entry_price}
+    tmp_path = f"{HANDOVER_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(state, fh)
+    os.replace(tmp_path, HANDOVER_FILE)
+
+
 def _fetch_position_snapshot_with_cache(
     *,
     client,
@@ -1326,43 +1485,107 @@ def _fetch_position_snapshot_with_cache(
         return snapshot, now
     except Exception as probe_exc:
         if log_errors:
-            print(f"[WATCHDOG][SELL] 持仓查询异常：{probe_exc}")
+            LOG.warn(
+                "watchdog.sell.position",
+                f"[WATCHDOG][SELL] 持仓查询异常：{probe_exc}",
+                token=token_id,
+            )
         if cache is not None:
             return cache, cache_ts
         return None, cache_ts
 
 
-def _attempt_claim(client, meta: Dict[str, Any], token_id: str) -> None:
-    market_id = meta.get("market_id") if isinstance(meta, dict) else None
-    print(f"[CLAIM] 检测到需处理的未平仓仓位，token_id={token_id}，开始尝试 claim…")
-    if not market_id:
-        print("[CLAIM] 未找到 market_id，无法自动 claim，请手动处理。")
-        return
-
+def _claim_market(client, market_id: str, token_ids: Sequence[str]) -> Tuple[bool, Optional[float]]:
+    """一次 claim 尝试，返回 (是否成功, 金额)；成功与否按响应内容判断，而不是调用没抛异常。"""
     claim_fn = getattr(client, "claim_positions", None)
     if callable(claim_fn):
-        claim_kwargs = {"market": market_id}
-        if token_id:
-            claim_kwargs["token_ids"] = [token_id]
+        claim_kwargs: Dict[str, Any] = {"market": market_id}
+        if token_ids:
+            claim_kwargs["token_ids"] = list(token_ids)
         try:
             print(f"[CLAIM] 尝试调用 claim_positions({claim_kwargs})…")
+            _enforce_claim_rate_limit()
             resp = claim_fn(**claim_kwargs)
-            print(f"[CLAIM] 响应: {resp}")
-            return
         except TypeError as exc:
             print(f"[CLAIM] claim_positions 参数不匹配: {exc}，改用 HTTP 接口。")
         except Exception as exc:
             print(f"[CLAIM] 调用 claim_positions 失败: {exc}，改用 HTTP 接口。")
+        else:
+            print(f"[CLAIM] 响应: {resp}")
+            success, amount = parse_claim_response(resp)
+            if success:
+                return True, amount
+            print("[CLAIM] claim_positions 响应未确认成功，改用 HTTP 接口。")
+
+    return _claim_via_http(client, market_id, token_ids)
+
+
+def _claim_key(meta: Optional[Dict[str, Any]]) -> Optional[str]:
+    """claim 任务的市场键：与持仓扫描（redeemable_jobs）一样用 conditionId，gamma 未给出时才退回 market_id。"""
+    if not isinstance(meta, dict):
+        return None
+    key = meta.get("condition_id") or meta.get("market_id")
+    return str(key) if key else None
+
+
+def _attempt_claim(client, meta: Dict[str, Any], token_id: str) -> None:
+    market_id = _claim_key(meta)
+    print(f"[CLAIM] 检测到需处理的未平仓仓位，token_id={token_id}，开始尝试 claim…")
+    if not market_id:
+        print("[CLAIM] 未找到 market_id，无法自动 claim，请手动处理。")
+        return
 
-    if _claim_via_http(client, market_id, token_id):
+    success, _amount = _claim_market(client, market_id, [token_id] if token_id else [])
+    if success:
         return
 
     print("[CLAIM] 未找到可用的 claim 方法，请手动处理。")
 
-def _http_json(url: str, params=None) -> Optional[Any]:
+
+def _start_claim_worker(client) -> Optional[ClaimWorker]:
+    """启动进程内后台 claim 线程：结算通知 + 定期扫描持仓 redeemable，批量 claim 不占交易线程。"""
+    if not AUTO_CLAIM:
+        return None
+    ledger: Optional[ClaimLedger] = None
+    if CLAIM_PROGRESS_PATH and CLAIM_PROGRESS_PATH.lower() != "off":
+        try:
+            ledger = ClaimLedger(CLAIM_PROGRESS_PATH)
+        except OSError as exc:
+            print(f"[WARN] claim 进度文件不可用（{exc}），自动 claim 不做去重记录。")
+
+    def _scan() -> List[ClaimJob]:
+        positions, ok, _origin = _fetch_positions_from_data_api(client)
+        if not ok:
+            return []
+        if ledger is not None:
+            ledger.refresh()
+        jobs = [job for job in redeemable_jobs(positions) if ledger is None or not ledger.is_claimed(job.market_id)]
+        if jobs:
+            print(f"[CLAIM] 持仓快照中发现 {len(jobs)} 个可赎回市场，已加入自动 claim 队列。")
+        return jobs
+
+    def _on_result(outcome: ClaimOutcome) -> None:
+        if outcome.ok:
+            print(f"[CLAIM] 自动 claim 成功：市场 {outcome.market_id}（{outcome.attempts} 次尝试，{outcome.elapsed:.1f}s）")
+        else:
+            print(f"[CLAIM] 自动 claim 失败：市场 {outcome.market_id}（{outcome.attempts} 次尝试），下次扫描时重试。")
+
+    worker = ClaimWorker(
+        lambda job: _claim_market(client, job.market_id, job.token_ids),
+        scan=_scan if AUTO_CLAIM_SCAN_SEC > 0 else None,
+        scan_interval=AUTO_CLAIM_SCAN_SEC,
+        ledger=ledger,
+        on_result=_on_result,
+        on_error=lambda stage, exc: print(f"[CLAIM] 自动 claim 后台线程异常（{stage}）：{exc}"),
+    )
+    return worker.start()
+
+def _http_json(url: str, params=None, *, cancel: Optional[threading.Event] = None) -> Optional[Any]:
     try:
-        _enforce_request_rate_limit()
-        r = requests.get(url, params=params or {}, timeout=10)
+        if not _enforce_request_rate_limit(url, cancel):
+            return None
+        with REST_LATENCY_SECONDS.labels(_endpoint_label(url)).time():
+            r = requests.get(url, params=params or {}, timeout=10)
         if r.status_code == 404:
             return None
         r.raise_for_status()
@@ -1370,9 +1593,82 @@ def _http_json(url: str, params=None) -> Optional[Any]:
     except Exception:
         return None
 
+_market_catalog_lock = threading.Lock()
+_market_catalog_state: Dict[str, Any] = {"catalog": None, "failed": False}
+
+
+def _market_catalog() -> Optional["MarketCatalog"]:
+    """惰性打开本地市场目录；打开失败后不再重试，直接走在线解析。"""
+    path = (MARKET_CATALOG_PATH or "").strip()
+    if not path or path.lower() == "off":
+        return None
+    with _market_catalog_lock:
+        if _market_catalog_state["catalog"] is None and not _market_catalog_state["failed"]:
+            try:
+                from trading.market_catalog import MarketCatalog
+
+                if path != ":memory:":
+                    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                _market_catalog_state["catalog"] = MarketCatalog(
+                    path, fetch=_http_json, gamma_root=GAMMA_ROOT
+                )
+            except Exception as exc:
+                _market_catalog_state["failed"] = True
+                print(f"[WARN] 本地市场目录不可用，改用在线解析：{exc}")
+        return _market_catalog_state["catalog"]
+
+
+def _catalog_remember(markets: Any, event_slug: Optional[str] = None) -> None:
+    """把在线拉到的市场对象写回本地目录，下次同一市场无需再请求 gamma。"""
+    catalog = _market_catalog()
+    if catalog is None or not markets:
+        return
+    if isinstance(markets, dict):
+        markets = [markets]
+    try:
+        catalog.upsert_markets(markets, event_slug=event_slug)
+    except Exception as exc:
+        print(f"[WARN] 写入本地市场目录失败：{exc}")
+
+
+def _resolve_from_catalog(source: str) -> Optional[Tuple[str, str, str, Dict[str, Any]]]:
+    """仅查本地目录：market slug / conditionId / tokenId 命中即返回，否则 None。"""
+    catalog = _market_catalog()
+    if catalog is None:
+        return None
+    text = source.strip()
+    try:
+        if re.fullmatch(r"0x[0-9a-fA-F]{64}", text):
+            m = catalog.by_condition_id(text)
+        elif text.isdigit():
+            m = catalog.by_token_id(text)
+        elif _looks_like_event_source(text):
+            m = None
+        else:
+            slug = _extract_market_slug(text)
+            m = catalog.by_slug(slug) if slug else None
+    except Exception as exc:
+        print(f"[WARN] 查询本地市场目录失败：{exc}")
+        return None
+    if not isinstance(m, dict):
+        return None
+    y, n, title = _tokens_from_market_obj(m)
+    if not (y and n):
+        return None
+    return y, n, title, _market_meta_from_obj(m)
+
+
 def _list_markets_under_event(event_slug: str) -> List[dict]:
     if not event_slug:
         return []
+    catalog = _market_catalog()
+    if catalog is not None:
+        try:
+            cached = catalog.by_event_slug(event_slug)
+        except Exception:
+            cached = []
+        if cached:
+            return cached
     # A) /events?slug=<slug>
     for closed_flag in ("false", "true", None):
         params = {"slug": event_slug}
@@ -1388,6 +1684,7 @@ def _list_markets_under_event(event_slug: str) -> List[dict]:
             for ev in evs:
                 mkts = ev.get("markets") or []
                 if mkts:
+                    _catalog_remember(mkts, event_slug=ev.get("slug") or event_slug)
                     return mkts
         # 若找到事件但 markets 为空，则无需继续尝试其它 closed_flag
         if evs:
@@ -1400,11 +1697,131 @@ def _list_markets_under_event(event_slug: str) -> List[dict]:
     elif isinstance(data, list):
         mkts = data
     if isinstance(mkts, list):
-        return [m for m in mkts if str(m.get("eventSlug") or "") == str(event_slug)]
+        hits = [m for m in mkts if str(m.get("eventSlug") or "") == str(event_slug)]
+        _catalog_remember(hits)
+        return hits
+    return []
+
+def _fetch_market_by_slug(
+    market_slug: str, *, cancel: Optional[threading.Event] = None, fresh: bool = False
+) -> Optional[dict]:
+    """fresh=True 时跳过本地目录直接请求 gamma（刷新结算状态 / 截止时间用），并用响应更新目录。"""
+    catalog = None if fresh else _market_catalog()
+    if catalog is not None:
+        try:
+            cached = catalog.by_slug(market_slug)
+        except Exception:
+            cached = None
+        if isinstance(cached, dict):
+            return cached
+    m = _http_json(f"{GAMMA_ROOT}/markets/slug/{market_slug}", cancel=cancel)
+    if isinstance(m, dict):
+        _catalog_remember(m)
+    return m
+
+
+def _listing_items(data: Any) -> List[dict]:
+    if isinstance(data, dict) and "data" in data:
+        data = data["data"]
+    if isinstance(data, list):
+        return [x for x in data if isinstance(x, dict)]
     return []
 
-def _fetch_market_by_slug(market_slug: str) -> Optional[dict]:
-    return _http_json(f"{GAMMA_ROOT}/markets/slug/{market_slug}")
+
+def _fetch_market_by_slug_param(slug: str, *, cancel: Optional[threading.Event] = None) -> Optional[dict]:
+    """/markets?slug=<slug>（旧解析器同款查询），作为 /markets/slug/<slug> 的并行备选。"""
+    mkts = _listing_items(_http_json(f"{GAMMA_ROOT}/markets", params={"limit": 1, "slug": slug}, cancel=cancel))
+    if mkts:
+        _catalog_remember(mkts[0])
+        return mkts[0]
+    return None
+
+
+def _search_market_hit(slug: str, params: Dict[str, Any], *, cancel: Optional[threading.Event] = None) -> Optional[dict]:
+    """/markets?search=<slug>：优先 slug 精确命中，其次 eventSlug 命中。"""
+    mkts = _listing_items(_http_json(f"{GAMMA_ROOT}/markets", params=params, cancel=cancel))
+    hit = None
+    for m2 in mkts:
+        if str(m2.get("slug") or "") == slug:
+            hit = m2; break
+    if not hit:
+        for m2 in mkts:
+            if str(m2.get("eventSlug") or "") == slug:
+                hit = m2; break
+    if hit:
+        _catalog_remember(hit)
+    return hit
+
+
+def _single_market_of_event(event_slug: str, *, cancel: Optional[threading.Event] = None) -> Optional[dict]:
+    """/events?slug=<slug>：仅当事件下只有一个子问题时才算命中（多个子问题需人工选择）。"""
+    for ev in _listing_items(_http_json(f"{GAMMA_ROOT}/events", params={"slug": event_slug}, cancel=cancel)):
+        mkts = [m for m in (ev.get("markets") or []) if isinstance(m, dict)]
+        if mkts:
+            _catalog_remember(mkts, event_slug=ev.get("slug") or event_slug)
+        if len(mkts) == 1:
+            return mkts[0]
+    return None
+
+
+def _resolved_from_market(m: Any, fallback_title: str = "") -> Optional[Tuple[str, str, str, Dict[str, Any]]]:
+    if not isinstance(m, dict):
+        return None
+    y, n, title = _tokens_from_market_obj(m)
+    if not (y and n):
+        return None
+    return y, n, title or (m.get("title") or m.get("question") or fallback_title), _market_meta_from_obj(m)
+
+
+# 市场解析查询共用的线程池（有界，按需创建）；每次解析不再单独起线程池
+RESOLVE_WORKERS = max(int(os.getenv("POLY_RESOLVE_WORKERS", "4")), 1)
+_resolve_pool_lock = threading.Lock()
+_resolve_pool_state: Dict[str, Any] = {"pool": None}
+
+
+def _resolve_pool():
+    with _resolve_pool_lock:
+        if _resolve_pool_state["pool"] is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            _resolve_pool_state["pool"] = ThreadPoolExecutor(
+                max_workers=RESOLVE_WORKERS, thread_name_prefix="resolve"
+            )
+        return _resolve_pool_state["pool"]
+
+
+def _resolve_by_precedence(slugs: List[str]) -> Optional[Tuple[str, str, str, Dict[str, Any]]]:
+    """并发发起 gamma 查询，但按旧解析链路的优先级取结果。
+
+    顺序：每个候选 slug 依次为 /markets/slug、/markets?slug=、search（先 active 再放宽）、事件单子问题。
+    靠前的查询命中即返回；靠后的兜底结果（可能是同一事件下的其他子问题）只有在它之前的查询全部落空后才采用。
+    查询共享按 host 的令牌桶（见 `_enforce_request_rate_limit`），返回后尚在排队的查询直接放弃，不占用额度。
+    """
+    cancel = threading.Event()
+    lookups = []
+    for slug in slugs:
+        lookups.append((slug, lambda slug=slug: _fetch_market_by_slug(slug, cancel=cancel)))
+        lookups.append((slug, lambda slug=slug: _fetch_market_by_slug_param(slug, cancel=cancel)))
+        for params in ({"limit": 200, "search": slug, "active": "true"}, {"limit": 200, "search": slug}):
+            lookups.append((slug, lambda slug=slug, params=params: _search_market_hit(slug, params, cancel=cancel)))
+        lookups.append((slug, lambda slug=slug: _single_market_of_event(slug, cancel=cancel)))
+    if not lookups:
+        return None
+    pool = _resolve_pool()
+    futures = [(slug, pool.submit(fn)) for slug, fn in lookups]
+    try:
+        for slug, fut in futures:
+            try:
+                resolved = _resolved_from_market(fut.result(), slug)
+            except Exception:
+                continue
+            if resolved:
+                return resolved
+        return None
+    finally:
+        cancel.set()
+        for _slug, fut in futures:
+            fut.cancel()
 
 def _pick_market_subquestion(markets: List[dict]) -> dict:
     print("[CHOICE] 该事件下存在多个子问题，请选择其一，或直接粘贴具体子问题URL：")
@@ -1479,56 +1896,23 @@ def _resolve_with_fallback(source: str) -> Tuple[str, str, str, Dict[str, Any]]:
     y, n = _parse_yes_no_ids_literal(source)
     if y and n:
         return y, n, "(Manual IDs)", {}
-    # 2) 先尝试旧解析器（单一市场 URL/slug）
-    if not _looks_like_event_source(source):
-        try:
-            y1, n1, title1, raw1 = resolve_token_ids(source)
-            if y1 and n1:
-                meta = _market_meta_from_obj(raw1 or {}) if raw1 else {}
-                if not meta:
-                    meta = _maybe_fetch_market_meta_from_source(source)
-                return y1, n1, title1, meta
-        except Exception:
-            pass
-    # 2.5) 若上一步失败：把输入当作可能的 market slug（含 /event 路由别名）
-    cand_slugs: List[str] = []
+    # 1.5) 本地市场目录命中则无需任何 gamma 请求
+    cached = _resolve_from_catalog(source)
+    if cached:
+        return cached
+    # 2) 单一市场 URL/slug：并发查询 slug 接口、search、事件列表，按旧链路优先级取结果
+    #    （含 /event 路由别名；多子问题事件交给下方的人工选择链路）
     if not _looks_like_event_source(source):
+        cand_slugs: List[str] = []
         ms = _extract_market_slug(source)
         if ms:
             cand_slugs.append(ms)
         es = _extract_event_slug(source)
         if es and es not in cand_slugs:
             cand_slugs.append(es)
-    for slug in cand_slugs:
-        # A) 直接按 /markets/slug/<slug>
-        m = _fetch_market_by_slug(slug)
-        if isinstance(m, dict):
-            yx, nx, tx = _tokens_from_market_obj(m)
-            if yx and nx:
-                return yx, nx, tx or (m.get("title") or m.get("question") or slug), _market_meta_from_obj(m)
-        # B) 用 /markets?search=<slug> 兜底（先 active，再放宽）
-        for params in ({"limit": 200, "search": slug, "active": "true"}, {"limit": 200, "search": slug}):
-            data = _http_json(f"{GAMMA_ROOT}/markets", params=params)
-            mkts = []
-            if isinstance(data, dict) and "data" in data:
-                mkts = data["data"]
-            elif isinstance(data, list):
-                mkts = data
-            if isinstance(mkts, list) and mkts:
-                hit = None
-                # 优先 slug 精确命中
-                for m2 in mkts:
-                    if str(m2.get("slug") or "") == slug:
-                        hit = m2; break
-                # 其次 eventSlug 命中
-                if not hit:
-                    for m2 in mkts:
-                        if str(m2.get("eventSlug") or "") == slug:
-                            hit = m2; break
-                if hit:
-                    yx, nx, tx = _tokens_from_market_obj(hit)
-                    if yx and nx:
-                        return yx, nx, tx, _market_meta_from_obj(hit)
+        resolved = _resolve_by_precedence(cand_slugs)
+        if resolved:
+            return resolved
     # 3) 事件页/事件 slug 回退链路
     event_slug = _extract_event_slug(source)
     if not event_slug:
@@ -1568,8 +1952,7 @@ def _resolve_with_fallback(source: str) -> Tuple[str, str, str, Dict[str, Any]]:
 
 # ====== 下单执行工具 ======
 def _floor(x: float, dp: int) -> float:
-    q = Decimal(str(x)).quantize(Decimal("1." + "0"*dp), rounding=ROUND_DOWN)
-    return float(q)
+    return grid_for(dp).floor(x)
 
 def _normalize_sell_pair(price: float, size: float) -> Tuple[float, float]:
     # 价格 4dp；份数 2dp（下单时再 floor 一次，确保不超）
@@ -1587,20 +1970,411 @@ def _place_sell_fok(client, token_id: str, price: float, size: float) -> Dict[st
     return client.post_order(signed, OrderType.FOK)
 
 
+# ===== 价格窗口预热 =====
+def _open_tick_ring(token_id: str) -> Optional[TickRing]:
+    if not TICK_HISTORY_DIR or TICK_HISTORY_DIR.lower() == "off":
+        return None
+    try:
+        return TickRing(os.path.join(TICK_HISTORY_DIR, f"{token_id}.ticks"))
+    except OSError as exc:
+        print(f"[WARN] 本地 tick 记录不可用：{exc}")
+        return None
+
+
+def _warm_start_price_history(
+    strategy: "VolArbStrategy", token_id: str, ring: Optional[TickRing]
+) -> None:
+    """重启后先用本地 tick 环、再用 CLOB prices-history 补齐窗口前段，一次性灌入策略。"""
+    now = time.time()
+    window_start = now - strategy.cfg.drop_window_minutes * 60.0
+    ts_values: List[float] = []
+    mids: List[float] = []
+    if ring is not None:
+        try:
+            ts_values, mids = ring.load(since=window_start)
+        except OSError as exc:
+            print(f"[WARN] 读取本地 tick 记录失败：{exc}")
+    local_points = len(ts_values)
+
+    # 本地记录覆盖不到窗口起点（超过 1 分钟缺口）时，向接口补拉缺失的前段
+    remote_points = 0
+    gap_end = ts_values[0] if ts_values else now
+    if gap_end - window_start > 60.0:
+        try:
+            hist_ts, hist_mids = fetch_prices_history(
+                token_id, start_ts=window_start, end_ts=gap_end, fetch=_http_json
+            )
+        except Exception as exc:
+            print(f"[WARN] 拉取历史价格失败：{exc}")
+            hist_ts, hist_mids = [], []
+        remote_points = len(hist_ts)
+        ts_values = hist_ts + ts_values
+        mids = hist_mids + mids
+
+    loaded = strategy.warm_start(ts_values, mids, now=now)
+    if loaded:
+        drop_stats = strategy.status().get("drop_stats", {})
+        print(
+            f"[INIT] 价格窗口已预热：{loaded} 个点（本地 {local_points} / 接口 {remote_points}），"
+            f"窗口高={drop_stats.get('window_high')} 低={drop_stats.get('window_low')}"
+        )
+    else:
+        print("[INIT] 无可用历史价格，跌幅窗口将从实时行情开始累积。")
+
+
+def _cancel_open_orders(client, token_id: str, tag: str, *, bulk: bool = True) -> int:
+    """撤销该 token 的挂单：本地跟踪的逐笔撤销；bulk=True 时再按 asset 向交易所批量撤一次。
+
+    交接（bulk=False）只撤本进程自己下的单，不按 asset 批量撤，避免误撤新持有者已挂出的订单。
+    """
+    from trading.execution import ClobPolymarketAPI
+
+    adapter = ClobPolymarketAPI(client)
+    store = default_store()
+    cancelled = 0
+    for state in store.open_orders(token_id=token_id):
+        try:
+            ok = adapter.cancel_order(state.order_id)
+        except Exception as exc:
+            print(f"{tag} 撤单失败 {state.order_id}：{exc}")
+            continue
+        if ok:
+            store.mark_cancelled(state.order_id, source="handover")
+            cancelled += 1
+    if not bulk:
+        print(f"{tag} 已撤销本进程挂单 {cancelled} 笔。")
+        return cancelled
+    bulk_cancel = getattr(client, "cancel_market_orders", None)
+    if callable(bulk_cancel):
+        try:
+            bulk_cancel(asset_id=str(token_id))
+        except Exception as exc:
+            print(f"{tag} 按 asset 批量撤单失败：{exc}")
+    print(f"{tag} 已撤销本地跟踪挂单 {cancelled} 笔，并请求交易所撤销该 token 的其余挂单。")
+    return cancelled
+
+
+# ===== 会话日志（崩溃恢复） =====
+# 设置 POLY_JOURNAL_DIR 后启用：交互输入、策略状态迁移、订单与本地仓位写入 WAL，
+# 异常退出后重启即可毫秒级恢复到崩溃前状态（见 trading/journal.py）。
+JOURNAL_DIR = os.getenv("POLY_JOURNAL_DIR", "").strip()
+# 恢复时对仍存活的挂单：默认撤单；设为 1 则保留并重新纳入 OrderStore 跟踪
+RESUME_KEEP_ORDERS = os.getenv("POLY_RESUME_KEEP_ORDERS", "0") == "1"
+
+_input_replay: List[str] = []
+_input_log: Optional[List[str]] = None
+
+
+def _read_input() -> str:
+    """读取一行交互输入；恢复会话时优先回放日志中记录的答案。"""
+    if _input_replay:
+        answer = _input_replay.pop(0)
+        print(f"[RESUME] > {answer}")
+    else:
+        answer = input()
+    if _input_log is not None:
+        _input_log.append(answer)
+    return answer
+
+
+class _RunJournal:
+    """把 `trading.journal.Journal` 接入运行器：输入回放、状态记录与恢复。"""
+
+    def __init__(self, directory: str):
+        global _input_log
+        self.journal = None
+        self.resume_state: Optional[Dict[str, Any]] = None
+        self._last_position: Optional[Tuple[Any, Any]] = None
+        self._unsubscribers: List[Any] = []
+        if not directory:
+            return
+        from trading.journal import Journal
+
+        started = time.perf_counter()
+        try:
+            self.journal = Journal(directory)
+        except OSError as exc:
+            print(f"[WARN] 会话日志不可用（{directory}）：{exc}")
+            return
+        recovered = self.journal.recovered
+        session = recovered.state.get("session") or {}
+        if session.get("inputs") and not session.get("closed"):
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            open_orders = len(recovered.state.get("orders") or {})
+            print(
+                f"[RESUME] 检测到未正常结束的会话：token={session.get('token_id')} "
+                f"挂单={open_orders} 日志记录={recovered.seq}（恢复耗时 {elapsed_ms:.1f}ms）"
+            )
+            print("[RESUME] 直接回车恢复该会话，输入 n 重新开始：")
+            try:
+                choice = input().strip().lower()
+            except EOFError:
+                choice = ""
+            if choice not in {"n", "no"}:
+                self.resume_state = recovered.state
+                _input_replay[:] = [str(x) for x in session["inputs"]]
+        if self.resume_state is None:
+            self.journal.reset()
+        _input_log = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.journal is not None
+
+    def _append(self, kind: str, data: Dict[str, Any], *, sync: bool = False) -> None:
+        if self.journal is None:
+            return
+        try:
+            self.journal.append(kind, data, sync=sync)
+        except Exception as exc:
+            print(f"[WARN] 会话日志写入失败：{exc}")
+
+    def record_session(self, **fields: Any) -> None:
+        inputs = list(_input_log or [])
+        self._append("session", dict(fields, inputs=inputs), sync=True)
+
+    def attach(self, strategy: "VolArbStrategy", token_id: str) -> None:
+        """恢复策略状态，并订阅后续的策略迁移与订单变化。"""
+        if self.journal is None:
+            return
+        saved = (self.resume_state or {}).get("strategy")
+        if saved:
+            strategy.restore_state(saved)
+            print(f"[RESUME] 策略状态已恢复：{strategy.status()}")
+        self._unsubscribers.append(
+            strategy.add_listener(
+                lambda event, state: self._append("strategy", {"event": event, "state": state})
+            )
+        )
+
+        def _on_order(state) -> None:
+            if state.token_id == token_id:
+                self._append("order", asdict(state))
+
+        self._unsubscribers.append(default_store().subscribe(_on_order))
+
+    def restored_position(self) -> Optional[Dict[str, Any]]:
+        return (self.resume_state or {}).get("position")
+
+    def record_position(self, position_size: Optional[float], last_order_size: Optional[float]) -> None:
+        key = (position_size, last_order_size)
+        if self.journal is None or key == self._last_position:
+            return
+        self._last_position = key
+        self._append("position", {"position_size": position_size, "last_order_size": last_order_size})
+
+    def reconcile_orders(self, client, token_id: str) -> None:
+        """核对日志中的挂单：按最新状态回填 OrderStore，仍存活的撤单或保留。"""
+        orders = (self.resume_state or {}).get("orders") or {}
+        pending = [o for o in orders.values() if o.get("token_id") == token_id]
+        if not pending:
+            return
+        from trading.execution import ClobPolymarketAPI
+
+        adapter = ClobPolymarketAPI(client)
+        store = default_store()
+        for order in pending:
+            order_id = str(order.get("order_id"))
+            store.add(
+                order_id,
+                token_id,
+                str(order.get("side") or ""),
+                float(order.get("price") or 0.0),
+                float(order.get("size") or 0.0),
+                status=str(order.get("status") or "OPEN"),
+                source="journal",
+            )
+            try:
+                payload = adapter.get_order_status(order_id)
+            except Exception as exc:
+                print(f"[RESUME] 查询挂单 {order_id} 状态失败：{exc}，按存活处理。")
+                payload = {}
+            status = str(payload.get("status") or "").upper() or None
+            filled = _coerce_float(payload.get("filledAmount"))
+            if filled is not None:
+                store.apply_fill(
+                    order_id,
+                    filled,
+                    avg_price=_coerce_float(payload.get("avgPrice")),
+                    status=status,
+                    source="journal",
+                )
+            elif status:
+                store.apply_status(order_id, status, source="journal")
+            state = store.get(order_id)
+            if state is None or not state.is_open:
+                print(f"[RESUME] 挂单 {order_id} 已结束：status={status}")
+                continue
+            if RESUME_KEEP_ORDERS:
+                print(
+                    f"[RESUME] 保留存活挂单 {order_id} side={state.side} "
+                    f"price={state.price} 剩余={state.remaining:.4f}"
+                )
+                continue
+            if adapter.cancel_order(order_id):
+                store.mark_cancelled(order_id, source="journal")
+                print(f"[RESUME] 已撤销崩溃前遗留挂单 {order_id}")
+            else:
+                print(f"[WARN] 撤销遗留挂单 {order_id} 失败，请手动检查。")
+
+    def close(self, *, clean: bool) -> None:
+        for unsubscribe in self._unsubscribers:
+            unsubscribe()
+        self._unsubscribers.clear()
+        if self.journal is None:
+            return
+        if clean:
+            self._append("session_closed", {}, sync=True)
+        self.journal.close()
+        self.journal = None
+
+
+# ===== 行情帧解析（纯函数：_on_event 与 benchmarks 共用） =====
+def _extract_ts(raw: Optional[Any]) -> float:
+    if raw is None:
+        return time.time()
+    try:
+        ts = float(raw)
+    except Exception:
+        return time.time()
+    if ts > 1e12:
+        ts = ts / 1000.0
+    return ts
+
+
+def _is_market_closed(payload: Dict[str, Any]) -> bool:
+    status_keys = ["status", "market_status", "marketStatus"]
+    for key in status_keys:
+        val = payload.get(key)
+        if isinstance(val, str) and val.lower() in {"closed", "settled", "resolved", "expired"}:
+            return True
+    bool_keys = ["is_closed", "market_closed", "closed", "isMarketClosed"]
+    for key in bool_keys:
+        val = payload.get(key)
+        if isinstance(val, bool) and val:
+            return True
+        if isinstance(val, str) and val.strip().lower() in {"true", "1", "yes"}:
+            return True
+    return False
+
+
+def _event_indicates_market_closed(ev: Dict[str, Any]) -> bool:
+    if not isinstance(ev, dict):
+        return False
+
+    if _is_market_closed(ev):
+        return True
+
+    queue: List[Dict[str, Any]] = []
+    for key in ("market", "market_state", "marketState", "marketStatus", "data", "payload"):
+        val = ev.get(key)
+        if isinstance(val, dict):
+            queue.append(val)
+        elif isinstance(val, list):
+            for item in val:
+                if isinstance(item, dict):
+                    queue.append(item)
+
+    while queue:
+        item = queue.pop()
+        if _is_market_closed(item):
+            return True
+        for key, val in item.items():
+            if isinstance(val, dict):
+                queue.append(val)
+            elif isinstance(val, list):
+                for sub in val:
+                    if isinstance(sub, dict):
+                        queue.append(sub)
+    return False
+
+
+def _parse_price_change(pc: Dict[str, Any]) -> Tuple[float, float, float]:
+    def _to_float(val: Any) -> Optional[float]:
+        if val is None:
+            return None
+        try:
+            return float(val)
+        except (TypeError, ValueError):
+            return None
+
+    price_fields = (
+        "last_trade_price",
+        "last_price",
+        "mark_price",
+        "price",
+    )
+
+    bid = _to_float(pc.get("best_bid"))
+    ask = _to_float(pc.get("best_ask"))
+
+    price_val: Optional[float] = None
+    for key in price_fields:
+        price_val = _to_float(pc.get(key))
+        if price_val is not None:
+            break
+
+    if price_val is None:
+        if bid is not None and ask is not None:
+            price_val = (bid + ask) / 2.0
+        elif bid is not None:
+            price_val = bid
+        elif ask is not None:
+            price_val = ask
+        else:
+            price_val = 0.0
+
+    return (
+        bid or 0.0,
+        ask or 0.0,
+        price_val,
+    )
+
+
 # ===== 主流程 =====
 def main():
+    # 未捕获异常（任意线程）时，把最近的结构化日志环形缓冲落盘，便于事后排查
+    LOG.install_crash_dump()
+    run_journal = _RunJournal(JOURNAL_DIR)
+    clean_exit = False
+    try:
+        _run_main(run_journal)
+        clean_exit = True
+    finally:
+        # 仅正常返回时写入结束标记；崩溃 / 被杀时保留会话以便下次恢复
+        run_journal.close(clean=clean_exit)
+
+
+def _run_main(run_journal: _RunJournal):
+    from Volatility_arbitrage_strategy import (
+        StrategyConfig,
+        VolArbStrategy,
+        ActionType,
+        Action,
+    )
+    from maker_execution import (
+        maker_buy_follow_bid,
+        maker_sell_follow_ask_with_floor_wait,
+    )
+
+    metrics_port = os.getenv("POLY_METRICS_PORT")
+    if metrics_port:
+        try:
+            start_metrics_server(int(metrics_port))
+            print(f"[INIT] 指标服务已启动：http://127.0.0.1:{int(metrics_port)}/metrics")
+        except (OSError, ValueError) as exc:
+            print(f"[WARN] 指标服务启动失败：{exc}")
     client = _get_client()
-    creds_check = _extract_api_creds(client)
-    if not creds_check or not creds_check.get("key") or not creds_check.get("secret"):
-        print("[ERR] 无法获取完整 API 凭证，请检查配置后重试。")
-        return
-    print("[INIT] API 凭证已验证。")
-    print("[INIT] ClobClient 就绪。")
+    claim_worker = _start_claim_worker(client)
+    if not getattr(client, "ready", True):
+        print("[INIT] ClobClient 后台鉴权中，先进行市场解析…")
+    else:
+        print("[INIT] ClobClient 就绪。")
     timezone_override_hint: Optional[Any] = None
     manual_deadline_override_ts: Optional[float] = None
     manual_deadline_disabled = False
     print('请输入 Polymarket 市场 URL：')
-    source = input().strip()
+    source = _read_input().strip()
     if not source:
         print("[ERR] 未输入，退出。")
         return
@@ -1627,7 +2401,7 @@ def main():
     else:
         print("[WARN] 市场数据未提供时区信息，请选择时区：")
         print("1) ET（美东时间）\n2) UTC\n直接回车默认选择 1) ET。")
-        tz_choice = input().strip()
+        tz_choice = _read_input().strip()
         if tz_choice == "2":
             timezone_override_hint = "UTC"
         else:
@@ -1771,7 +2545,7 @@ def main():
 
     def _prompt_yes_or_no(message: str, default_yes: bool = True) -> Optional[bool]:
         print(message)
-        raw = input().strip()
+        raw = _read_input().strip()
         if not raw:
             return default_yes
         lowered = raw.lower()
@@ -1793,7 +2567,7 @@ def main():
     token_id = yes_id if side == "YES" else no_id
 
     print("② 请输入买入份数（留空=按 $1 反推）：")
-    size_in = input().strip()
+    size_in = _read_input().strip()
     manual_order_size: Optional[float] = None
     manual_size_is_target = False
     if size_in:
@@ -1817,7 +2591,7 @@ def main():
             print("[INIT] 手动份数将直接作为单笔下单量使用，不扣除已有仓位。")
 
     print("④ 请选择卖出挂单模式：输入 1 为激进分支，输入 2 为保守分支（默认 1）：")
-    sell_mode_in = input().strip()
+    sell_mode_in = _read_input().strip()
     if sell_mode_in == "2":
         sell_mode = "conservative"
         print("[INIT] 已选择保守卖出分支。")
@@ -1825,7 +2599,7 @@ def main():
         sell_mode = "aggressive"
         print("[INIT] 已选择激进卖出分支。")
     print("请输入买入触发价（对标 bid，如 0.35，留空表示仅依赖跌幅触发）：")
-    buy_px_in = input().strip()
+    buy_px_in = _read_input().strip()
     buy_threshold = None
     if buy_px_in:
         try:
@@ -1835,7 +2609,7 @@ def main():
             return
 
     print("请输入跌幅窗口分钟数（默认 10）：")
-    drop_window_in = input().strip()
+    drop_window_in = _read_input().strip()
     try:
         drop_window = float(drop_window_in) if drop_window_in else 10.0
     except Exception:
@@ -1843,7 +2617,7 @@ def main():
         return
 
     print("请输入跌幅触发百分比（默认 5 表示 5%）：")
-    drop_pct_in = input().strip()
+    drop_pct_in = _read_input().strip()
     try:
         drop_pct = float(drop_pct_in) / 100.0 if drop_pct_in else 0.05
     except Exception:
@@ -1851,7 +2625,7 @@ def main():
         return
 
     print("请输入卖出盈利百分比（默认 5 表示 +5%）：")
-    profit_in = input().strip()
+    profit_in = _read_input().strip()
     try:
         profit_pct = float(profit_in) / 100.0 if profit_in else 0.05
     except Exception:
@@ -1864,7 +2638,7 @@ def main():
         "输入数字（单位%），如 0.1 表示每轮+0.1%；"
         "直接回车表示不启用递增。"
     )
-    incremental_step_raw = input().strip()
+    incremental_step_raw = _read_input().strip()
     incremental_drop_pct_step = 0.0
     enable_incremental_drop_pct = False
     if incremental_step_raw:
@@ -1895,7 +2669,7 @@ def main():
             "  - 提前的分钟数，如输入 30 表示截止前 30 分钟进入仅卖出模式；\n"
             "留空表示不启用倒计时卖出保护。"
         )
-        countdown_in = input().strip()
+        countdown_in = _read_input().strip()
         if countdown_in:
             parsed_ts: Optional[float] = None
             used_minutes = False
@@ -1937,15 +2711,36 @@ def main():
         disable_sell_signals=True,
         enable_incremental_drop_pct=enable_incremental_drop_pct,
         incremental_drop_pct_step=incremental_drop_pct_step,
+        price_tick=_price_tick_from_precision(market_price_precision),
     )
     strategy = VolArbStrategy(cfg)
     strategy_supports_total_position = _strategy_accepts_total_position(strategy)
+    run_journal.record_session(source=source, title=title, side=side, token_id=token_id)
+    run_journal.attach(strategy, token_id)
+    tick_ring = _open_tick_ring(token_id)
+    _warm_start_price_history(strategy, token_id, tick_ring)
 
     latest: Dict[str, Dict[str, Any]] = {}
-    action_queue: Queue[Action] = Queue()
+
+    def _on_signal_dropped(action: Action, reason: str) -> None:
+        LOG.info(
+            "signal.dropped",
+            f"[SIGNAL] 丢弃 {action.action.value} 信号（{reason}） ref={action.ref_price:.4f}",
+            token=token_id,
+            side=action.action.value,
+            reason=reason,
+        )
+        if reason == "expired":
+            # 过期信号不会再执行，解除策略的待确认状态，等待新行情重新触发
+            strategy.on_reject(f"signal {reason}")
+
+    # 每个 token 只保留最新一条待执行信号（newest wins），超过 SIGNAL_MAX_AGE 即过期
+    signal_slot = SignalSlot(SIGNAL_MAX_AGE, on_drop=_on_signal_dropped)
     stop_event = threading.Event()
     sell_only_event = threading.Event()
     market_closed_detected = False
+    # 协调器下发 release 指令：撤掉本进程挂单后退出，新持有者才开始报价
+    handover_requested = False
 
     slug_for_refresh = ""
     if isinstance(market_meta, dict):
@@ -1970,7 +2765,8 @@ def main():
                 print("[COUNTDOWN] 无市场 slug，无法刷新事件状态，仅依赖本地信息。")
                 unable_to_refresh_logged = True
             return market_meta
-        m_obj = _fetch_market_by_slug(slug)
+        # 刷新必须绕过本地目录：目录里是启动时的快照，看不到新的 resolved_ts / 改期的 endDate
+        m_obj = _fetch_market_by_slug(slug, fresh=True)
         if isinstance(m_obj, dict):
             refreshed = _market_meta_from_obj(m_obj, timezone_override_hint)
             if refreshed:
@@ -1998,6 +2794,7 @@ def main():
                 market_price_precision = new_precision
                 if meta_changed:
                     _log_profit_floor("[INFO][REFRESH]")
+                    strategy.set_price_tick(_price_tick_from_precision(market_price_precision))
                     adjusted_profit = _enforce_profit_floor(
                         profit_pct, prefix="[ADJUST]"
                     )
@@ -2010,117 +2807,34 @@ def main():
     def _calc_size_by_1dollar(ask_px: float) -> float:
         if not ask_px or ask_px <= 0:
             return 1.0
-        s = 1.0 / ask_px
-        return float(Decimal(str(s)).quantize(Decimal("1"), rounding=ROUND_UP))
+        return grid_for(0).ceil(1.0 / ask_px)
+
+    def _queue_claim(reason: str) -> None:
+        # 市场结束即交给后台 claim 线程（本线程不发请求）；链上结算常晚于关闭事件，同时把持仓扫描提前
+        if claim_worker is None or handover_requested:
+            return
+        market_id = _claim_key(market_meta)
+        if market_id and _extract_position_size(strategy.status()) > 0:
+            if claim_worker.notify(market_id, [token_id]):
+                print(f"[CLAIM] 市场已结束（{reason}），已加入自动 claim 队列。")
+        claim_worker.scan_now(delay=5.0)
 
     def _probe_position_size_for_buy() -> Tuple[Optional[float], Optional[str]]:
         try:
             _avg_px, total_pos, origin_note = _lookup_position_avg_price(client, token_id)
         except Exception as probe_exc:
-            print(f"[WATCHDOG][BUY] 下单前持仓查询异常：{probe_exc}")
+            LOG.warn(
+                "watchdog.buy.position",
+                f"[WATCHDOG][BUY] 下单前持仓查询异常：{probe_exc}",
+                token=token_id,
+            )
             return None, None
         origin_display = origin_note or "positions"
         return total_pos, origin_display
 
-    def _extract_ts(raw: Optional[Any]) -> float:
-        if raw is None:
-            return time.time()
-        try:
-            ts = float(raw)
-        except Exception:
-            return time.time()
-        if ts > 1e12:
-            ts = ts / 1000.0
-        return ts
-
-    def _is_market_closed(payload: Dict[str, Any]) -> bool:
-        status_keys = ["status", "market_status", "marketStatus"]
-        for key in status_keys:
-            val = payload.get(key)
-            if isinstance(val, str) and val.lower() in {"closed", "settled", "resolved", "expired"}:
-                return True
-        bool_keys = ["is_closed", "market_closed", "closed", "isMarketClosed"]
-        for key in bool_keys:
-            val = payload.get(key)
-            if isinstance(val, bool) and val:
-                return True
-            if isinstance(val, str) and val.strip().lower() in {"true", "1", "yes"}:
-                return True
-        return False
-
-    def _event_indicates_market_closed(ev: Dict[str, Any]) -> bool:
-        if not isinstance(ev, dict):
-            return False
-
-        if _is_market_closed(ev):
-            return True
-
-        queue: List[Dict[str, Any]] = []
-        for key in ("market", "market_state", "marketState", "marketStatus", "data", "payload"):
-            val = ev.get(key)
-            if isinstance(val, dict):
-                queue.append(val)
-            elif isinstance(val, list):
-                for item in val:
-                    if isinstance(item, dict):
-                        queue.append(item)
-
-        while queue:
-            item = queue.pop()
-            if _is_market_closed(item):
-                return True
-            for key, val in item.items():
-                if isinstance(val, dict):
-                    queue.append(val)
-                elif isinstance(val, list):
-                    for sub in val:
-                        if isinstance(sub, dict):
-                            queue.append(sub)
-        return False
-
-    def _parse_price_change(pc: Dict[str, Any]) -> Tuple[float, float, float]:
-        def _to_float(val: Any) -> Optional[float]:
-            if val is None:
-                return None
-            try:
-                return float(val)
-            except (TypeError, ValueError):
-                return None
-
-        price_fields = (
-            "last_trade_price",
-            "last_price",
-            "mark_price",
-            "price",
-        )
-
-        bid = _to_float(pc.get("best_bid"))
-        ask = _to_float(pc.get("best_ask"))
-
-        price_val: Optional[float] = None
-        for key in price_fields:
-            price_val = _to_float(pc.get(key))
-            if price_val is not None:
-                break
-
-        if price_val is None:
-            if bid is not None and ask is not None:
-                price_val = (bid + ask) / 2.0
-            elif bid is not None:
-                price_val = bid
-            elif ask is not None:
-                price_val = ask
-            else:
-                price_val = 0.0
-
-        return (
-            bid or 0.0,
-            ask or 0.0,
-            price_val,
-        )
-
     def _on_event(ev: Dict[str, Any]):
         nonlocal market_closed_detected
+        received_at = time.perf_counter()
         if stop_event.is_set():
             return
         if not isinstance(ev, dict):
@@ -2130,6 +2844,7 @@ def main():
             market_closed_detected = True
             strategy.stop("market closed")
             stop_event.set()
+            _queue_claim("ws")
             return
 
         if ev.get("event_type") == "price_change":
@@ -2143,59 +2858,120 @@ def main():
             if str(pc.get("asset_id")) != str(token_id):
                 continue
             bid, ask, last = _parse_price_change(pc)
+            # 事件未带的一侧沿用上一笔报价；尚未报过价的一侧不送进策略（0.0 会被当成真实价格触发跌幅买入）
+            prev = latest.get(token_id) or {}
+            if pc.get("best_bid") is None:
+                bid = prev.get("best_bid") or 0.0
+            if pc.get("best_ask") is None:
+                ask = prev.get("best_ask") or 0.0
             latest[token_id] = {"price": last, "best_bid": bid, "best_ask": ask, "ts": ts}
-            action = strategy.on_tick(best_ask=ask, best_bid=bid, ts=ts)
-            if action and action.action in (ActionType.BUY, ActionType.SELL):
-                action_queue.put(action)
+            if bid > 0 and ask > 0:
+                trace_id = TRACER.new_trace()
+                TRACER.frame_spans(trace_id, ts)
+                # 只登记最新报价，策略评估交给 _strategy_worker，WS 读循环不等策略
+                tick_buffer.offer(token_id, bid, ask, last, ts, received_at=received_at, trace_id=trace_id)
             if _is_market_closed(pc):
                 print("[MARKET] 检测到市场关闭信号，准备退出…")
                 market_closed_detected = True
                 strategy.stop("market closed")
                 stop_event.set()
+                _queue_claim("ws")
                 break
 
-    def _confirm_market_closed():
+    def _evaluate_tick(tick: ConflatedTick) -> None:
+        eval_started = time.perf_counter()
+        TRACER.record("strategy.wait", tick.received_at, eval_started, trace_id=tick.trace_id)
+        # 被合并的中间行情以 mid_min/mid_max 计入策略跌幅窗口
+        action = strategy.on_tick(
+            best_ask=tick.best_ask,
+            best_bid=tick.best_bid,
+            ts=tick.ts,
+            mid_low=tick.mid_min if tick.conflated else None,
+            mid_high=tick.mid_max if tick.conflated else None,
+        )
+        TRACER.record("strategy.on_tick", eval_started, trace_id=tick.trace_id)
+        if tick_ring is not None:
+            tick_ring.append(tick.ts, tick.mid)
+        if action and action.action in (ActionType.BUY, ActionType.SELL):
+            emitted_at = time.perf_counter()
+            TICK_TO_ACTION_SECONDS.observe(emitted_at - tick.received_at)
+            action.extra["emitted_at"] = emitted_at
+            if tick.trace_id:
+                action.extra["trace_id"] = tick.trace_id
+            if tick.conflated:
+                action.extra["ticks_conflated"] = tick.conflated
+            signal_slot.put(token_id, action)
+
+    def _strategy_worker() -> None:
+        run_worker(tick_buffer, _evaluate_tick, stop_event)
+
+    def _confirm_market_closed(attempt: int = 1) -> None:
+        # 在定时轮的工作线程中执行（含 HTTP 刷新）；未确认时 10 秒后由定时轮再次调度
         nonlocal market_closed_detected
-        attempt = 0
-        while not stop_event.is_set():
-            refreshed_meta = _refresh_market_meta()
-            attempt += 1
-            now = time.time()
-            if _market_has_ended(refreshed_meta, now):
-                print("[MARKET] 已确认市场结束，可进行后续处理。")
-                market_closed_detected = True
-                strategy.stop("market ended confirmed")
-                stop_event.set()
-                return
-            if attempt == 1:
-                print("[MARKET] 倒计时结束但市场尚未标记结束，10 秒后再次检查…")
-            else:
-                print(
-                    f"[MARKET] 第 {attempt} 次检查仍未确认结束，10 秒后再次重试…"
-                )
-            for _ in range(10):
-                if stop_event.is_set():
-                    return
-                time.sleep(1)
+        if stop_event.is_set():
+            return
+        refreshed_meta = _refresh_market_meta()
+        now = time.time()
+        if _market_has_ended(refreshed_meta, now):
+            print("[MARKET] 已确认市场结束，可进行后续处理。")
+            market_closed_detected = True
+            strategy.stop("market ended confirmed")
+            stop_event.set()
+            _queue_claim("gamma")
+            return
+        if attempt == 1:
+            print("[MARKET] 倒计时结束但市场尚未标记结束，10 秒后再次检查…")
+        else:
+            print(
+                f"[MARKET] 第 {attempt} 次检查仍未确认结束，10 秒后再次重试…"
+            )
+        countdown_timers.append(
+            timer_wheel.call_later(10.0, _confirm_market_closed, attempt + 1, blocking=True)
+        )
 
-                for _ in range(int(wait)):
-                    if stop_event.is_set():
-                        return
-                    time.sleep(1)
-
-    ws_thread = threading.Thread(
-        target=ws_watch_by_ids,
-        kwargs={
-            "asset_ids": [token_id],
-            "label": f"{title} ({side})",
-            "on_event": _on_event,
-            "verbose": False,
-        },
-        daemon=True,
-    )
+    tick_buffer = TickConflator()
+    threading.Thread(target=_strategy_worker, name="strategy-worker", daemon=True).start()
+
+    ws_kwargs: Dict[str, Any] = {
+        "asset_ids": [token_id],
+        "label": f"{title} ({side})",
+        "on_event": _on_event,
+        "verbose": False,
+    }
+    watch_source = ws_watch_by_ids
+    if SHM_FEED_NAME:
+        # 多进程分片：由独立的 feed-handler 进程持有 WS，本进程直接读共享内存行情
+        from trading.shm_feed import shm_watch_by_ids
+
+        watch_source = shm_watch_by_ids
+        ws_kwargs.update(name=SHM_FEED_NAME, stop_event=stop_event)
+        print(f"[INIT] 行情来源：共享内存 {SHM_FEED_NAME}")
+    elif FANOUT_ADDRESS:
+        # 多机部署：由 fan-out 服务统一持有 WS 订阅，连接时先下发盘口快照
+        from trading.fanout import fanout_watch_by_ids
+
+        watch_source = fanout_watch_by_ids
+        ws_kwargs.update(address=FANOUT_ADDRESS, stop_event=stop_event)
+        print(f"[INIT] 行情来源：fan-out {FANOUT_ADDRESS}")
+    ws_thread = threading.Thread(target=watch_source, kwargs=ws_kwargs, daemon=True)
     ws_thread.start()
 
-    print("[RUN] 监听行情中… 输入 stop / exit 可手动停止。")
+    # 行情订阅已在建立，此时再等待后台鉴权完成并校验凭证
+    try:
+        creds_check = _extract_api_creds(client)
+    except Exception as exc:
+        print(f"[ERR] ClobClient 初始化失败：{exc}")
+        creds_check = None
+    if not creds_check or not creds_check.get("key") or not creds_check.get("secret"):
+        print("[ERR] 无法获取完整 API 凭证，请检查配置后重试。")
+        stop_event.set()
+        return
+    print("[INIT] API 凭证已验证。")
+    run_journal.reconcile_orders(client, token_id)
+    if CANCEL_STALE_ORDERS:
+        _cancel_open_orders(client, token_id, "[LEASE]")
+
+    print("[RUN] 监听行情中… 输入 stop / exit 可手动停止（release 为交接：撤单后退出）。")
 
     start_wait = time.time()
     while not latest.get(token_id) and not stop_event.is_set():
@@ -2209,11 +2985,18 @@ def main():
         return
 
     def _input_listener():
+        nonlocal handover_requested
         while not stop_event.is_set():
             try:
                 cmd = input().strip().lower()
             except EOFError:
                 break
+            if cmd == "release":
+                print("[HANDOVER] 协调器收回本市场，撤单后退出…")
+                handover_requested = True
+                strategy.stop("lease released")
+                stop_event.set()
+                break
             if cmd in {"stop", "exit", "quit"}:
                 print("[CMD] 收到停止指令，准备退出…")
                 strategy.stop("manual stop")
@@ -2298,6 +3081,41 @@ def main():
     if initial_pos > 0:
         position_size = initial_pos
         last_order_size = initial_pos
+    restored_position = run_journal.restored_position()
+    if restored_position:
+        # 日志里的仓位可能早于崩溃后的成交：以实时持仓为准，只有实时查询失败时才用日志值
+        journal_size = _coerce_float(restored_position.get("position_size"))
+        live_size = _live_position_size(client, token_id)
+        if live_size is not None:
+            position_size = live_size if live_size > 0 else None
+            last_order_size = _coerce_float(restored_position.get("last_order_size")) if live_size > 0 else None
+            print(f"[RESUME] 以实时持仓为准：position_size={position_size}（日志记录 {journal_size}）")
+        else:
+            position_size = journal_size
+            last_order_size = _coerce_float(restored_position.get("last_order_size"))
+            print(f"[RESUME] 实时持仓查询失败，使用日志中的本地仓位：position_size={position_size} last_order_size={last_order_size}")
+    handover_state = _load_handover_state()
+    if position_size is None and (handover_state is not None or CANCEL_STALE_ORDERS):
+        # 交接不卖出：上一任持有者的库存留在账户里。先按实时持仓（查询失败时按交接报告）播种策略，
+        # 否则本进程以空仓起步，遗留仓位永远不会卖出，还可能在其上继续买入
+        seed_size = _live_position_size(client, token_id)
+        seed_origin = "positions"
+        if seed_size is None and handover_state is not None:
+            seed_size = _coerce_float(handover_state.get("position_size"))
+            seed_origin = "handover"
+        seed_px = _coerce_float(handover_state.get("entry_price")) if handover_state is not None else None
+        if seed_size is not None and seed_size > max(API_MIN_ORDER_SIZE or 0.0, 1e-4):
+            if seed_px is None:
+                seed_px, _total, _origin = _lookup_position_avg_price(client, token_id)
+            if seed_px is None:
+                print(f"[FATAL][LEASE] 接手仓位 {seed_size:.4f} 但无法获取持仓均价，停止脚本以避免错误卖出。")
+                strategy.stop("missing avg price for inherited position")
+                stop_event.set()
+            else:
+                strategy.on_buy_filled(seed_px, total_position=seed_size, size=0.0)
+                position_size = seed_size
+                last_order_size = seed_size
+                print(f"[LEASE] 接手上一任持有者的仓位 origin={seed_origin} size={seed_size:.4f} entry={seed_px:.4f}")
     max_position_cap: Optional[float] = None
     if manual_order_size is not None and manual_size_is_target:
         try:
@@ -2306,7 +3124,7 @@ def main():
             max_position_cap = None
     last_log: Optional[float] = None
     buy_cooldown_until: float = 0.0
-    pending_buy: Optional[Action] = None
+    pending_buy: Optional[SignalEntry] = None
     short_buy_cooldown = 1.0
     next_position_sync: float = 0.0
     position_sync_block_until: float = 0.0
@@ -2344,10 +3162,17 @@ def main():
             next_position_sync = max(next_position_sync, position_sync_block_until)
             return
         next_position_sync = now + POSITION_SYNC_INTERVAL
+        default_store().prune_closed(ORDER_STORE_RETENTION)
         try:
-            avg_px, total_pos, origin_note = _lookup_position_avg_price(client, token_id)
+            with POSITION_SYNC_SECONDS.time():
+                avg_px, total_pos, origin_note = _lookup_position_avg_price(client, token_id)
         except Exception as probe_exc:
-            print(f"[WATCHDOG][POSITION] {reason} 持仓查询异常：{probe_exc}")
+            LOG.warn(
+                "watchdog.position",
+                f"[WATCHDOG][POSITION] {reason} 持仓查询异常：{probe_exc}",
+                token=token_id,
+                reason=reason,
+            )
             return
 
         status_snapshot = strategy.status()
@@ -2398,8 +3223,14 @@ def main():
             dust_note = ""
             if total_pos is not None and total_pos < dust_floor - eps:
                 dust_note = f" (size={float(total_pos):.4f} < 最小挂单量 {dust_floor:.2f}，视为无持仓)"
-            print(
-                f"[WATCHDOG][POSITION] {reason} -> origin={origin_display} avg={avg_display} 当前无持仓{dust_note}"
+            LOG.info(
+                "watchdog.position",
+                f"[WATCHDOG][POSITION] {reason} -> origin={origin_display} avg={avg_display} 当前无持仓{dust_note}",
+                token=token_id,
+                reason=reason,
+                origin=origin_display,
+                avg_price=avg_px,
+                size=0.0,
             )
             latest_bid = _latest_best_bid()
             fallback_px = latest_bid if latest_bid is not None else 0.0
@@ -2408,8 +3239,14 @@ def main():
                 f"[STATE] 同步策略为空仓 (fallback_px={fallback_px:.4f})"
             )
         else:
-            print(
-                f"[WATCHDOG][POSITION] {reason} -> origin={origin_display} avg={avg_display} size={new_size:.4f}"
+            LOG.info(
+                "watchdog.position",
+                f"[WATCHDOG][POSITION] {reason} -> origin={origin_display} avg={avg_display} size={new_size:.4f}",
+                token=token_id,
+                reason=reason,
+                origin=origin_display,
+                avg_price=avg_px,
+                size=new_size,
             )
             latest_bid = _latest_best_bid()
             latest_ask = _latest_best_ask()
@@ -2428,7 +3265,12 @@ def main():
                     print("[STATE] 同步远端持仓后，标记等待卖出以避免误入买入分支。")
                     _execute_sell(position_size, floor_hint=fallback_px, source="[POSITION][SYNC]")
             except Exception as exc:
-                print(f"[WATCHDOG][POSITION] 自动卖出旧仓位失败：{exc}")
+                LOG.error(
+                    "watchdog.position",
+                    f"[WATCHDOG][POSITION] 自动卖出旧仓位失败：{exc}",
+                    token=token_id,
+                    size=position_size,
+                )
 
     def _activate_sell_only(reason: str) -> None:
         nonlocal exit_after_sell_only_clear
@@ -2449,66 +3291,86 @@ def main():
             strategy.stop("countdown sell-only window (flat)")
             stop_event.set()
 
-    def _countdown_monitor():
+    def _warn_sell_only_soon() -> None:
+        if stop_event.is_set() or sell_only_event.is_set() or not sell_only_start_ts:
+            return
+        until_sell_only = max(sell_only_start_ts - time.time(), 0)
+        mins = int(until_sell_only // 60)
+        secs = int(until_sell_only % 60)
+        LOG.info(
+            "countdown.sell_only",
+            "[COUNTDOWN] 距离仅卖出模式开启还剩 "
+            f"{mins:02d}:{secs:02d}。",
+            token=token_id,
+            seconds_left=until_sell_only,
+        )
+
+    def _countdown_tick(state: Dict[str, Any]) -> None:
+        # 定时轮线程内每秒调用一次（仅最后 5 分钟），只做时间比较与日志
+        if stop_event.is_set():
+            state["handle"].cancel()
+            return
         if not market_deadline_ts:
             return
-        last_display: Optional[int] = None
-        sell_only_warn_logged = False
-        while not stop_event.is_set():
-            now = time.time()
-            if sell_only_start_ts and not sell_only_event.is_set():
-                until_sell_only = sell_only_start_ts - now
-                if until_sell_only <= 0:
-                    _activate_sell_only("countdown window")
-                elif until_sell_only <= 300 and not sell_only_warn_logged:
-                    mins = int(max(until_sell_only, 0) // 60)
-                    secs = int(max(until_sell_only, 0) % 60)
-                    print(
-                        "[COUNTDOWN] 距离仅卖出模式开启还剩 "
-                        f"{mins:02d}:{secs:02d}。"
-                    )
-                    sell_only_warn_logged = True
-            remaining = market_deadline_ts - now
-            if remaining <= 0:
-                if last_display != 0:
-                    print("[COUNTDOWN] 距离市场结束还剩 00:00")
-                print("[COUNTDOWN] 倒计时结束，开始确认市场状态…")
-                _confirm_market_closed()
-                return
-            if remaining <= 300:
-                secs_left = int(remaining)
-                if secs_left != last_display:
-                    mm = secs_left // 60
-                    ss = secs_left % 60
-                    print(
-                        f"[COUNTDOWN] 距离市场结束还剩 {mm:02d}:{ss:02d}"
-                    )
-                    last_display = secs_left
-                for _ in range(5):
-                    if stop_event.is_set():
-                        return
-                    time.sleep(0.2)
-            else:
-                wait = min(remaining - 300, 60)
-                if wait <= 0:
-                    wait = 1
-                deadline = time.time() + wait
-                while time.time() < deadline:
-                    if stop_event.is_set():
-                        return
-                    time.sleep(0.2)
+        remaining = market_deadline_ts - time.time()
+        if remaining > 301:
+            # 截止时间被刷新推后：取消当前节拍，按新时间重新排程
+            state["handle"].cancel()
+            _schedule_deadline_countdown()
+            return
+        if remaining <= 0:
+            state["handle"].cancel()
+            if state.get("last_display") != 0:
+                print("[COUNTDOWN] 距离市场结束还剩 00:00")
+            print("[COUNTDOWN] 倒计时结束，开始确认市场状态…")
+            countdown_timers.append(timer_wheel.call_later(0, _confirm_market_closed, blocking=True))
+            return
+        secs_left = int(remaining)
+        if secs_left != state.get("last_display"):
+            mm = secs_left // 60
+            ss = secs_left % 60
+            LOG.info(
+                "countdown.deadline",
+                f"[COUNTDOWN] 距离市场结束还剩 {mm:02d}:{ss:02d}",
+                token=token_id,
+                seconds_left=secs_left,
+            )
+            state["last_display"] = secs_left
+
+    def _schedule_deadline_countdown() -> None:
+        if not market_deadline_ts:
+            return
+        state: Dict[str, Any] = {}
+        start_in = max(market_deadline_ts - 300 - time.time(), 0.0)
+        state["handle"] = timer_wheel.call_later(start_in, _countdown_tick, state, interval=1.0)
+        countdown_timers.append(state["handle"])
+
+    # 倒计时与市场结束确认统一注册到进程级定时轮（单线程、O(1) 插入/取消），不再每个市场各开线程轮询
+    timer_wheel = default_wheel()
+    countdown_timers: List[TimerHandle] = []
 
     if sell_only_start_ts and time.time() >= sell_only_start_ts:
         _activate_sell_only("countdown window")
 
     if market_deadline_ts:
-        threading.Thread(target=_countdown_monitor, daemon=True).start()
+        if sell_only_start_ts and not sell_only_event.is_set():
+            until_sell_only = sell_only_start_ts - time.time()
+            countdown_timers.append(
+                timer_wheel.call_later(max(until_sell_only - 300, 0.0), _warn_sell_only_soon)
+            )
+            countdown_timers.append(
+                timer_wheel.call_later(
+                    until_sell_only, _activate_sell_only, "countdown window", blocking=True
+                )
+            )
+        _schedule_deadline_countdown()
 
     def _execute_sell(
         order_qty: Optional[float],
         *,
         floor_hint: Optional[float],
         source: str,
+        signal_emitted_at: Optional[float] = None,
     ) -> None:
         nonlocal position_size, last_order_size, position_sync_block_until, next_position_sync, next_loop_after
 
@@ -2564,17 +3426,29 @@ def main():
             return
 
         def _sell_progress_probe() -> None:
+            _log_order_store_summary(token_id, "SELL")
             snapshot = _fetch_position_snapshot(log_errors=True, force=True)
             if snapshot is None:
                 return
             avg_px, total_pos, origin_note = snapshot
             origin_display = origin_note or "positions"
             if total_pos is None or total_pos <= 0:
-                print(f"[WATCHDOG][SELL] 持仓检查 -> origin={origin_display} 当前无持仓")
+                LOG.info(
+                    "watchdog.sell.position",
+                    f"[WATCHDOG][SELL] 持仓检查 -> origin={origin_display} 当前无持仓",
+                    token=token_id,
+                    origin=origin_display,
+                    size=0.0,
+                )
                 return
             avg_display = f"{avg_px:.4f}" if avg_px is not None else "-"
-            print(
-                f"[WATCHDOG][SELL] 持仓检查 -> origin={origin_display} avg={avg_display} size={total_pos:.4f}"
+            LOG.info(
+                "watchdog.sell.position",
+                f"[WATCHDOG][SELL] 持仓检查 -> origin={origin_display} avg={avg_display} size={total_pos:.4f}",
+                token=token_id,
+                origin=origin_display,
+                avg_price=avg_px,
+                size=total_pos,
             )
 
         def _position_size_fetcher() -> Optional[float]:
@@ -2584,6 +3458,7 @@ def main():
             _avg_px, total_pos, _origin = snapshot
             return total_pos
 
+        stop_ack_watch = _watch_first_ack(token_id, "SELL", signal_emitted_at)
         try:
             sell_resp = maker_sell_follow_ask_with_floor_wait(
                 client=client,
@@ -2604,6 +3479,8 @@ def main():
             print(f"[ERR] {source} 卖出挂单异常：{exc}")
             strategy.on_reject(str(exc))
             return
+        finally:
+            stop_ack_watch()
 
         print(f"[TRADE][SELL][MAKER] resp={sell_resp}")
         sell_status = str(sell_resp.get("status") or "").upper()
@@ -2747,7 +3624,10 @@ def main():
                             pending_buy = None
                         else:
                             print("[COOLDOWN] 冷却结束，重新尝试买入…")
-                            action_queue.put(pending_buy)
+                            # 保留原始创建时间：期间若有更新的信号则以新信号为准，过期则作废
+                            signal_slot.put(
+                                token_id, pending_buy.signal, created_at=pending_buy.created_at
+                            )
                             pending_buy = None
 
                 if now >= next_position_sync:
@@ -2813,10 +3693,12 @@ def main():
                         print(line)
                     last_log = now
 
-                try:
-                    action = action_queue.get(timeout=0.5)
-                except Empty:
-                    action = None
+                signal_entry = signal_slot.take(timeout=0.5)
+                action = signal_entry.signal if signal_entry is not None else None
+                if action is not None and action.extra.get("trace_id"):
+                    # 本轮后续的持仓校对、签名、下单与撤单 span 都归到该信号的 trace
+                    TRACER.set_current(action.extra["trace_id"])
+                    TRACER.record("signal.queue", action.extra.get("emitted_at") or time.perf_counter())
 
                 if stop_event.is_set():
                     break
@@ -2842,7 +3724,12 @@ def main():
     
                 if action.action == ActionType.SELL:
                     floor_override = action.target_price
-                    _execute_sell(position_size, floor_hint=floor_override, source="[SIGNAL]")
+                    _execute_sell(
+                        position_size,
+                        floor_hint=floor_override,
+                        source="[SIGNAL]",
+                        signal_emitted_at=action.extra.get("emitted_at"),
+                    )
                     continue
     
                 if action.action != ActionType.BUY:
@@ -2880,7 +3767,7 @@ def main():
                     print(
                         f"[BUY][BLOCK] 检测到可卖出仓位 {actionable_position:.4f}，先清仓后再尝试买入。"
                     )
-                    pending_buy = action
+                    pending_buy = signal_entry
                     buy_cooldown_until = time.time() + short_buy_cooldown
                     _execute_sell(actionable_position, floor_hint=None, source="[BUY][BLOCK]")
                     continue
@@ -2949,7 +3836,7 @@ def main():
                     print(
                         f"[COOLDOWN] 买入冷却中，剩余 {remaining:.1f}s 再尝试买入。"
                     )
-                    pending_buy = action
+                    pending_buy = signal_entry
                     continue
     
                 if max_position_cap is not None:
@@ -3015,18 +3902,34 @@ def main():
                     print(f"[HINT] 未指定份数，按 $1 反推 -> size={order_size}")
     
                 def _buy_progress_probe() -> None:
+                    _log_order_store_summary(token_id, "BUY")
                     try:
                         avg_px, total_pos, origin_note = _lookup_position_avg_price(client, token_id)
                     except Exception as probe_exc:
-                        print(f"[WATCHDOG][BUY] 持仓查询异常：{probe_exc}")
+                        LOG.warn(
+                            "watchdog.buy.position",
+                            f"[WATCHDOG][BUY] 持仓查询异常：{probe_exc}",
+                            token=token_id,
+                        )
                         return
                     origin_display = origin_note or "positions"
                     if total_pos is None or total_pos <= 0:
-                        print(f"[WATCHDOG][BUY] 持仓检查 -> origin={origin_display} 当前无持仓")
+                        LOG.info(
+                            "watchdog.buy.position",
+                            f"[WATCHDOG][BUY] 持仓检查 -> origin={origin_display} 当前无持仓",
+                            token=token_id,
+                            origin=origin_display,
+                            size=0.0,
+                        )
                         return
                     avg_display = f"{avg_px:.4f}" if avg_px is not None else "-"
-                    print(
-                        f"[WATCHDOG][BUY] 持仓检查 -> origin={origin_display} avg={avg_display} size={total_pos:.4f}"
+                    LOG.info(
+                        "watchdog.buy.position",
+                        f"[WATCHDOG][BUY] 持仓检查 -> origin={origin_display} avg={avg_display} size={total_pos:.4f}",
+                        token=token_id,
+                        origin=origin_display,
+                        avg_price=avg_px,
+                        size=total_pos,
                     )
     
                 baseline_position = float(position_size or 0.0)
@@ -3035,7 +3938,11 @@ def main():
                     try:
                         _, latest_pos, _ = _lookup_position_avg_price(client, token_id)
                     except Exception as probe_exc:
-                        print(f"[WATCHDOG][BUY] 持仓校对异常：{probe_exc}")
+                        LOG.warn(
+                            "watchdog.buy.position",
+                            f"[WATCHDOG][BUY] 持仓校对异常：{probe_exc}",
+                            token=token_id,
+                        )
                         return None
                     if latest_pos is None:
                         return None
@@ -3043,6 +3950,9 @@ def main():
     
                 if awaiting_buy_passthrough:
                     awaiting_buy_passthrough = False
+                stop_ack_watch = _watch_first_ack(
+                    token_id, "BUY", action.extra.get("emitted_at")
+                )
                 try:
                     buy_resp = maker_buy_follow_bid(
                         client=client,
@@ -3062,6 +3972,8 @@ def main():
                     strategy.on_reject(str(exc))
                     buy_cooldown_until = time.time() + short_buy_cooldown
                     continue
+                finally:
+                    stop_ack_watch()
                 print(f"[TRADE][BUY][MAKER] resp={buy_resp}")
                 buy_status = str(buy_resp.get("status") or "").upper()
                 filled_amt = float(buy_resp.get("filled") or 0.0)
@@ -3111,9 +4023,15 @@ def main():
                             ):
                                 success_samples.append((actual_avg_price, actual_total_position))
                                 origin_display = origin_note or "positions"
-                                print(
+                                LOG.info(
+                                    "trace.position_avg",
                                     f"[TRACE] 持仓均价查询结果（第{attempt + 1}次/本轮）"
-                                    f" origin={origin_display} avg={actual_avg_price:.6f} size={actual_total_position:.6f}"
+                                    f" origin={origin_display} avg={actual_avg_price:.6f} size={actual_total_position:.6f}",
+                                    token=token_id,
+                                    attempt=attempt + 1,
+                                    origin=origin_display,
+                                    avg_price=actual_avg_price,
+                                    size=actual_total_position,
                                 )
                                 if (
                                     last_avg is not None
@@ -3219,6 +4137,8 @@ def main():
 
             finally:
                 next_loop_after = loop_started + min_loop_interval
+                run_journal.record_position(position_size, last_order_size)
+                TRACER.set_current(0)
 
     except KeyboardInterrupt:
         print("[CMD] 捕获到 Ctrl+C，准备退出…")
@@ -3227,15 +4147,43 @@ def main():
 
     finally:
         stop_event.set()
+        for handle in countdown_timers:
+            handle.cancel()
+        tick_buffer.close()
+        if tick_ring is not None:
+            tick_ring.close()
         final_status = strategy.status()
         print(f"[EXIT] 最终状态: {final_status}")
+        if TRACER.enabled:
+            trace_path = TRACER.export_chrome()
+            print(f"[TRACE] 已导出 Chrome trace：{trace_path}")
+            for line in TRACER.format_summary():
+                print(f"[TRACE] {line}")
+        signal_stats = signal_slot.stats()
+        print(
+            f"[EXIT] 信号统计：被新信号覆盖 {signal_stats['superseded']} 条，"
+            f"过期作废 {signal_stats['expired']} 条（有效期 {SIGNAL_MAX_AGE:.1f}s）"
+        )
         try:
-            if _should_attempt_claim(market_meta, final_status, market_closed_detected):
-                _attempt_claim(client, market_meta, token_id)
+            if handover_requested:
+                # 交接时不 claim：仓位随市场一起交给新持有者
+                _cancel_open_orders(client, token_id, "[HANDOVER]", bulk=False)
+                handover_size = max(position_size or 0.0, _extract_position_size(final_status))
+                _write_handover_state(token_id, handover_size, _coerce_float(final_status.get("entry_price")))
+                print(f"[HANDOVER] 移交仓位 size={handover_size:.4f} entry={final_status.get('entry_price')}")
+            elif _should_attempt_claim(market_meta, final_status, market_closed_detected):
+                if claim_worker is not None and _claim_key(market_meta):
+                    claim_worker.notify(_claim_key(market_meta), [token_id])
+                else:
+                    _attempt_claim(client, market_meta, token_id)
             else:
                 print("[CLAIM] 未检测到需要 claim 的仓位，脚本结束。")
         except Exception as claim_exc:
             print(f"[CLAIM] 自动 claim 过程出现异常: {claim_exc}")
+        if claim_worker is not None:
+            # 退出前把已排队的 claim 做完（不再发起新的持仓扫描）
+            if not claim_worker.stop(drain=True, timeout=AUTO_CLAIM_DRAIN_SEC):
+                print(f"[CLAIM] 后台 claim 在 {AUTO_CLAIM_DRAIN_SEC:.0f}s 内未完成，剩余市场请运行 Volatility_arbitrage_claim.py 处理。")
 
 
 if __name__ == "__main__":
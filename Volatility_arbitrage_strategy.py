@@ -8,10 +8,12 @@
 
 from __future__ import annotations
 from collections import deque
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field, fields
 from enum import Enum
 import time
-from typing import Optional, Dict, Any, Deque, Tuple
+from typing import Optional, Dict, Any, Callable, Deque, List, Sequence, Tuple
+
+from trading.ticks import ROUND_DOWN, ROUND_UP, TickGrid
 
 
 class ActionType(str, Enum):
@@ -50,6 +52,9 @@ class StrategyConfig:
     # 交易所最小市场单规模（用于识别“尘埃仓位”并视为已清空）
     min_market_order_size: Optional[float] = None
 
+    # 市场最小价格变动（如 0.01 / 0.001）；设置后买卖触发按整数 tick 比较，避免 0.4*1.1 这类浮点误差漏触发
+    price_tick: Optional[float] = None
+
 
 @dataclass
 class Action:
@@ -119,15 +124,33 @@ class VolArbStrategy:
             getattr(self.cfg, "min_market_order_size", None)
         )
 
+        # 状态变更监听（如崩溃恢复日志）：fn(event, snapshot_state())
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+
+        # 价格网格（None 时按浮点比较）
+        self._price_grid: Optional[TickGrid] = None
+        self.set_price_tick(self.cfg.price_tick)
+
+    def set_price_tick(self, tick: Optional[float]) -> None:
+        """设置市场价格网格；市场精度刷新时由上游调用。tick 须为 10 的负整数次幂。"""
+        self._price_grid = TickGrid.for_tick_size(tick) if tick else None
+        self.cfg.price_tick = tick
+
     # ------------------------ 上游主调用：每笔行情快照 ------------------------
     def on_tick(
         self,
         best_ask: float,
         best_bid: float,
         ts: Optional[float] = None,
+        *,
+        mid_low: Optional[float] = None,
+        mid_high: Optional[float] = None,
     ) -> Optional[Action]:
         """
         上游每次行情推送调用。返回 Action（BUY/SELL）或 None（无动作）。
+
+        mid_low / mid_high：上游合并（conflation）多笔行情时，被合并区间内中间价的
+        最低/最高值；会一并计入跌幅窗口，避免被跳过的高点/低点从窗口中丢失。
         """
         if ts is None:
             ts = time.time()
@@ -142,7 +165,9 @@ class VolArbStrategy:
         self._last_best_ask = best_ask
         self._last_best_bid = best_bid
 
-        price_for_drop = self._prepare_price_history(ts, (best_bid + best_ask) / 2)
+        price_for_drop = self._prepare_price_history(
+            ts, (best_bid + best_ask) / 2, extremes=(mid_high, mid_low)
+        )
 
         if self._manual_stop:
             return None
@@ -171,10 +196,15 @@ class VolArbStrategy:
             drop_ratio = (window_high - drop_price) / window_high
             drop_trigger = drop_ratio >= self.cfg.drop_pct
 
-        threshold_trigger = (
-            self.cfg.buy_price_threshold is not None
-            and best_bid <= self.cfg.buy_price_threshold
-        )
+        threshold = self.cfg.buy_price_threshold
+        grid = self._price_grid
+        if threshold is None:
+            threshold_trigger = False
+        elif grid is not None:
+            # 阈值不在网格上时向下取整：best_bid ≤ 阈值 ⇔ bid 的 tick 数 ≤ floor(阈值)
+            threshold_trigger = grid.to_units(best_bid) <= grid.to_units(threshold, ROUND_DOWN)
+        else:
+            threshold_trigger = best_bid <= threshold
 
         if not drop_trigger and not threshold_trigger:
             return None
@@ -214,6 +244,7 @@ class VolArbStrategy:
         )
         self._last_signal = ActionType.BUY
         self._awaiting = ActionType.BUY  # 必须等待上游 on_buy_filled() 确认
+        self._notify("signal_buy")
         return act
 
     def _maybe_sell(self, best_bid: float, ts: Optional[float]) -> Optional[Action]:
@@ -232,7 +263,13 @@ class VolArbStrategy:
         if self._entry_price > 0:
             gain_ratio = (best_bid - self._entry_price) / self._entry_price
 
-        if best_bid >= target:
+        grid = self._price_grid
+        if grid is not None:
+            # 目标价向上取整到网格：best_bid ≥ 目标 ⇔ bid 的 tick 数 ≥ ceil(目标)
+            hit = grid.to_units(best_bid) >= grid.to_units(target, ROUND_UP)
+        else:
+            hit = best_bid >= target
+        if hit:
             reason = (
                 f"best_bid({best_bid:.5f}) ≥ target({target:.5f}) = entry({self._entry_price:.5f}) * (1+{profit_pct:.4f})"
             )
@@ -250,10 +287,16 @@ class VolArbStrategy:
             )
             self._last_signal = ActionType.SELL
             self._awaiting = ActionType.SELL  # 必须等待上游 on_sell_filled() 确认
+            self._notify("signal_sell")
             return act
         return None
 
-    def _prepare_price_history(self, ts: float, price: float) -> float:
+    def _prepare_price_history(
+        self, ts: float, price: float, extremes: Tuple[Optional[float], ...] = ()
+    ) -> float:
+        for px in extremes:
+            if px is not None and px > 0 and px != price:
+                self._price_history.append((ts, px))
         self._price_history.append((ts, price))
         self._trim_history(ts)
         return price
@@ -292,7 +335,9 @@ class VolArbStrategy:
             self._reset_drop_metrics()
             return
 
-        current_price = self._price_history[-1][1]
+        self._set_drop_metrics(high_price, low_price, self._price_history[-1][1])
+
+    def _set_drop_metrics(self, high_price: float, low_price: Optional[float], current_price: Optional[float]) -> None:
         if high_price > 0:
             max_drop = (
                 (high_price - low_price) / high_price
@@ -313,6 +358,56 @@ class VolArbStrategy:
         self._max_drop_ratio = max_drop
         self._current_drop_ratio = current_drop
 
+    # ------------------------ 价格窗口预热 ------------------------
+    def warm_start(
+        self,
+        timestamps: Sequence[float],
+        mids: Sequence[float],
+        now: Optional[float] = None,
+    ) -> int:
+        """
+        重启后一次性批量灌入历史 (ts, mid)，使跌幅窗口立即可用。
+        - 只保留 [now - 窗口, now] 内、早于现有首个 tick 的点（不覆盖已收到的实时行情）；
+        - 整批线性处理后一次性计算窗口最高/最低价，不逐点走 on_tick/_trim_history；
+        - 返回实际载入的点数。
+        """
+        if now is None:
+            now = time.time()
+        window_start = now - self._history_window_seconds
+        cutoff = self._price_history[0][0] if self._price_history else now
+        min_px = self.cfg.min_price
+        max_px = self.cfg.max_price
+
+        points = sorted(zip(timestamps, mids))
+        loaded: List[Tuple[float, float]] = []
+        for ts, px in points:
+            if ts < window_start or ts > cutoff or px != px or px <= 0:
+                continue
+            if (min_px is not None and px < min_px) or (max_px is not None and px > max_px):
+                continue
+            if loaded and ts == loaded[-1][0]:
+                loaded[-1] = (ts, px)
+                continue
+            loaded.append((ts, px))
+        if not loaded:
+            return 0
+
+        live = list(self._price_history)
+        merged = loaded + live
+        keep = self.cfg.max_history_points
+        if keep and len(merged) > keep:
+            merged = merged[-keep:]
+        high_price: Optional[float] = None
+        low_price: Optional[float] = None
+        for _, px in merged:
+            if high_price is None or px > high_price:
+                high_price = px
+            if low_price is None or px < low_price:
+                low_price = px
+        self._price_history = deque(merged)
+        self._set_drop_metrics(high_price, low_price, merged[-1][1])
+        return max(len(merged) - len(live), 0)
+
     # ------------------------ 上游回调：成交/被拒 ------------------------
     def on_buy_filled(
         self,
@@ -387,6 +482,7 @@ class VolArbStrategy:
         self._state = "LONG"
         self._awaiting = None
         self._last_reject_reason = None
+        self._notify("buy_filled")
 
     def on_sell_filled(
         self,
@@ -452,11 +548,13 @@ class VolArbStrategy:
             self._maybe_increment_drop_pct()
 
         self._last_reject_reason = None
+        self._notify("sell_filled")
 
     def on_reject(self, reason: Optional[str] = None) -> None:
         """上游在下单失败/被拒绝时回调，解除“待确认”以便重新发信号。"""
         self._awaiting = None
         self._last_reject_reason = reason
+        self._notify("reject")
 
     def sync_position(
         self, total_position: Optional[float], *, ref_price: Optional[float] = None
@@ -488,6 +586,7 @@ class VolArbStrategy:
             self._entry_price = None
             self._last_reject_reason = None
             self._maybe_increment_drop_pct()
+            self._notify("position_sync")
             return
 
         # 链上存在可交易持仓：保持 SELL 阻塞，防止重复买入
@@ -500,32 +599,38 @@ class VolArbStrategy:
             if self._last_buy_price is not None:
                 self._entry_price = self._last_buy_price
         self._last_reject_reason = None
+        self._notify("position_sync")
 
     def mark_awaiting(self, action: Optional[ActionType]) -> None:
         """显式设置等待状态（用于外部状态同步时标记 SELL 等流程）。"""
 
         self._awaiting = action
+        self._notify("mark_awaiting")
 
     def stop(self, reason: Optional[str] = None) -> None:
         """手动暂停策略或在市场关闭时调用。"""
         self._manual_stop = True
         self._manual_stop_reason = reason
         self._awaiting = None
+        self._notify("stop")
 
     def resume(self) -> None:
         """恢复策略运行。"""
         self._manual_stop = False
         self._manual_stop_reason = None
+        self._notify("resume")
 
     def enable_sell_only(self, reason: Optional[str] = None) -> None:
         """仅允许卖出，不再触发买入信号。"""
         self._sell_only = True
         self._sell_only_reason = reason
+        self._notify("sell_only")
 
     def disable_sell_only(self) -> None:
         """恢复买入能力。"""
         self._sell_only = False
         self._sell_only_reason = None
+        self._notify("sell_only_off")
 
     # ------------------------ 实用方法 ------------------------
     def update_params(
@@ -573,6 +678,7 @@ class VolArbStrategy:
             self._min_market_order_size = self._normalize_min_market_order_size(
                 min_market_order_size
             )
+        self._notify("update_params")
 
     def sell_trigger_price(self) -> Optional[float]:
         if self._entry_price is None:
@@ -625,6 +731,67 @@ class VolArbStrategy:
             },
         }
 
+    # ------------------------ 持久化 / 恢复 ------------------------
+    _PERSISTED_FIELDS = (
+        "_state",
+        "_entry_price",
+        "_position_size",
+        "_last_buy_price",
+        "_last_sell_price",
+        "_manual_stop",
+        "_manual_stop_reason",
+        "_last_reject_reason",
+        "_sell_only",
+        "_sell_only_reason",
+        "_initial_drop_pct",
+        "_min_market_order_size",
+    )
+
+    def snapshot_state(self) -> Dict[str, Any]:
+        """导出可 JSON 序列化的完整状态（不含价格历史），用于崩溃恢复。"""
+        state: Dict[str, Any] = {name.lstrip("_"): getattr(self, name) for name in self._PERSISTED_FIELDS}
+        state["awaiting"] = self._awaiting.value if self._awaiting is not None else None
+        state["last_signal"] = self._last_signal.value if self._last_signal is not None else None
+        state["config"] = asdict(self.cfg)
+        return state
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """按 snapshot_state() 的输出恢复状态；配置中的动态字段（如递增后的 drop_pct）一并恢复。"""
+        config = state.get("config") or {}
+        for cfg_field in fields(self.cfg):
+            if cfg_field.name in config and cfg_field.name != "token_id":
+                setattr(self.cfg, cfg_field.name, config[cfg_field.name])
+        self._history_window_seconds = self.cfg.drop_window_minutes * 60.0
+        self.set_price_tick(self.cfg.price_tick)
+        for name in self._PERSISTED_FIELDS:
+            key = name.lstrip("_")
+            if key in state:
+                setattr(self, name, state[key])
+        awaiting = state.get("awaiting")
+        self._awaiting = ActionType(awaiting) if awaiting else None
+        last_signal = state.get("last_signal")
+        self._last_signal = ActionType(last_signal) if last_signal else None
+
+    def add_listener(self, listener: Callable[[str, Dict[str, Any]], None]) -> Callable[[], None]:
+        """注册状态变更回调，返回取消注册函数。回调异常不会影响策略本身。"""
+        self._listeners.append(listener)
+
+        def _remove() -> None:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return _remove
+
+    def _notify(self, event: str) -> None:
+        if not self._listeners:
+            return
+        snapshot = self.snapshot_state()
+        for listener in list(self._listeners):
+            try:
+                listener(event, snapshot)
+            except Exception:
+                pass
+
     # ------------------------ 内部辅助 ------------------------
     def _maybe_increment_drop_pct(self) -> None:
         if not getattr(self.cfg, "enable_incremental_drop_pct", False):
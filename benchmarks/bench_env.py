@@ -0,0 +1,50 @@
+"""Machine description stored next to benchmark results.
+
+Results are only comparable between runs on the same CPU and Python build;
+every ``--json`` writer in this directory records :func:`machine_info` so a
+comparison can warn when they differ.
+"""
+
+from __future__ import annotations
+
+import os
+import platform
+import subprocess
+from pathlib import Path
+from typing import Any, Dict
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def machine_info() -> Dict[str, Any]:
+    info: Dict[str, Any] = {
+        "hostname": platform.node(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor() or None,
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "python_build": " ".join(platform.python_build()),
+        "compiler": platform.python_compiler(),
+    }
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as fh:
+            for line in fh:
+                if line.startswith("model name"):
+                    info["cpu_model"] = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    try:
+        info["git_commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+        info["git_dirty"] = bool(
+            subprocess.run(
+                ["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True, timeout=5
+            ).stdout.strip()
+        )
+    except (OSError, subprocess.SubprocessError):
+        info["git_commit"] = None
+    return info
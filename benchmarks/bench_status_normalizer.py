@@ -0,0 +1,86 @@
+"""Micro-benchmark: generic status walk vs. schema-memoised normaliser.
+
+Usage::
+
+    python benchmarks/bench_status_normalizer.py [--iterations 200000]
+
+Each payload shape mirrors a response seen from a CLOB client: a flat
+``get_order`` dict, an envelope (``{"data": {"order": {...}}}``), a list
+wrapper and a payload carrying ``fills``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from trading.status_normalizer import StatusNormalizer, normalize_status_full  # noqa: E402
+
+
+def _payloads():
+    flat = {
+        "id": "0xabc",
+        "status": "LIVE",
+        "owner": "owner",
+        "maker_address": "0xmaker",
+        "market": "0xmarket",
+        "asset_id": "123",
+        "side": "BUY",
+        "original_size": "10",
+        "size_matched": "0",
+        "price": "0.45",
+        "outcome": "Yes",
+        "created_at": 1700000000,
+        "expiration": "0",
+        "order_type": "GTC",
+        "associate_trades": None,
+    }
+    envelope = {"success": True, "data": {"order": dict(flat, status="MATCHED")}}
+    wrapped = [{"orderStatus": "OPEN", "filledAmount": "2.5", "avgPrice": "0.51"}]
+    with_fills = {
+        "result": {
+            "state": "PARTIAL",
+            "fills": [
+                {"size": "1.0", "price": "0.50"},
+                {"size": "2.0", "price": "0.52"},
+            ],
+        }
+    }
+    return {
+        "flat": flat,
+        "envelope": envelope,
+        "list": wrapped,
+        "fills": with_fills,
+    }
+
+
+def _time(fn, payload, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(payload)
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    normalizer = StatusNormalizer()
+    print(f"{'shape':<10} {'full ns/op':>12} {'memo ns/op':>12} {'speedup':>8}")
+    for name, payload in _payloads().items():
+        expected = normalize_status_full(payload)
+        assert normalizer.normalize_status(payload) == expected
+        full_ns = _time(normalize_status_full, payload, args.iterations)
+        memo_ns = _time(normalizer.normalize_status, payload, args.iterations)
+        print(f"{name:<10} {full_ns:>12.0f} {memo_ns:>12.0f} {full_ns / memo_ns:>7.2f}x")
+    print(f"hits={normalizer.hits} misses={normalizer.misses}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
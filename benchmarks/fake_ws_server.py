@@ -0,0 +1,399 @@
+"""Minimal local stand-in for the Polymarket market-channel websocket.
+
+Only what ``ws_watch_by_ids`` needs is implemented: the RFC 6455 handshake,
+unfragmented text frames, the ``{"type": "market", "assets_ids": [...]}``
+subscription, ``PING`` -> ``PONG`` text heartbeats and ping/close control
+frames. After a client subscribes, ``initial_messages(asset_ids)`` is sent
+as one frame per message.
+
+With a :class:`LoadProfile` the server also acts as a load generator: every
+subscribed client gets a stream of ``price_change`` (and optionally ``book``)
+events at ``rate`` events/s across its assets, ``batch`` events per frame,
+sent in bursts of ``burst`` frames. Each event's ``timestamp`` is the send
+time in fractional epoch milliseconds so the receiver can measure latency.
+:meth:`FakeMarketWS.drop_clients` cuts every connection without a close
+frame, as a network failure would.
+
+Point the client at it with ``POLY_WS_BASE=ws://127.0.0.1:<port>`` (or
+``ws_watch_by_ids(..., ws_base=server.url)``)::
+
+    python benchmarks/fake_ws_server.py --port 8765 --rate 5000 --batch 10 --burst 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional
+
+_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+MessageFactory = Callable[[List[str]], Iterable[str]]
+
+
+def book_snapshot(asset_ids: List[str]) -> List[str]:
+    """One ``book`` event per asset, shaped like the live market channel."""
+
+    ts = str(int(time.time() * 1000))
+    events = [
+        {
+            "event_type": "book",
+            "asset_id": aid,
+            "market": "0xbench",
+            "bids": [{"price": "0.45", "size": "100"}],
+            "asks": [{"price": "0.55", "size": "100"}],
+            "timestamp": ts,
+        }
+        for aid in asset_ids
+    ]
+    return [json.dumps(events)]
+
+
+@dataclass
+class LoadProfile:
+    """Synthetic market-data stream sent to each subscribed client."""
+
+    rate: float = 1000.0  # events per second, per client
+    batch: int = 1  # events per frame; >1 sends a JSON list like the live channel
+    burst: int = 1  # frames sent back to back, bursts spaced to keep ``rate``
+    assets: int = 0  # stream only the first N subscribed ids (0 = all)
+    book_every: int = 0  # every Nth event is a ``book`` snapshot (0 = never)
+    changes: int = 1  # ``price_changes`` entries per event
+    duration: float = 0.0  # stop streaming after this many seconds (0 = until closed)
+
+
+class EventRenderer:
+    """Pre-rendered event templates; only prices and the timestamp vary."""
+
+    def __init__(self, asset_ids: List[str], profile: LoadProfile) -> None:
+        self.asset_ids = asset_ids or ["bench-asset"]
+        self.profile = profile
+        self.count = 0
+        self._change = (
+            '{"asset_id":"%s","price":"%.3f","size":"10","side":"BUY","hash":"0x%x",'
+            '"best_bid":"%.3f","best_ask":"%.3f"}'
+        )
+        self._book = (
+            '{"event_type":"book","asset_id":"%s","market":"0xbench","timestamp":"%.3f","hash":"0x%x",'
+            '"bids":[{"price":"%.3f","size":"100"},{"price":"%.3f","size":"250"}],'
+            '"asks":[{"price":"%.3f","size":"100"},{"price":"%.3f","size":"250"}]}'
+        )
+
+    def event(self, now_ms: float) -> str:
+        n = self.count
+        self.count += 1
+        ids = self.asset_ids
+        bid = 0.40 + (n % 97) / 1000.0
+        if self.profile.book_every and n % self.profile.book_every == 0:
+            return self._book % (ids[n % len(ids)], now_ms, n, bid, bid - 0.01, bid + 0.02, bid + 0.03)
+        changes = ",".join(
+            self._change % (ids[(n + k) % len(ids)], bid + 0.01, n, bid, bid + 0.02)
+            for k in range(self.profile.changes)
+        )
+        return '{"event_type":"price_change","market":"0xbench","price_changes":[%s],"timestamp":"%.3f"}' % (
+            changes,
+            now_ms,
+        )
+
+    def frame(self) -> str:
+        now_ms = time.time() * 1000.0
+        if self.profile.batch <= 1:
+            return self.event(now_ms)
+        return "[" + ",".join(self.event(now_ms) for _ in range(self.profile.batch)) + "]"
+
+
+def encode_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    header = bytearray([0x80 | opcode])
+    length = len(payload)
+    if length < 126:
+        header.append(length)
+    elif length < 1 << 16:
+        header.append(126)
+        header.extend(struct.pack("!H", length))
+    else:
+        header.append(127)
+        header.extend(struct.pack("!Q", length))
+    return bytes(header) + payload
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("client closed")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def read_frame(sock: socket.socket):
+    """Return ``(opcode, payload)`` for one (client-masked) frame."""
+
+    first, second = _recv_exact(sock, 2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", _recv_exact(sock, 2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", _recv_exact(sock, 8))
+    mask = _recv_exact(sock, 4) if second & 0x80 else b""
+    payload = _recv_exact(sock, length)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return opcode, payload
+
+
+class FakeMarketWS:
+    """Threaded websocket server speaking just enough of the market channel."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        initial_messages: MessageFactory = book_snapshot,
+        on_subscribe: Optional[Callable[["ClientConnection"], None]] = None,
+        load: Optional[LoadProfile] = None,
+    ) -> None:
+        self.host = host
+        self.initial_messages = initial_messages
+        self.on_subscribe = on_subscribe
+        self.load = load
+        self.subscriptions = 0
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self._sock.listen(64)
+        self.port = self._sock.getsockname()[1]
+        self._stop = threading.Event()
+        self._clients: List[ClientConnection] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    @property
+    def events_sent(self) -> int:
+        with self._lock:
+            return sum(c.events_sent for c in self._clients)
+
+    @property
+    def clients(self) -> List["ClientConnection"]:
+        with self._lock:
+            return [c for c in self._clients if not c.closed]
+
+    def start(self) -> "FakeMarketWS":
+        self._thread = threading.Thread(target=self._accept_loop, name="fake-ws", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+        for client in self.clients:
+            client.close()
+
+    def drop_clients(self) -> int:
+        """Cut every open connection without a close frame; return how many."""
+
+        dropped = 0
+        for client in self.clients:
+            client.drop()
+            dropped += 1
+        return dropped
+
+    def __enter__(self) -> "FakeMarketWS":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _accept_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                conn, _addr = self._sock.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client = ClientConnection(self, conn)
+            with self._lock:
+                self._clients.append(client)
+            threading.Thread(target=client.serve, name="fake-ws-client", daemon=True).start()
+
+
+class ClientConnection:
+    def __init__(self, server: FakeMarketWS, sock: socket.socket) -> None:
+        self.server = server
+        self.sock = sock
+        self.asset_ids: List[str] = []
+        self.subscribed = threading.Event()
+        self.closed = False
+        self.events_sent = 0
+        self._send_lock = threading.Lock()
+
+    def send_text(self, text: str) -> None:
+        self.send_raw(encode_frame(text.encode("utf-8")))
+
+    def send_raw(self, frame: bytes) -> None:
+        with self._send_lock:
+            self.sock.sendall(frame)
+
+    def drop(self) -> None:
+        self.closed = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+    def stream(self, profile: LoadProfile) -> None:
+        """Send the synthetic load until the connection closes."""
+
+        ids = self.asset_ids[: profile.assets] if profile.assets else self.asset_ids
+        renderer = EventRenderer(ids, profile)
+        burst_gap = max(profile.burst, 1) * max(profile.batch, 1) / max(profile.rate, 1e-9)
+        started = time.perf_counter()
+        next_burst = started
+        try:
+            while not self.closed and not self.server._stop.is_set():
+                now = time.perf_counter()
+                if profile.duration and now - started >= profile.duration:
+                    return
+                if next_burst > now:
+                    time.sleep(next_burst - now)
+                for _ in range(max(profile.burst, 1)):
+                    self.send_text(renderer.frame())
+                self.events_sent += max(profile.burst, 1) * max(profile.batch, 1)
+                # when behind (client backpressure), realign instead of replaying missed bursts
+                next_burst = max(next_burst + burst_gap, time.perf_counter() - burst_gap)
+        except OSError:
+            return
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.send_raw(encode_frame(b"", opcode=0x8))
+        except OSError:
+            pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+    def _handshake(self) -> None:
+        request = b""
+        while b"\r\n\r\n" not in request:
+            chunk = self.sock.recv(4096)
+            if not chunk:
+                raise ConnectionError("client closed during handshake")
+            request += chunk
+        key = ""
+        for line in request.decode("latin-1").split("\r\n"):
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "sec-websocket-key":
+                key = value.strip()
+        accept = base64.b64encode(hashlib.sha1((key + _GUID).encode()).digest()).decode()
+        self.sock.sendall(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+            ).encode()
+        )
+
+    def serve(self) -> None:
+        try:
+            self._handshake()
+            while not self.closed:
+                opcode, payload = read_frame(self.sock)
+                if opcode == 0x8:
+                    break
+                if opcode == 0x9:
+                    self.send_raw(encode_frame(payload, opcode=0xA))
+                    continue
+                if opcode != 0x1:
+                    continue
+                text = payload.decode("utf-8", "replace")
+                if text == "PING":
+                    self.send_text("PONG")
+                    continue
+                self._handle_text(text)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.close()
+
+    def _handle_text(self, text: str) -> None:
+        try:
+            msg = json.loads(text)
+        except ValueError:
+            return
+        if not isinstance(msg, dict) or "assets_ids" not in msg:
+            return
+        self.asset_ids = [str(a) for a in msg.get("assets_ids") or []]
+        for message in self.server.initial_messages(self.asset_ids):
+            self.send_text(message)
+        self.subscribed.set()
+        self.server.subscriptions += 1
+        if self.server.on_subscribe is not None:
+            self.server.on_subscribe(self)
+        if self.server.load is not None:
+            threading.Thread(target=self.stream, args=(self.server.load,), name="fake-ws-load", daemon=True).start()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=float, default=0.0, help="events/s per client (0 = snapshot only)")
+    parser.add_argument("--batch", type=int, default=1, help="events per frame")
+    parser.add_argument("--burst", type=int, default=1, help="frames per burst")
+    parser.add_argument("--assets", type=int, default=0, help="stream only the first N subscribed ids")
+    parser.add_argument("--book-every", type=int, default=0, help="every Nth event is a book snapshot")
+    parser.add_argument("--changes", type=int, default=1, help="price_changes entries per event")
+    args = parser.parse_args(argv)
+
+    load = None
+    if args.rate > 0:
+        load = LoadProfile(
+            rate=args.rate,
+            batch=args.batch,
+            burst=args.burst,
+            assets=args.assets,
+            book_every=args.book_every,
+            changes=args.changes,
+        )
+    server = FakeMarketWS(args.host, args.port, load=load).start()
+    print(f"fake market ws listening on {server.url}/ws/market (Ctrl+C to stop)")
+    if load is not None:
+        print(f"streaming {load}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
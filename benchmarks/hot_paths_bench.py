@@ -0,0 +1,332 @@
+"""Micro-benchmarks for the trading hot paths, run offline from fixtures.
+
+Usage::
+
+    python benchmarks/hot_paths_bench.py [--filter on_tick] [--repeat 5] [--min-time 0.2]
+                                         [--json results.json]
+                                         [--baseline previous.json] [--tolerance 0.15]
+
+Payloads come from ``fixtures/hot_paths.json`` (websocket frames, order
+responses, ``get_order`` / fill payloads, order books, a data-api position
+entry); nothing touches the network. Cases:
+
+* ``strategy.on_tick[N]`` -- ``VolArbStrategy.on_tick`` with an N-point
+  price window at steady state (one tick per second, no signal fired);
+* ``ws.on_event.*`` -- the runner's frame path (``_event_indicates_market_closed``
+  -> ``_parse_price_change`` -> conflation slot), plus each parser alone;
+* ``clob.normalize_status.*`` / ``clob.extract_order_id.*``;
+* ``maker.update_fill_totals.*`` / ``maker.extract_best_price.*``;
+* ``positions.fetch_500x3`` -- ``_fetch_positions_from_data_api`` paging
+  through three 500-entry pages served from memory (JSON decode included);
+* ``execution.slice_quantities[total]`` with ``config/trading.yaml``.
+
+Each case is auto-ranged to at least ``--min-time`` seconds per run and
+repeated; best and median ns/op are reported. ``--json`` writes the results
+together with machine info (CPU, Python build, git commit) so runs from
+different builds can be compared; ``--baseline`` compares against such a file
+and exits with status 1 when a case's best time regressed by more than
+``--tolerance``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+import types
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+import maker_execution  # noqa: E402
+import Volatility_arbitrage_run as runner  # noqa: E402
+from trading.conflation import TickConflator  # noqa: E402
+from bench_env import machine_info  # noqa: E402
+from trading.execution import ClobPolymarketAPI, ExecutionEngine, load_default_config  # noqa: E402
+from Volatility_arbitrage_strategy import StrategyConfig, VolArbStrategy  # noqa: E402
+
+FIXTURES_PATH = Path(__file__).resolve().parent / "fixtures" / "hot_paths.json"
+WINDOW_SIZES = (60, 600, 3600)
+
+Case = Tuple[str, Callable[[], Any]]
+
+
+def _load_fixtures() -> Dict[str, Any]:
+    with open(FIXTURES_PATH, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+# ---------------------------------------------------------------------------
+# Cases
+def _strategy_cases(fx: Dict[str, Any]) -> List[Case]:
+    cases: List[Case] = []
+    rng = random.Random(7)
+    mids: List[float] = []
+    mid = 0.5
+    for _ in range(4096):
+        mid = min(max(mid + rng.uniform(-0.002, 0.002), 0.45), 0.55)
+        mids.append(mid)
+    for points in WINDOW_SIZES:
+        strategy = VolArbStrategy(
+            StrategyConfig(
+                token_id=fx["token_id"],
+                drop_window_minutes=points / 60.0,
+                max_history_points=points,
+                drop_pct=0.99,  # 稳态：窗口满但不出信号
+            )
+        )
+        clock = {"ts": 1_757_900_000.0, "i": 0}
+        for _ in range(points + 1):
+            clock["ts"] += 1.0
+            strategy.on_tick(best_ask=0.51, best_bid=0.49, ts=clock["ts"])
+
+        def _tick(strategy=strategy, clock=clock) -> None:
+            clock["ts"] += 1.0
+            i = clock["i"] = (clock["i"] + 1) & 4095
+            m = mids[i]
+            strategy.on_tick(best_ask=m + 0.005, best_bid=m - 0.005, ts=clock["ts"])
+
+        cases.append((f"strategy.on_tick[{points}]", _tick))
+    return cases
+
+
+def _ws_cases(fx: Dict[str, Any]) -> List[Case]:
+    token_id = fx["token_id"]
+    frames = fx["ws_frames"]
+    conflator = TickConflator()
+    latest: Dict[str, Dict[str, Any]] = {}
+
+    def _on_event(ev: Dict[str, Any]) -> None:
+        # 与 _run_main._on_event 相同的解析路径（去掉日志与 stop_event 处理）
+        received_at = time.perf_counter()
+        if runner._event_indicates_market_closed(ev):
+            return
+        if ev.get("event_type") == "price_change" or "price_changes" in ev:
+            pcs = ev.get("price_changes", [])
+        else:
+            return
+        ts = runner._extract_ts(ev.get("timestamp") or ev.get("ts") or ev.get("time"))
+        for pc in pcs:
+            if str(pc.get("asset_id")) != str(token_id):
+                continue
+            bid, ask, last = runner._parse_price_change(pc)
+            latest[token_id] = {"price": last, "best_bid": bid, "best_ask": ask, "ts": ts}
+            conflator.offer(token_id, bid, ask, last, ts, received_at=received_at)
+            if runner._is_market_closed(pc):
+                break
+
+    cases: List[Case] = []
+    for name, frame in frames.items():
+        cases.append((f"ws.on_event.{name}", lambda frame=frame: _on_event(frame)))
+    for name, frame in frames.items():
+        cases.append(
+            (f"ws.event_indicates_market_closed.{name}", lambda frame=frame: runner._event_indicates_market_closed(frame))
+        )
+    pc = frames["price_change"]["price_changes"][0]
+    cases.append(("ws.parse_price_change", lambda: runner._parse_price_change(pc)))
+    return cases
+
+
+def _clob_cases(fx: Dict[str, Any]) -> List[Case]:
+    cases: List[Case] = []
+    for name, payload in fx["status_payloads"].items():
+        cases.append((f"clob.normalize_status.{name}", lambda p=payload: ClobPolymarketAPI._normalize_status(p)))
+    for name, payload in fx["order_responses"].items():
+        cases.append((f"clob.extract_order_id.{name}", lambda p=payload: ClobPolymarketAPI._extract_order_id(p)))
+    return cases
+
+
+def _maker_cases(fx: Dict[str, Any]) -> List[Case]:
+    cases: List[Case] = []
+    for name, payload in fx["fill_statuses"].items():
+        status_text = str(payload.get("status", ""))
+
+        def _fill(payload=payload, status_text=status_text) -> None:
+            maker_execution._update_fill_totals(
+                "0x8e3c",
+                payload,
+                {},
+                0.0,
+                0.45,
+                status_text=status_text,
+                expected_full_size=5.0,
+            )
+
+        cases.append((f"maker.update_fill_totals.{name}", _fill))
+    for name, payload in fx["books"].items():
+        cases.append((f"maker.extract_best_price.{name}", lambda p=payload: maker_execution._extract_best_price(p, "bid")))
+    return cases
+
+
+class _FixtureResponse:
+    status_code = 200
+
+    def __init__(self, body: bytes) -> None:
+        self._body = body
+
+    def raise_for_status(self) -> None:
+        return None
+
+    def json(self) -> Any:
+        return json.loads(self._body)
+
+
+@contextmanager
+def _offline_data_api(pages: List[bytes]) -> Iterator[None]:
+    """Serve data-api pages from memory and skip the per-host rate limiter."""
+
+    def _get(url: str, params: Optional[Dict[str, Any]] = None, timeout: float = 0.0) -> _FixtureResponse:
+        offset = int((params or {}).get("offset", 0))
+        limit = int((params or {}).get("limit", 500))
+        return _FixtureResponse(pages[min(offset // limit, len(pages) - 1)])
+
+    fixture_requests = types.SimpleNamespace(get=_get, RequestException=OSError)
+    saved = (runner.requests, runner._enforce_request_rate_limit)
+    runner.requests = fixture_requests
+    runner._enforce_request_rate_limit = lambda url="", cancel=None: True
+    try:
+        yield
+    finally:
+        runner.requests, runner._enforce_request_rate_limit = saved
+
+
+def _positions_cases(fx: Dict[str, Any]) -> List[Case]:
+    entry = fx["position_entry"]
+    page_count, page_size = 3, 500
+    total = page_count * page_size
+    pages = []
+    for page in range(page_count):
+        data = []
+        for i in range(page_size):
+            n = page * page_size + i
+            data.append(dict(entry, asset=f"{entry['asset'][:-6]}{n:06d}", size=entry["size"] + n, avgPrice=0.3 + n % 50 / 100.0))
+        pages.append(json.dumps({"data": data, "meta": {"total": total}}).encode("utf-8"))
+    client = types.SimpleNamespace(funder=entry["proxyWallet"])
+
+    def _fetch() -> None:
+        with _offline_data_api(pages):
+            positions, ok, _origin = runner._fetch_positions_from_data_api(client)
+        assert ok and len(positions) == total
+
+    return [(f"positions.fetch_{page_size}x{page_count}", _fetch)]
+
+
+def _slice_cases(fx: Dict[str, Any]) -> List[Case]:
+    engine = ExecutionEngine(None, load_default_config())  # type: ignore[arg-type]
+    return [
+        (f"execution.slice_quantities[{total:g}]", lambda total=total: engine._slice_quantities(total, "buy", 0.5))
+        for total in fx["slice_totals"]
+    ]
+
+
+def build_cases(fx: Dict[str, Any]) -> List[Case]:
+    cases: List[Case] = []
+    for factory in (_strategy_cases, _ws_cases, _clob_cases, _maker_cases, _positions_cases, _slice_cases):
+        cases.extend(factory(fx))
+    return cases
+
+
+# ---------------------------------------------------------------------------
+# Timing
+def _autorange(fn: Callable[[], Any], min_time: float) -> int:
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        if time.perf_counter() - start >= min_time:
+            return iterations
+        iterations *= 2 if iterations < 1024 else 4
+
+
+def time_case(fn: Callable[[], Any], repeat: int, min_time: float) -> Dict[str, Any]:
+    fn()  # warm caches (status schema memo, lazy imports)
+    iterations = _autorange(fn, min_time / 4)
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        samples.append((time.perf_counter() - start) / iterations * 1e9)
+    return {
+        "ns_per_op": round(min(samples), 1),
+        "median_ns": round(statistics.median(samples), 1),
+        "iterations": iterations,
+        "repeat": repeat,
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Print current vs. baseline best times; return the names that regressed."""
+
+    base_results = baseline.get("results", {})
+    base_commit = baseline.get("machine", {}).get("git_commit")
+    print(f"\nvs. baseline {base_commit or '?'} (tolerance {tolerance:.0%})")
+    regressed = []
+    for name, current in results.items():
+        base = base_results.get(name)
+        if not base:
+            print(f"  {name:<56} {'new':>10}")
+            continue
+        ratio = current["ns_per_op"] / max(base["ns_per_op"], 1e-9)
+        flag = ""
+        if ratio > 1.0 + tolerance:
+            flag = "  REGRESSION"
+            regressed.append(name)
+        print(f"  {name:<56} {base['ns_per_op']:>10.0f} -> {current['ns_per_op']:>10.0f}  {ratio:5.2f}x{flag}")
+    return regressed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", default="", help="只跑名称包含该子串的用例")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="每轮计时的最短时长（秒）")
+    parser.add_argument("--json", dest="json_path", help="结果写入该 JSON 文件（含机器信息）")
+    parser.add_argument("--baseline", help="与之前的 --json 结果比较")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="best 耗时允许的回退比例")
+    args = parser.parse_args(argv)
+
+    cases = [(name, fn) for name, fn in build_cases(_load_fixtures()) if args.filter in name]
+    machine = machine_info()
+    print(f"{machine.get('cpu_model') or machine['machine']} | {machine['implementation']} {machine['python']} | {machine.get('git_commit')}")
+    print(f"{'case':<56} {'best ns/op':>12} {'median':>12} {'iters':>9}")
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, fn in cases:
+        results[name] = stats = time_case(fn, args.repeat, args.min_time)
+        print(f"{name:<56} {stats['ns_per_op']:>12.0f} {stats['median_ns']:>12.0f} {stats['iterations']:>9}")
+
+    if args.json_path:
+        payload = {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "machine": machine,
+            "settings": {"repeat": args.repeat, "min_time": args.min_time, "filter": args.filter},
+            "results": results,
+        }
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, indent=2, ensure_ascii=False)
+            fh.write("\n")
+        print(f"wrote {args.json_path}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        base_machine = baseline.get("machine", {})
+        for key in ("cpu_model", "python", "implementation"):
+            if base_machine.get(key) != machine.get(key):
+                print(f"[WARN] baseline {key}={base_machine.get(key)!r} differs from {machine.get(key)!r}")
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
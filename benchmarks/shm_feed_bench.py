@@ -0,0 +1,147 @@
+"""Throughput benchmark: shared-memory quote ring, one writer and N reader processes.
+
+Usage::
+
+    python benchmarks/shm_feed_bench.py [--rate 100000] [--seconds 5] [--readers 2] [--json]
+
+A writer process publishes quotes round-robin over ``--assets`` token ids,
+paced at ``--rate`` updates/sec (``--rate 0`` means as fast as possible).
+Each reader process maps the segment and polls it until the writer closes
+the feed. It reports how many records it read and lost, and the
+publish-to-read latency taken from the records' ``written_at`` stamps
+(``time.monotonic`` is system-wide on Linux).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from trading.shm_feed import ShmQuoteReader, ShmQuoteWriter  # noqa: E402
+
+
+def _percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _writer(name: str, assets: int, rate: float, seconds: float, ready, results) -> None:
+    writer = ShmQuoteWriter(name, create=False)
+    asset_ids = [f"bench-asset-{i}" for i in range(assets)]
+    ready.wait()
+    batch = 500
+    published = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        if rate > 0:
+            due = int((now - started) * rate)
+            if published >= due:
+                time.sleep(min(batch / rate, deadline - now) / 2)
+                continue
+        for i in range(published, published + batch):
+            mid = 0.3 + (i % 400) / 1000.0
+            writer.publish(asset_ids[i % assets], mid - 0.01, mid + 0.01, mid, float(i))
+        published += batch
+    elapsed = time.perf_counter() - started
+    writer.close()
+    results.put({"role": "writer", "published": published, "seconds": elapsed})
+
+
+def _reader(name: str, ready, results) -> None:
+    reader = ShmQuoteReader(name)
+    ready.wait()
+    latencies = []
+    read = 0
+    started = time.perf_counter()
+    while True:
+        batch = reader.poll()
+        if batch:
+            now = time.monotonic()
+            read += len(batch)
+            # Sample one latency per batch: the oldest record is the worst case.
+            latencies.append(now - batch[0].written_at)
+        elif reader.closed:
+            break
+        else:
+            time.sleep(0.0002)
+    elapsed = time.perf_counter() - started
+    lost = reader.lost
+    reader.close()
+    latencies.sort()
+    results.put(
+        {
+            "role": "reader",
+            "read": read,
+            "lost": lost,
+            "seconds": elapsed,
+            "latency_p50_us": _percentile(latencies, 50) * 1e6,
+            "latency_p99_us": _percentile(latencies, 99) * 1e6,
+        }
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=100_000.0, help="target updates/sec (0 = unpaced)")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--assets", type=int, default=200)
+    parser.add_argument("--capacity", type=int, default=1 << 16)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    owner = ShmQuoteWriter(capacity=args.capacity, max_assets=max(args.assets, 1))
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Event()
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_reader, args=(owner.name, ready, results)) for _ in range(args.readers)]
+    procs.append(ctx.Process(target=_writer, args=(owner.name, args.assets, args.rate, args.seconds, ready, results)))
+    try:
+        for proc in procs:
+            proc.start()
+        time.sleep(0.5)  # let the spawned interpreters import and attach
+        ready.set()
+        collected = [results.get(timeout=args.seconds + 60) for _ in procs]
+        for proc in procs:
+            proc.join(timeout=5)
+    finally:
+        owner.close()
+
+    writer = next(r for r in collected if r["role"] == "writer")
+    readers = [r for r in collected if r["role"] == "reader"]
+    achieved = writer["published"] / writer["seconds"] if writer["seconds"] else 0.0
+    summary = {
+        "target_rate": args.rate,
+        "achieved_rate": achieved,
+        "published": writer["published"],
+        "record_bytes": 64,
+        "readers": readers,
+        "target_met": args.rate <= 0 or achieved >= 0.95 * args.rate,
+    }
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"writer: {writer['published']} updates in {writer['seconds']:.2f}s = {achieved:,.0f}/s (target {args.rate:,.0f}/s)")
+        for i, r in enumerate(readers):
+            rate = r["read"] / r["seconds"] if r["seconds"] else 0.0
+            print(
+                f"reader {i}: read {r['read']} ({rate:,.0f}/s) lost {r['lost']} "
+                f"latency p50 {r['latency_p50_us']:.0f}us p99 {r['latency_p99_us']:.0f}us"
+            )
+    return 0 if summary["target_met"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,240 @@
+"""Startup benchmark: import cost per entry point and time-to-first-tick.
+
+Usage::
+
+    python benchmarks/startup_bench.py [--repeat 5] [--top 8] [--check] [--json]
+
+For every entry point in ``startup_budgets.json`` this runs a fresh
+interpreter with ``-X importtime`` and reports the median cumulative import
+time of the entry module plus its heaviest dependencies. Entry points that
+subscribe to market data are also timed end to end: a child process imports
+the entry module, subscribes through ``ws_watch_by_ids`` against a local
+websocket stand-in (``fake_ws_server.FakeMarketWS``, via ``POLY_WS_BASE``) and
+exits on its first tick; the parent measures spawn -> first tick.
+
+``--check`` exits with status 1 when any median exceeds its recorded budget.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from fake_ws_server import FakeMarketWS  # noqa: E402
+
+BUDGETS_PATH = Path(__file__).resolve().with_name("startup_budgets.json")
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+_FIRST_TICK_CHILD = """
+import os, sys
+import {module}
+from Volatility_arbitrage_main_ws import ws_watch_by_ids
+
+def _on_event(_event):
+    sys.stdout.write("TICK\\n")
+    sys.stdout.flush()
+    os._exit(0)
+
+ws_watch_by_ids(["startup-bench-asset"], on_event=_on_event)
+"""
+
+
+@dataclass
+class ImportRecord:
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class EntryResult:
+    entry: str
+    module: str
+    import_ms: List[float] = field(default_factory=list)
+    first_tick_ms: List[float] = field(default_factory=list)
+    heaviest: List[ImportRecord] = field(default_factory=list)
+
+    @property
+    def import_median(self) -> Optional[float]:
+        return statistics.median(self.import_ms) if self.import_ms else None
+
+    @property
+    def first_tick_median(self) -> Optional[float]:
+        return statistics.median(self.first_tick_ms) if self.first_tick_ms else None
+
+
+def parse_importtime(stderr: str) -> List[ImportRecord]:
+    records = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        records.append(ImportRecord(name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return records
+
+
+def _direct_children(records: List[ImportRecord], index: int) -> List[ImportRecord]:
+    """Imports made directly by ``records[index]`` (importtime lists children first)."""
+
+    depth = records[index].depth
+    children = []
+    for record in reversed(records[:index]):
+        if record.depth <= depth:
+            break
+        if record.depth == depth + 1:
+            children.append(record)
+    return children
+
+
+def _child_env(**extra: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    env.update(extra)
+    return env
+
+
+def measure_import(module: str) -> List[ImportRecord]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=_child_env(),
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def measure_first_tick(module: str, server: FakeMarketWS, timeout: float = 30.0) -> float:
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", _FIRST_TICK_CHILD.format(module=module)],
+        cwd=ROOT,
+        env=_child_env(POLY_WS_BASE=server.url),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        line = proc.stdout.readline() if proc.stdout else ""
+        elapsed = (time.perf_counter() - started) * 1000.0
+        proc.wait(timeout=timeout)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+    if line.strip() != "TICK":
+        stderr = proc.stderr.read() if proc.stderr else ""
+        raise RuntimeError(f"{module}: no tick received\n{stderr[-2000:]}")
+    return elapsed
+
+
+def run_entry(entry: str, spec: Dict[str, object], repeat: int, top: int, server: FakeMarketWS) -> EntryResult:
+    module = str(spec["module"])
+    result = EntryResult(entry, module)
+    for _ in range(repeat):
+        records = measure_import(module)
+        index = next((i for i, r in enumerate(records) if r.name == module), None)
+        if index is None:
+            raise RuntimeError(f"{module} missing from -X importtime output")
+        result.import_ms.append(records[index].cumulative_us / 1000.0)
+        if not result.heaviest:
+            result.heaviest = sorted(
+                _direct_children(records, index),
+                key=lambda r: r.cumulative_us,
+                reverse=True,
+            )[:top]
+    if spec.get("first_tick_ms") is not None:
+        for _ in range(repeat):
+            result.first_tick_ms.append(measure_first_tick(module, server))
+    return result
+
+
+def _over_budget(value: Optional[float], budget: Optional[float]) -> bool:
+    return value is not None and budget is not None and value > float(budget)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="heaviest imports to list per entry")
+    parser.add_argument("--entry", action="append", help="limit to these entry points")
+    parser.add_argument("--budgets", type=Path, default=BUDGETS_PATH)
+    parser.add_argument("--check", action="store_true", help="exit 1 when a budget is exceeded")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    budgets: Dict[str, Dict[str, object]] = json.loads(args.budgets.read_text(encoding="utf-8"))
+    entries = args.entry or list(budgets)
+    failures: List[str] = []
+    results: List[EntryResult] = []
+
+    with FakeMarketWS() as server:
+        for entry in entries:
+            spec = budgets[entry]
+            result = run_entry(entry, spec, args.repeat, args.top, server)
+            results.append(result)
+            if _over_budget(result.import_median, spec.get("import_ms")):
+                failures.append(f"{entry}: import {result.import_median:.1f}ms > {spec['import_ms']}ms")
+            if _over_budget(result.first_tick_median, spec.get("first_tick_ms")):
+                failures.append(
+                    f"{entry}: first tick {result.first_tick_median:.1f}ms > {spec['first_tick_ms']}ms"
+                )
+
+    if args.json:
+        print(
+            json.dumps(
+                [
+                    {
+                        "entry": r.entry,
+                        "module": r.module,
+                        "import_ms": r.import_median,
+                        "first_tick_ms": r.first_tick_median,
+                        "budget": budgets[r.entry],
+                        "heaviest": [
+                            {"name": h.name, "self_ms": h.self_us / 1000.0, "cumulative_ms": h.cumulative_us / 1000.0}
+                            for h in r.heaviest
+                        ],
+                    }
+                    for r in results
+                ],
+                indent=2,
+            )
+        )
+    else:
+        for r in results:
+            spec = budgets[r.entry]
+            tick = "-" if r.first_tick_median is None else f"{r.first_tick_median:.1f}ms"
+            print(
+                f"[{r.entry}] {r.module}: import {r.import_median:.1f}ms (budget {spec.get('import_ms')}ms)"
+                f"  first tick {tick} (budget {spec.get('first_tick_ms', '-')}ms)"
+            )
+            for h in r.heaviest:
+                print(f"    {h.cumulative_us / 1000.0:>8.1f}ms cum {h.self_us / 1000.0:>7.1f}ms self  {h.name}")
+
+    for failure in failures:
+        print(f"[OVER BUDGET] {failure}", file=sys.stderr)
+    return 1 if args.check and failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
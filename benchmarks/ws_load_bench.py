@@ -0,0 +1,278 @@
+"""Throughput benchmark for market-data clients against a local load generator.
+
+Usage::
+
+    python benchmarks/ws_load_bench.py [--clients ws,fanout] [--rate 5000] [--assets 20]
+                                       [--batch 10] [--burst 1] [--book-every 0]
+                                       [--duration 5] [--reconnects 3] [--json out.json]
+
+A :class:`fake_ws_server.FakeMarketWS` with a :class:`~fake_ws_server.LoadProfile`
+runs in a child process (so its CPU and GIL stay out of the measurement) and
+streams to every subscriber. Each client in ``--clients`` is started in a
+thread of this process, exactly as the runner starts it:
+
+* ``ws`` -- ``ws_watch_by_ids(..., ws_base=<fake server>)``;
+* ``fanout`` -- ``fanout_watch_by_ids`` reading from an in-process
+  ``FanoutServer`` whose upstream is ``ws_watch_by_ids``.
+
+Per client it reports updates/s and callbacks/s received (against events/s
+sent), callback latency from the event's send timestamp (p50/p90/p99/max),
+process CPU per 1k updates, and reconnect recovery time: the server cuts the
+connection without a close frame and the clock runs until the first callback
+carrying data sent after the cut.
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import multiprocessing
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from bench_env import machine_info  # noqa: E402
+from fake_ws_server import FakeMarketWS, LoadProfile  # noqa: E402
+from Volatility_arbitrage_main_ws import ws_watch_by_ids  # noqa: E402
+
+WatchFn = Callable[..., None]
+
+
+def _server_process(profile: Dict[str, Any], conn) -> None:
+    """Child process: run the load generator and answer ``drop``/``stats``/``stop``."""
+
+    server = FakeMarketWS(load=LoadProfile(**profile)).start()
+    conn.send(server.url)
+    try:
+        while True:
+            command = conn.recv()
+            if command == "drop":
+                conn.send(server.drop_clients())
+            elif command == "stats":
+                conn.send((server.events_sent, server.subscriptions))
+            else:
+                break
+    except EOFError:
+        pass
+    finally:
+        server.stop()
+
+
+class LoadServer:
+    def __init__(self, profile: LoadProfile) -> None:
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child = ctx.Pipe()
+        self._proc = ctx.Process(target=_server_process, args=(asdict(profile), child), daemon=True)
+        self._proc.start()
+        self.url: str = self._conn.recv()
+
+    def call(self, command: str) -> Any:
+        self._conn.send(command)
+        return self._conn.recv()
+
+    def stop(self) -> None:
+        try:
+            self._conn.send("stop")
+        except OSError:
+            pass
+        self._proc.join(timeout=5)
+        if self._proc.is_alive():
+            self._proc.kill()
+
+
+class Collector:
+    """``on_event`` sink: counts updates and keeps send -> callback latencies."""
+
+    def __init__(self) -> None:
+        self.updates = 0
+        self.callbacks = 0
+        self.latencies_ms: List[float] = []
+        self.first = threading.Event()
+        self.recovered = threading.Event()
+        self.waiting_since: Optional[float] = None
+        self.recovered_at = 0.0
+
+    def reset(self) -> None:
+        self.updates = 0
+        self.callbacks = 0
+        self.latencies_ms = []
+
+    def on_event(self, ev: Dict[str, Any]) -> None:
+        now = time.time()
+        self.callbacks += 1
+        changes = ev.get("price_changes")
+        self.updates += len(changes) if isinstance(changes, list) else 1
+        try:
+            ts = float(ev.get("timestamp") or 0.0)
+        except (TypeError, ValueError):
+            ts = 0.0
+        if ts > 1e12:
+            ts /= 1000.0
+        if ts:
+            self.latencies_ms.append((now - ts) * 1000.0)
+        self.first.set()
+        if self.waiting_since is not None and ts >= self.waiting_since:
+            self.waiting_since = None
+            self.recovered_at = now
+            self.recovered.set()
+
+
+def _ws_client(url: str, workdir: str) -> Tuple[WatchFn, Callable[[], None]]:
+    return functools.partial(ws_watch_by_ids, ws_base=url), lambda: None
+
+
+def _fanout_client(url: str, workdir: str) -> Tuple[WatchFn, Callable[[], None]]:
+    from trading.fanout import FanoutServer, fanout_watch_by_ids
+
+    server = FanoutServer(
+        f"unix://{Path(workdir) / 'fanout.sock'}",
+        upstream=functools.partial(ws_watch_by_ids, ws_base=url),
+    ).start()
+    return functools.partial(fanout_watch_by_ids, address=server.address, poll_timeout=0.1), server.stop
+
+
+CLIENTS: Dict[str, Callable[[str, str], Tuple[WatchFn, Callable[[], None]]]] = {
+    "ws": _ws_client,
+    "fanout": _fanout_client,
+}
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def _at(pct: float) -> float:
+        return round(ordered[min(int(pct / 100.0 * len(ordered)), len(ordered) - 1)], 3)
+
+    return {"p50": _at(50), "p90": _at(90), "p99": _at(99), "p999": _at(99.9), "max": round(ordered[-1], 3)}
+
+
+def run_client(name: str, profile: LoadProfile, asset_ids: List[str], args: argparse.Namespace) -> Dict[str, Any]:
+    server = LoadServer(profile)
+    collector = Collector()
+    stop = threading.Event()
+    with tempfile.TemporaryDirectory(prefix="ws-load-") as workdir:
+        watch, cleanup = CLIENTS[name](server.url, workdir)
+        thread = threading.Thread(
+            target=watch,
+            args=(asset_ids,),
+            kwargs={"on_event": collector.on_event, "stop_event": stop},
+            name=f"bench-{name}",
+            daemon=True,
+        )
+        try:
+            thread.start()
+            if not collector.first.wait(15):
+                raise RuntimeError(f"{name}: no event within 15s")
+            time.sleep(args.warmup)
+
+            collector.reset()
+            sent_before, _ = server.call("stats")
+            cpu_before = time.process_time()
+            started = time.perf_counter()
+            time.sleep(args.duration)
+            elapsed = time.perf_counter() - started
+            cpu = time.process_time() - cpu_before
+            sent_after, _ = server.call("stats")
+            updates, callbacks, latencies = collector.updates, collector.callbacks, list(collector.latencies_ms)
+
+            recoveries: List[float] = []
+            for _ in range(args.reconnects):
+                collector.recovered.clear()
+                collector.waiting_since = time.time()
+                dropped_at = time.perf_counter()
+                server.call("drop")
+                if not collector.recovered.wait(90):
+                    recoveries.append(float("nan"))
+                    break
+                recoveries.append(round(time.perf_counter() - dropped_at, 3))
+        finally:
+            stop.set()
+            server.stop()
+            thread.join(timeout=10)
+            cleanup()
+
+    return {
+        "sent_per_s": round((sent_after - sent_before) / elapsed, 1),
+        "updates_per_s": round(updates / elapsed, 1),
+        "callbacks_per_s": round(callbacks / elapsed, 1),
+        "latency_ms": _percentiles(latencies),
+        "cpu_ms_per_1k_updates": round(cpu * 1e6 / max(updates, 1), 3),
+        "cpu_utilisation": round(cpu / elapsed, 3),
+        "reconnect_recovery_s": recoveries,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", default="ws,fanout", help=f"逗号分隔：{','.join(CLIENTS)}")
+    parser.add_argument("--rate", type=float, default=5000.0, help="服务端每连接每秒事件数")
+    parser.add_argument("--assets", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=10, help="每帧事件数")
+    parser.add_argument("--burst", type=int, default=1, help="每次突发连续发送的帧数")
+    parser.add_argument("--book-every", type=int, default=0)
+    parser.add_argument("--changes", type=int, default=1, help="每个 price_change 的条目数")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--reconnects", type=int, default=3)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args(argv)
+
+    profile = LoadProfile(
+        rate=args.rate,
+        batch=args.batch,
+        burst=args.burst,
+        book_every=args.book_every,
+        changes=args.changes,
+    )
+    asset_ids = [f"bench-asset-{i:04d}" for i in range(args.assets)]
+    names = [n.strip() for n in args.clients.split(",") if n.strip()]
+    unknown = [n for n in names if n not in CLIENTS]
+    if unknown:
+        parser.error(f"unknown client(s): {', '.join(unknown)}")
+
+    print(f"profile: {profile} assets={args.assets}")
+    print(
+        f"{'client':<8} {'sent/s':>9} {'upd/s':>9} {'cb/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        f" {'cpu ms/1k':>10} {'reconnect s':>14}"
+    )
+    results: Dict[str, Dict[str, Any]] = {}
+    for name in names:
+        r = results[name] = run_client(name, profile, asset_ids, args)
+        lat = r["latency_ms"]
+        recovery = r["reconnect_recovery_s"]
+        recovery_text = f"{statistics.median(recovery):.3f}" if recovery else "-"
+        print(
+            f"{name:<8} {r['sent_per_s']:>9.0f} {r['updates_per_s']:>9.0f} {r['callbacks_per_s']:>9.0f}"
+            f" {lat.get('p50', 0):>8.2f} {lat.get('p99', 0):>8.2f} {lat.get('max', 0):>8.2f}"
+            f" {r['cpu_ms_per_1k_updates']:>10.2f} {recovery_text:>14}"
+        )
+
+    if args.json_path:
+        payload = {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "machine": machine_info(),
+            "profile": dict(asdict(profile), assets=args.assets),
+            "settings": {"duration": args.duration, "warmup": args.warmup, "reconnects": args.reconnects},
+            "results": results,
+        }
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, indent=2, ensure_ascii=False)
+            fh.write("\n")
+        print(f"wrote {args.json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -26,14 +26,17 @@ fill statistics so that the strategy layer can update its internal state.
 """
 from __future__ import annotations
 
-import math
 import time
 from collections import deque
 from collections.abc import Callable, Iterable, Mapping
-from decimal import Decimal, InvalidOperation
 from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
+from trading.async_log import LOG
 from trading.execution import ClobPolymarketAPI
+from trading.metrics import FILLED_SIZE, FILLS, REQUOTES
+from trading.ticks import ROUND_DOWN, ROUND_UP, decimals_of, grid_for
+from trading.tracing import TRACER
+from trading.order_store import OrderStore, default_store
 
 
 BUY_PRICE_DP = 2
@@ -44,24 +47,17 @@ _MIN_FILL_EPS = 1e-9
 DEFAULT_MIN_ORDER_SIZE = 5.0
 
 
+# 价格/数量的取整统一走 trading.ticks 的整数网格（价格按 tick、数量按 lot），不再在每处比较里带 1e-12
 def _round_up_to_dp(value: float, dp: int) -> float:
-    factor = 10 ** dp
-    return math.ceil(value * factor - 1e-12) / factor
+    return grid_for(dp).ceil(value)
 
 
 def _round_down_to_dp(value: float, dp: int) -> float:
-    factor = 10 ** dp
-    return math.floor(value * factor + 1e-12) / factor
+    return grid_for(dp).floor(value)
 
 
-def _ceil_to_dp(value: float, dp: int) -> float:
-    factor = 10 ** dp
-    return math.ceil(value * factor - 1e-12) / factor
-
-
-def _floor_to_dp(value: float, dp: int) -> float:
-    factor = 10 ** dp
-    return math.floor(value * factor + 1e-12) / factor
+_ceil_to_dp = _round_up_to_dp
+_floor_to_dp = _round_down_to_dp
 
 
 def _coerce_float(value: Any) -> Optional[float]:
@@ -86,31 +82,7 @@ class PriceSample(NamedTuple):
 
 
 def _infer_price_decimals(value: Any, *, max_dp: int = 6) -> Optional[int]:
-    candidate: Optional[Decimal] = None
-    if isinstance(value, str):
-        raw = value.strip()
-        if not raw:
-            return None
-        try:
-            candidate = Decimal(raw)
-        except (InvalidOperation, ValueError):
-            return None
-    elif isinstance(value, (int, float)) and not isinstance(value, bool):
-        try:
-            candidate = Decimal(str(value))
-        except (InvalidOperation, ValueError):
-            return None
-    else:
-        return None
-
-    exponent = candidate.as_tuple().exponent
-    if candidate.is_zero():
-        if exponent < 0:
-            return min(-int(exponent), max_dp)
-        return 0
-    if exponent >= 0:
-        return 0
-    return min(-int(exponent), max_dp)
+    return decimals_of(value, max_dp=max_dp)
 
 
 def _extract_best_price(payload: Any, side: str) -> Optional[PriceSample]:
@@ -261,7 +233,17 @@ def _best_ask(
     return info.price
 
 
-def _cancel_order(client: Any, order_id: Optional[str]) -> bool:
+@TRACER.traced("maker.cancel")
+def _cancel_order(
+    client: Any, order_id: Optional[str], *, store: Optional[OrderStore] = None
+) -> bool:
+    cancelled = _cancel_via_client(client, order_id)
+    if cancelled and store is not None and order_id:
+        store.mark_cancelled(order_id)
+    return cancelled
+
+
+def _cancel_via_client(client: Any, order_id: Optional[str]) -> bool:
     if not order_id:
         return False
     method_names = (
@@ -311,7 +293,201 @@ def _cancel_order(client: Any, order_id: Optional[str]) -> bool:
 
 
 def _order_tick(dp: int) -> float:
-    return 10 ** (-dp)
+    return grid_for(dp).step
+
+
+def _prime_requote_ladder(
+    adapter: Any,
+    token_id: str,
+    side: str,
+    price: float,
+    size: float,
+    *,
+    tick: Optional[float] = None,
+    price_dp: Optional[int] = None,
+) -> None:
+    """Ask the adapter to pre-sign the likely next requote prices, if supported.
+
+    Without ``price_dp`` the rungs use the quote's own decimals, clamped to
+    ``2..SELL_PRICE_DP``; ``tick`` defaults to one unit of ``price_dp``.
+    """
+
+    prime = getattr(adapter, "prime_ladder", None)
+    if not callable(prime):
+        return
+    if price_dp is None:
+        price_dp = min(max(_infer_price_decimals(price) or 2, 2), SELL_PRICE_DP)
+    if tick is None:
+        tick = _order_tick(price_dp)
+    try:
+        prime(token_id, side, price, size, tick=tick, price_dp=price_dp)
+    except Exception as exc:
+        LOG.warn(
+            "maker.ladder",
+            f"[MAKER][{side}] 预签名挂单梯队失败：{exc}",
+            token=token_id,
+            side=side,
+        )
+
+
+@TRACER.traced("maker.requote")
+def _replace_active_order(
+    adapter: Any,
+    client: Any,
+    old_id: str,
+    payload: Dict[str, Any],
+    *,
+    orders: List[Dict[str, Any]],
+    records: Dict[str, Dict[str, Any]],
+    accounted: Dict[str, float],
+    notional_sum: float,
+    size_dp: int,
+    order_store: Optional[OrderStore] = None,
+) -> Tuple[Optional[str], float, Optional[BaseException]]:
+    """Move the working order to ``payload``'s price, keeping fill totals exact.
+
+    Uses the adapter's pipelined ``replace_order`` when available and falls
+    back to a plain cancel otherwise. The old order always ends up cancelled.
+    Returns the id of the new live order (``None`` when the caller should place
+    a fresh one), the updated notional sum and the replace error, if any, so
+    the caller can run the same balance-shortage handling as a failed placement.
+    """
+
+    side = str(payload.get("side", "")).upper()
+    tag = f"[MAKER][{side}]"
+    old_record = records.get(old_id)
+    replace = getattr(adapter, "replace_order", None)
+    if not callable(replace):
+        _cancel_order(client, old_id, store=order_store)
+        if old_record is not None:
+            old_record["status"] = "CANCELLED"
+        return None, notional_sum, None
+
+    old_size: Optional[float] = None
+    old_price = 0.0
+    if old_record is not None:
+        old_size = _coerce_float(old_record.get("size"))
+        old_price = _coerce_float(old_record.get("price")) or 0.0
+    filled_before = accounted.get(old_id, 0.0)
+    new_price = float(payload["price"])
+    new_size = float(payload["size"])
+    try:
+        result = replace(
+            old_id,
+            new_price,
+            new_size,
+            payload=payload,
+            old_filled=filled_before,
+        )
+    except Exception as exc:
+        LOG.warn(
+            "maker.requote.error",
+            f"{tag} 撤单重挂异常，改为撤单后重新挂单：{exc}",
+            token=str(payload.get("tokenId")),
+            order_id=old_id,
+            side=side,
+        )
+        _cancel_order(client, old_id, store=order_store)
+        if old_record is not None:
+            old_record["status"] = "CANCELLED"
+        return None, notional_sum, exc
+
+    if not result.get("cancelled"):
+        _cancel_order(client, old_id, store=order_store)
+    elif order_store is not None:
+        order_store.mark_cancelled(old_id)
+    old_status = result.get("old_status")
+    if isinstance(old_status, dict):
+        filled_amount, avg_price, notional_sum = _update_fill_totals(
+            old_id,
+            old_status,
+            accounted,
+            notional_sum,
+            old_price,
+            status_text=str(old_status.get("status", "")),
+            expected_full_size=old_size,
+            store=order_store,
+        )
+        if old_record is not None:
+            old_record["filled"] = filled_amount
+            if avg_price is not None:
+                old_record["avg_price"] = avg_price
+    if old_record is not None:
+        old_record["status"] = "CANCELLED"
+    late_fill = max(accounted.get(old_id, 0.0) - filled_before, 0.0)
+
+    new_id = result.get("orderId")
+    error = result.get("error")
+    if error is not None or not new_id:
+        LOG.warn(
+            "maker.requote.error",
+            f"{tag} 撤单重挂未能挂出新单：{error}",
+            token=str(payload.get("tokenId")),
+            order_id=old_id,
+            side=side,
+        )
+        return None, notional_sum, error if isinstance(error, BaseException) else None
+
+    new_id = str(new_id)
+    record = {
+        "id": new_id,
+        "side": side.lower(),
+        "price": new_price,
+        "size": new_size,
+        "status": "OPEN",
+        "filled": 0.0,
+    }
+    orders.append(record)
+    records[new_id] = record
+    accounted[new_id] = 0.0
+    if order_store is not None:
+        order_store.add(new_id, str(payload.get("tokenId")), side, new_price, new_size)
+    gap = float(result.get("quote_gap_seconds") or 0.0)
+    LOG.info(
+        "maker.requote",
+        f"{tag} 撤单重挂完成 -> id={new_id} 无挂单间隔={gap * 1000:.1f}ms",
+        token=str(payload.get("tokenId")),
+        order_id=new_id,
+        side=side,
+        price=new_price,
+        size=new_size,
+        latency_ms=gap * 1000,
+    )
+
+    if late_fill > _MIN_FILL_EPS:
+        # The replacement was sized before these fills were known; pull it and
+        # let the caller re-quote the true remainder.
+        LOG.info(
+            "maker.requote.late_fill",
+            f"{tag} 旧单撤单期间成交 {late_fill:.{size_dp}f}，撤回新单按剩余数量重挂。",
+            token=str(payload.get("tokenId")),
+            order_id=new_id,
+            side=side,
+            filled=late_fill,
+        )
+        _cancel_order(client, new_id, store=order_store)
+        try:
+            new_status = adapter.get_order_status(new_id)
+        except Exception:
+            new_status = None
+        if isinstance(new_status, dict):
+            filled_amount, avg_price, notional_sum = _update_fill_totals(
+                new_id,
+                new_status,
+                accounted,
+                notional_sum,
+                new_price,
+                status_text=str(new_status.get("status", "")),
+                expected_full_size=new_size,
+                store=order_store,
+            )
+            record["filled"] = filled_amount
+            if avg_price is not None:
+                record["avg_price"] = avg_price
+        record["status"] = "CANCELLED"
+        return None, notional_sum, None
+
+    return new_id, notional_sum, None
 
 
 def _update_fill_totals(
@@ -323,6 +499,7 @@ def _update_fill_totals(
     *,
     status_text: Optional[str] = None,
     expected_full_size: Optional[float] = None,
+    store: Optional[OrderStore] = None,
 ) -> Tuple[float, float, float]:
     avg_price = _coerce_float(status_payload.get("avgPrice"))
 
@@ -413,6 +590,8 @@ def _update_fill_totals(
     delta = max(filled_amount - previous, 0.0)
     accounted[order_id] = filled_amount
     notional_sum += delta * avg_price
+    if store is not None:
+        store.apply_fill(order_id, filled_amount, avg_price=avg_price, status=status_text)
     return filled_amount, avg_price, notional_sum
 
 
@@ -431,6 +610,7 @@ def maker_buy_follow_bid(
     progress_probe_interval: float = 60.0,
     price_dp: Optional[int] = None,
     external_fill_probe: Optional[Callable[[], Optional[float]]] = None,
+    order_store: Optional[OrderStore] = None,
 ) -> Dict[str, Any]:
     """Continuously maintain a maker buy order following the market bid."""
 
@@ -449,6 +629,8 @@ def maker_buy_follow_bid(
         }
 
     adapter = ClobPolymarketAPI(client)
+    if order_store is None:
+        order_store = default_store()
     orders: List[Dict[str, Any]] = []
     records: Dict[str, Dict[str, Any]] = {}
     accounted: Dict[str, float] = {}
@@ -483,7 +665,12 @@ def maker_buy_follow_bid(
         if desired != price_dp_active:
             price_dp_active = desired
             tick = _order_tick(price_dp_active)
-            print(f"[MAKER][BUY] 检测到市场价格精度 -> decimals={price_dp_active}")
+            LOG.info(
+                "maker.buy.precision",
+                f"[MAKER][BUY] 检测到市场价格精度 -> decimals={price_dp_active}",
+                token=token_id,
+                price_dp=price_dp_active,
+            )
 
     def _is_insufficient_balance(value: object) -> bool:
         def _text_has_shortage(text: str) -> bool:
@@ -523,6 +710,26 @@ def maker_buy_follow_bid(
         except Exception:
             return False
 
+    def _buy_quote_qty(px: float) -> Tuple[float, float]:
+        min_qty = 0.0
+        if min_quote_amt and min_quote_amt > 0:
+            min_qty = _ceil_to_dp(min_quote_amt / max(px, 1e-9), BUY_SIZE_DP)
+        eff_qty = max(remaining, min_qty)
+        if api_min_qty:
+            eff_qty = max(eff_qty, api_min_qty)
+        return min_qty, _ceil_to_dp(eff_qty, BUY_SIZE_DP)
+
+    def _buy_payload(px: float, qty: float) -> Dict[str, Any]:
+        return {
+            "tokenId": token_id,
+            "side": "BUY",
+            "price": px,
+            "size": qty,
+            "timeInForce": "GTC",
+            "type": "GTC",
+            "allowPartial": True,
+        }
+
     def _reset_shortage_recovery(note: str) -> None:
         nonlocal shortage_retry_count, min_shrink_interval, last_shrink_time
 
@@ -530,15 +737,25 @@ def maker_buy_follow_bid(
             shortage_retry_count = 0
             min_shrink_interval = base_min_shrink_interval
             last_shrink_time = time.monotonic()
-            print(note)
+            LOG.info(
+                "maker.buy.shortage",
+                note,
+                token=token_id,
+                order_id=active_order,
+            )
 
     def _handle_balance_shortage(reason: str, min_viable: float) -> bool:
         nonlocal goal_size, remaining, active_order, active_price, final_status, shortage_retry_count, size_tick, last_shrink_time, min_shrink_interval
 
-        print(reason)
+        LOG.warn(
+            "maker.buy.shortage",
+            reason,
+            token=token_id,
+            order_id=active_order,
+        )
         min_shrink_interval = max(min_shrink_interval, base_min_shrink_interval)
         if active_order:
-            _cancel_order(client, active_order)
+            _cancel_order(client, active_order, store=order_store)
             rec = records.get(active_order)
             if rec is not None:
                 rec["status"] = "CANCELLED"
@@ -551,7 +768,12 @@ def maker_buy_follow_bid(
         shortage_retry_count += 1
         if shortage_retry_count > 100 and size_tick < 0.1:
             size_tick = 0.1
-            print("[MAKER][BUY] 余额不足重试超过 100 次，提升缩减步长至 0.1。")
+            LOG.info(
+                "maker.buy.shortage",
+                "[MAKER][BUY] 余额不足重试超过 100 次，提升缩减步长至 0.1。",
+                token=token_id,
+                size_tick=size_tick,
+            )
 
         now = time.monotonic()
         elapsed = now - last_shrink_time
@@ -567,21 +789,29 @@ def maker_buy_follow_bid(
         if shrink_candidate > _MIN_FILL_EPS and (
             not min_viable or shrink_candidate + _MIN_FILL_EPS >= min_viable
         ):
-            print(
+            LOG.info(
+                "maker.buy.shrink",
                 "[MAKER][BUY] 重新调整买入目标 -> "
-                f"old={current_remaining:.{BUY_SIZE_DP}f} new={shrink_candidate:.{BUY_SIZE_DP}f}"
+                f"old={current_remaining:.{BUY_SIZE_DP}f} new={shrink_candidate:.{BUY_SIZE_DP}f}",
+                token=token_id,
+                size=shrink_candidate,
             )
             goal_size = filled_total + shrink_candidate
             remaining = max(goal_size - filled_total, 0.0)
             return False
-        print("[MAKER][BUY] 无法在满足最小下单量的前提下继续缩减，终止买入。")
+        LOG.warn(
+            "maker.buy.shrink",
+            "[MAKER][BUY] 无法在满足最小下单量的前提下继续缩减，终止买入。",
+            token=token_id,
+            filled=filled_total,
+        )
         final_status = "FILLED_TRUNCATED" if filled_total > _MIN_FILL_EPS else "SKIPPED_TOO_SMALL"
         return True
 
     while True:
         if stop_check and stop_check():
             if active_order:
-                _cancel_order(client, active_order)
+                _cancel_order(client, active_order, store=order_store)
                 rec = records.get(active_order)
                 if rec is not None:
                     rec["status"] = "CANCELLED"
@@ -605,25 +835,11 @@ def maker_buy_follow_bid(
             if px <= 0:
                 sleep_fn(poll_sec)
                 continue
-            min_qty = 0.0
-            if min_quote_amt and min_quote_amt > 0:
-                min_qty = _ceil_to_dp(min_quote_amt / max(px, 1e-9), BUY_SIZE_DP)
-            eff_qty = max(remaining, min_qty)
-            if api_min_qty:
-                eff_qty = max(eff_qty, api_min_qty)
-            eff_qty = _ceil_to_dp(eff_qty, BUY_SIZE_DP)
+            min_qty, eff_qty = _buy_quote_qty(px)
             if eff_qty <= 0:
                 final_status = "SKIPPED"
                 break
-            payload = {
-                "tokenId": token_id,
-                "side": "BUY",
-                "price": px,
-                "size": eff_qty,
-                "timeInForce": "GTC",
-                "type": "GTC",
-                "allowPartial": True,
-            }
+            payload = _buy_payload(px, eff_qty)
             try:
                 response = adapter.create_order(payload)
             except Exception as exc:
@@ -649,18 +865,34 @@ def maker_buy_follow_bid(
             orders.append(record)
             records[order_id] = record
             accounted[order_id] = 0.0
+            order_store.add(order_id, token_id, "BUY", px, eff_qty)
             active_order = order_id
             active_price = px
+            _prime_requote_ladder(
+                adapter, token_id, "BUY", px, eff_qty, tick=tick, price_dp=price_dp_active
+            )
             _reset_shortage_recovery("[MAKER][BUY] 挂单成功，退出余额不足重试模式。")
             if progress_probe:
                 interval = max(progress_probe_interval, poll_sec, 1e-6)
                 try:
                     progress_probe()
                 except Exception as probe_exc:
-                    print(f"[MAKER][BUY] 进度探针执行异常：{probe_exc}")
+                    LOG.warn(
+                        "maker.buy.probe",
+                        f"[MAKER][BUY] 进度探针执行异常：{probe_exc}",
+                        token=token_id,
+                        order_id=active_order,
+                    )
                 next_probe_at = time.time() + interval
-            print(
-                f"[MAKER][BUY] 挂单 -> price={px:.{price_dp_active}f} qty={eff_qty:.{BUY_SIZE_DP}f} remaining={remaining:.{BUY_SIZE_DP}f}"
+            LOG.info(
+                "maker.buy.place",
+                f"[MAKER][BUY] 挂单 -> price={px:.{price_dp_active}f} qty={eff_qty:.{BUY_SIZE_DP}f} remaining={remaining:.{BUY_SIZE_DP}f}",
+                token=token_id,
+                order_id=active_order,
+                side="BUY",
+                price=px,
+                size=eff_qty,
+                remaining=remaining,
             )
             continue
 
@@ -674,13 +906,23 @@ def maker_buy_follow_bid(
             try:
                 progress_probe()
             except Exception as probe_exc:
-                print(f"[MAKER][BUY] 进度探针执行异常：{probe_exc}")
+                LOG.warn(
+                    "maker.buy.probe",
+                    f"[MAKER][BUY] 进度探针执行异常：{probe_exc}",
+                    token=token_id,
+                    order_id=active_order,
+                )
             interval = max(progress_probe_interval, poll_sec, 1e-6)
             next_probe_at = time.time() + interval
         try:
             status_payload = adapter.get_order_status(active_order)
         except Exception as exc:
-            print(f"[MAKER][BUY] 查询订单状态异常：{exc}")
+            LOG.warn(
+                "maker.buy.status",
+                f"[MAKER][BUY] 查询订单状态异常：{exc}",
+                token=token_id,
+                order_id=active_order,
+            )
             status_payload = {"status": "UNKNOWN", "filledAmount": accounted.get(active_order, 0.0)}
 
         record = records.get(active_order)
@@ -706,44 +948,69 @@ def maker_buy_follow_bid(
             float(last_price_hint),
             status_text=status_text,
             expected_full_size=record_size,
+            store=order_store,
         )
         filled_total = sum(accounted.values())
         if external_fill_probe is not None:
             try:
                 external_filled = external_fill_probe()
             except Exception as probe_exc:
-                print(f"[MAKER][BUY] 外部持仓校对异常：{probe_exc}")
+                LOG.warn(
+                    "maker.buy.reconcile",
+                    f"[MAKER][BUY] 外部持仓校对异常：{probe_exc}",
+                    token=token_id,
+                    order_id=active_order,
+                )
                 external_filled = None
             if external_filled is not None and external_filled > filled_total + _MIN_FILL_EPS:
                 filled_total = external_filled
                 remaining = max(goal_size - filled_total, 0.0)
-                print(
+                LOG.info(
+                    "maker.buy.reconcile",
                     f"[MAKER][BUY] 校对持仓后更新累计成交 -> filled={filled_total:.{BUY_SIZE_DP}f} "
-                    f"remaining={remaining:.{BUY_SIZE_DP}f}"
+                    f"remaining={remaining:.{BUY_SIZE_DP}f}",
+                    token=token_id,
+                    order_id=active_order,
+                    filled=filled_total,
+                    remaining=remaining,
                 )
         if filled_total > previous_filled_total + _MIN_FILL_EPS:
             no_fill_poll_count = 0
+            FILLS.labels("BUY").inc()
+            FILLED_SIZE.labels("BUY").inc(filled_total - previous_filled_total)
         elif shortage_retry_count > 0:
             no_fill_poll_count += 1
         else:
             no_fill_poll_count = 0
         if shortage_retry_count > 0 and no_fill_poll_count >= 30:
-            print(
-                "[MAKER][BUY] 挂单连续 30 次未检测到新增成交，强制校对仓位/余额后重挂。"
+            LOG.warn(
+                "maker.buy.stalled",
+                "[MAKER][BUY] 挂单连续 30 次未检测到新增成交，强制校对仓位/余额后重挂。",
+                token=token_id,
+                order_id=active_order,
             )
             if external_fill_probe is not None:
                 try:
                     external_filled = external_fill_probe()
                 except Exception as probe_exc:
-                    print(f"[MAKER][BUY] 外部持仓校对异常：{probe_exc}")
+                    LOG.warn(
+                        "maker.buy.reconcile",
+                        f"[MAKER][BUY] 外部持仓校对异常：{probe_exc}",
+                        token=token_id,
+                        order_id=active_order,
+                    )
                     external_filled = None
                 if external_filled is not None and external_filled > filled_total + _MIN_FILL_EPS:
                     filled_total = external_filled
-                    print(
-                        f"[MAKER][BUY] 二次校对后更新累计成交 -> filled={filled_total:.{BUY_SIZE_DP}f}"
+                    LOG.info(
+                        "maker.buy.reconcile",
+                        f"[MAKER][BUY] 二次校对后更新累计成交 -> filled={filled_total:.{BUY_SIZE_DP}f}",
+                        token=token_id,
+                        order_id=active_order,
+                        filled=filled_total,
                     )
             remaining = max(goal_size - filled_total, 0.0)
-            _cancel_order(client, active_order)
+            _cancel_order(client, active_order, store=order_store)
             rec = records.get(active_order)
             if rec is not None:
                 rec["status"] = "CANCELLED"
@@ -762,10 +1029,18 @@ def maker_buy_follow_bid(
             total_size = float(record.get("size", 0.0) or 0.0)
             remaining_slice = max(total_size - filled_amount, 0.0)
             if price_display is not None:
-                print(
+                LOG.info(
+                    "maker.buy.status",
                     f"[MAKER][BUY] 挂单状态 -> price={float(price_display):.{price_dp_active}f} "
                     f"filled={filled_amount:.{BUY_SIZE_DP}f} remaining={remaining_slice:.{BUY_SIZE_DP}f} "
-                    f"status={status_text_upper}"
+                    f"status={status_text_upper}",
+                    token=token_id,
+                    order_id=active_order,
+                    side="BUY",
+                    price=float(price_display),
+                    filled=filled_amount,
+                    remaining=remaining_slice,
+                    status=status_text_upper,
                 )
 
         current_bid_info = _best_bid_info(client, token_id, best_bid_fn)
@@ -780,7 +1055,7 @@ def maker_buy_follow_bid(
 
         if remaining <= _MIN_FILL_EPS or (min_buyable and remaining < min_buyable):
             if active_order:
-                _cancel_order(client, active_order)
+                _cancel_order(client, active_order, store=order_store)
                 rec = records.get(active_order)
                 if rec is not None:
                     rec["status"] = "CANCELLED"
@@ -791,16 +1066,60 @@ def maker_buy_follow_bid(
                 final_status = "FILLED_TRUNCATED" if filled_total > _MIN_FILL_EPS else "SKIPPED_TOO_SMALL"
             break
 
-        if current_bid is not None and active_price is not None and current_bid >= active_price + tick - 1e-12:
-            print(
-                f"[MAKER][BUY] 买一上行 -> 撤单重挂 | old={active_price:.{price_dp_active}f} new={current_bid:.{price_dp_active}f}"
+        bid_grid = grid_for(price_dp_active)
+        if (
+            current_bid is not None
+            and active_price is not None
+            and bid_grid.to_units(current_bid) > bid_grid.to_units(active_price)
+        ):
+            LOG.info(
+                "maker.buy.requote",
+                f"[MAKER][BUY] 买一上行 -> 撤单重挂 | old={active_price:.{price_dp_active}f} new={current_bid:.{price_dp_active}f}",
+                token=token_id,
+                order_id=active_order,
+                side="BUY",
+                old_price=active_price,
+                price=current_bid,
             )
-            _cancel_order(client, active_order)
-            rec = records.get(active_order)
-            if rec is not None:
-                rec["status"] = "CANCELLED"
+            REQUOTES.labels("BUY").inc()
+            old_order = active_order
             active_order = None
             active_price = None
+            new_px = _round_up_to_dp(current_bid, price_dp_active)
+            new_min_qty, new_qty = _buy_quote_qty(new_px)
+            if new_qty <= 0:
+                _cancel_order(client, old_order, store=order_store)
+                rec = records.get(old_order)
+                if rec is not None:
+                    rec["status"] = "CANCELLED"
+                continue
+            replaced, notional_sum, replace_error = _replace_active_order(
+                adapter,
+                client,
+                old_order,
+                _buy_payload(new_px, new_qty),
+                orders=orders,
+                records=records,
+                accounted=accounted,
+                notional_sum=notional_sum,
+                size_dp=BUY_SIZE_DP,
+                order_store=order_store,
+            )
+            filled_total = sum(accounted.values())
+            remaining = max(goal_size - filled_total, 0.0)
+            if replaced is not None:
+                active_order = replaced
+                active_price = new_px
+                _prime_requote_ladder(
+                    adapter, token_id, "BUY", new_px, new_qty, tick=tick, price_dp=price_dp_active
+                )
+            elif replace_error is not None and _is_insufficient_balance(replace_error):
+                should_stop = _handle_balance_shortage(
+                    "[MAKER][BUY] 撤单重挂失败，疑似余额不足，尝试缩减买入目标后重试。",
+                    max(new_min_qty or 0.0, api_min_qty or 0.0),
+                )
+                if should_stop:
+                    break
             continue
 
         final_states = {"FILLED", "MATCHED", "COMPLETED", "EXECUTED"}
@@ -857,6 +1176,8 @@ def maker_sell_follow_ask_with_floor_wait(
     position_fetcher: Optional[Callable[[], Optional[float]]] = None,
     position_refresh_interval: float = 30.0,
     ask_validation_interval: float = 60.0,
+    order_store: Optional[OrderStore] = None,
+    price_dp: Optional[int] = None,
 ) -> Dict[str, Any]:
     """Maintain a maker sell order while respecting a profit floor."""
 
@@ -874,6 +1195,8 @@ def maker_sell_follow_ask_with_floor_wait(
         }
 
     adapter = ClobPolymarketAPI(client)
+    if order_store is None:
+        order_store = default_store()
     orders: List[Dict[str, Any]] = []
     records: Dict[str, Dict[str, Any]] = {}
     accounted: Dict[str, float] = {}
@@ -889,19 +1212,18 @@ def maker_sell_follow_ask_with_floor_wait(
         return max(capped, filled_total)
 
     active_order: Optional[str] = None
-    active_price: Optional[float] = None
+    active_units: Optional[int] = None
 
     final_status = "PENDING"
-    tick = _order_tick(SELL_PRICE_DP)
 
     waiting_for_floor = False
     aggressive_mode = str(sell_mode).lower() == "aggressive"
     aggressive_timer_start: Optional[float] = None
     aggressive_timer_anchor_fill: Optional[float] = None
     aggressive_floor_locked = False
-    aggressive_next_price_override: Optional[float] = None
-    aggressive_locked_price: Optional[float] = None
-    next_price_override: Optional[float] = None
+    aggressive_next_units: Optional[int] = None
+    aggressive_locked_units: Optional[int] = None
+    next_units: Optional[int] = None
     # 连续触发仓位不足但接口仍返回可用仓位的计数
     consecutive_insufficient_with_position = 0
     missing_position_retry = 0
@@ -938,7 +1260,54 @@ def maker_sell_follow_ask_with_floor_wait(
         aggressive_step = 0.01
     if aggressive_step <= 0:
         aggressive_mode = False
-    floor_float = float(floor_X)
+    # 卖单价格落在市场 tick 网格上：默认按 0.01 起步，观测到更细的报价精度后升级（最细 SELL_PRICE_DP）。
+    # 报价进入循环时换算一次整数 tick，之后的比较、步进都只用整数；地板价向上取整，挂单价不会低于地板
+    floor_raw = float(floor_X)
+    base_price_dp = min(BUY_PRICE_DP if price_dp is None else max(int(price_dp), 0), SELL_PRICE_DP)
+    price_dp_active = base_price_dp
+    price_grid = grid_for(price_dp_active)
+    floor_units = price_grid.to_units(floor_raw, ROUND_UP)
+    floor_X = price_grid.to_value(floor_units)
+    step_units = max(price_grid.to_units(aggressive_step, ROUND_UP), 1)
+
+    def _px(units: int) -> float:
+        return price_grid.to_value(units)
+
+    def _quote_units(sample: Optional[PriceSample]) -> Optional[int]:
+        if sample is None or sample.price is None or sample.price <= 0:
+            return None
+        units = price_grid.to_units(float(sample.price), ROUND_DOWN)
+        return units if units > 0 else None
+
+    def _maybe_update_price_dp(observed: Optional[int]) -> None:
+        nonlocal price_dp_active, price_grid, floor_units, floor_X, step_units
+        nonlocal active_units, next_units, aggressive_next_units, aggressive_locked_units
+        if observed is None:
+            return
+        desired = min(max(base_price_dp, int(observed)), SELL_PRICE_DP)
+        if desired <= price_dp_active:
+            return
+        factor = 10 ** (desired - price_dp_active)
+        price_dp_active = desired
+        price_grid = grid_for(price_dp_active)
+        floor_units = price_grid.to_units(floor_raw, ROUND_UP)
+        floor_X = price_grid.to_value(floor_units)
+        step_units = max(price_grid.to_units(aggressive_step, ROUND_UP), 1)
+        if active_units is not None:
+            active_units *= factor
+        if next_units is not None:
+            next_units *= factor
+        if aggressive_next_units is not None:
+            aggressive_next_units *= factor
+        if aggressive_locked_units is not None:
+            aggressive_locked_units = floor_units
+        LOG.info(
+            "maker.sell.precision",
+            f"[MAKER][SELL] 检测到市场价格精度 -> decimals={price_dp_active}",
+            token=token_id,
+            price_dp=price_dp_active,
+            floor=floor_X,
+        )
 
     try:
         position_refresh_interval = float(position_refresh_interval)
@@ -971,10 +1340,135 @@ def maker_sell_follow_ask_with_floor_wait(
         filled_so_far = accounted.get(active_order, 0.0)
         return max(total_size - filled_so_far, 0.0)
 
+    def _handle_position_shortage(exc: object) -> Optional[bool]:
+        """下单 / 撤单重挂失败时的仓位不足处理：刷新仓位并调整目标。
+
+        不是仓位不足返回 None；True 表示结束卖出流程，False 表示继续循环重试。
+        """
+        nonlocal final_status, goal_size, remaining, shortage_retry_count, missing_position_retry
+        nonlocal consecutive_insufficient_with_position, last_live_position
+
+        msg = str(exc).lower()
+        insufficient = any(
+            keyword in msg for keyword in ("insufficient", "balance", "position")
+        )
+        if not insufficient:
+            return None
+        shortage_retry_count += 1
+        LOG.warn(
+            "maker.sell.shortage",
+            "[MAKER][SELL] 下单失败，疑似仓位不足，等待60s后刷新仓位。",
+            token=token_id,
+            order_id=active_order,
+        )
+        sleep_fn(60)
+        refreshed_goal: Optional[float] = None
+        refreshed_remaining: Optional[float] = None
+        live_target: Optional[float] = None
+        now = time.time()
+        blocked_refresh = now < position_refresh_block_until
+        if blocked_refresh:
+            remaining_wait = max(position_refresh_block_until - now, 0.0)
+            LOG.info(
+                "maker.sell.position",
+                "[MAKER][SELL] 成交后等待仓位刷新，跳过本次同步，剩余 "
+                f"{int(remaining_wait)}s 冷却。",
+                token=token_id,
+                wait_s=remaining_wait,
+            )
+        else:
+            live_target, error_msg = _pull_live_position("余额不足重试")
+            if live_target is None and error_msg:
+                LOG.warn(
+                    "maker.sell.position",
+                    f"[MAKER][SELL] 无法获取最新仓位：{error_msg}",
+                    token=token_id,
+                )
+        if live_target is None:
+            if blocked_refresh:
+                missing_position_retry = 0
+                sleep_fn(60)
+                return False
+            missing_position_retry += 1
+            if missing_position_retry >= 5:
+                final_status = "FAILED"
+                LOG.error(
+                    "maker.sell.position",
+                    "[MAKER][SELL] 无法获取新仓位，退出卖出流程。",
+                    token=token_id,
+                )
+                return True
+            LOG.warn(
+                "maker.sell.position",
+                "[MAKER][SELL] 无法获取最新仓位，等待60s后重试同步。 "
+                f"(attempt {missing_position_retry}/5)",
+                token=token_id,
+                attempt=missing_position_retry,
+            )
+            sleep_fn(60)
+            return False
+        missing_position_retry = 0
+
+        dust_cutoff = 0.01
+        if api_min_qty and api_min_qty > dust_cutoff:
+            dust_cutoff = api_min_qty
+        if live_target + _MIN_FILL_EPS < dust_cutoff:
+            final_status = (
+                "FILLED_TRUNCATED" if filled_total > _MIN_FILL_EPS else "SKIPPED_TOO_SMALL"
+            )
+            remaining = max(goal_size - filled_total, 0.0)
+            LOG.info(
+                "maker.sell.position",
+                "[MAKER][SELL] 仓位已为0或仅剩尘埃，结束卖出流程。",
+                token=token_id,
+                position=live_target,
+            )
+            return True
+
+        refreshed_goal = _apply_goal_cap(max(filled_total + live_target, filled_total))
+        refreshed_remaining = max(refreshed_goal - filled_total, 0.0)
+        last_live_position = live_target
+        goal_size = refreshed_goal
+        remaining = refreshed_remaining
+        LOG.info(
+            "maker.sell.position",
+            "[MAKER][SELL] 刷新仓位后按最新可用数量重试 -> "
+            f"goal={goal_size:.{SELL_SIZE_DP}f} remain={remaining:.{SELL_SIZE_DP}f}",
+            token=token_id,
+            goal=goal_size,
+            remaining=remaining,
+        )
+
+        if refreshed_remaining < 0.01 or (
+            api_min_qty and refreshed_remaining + _MIN_FILL_EPS < api_min_qty
+        ):
+            final_status = (
+                "FILLED_TRUNCATED" if filled_total > _MIN_FILL_EPS else "SKIPPED_TOO_SMALL"
+            )
+            remaining = max(goal_size - filled_total, 0.0)
+            LOG.info(
+                "maker.sell.position",
+                "[MAKER][SELL] 刷新后可卖数量不足最小挂单量，结束卖出流程。",
+                token=token_id,
+                remaining=refreshed_remaining,
+            )
+            return True
+
+        consecutive_insufficient_with_position += 1
+        if consecutive_insufficient_with_position > 10:
+            final_status = "FAILED"
+            LOG.error(
+                "maker.sell.position",
+                "[MAKER][SELL] 仓位数据接口返回数据错误，退出卖出流程。",
+                token=token_id,
+            )
+            return True
+        return False
+
     while True:
         if stop_check and stop_check():
             if active_order:
-                _cancel_order(client, active_order)
+                _cancel_order(client, active_order, store=order_store)
                 rec = records.get(active_order)
                 if rec is not None:
                     rec["status"] = "CANCELLED"
@@ -993,9 +1487,12 @@ def maker_sell_follow_ask_with_floor_wait(
             if now < position_refresh_block_until:
                 remaining_wait = max(position_refresh_block_until - now, 0.0)
                 if now >= max(position_refresh_heartbeat_at, 0.0):
-                    print(
+                    LOG.info(
+                        "maker.sell.position",
                         "[MAKER][SELL] 成交后等待仓位刷新，剩余 "
-                        f"{int(remaining_wait)}s 冷却。"
+                        f"{int(remaining_wait)}s 冷却。",
+                        token=token_id,
+                        wait_s=remaining_wait,
                     )
                     position_refresh_heartbeat_at = now + position_refresh_heartbeat_interval
                 continue
@@ -1003,7 +1500,11 @@ def maker_sell_follow_ask_with_floor_wait(
             live_target, error_msg = _pull_live_position("定时")
             if live_target is None:
                 if error_msg:
-                    print(f"[MAKER][SELL] 定时仓位刷新失败：{error_msg}")
+                    LOG.warn(
+                        "maker.sell.position",
+                        f"[MAKER][SELL] 定时仓位刷新失败：{error_msg}",
+                        token=token_id,
+                    )
                 continue
             last_live_position = live_target
             if live_target > goal_cap:
@@ -1019,136 +1520,152 @@ def maker_sell_follow_ask_with_floor_wait(
                 prev_goal = goal_size
                 goal_size = new_goal
                 remaining = max(goal_size - filled_total, 0.0)
-                print(
+                LOG.info(
+                    "maker.sell.goal",
                     "[MAKER][SELL] 仓位更新 -> "
-                    f"{change}目标至 {goal_size:.{SELL_SIZE_DP}f}"
+                    f"{change}目标至 {goal_size:.{SELL_SIZE_DP}f}",
+                    token=token_id,
+                    order_id=active_order,
+                    goal=goal_size,
                 )
                 if remaining <= _MIN_FILL_EPS:
                     if active_order:
-                        _cancel_order(client, active_order)
+                        _cancel_order(client, active_order, store=order_store)
                         rec = records.get(active_order)
                         if rec is not None:
                             rec["status"] = "CANCELLED"
                         active_order = None
-                        active_price = None
+                        active_units = None
                     final_status = "FILLED"
                     break
                 if new_goal < prev_goal - _MIN_FILL_EPS and active_order:
-                    print("[MAKER][SELL] 仓位降低，撤销当前挂单以调整数量")
-                    _cancel_order(client, active_order)
+                    LOG.info(
+                        "maker.sell.goal",
+                        "[MAKER][SELL] 仓位降低，撤销当前挂单以调整数量",
+                        token=token_id,
+                        order_id=active_order,
+                        goal=goal_size,
+                    )
+                    _cancel_order(client, active_order, store=order_store)
                     rec = records.get(active_order)
                     if rec is not None:
                         rec["status"] = "CANCELLED"
                     active_order = None
-                    active_price = None
+                    active_units = None
                     aggressive_timer_start = None
                     aggressive_timer_anchor_fill = None
-                    aggressive_next_price_override = None
-                    next_price_override = None
+                    aggressive_next_units = None
+                    next_units = None
                     continue
 
         if api_min_qty and remaining + _MIN_FILL_EPS < api_min_qty:
             final_status = "FILLED_TRUNCATED" if filled_total > _MIN_FILL_EPS else "SKIPPED_TOO_SMALL"
             break
 
-        ask = _best_ask(client, token_id, best_ask_fn)
+        ask_info = _best_price_info(client, token_id, best_ask_fn, "ask")
+        validated: Optional[PriceSample] = None
         if ask_validation_interval and now >= max(next_ask_validation, 0.0):
             interval = max(ask_validation_interval, poll_sec, 1e-6)
             next_ask_validation = now + interval
             validated = _fetch_best_price(client, token_id, "ask")
-            if validated is not None and validated.price > 0:
-                validated_price = float(validated.price)
-                tolerance = max(tick * 0.5, 1e-6)
-                if ask is None or abs(validated_price - ask) > tolerance:
-                    prev = ask
-                    ask = validated_price
-                    direction = "下行" if prev is not None and validated_price < prev else "上行"
-                    if prev is None:
-                        print(
-                            f"[MAKER][SELL] 卖一校验覆盖：无本地价，采用最新卖一 {ask:.{SELL_PRICE_DP}f}"
-                        )
-                    else:
-                        print(
-                            "[MAKER][SELL] 卖一校验覆盖（" + direction + ") -> "
-                            f"old={prev:.{SELL_PRICE_DP}f} new={ask:.{SELL_PRICE_DP}f}"
-                        )
+        for sample in (ask_info, validated):
+            if sample is not None:
+                _maybe_update_price_dp(sample.decimals)
+        ask_units = _quote_units(ask_info)
+        validated_units = _quote_units(validated)
+        if validated_units is not None and validated_units != ask_units:
+            prev_units = ask_units
+            ask_units = validated_units
+            if prev_units is None:
+                LOG.info(
+                    "maker.sell.ask_check",
+                    f"[MAKER][SELL] 卖一校验覆盖：无本地价，采用最新卖一 {_px(ask_units):.{price_dp_active}f}",
+                    token=token_id,
+                    price=_px(ask_units),
+                )
+            else:
+                direction = "下行" if validated_units < prev_units else "上行"
+                LOG.info(
+                    "maker.sell.ask_check",
+                    "[MAKER][SELL] 卖一校验覆盖（" + direction + ") -> "
+                    f"old={_px(prev_units):.{price_dp_active}f} new={_px(ask_units):.{price_dp_active}f}",
+                    token=token_id,
+                    old_price=_px(prev_units),
+                    price=_px(ask_units),
+                )
         if not aggressive_mode:
-            if ask is None or ask <= 0:
+            if ask_units is None:
                 waiting_for_floor = True
                 if active_order:
-                    _cancel_order(client, active_order)
+                    _cancel_order(client, active_order, store=order_store)
                     rec = records.get(active_order)
                     if rec is not None:
                         rec["status"] = "CANCELLED"
                     active_order = None
-                    active_price = None
+                    active_units = None
                     aggressive_timer_start = None
                     aggressive_timer_anchor_fill = None
-                    aggressive_next_price_override = None
-                    next_price_override = None
+                    aggressive_next_units = None
+                    next_units = None
                 sleep_fn(poll_sec)
                 continue
-            if ask < floor_X - 1e-12:
+            if ask_units < floor_units:
                 if not waiting_for_floor:
-                    print(
-                        f"[MAKER][SELL] 卖一跌破地板，撤单等待 | ask={ask:.{SELL_PRICE_DP}f} floor={floor_X:.{SELL_PRICE_DP}f}"
+                    LOG.info(
+                        "maker.sell.floor",
+                        f"[MAKER][SELL] 卖一跌破地板，撤单等待 | ask={_px(ask_units):.{price_dp_active}f} floor={floor_X:.{price_dp_active}f}",
+                        token=token_id,
+                        order_id=active_order,
+                        price=_px(ask_units),
+                        floor=floor_X,
                     )
                 waiting_for_floor = True
                 if active_order:
-                    _cancel_order(client, active_order)
+                    _cancel_order(client, active_order, store=order_store)
                     rec = records.get(active_order)
                     if rec is not None:
                         rec["status"] = "CANCELLED"
                     active_order = None
-                    active_price = None
+                    active_units = None
                     aggressive_timer_start = None
                     aggressive_timer_anchor_fill = None
-                    aggressive_next_price_override = None
-                    next_price_override = None
+                    aggressive_next_units = None
+                    next_units = None
                 sleep_fn(poll_sec)
                 continue
-            if waiting_for_floor and ask >= floor_X:
+            if waiting_for_floor and ask_units >= floor_units:
                 waiting_for_floor = False
         else:
-            if ask is None or ask <= 0:
+            if ask_units is None:
                 sleep_fn(poll_sec)
                 continue
-            if ask <= floor_float + 1e-12:
+            if ask_units <= floor_units:
                 aggressive_floor_locked = True
-                aggressive_locked_price = floor_float
-            elif aggressive_floor_locked and ask > floor_float + 1e-12:
+                aggressive_locked_units = floor_units
+            elif aggressive_floor_locked and ask_units > floor_units:
                 aggressive_floor_locked = False
-                aggressive_locked_price = None
+                aggressive_locked_units = None
 
         if active_order is None:
-            px_candidate = max(_round_down_to_dp(ask, SELL_PRICE_DP), floor_float)
-            if next_price_override is not None:
-                px_candidate = max(
-                    _round_down_to_dp(next_price_override, SELL_PRICE_DP),
-                    floor_float,
-                )
-                next_price_override = None
+            px_units = max(ask_units, floor_units)
+            if next_units is not None:
+                px_units = max(next_units, floor_units)
+                next_units = None
             if aggressive_mode:
-                if aggressive_next_price_override is not None:
-                    px_candidate = max(
-                        _round_down_to_dp(aggressive_next_price_override, SELL_PRICE_DP),
-                        floor_float,
-                    )
-                    aggressive_next_price_override = None
-                elif aggressive_locked_price is not None:
-                    px_candidate = max(
-                        _round_down_to_dp(aggressive_locked_price, SELL_PRICE_DP),
-                        floor_float,
-                    )
-                if px_candidate <= floor_float + 1e-12:
+                if aggressive_next_units is not None:
+                    px_units = max(aggressive_next_units, floor_units)
+                    aggressive_next_units = None
+                elif aggressive_locked_units is not None:
+                    px_units = max(aggressive_locked_units, floor_units)
+                if px_units <= floor_units:
                     aggressive_floor_locked = True
-                    aggressive_locked_price = floor_float
+                    aggressive_locked_units = floor_units
                 else:
-                    aggressive_locked_price = None
+                    aggressive_locked_units = None
                     aggressive_floor_locked = False
             else:
-                aggressive_next_price_override = None
-            px = px_candidate
+                aggressive_next_units = None
+            px = _px(px_units)
             qty = _floor_to_dp(remaining, SELL_SIZE_DP)
             if qty < 0.01:
                 final_status = "FILLED"
@@ -1168,85 +1685,12 @@ def maker_sell_follow_ask_with_floor_wait(
             try:
                 response = adapter.create_order(payload)
             except Exception as exc:
-                msg = str(exc).lower()
-                insufficient = any(
-                    keyword in msg for keyword in ("insufficient", "balance", "position")
-                )
-                if insufficient:
-                    shortage_retry_count += 1
-                    print("[MAKER][SELL] 下单失败，疑似仓位不足，等待60s后刷新仓位。")
-                    sleep_fn(60)
-                    refreshed_goal: Optional[float] = None
-                    refreshed_remaining: Optional[float] = None
-                    live_target: Optional[float] = None
-                    now = time.time()
-                    blocked_refresh = now < position_refresh_block_until
-                    if blocked_refresh:
-                        remaining_wait = max(position_refresh_block_until - now, 0.0)
-                        print(
-                            "[MAKER][SELL] 成交后等待仓位刷新，跳过本次同步，剩余 "
-                            f"{int(remaining_wait)}s 冷却。"
-                        )
-                    else:
-                        live_target, error_msg = _pull_live_position("余额不足重试")
-                        if live_target is None and error_msg:
-                            print(f"[MAKER][SELL] 无法获取最新仓位：{error_msg}")
-                    if live_target is None:
-                        if blocked_refresh:
-                            missing_position_retry = 0
-                            sleep_fn(60)
-                            continue
-                        missing_position_retry += 1
-                        if missing_position_retry >= 5:
-                            final_status = "FAILED"
-                            print("[MAKER][SELL] 无法获取新仓位，退出卖出流程。")
-                            break
-                        print(
-                            "[MAKER][SELL] 无法获取最新仓位，等待60s后重试同步。 "
-                            f"(attempt {missing_position_retry}/5)"
-                        )
-                        sleep_fn(60)
-                        continue
-                    missing_position_retry = 0
-
-                    dust_cutoff = 0.01
-                    if api_min_qty and api_min_qty > dust_cutoff:
-                        dust_cutoff = api_min_qty
-                    if live_target + _MIN_FILL_EPS < dust_cutoff:
-                        final_status = (
-                            "FILLED_TRUNCATED" if filled_total > _MIN_FILL_EPS else "SKIPPED_TOO_SMALL"
-                        )
-                        remaining = max(goal_size - filled_total, 0.0)
-                        print("[MAKER][SELL] 仓位已为0或仅剩尘埃，结束卖出流程。")
-                        break
-
-                    refreshed_goal = _apply_goal_cap(max(filled_total + live_target, filled_total))
-                    refreshed_remaining = max(refreshed_goal - filled_total, 0.0)
-                    last_live_position = live_target
-                    goal_size = refreshed_goal
-                    remaining = refreshed_remaining
-                    print(
-                        "[MAKER][SELL] 刷新仓位后按最新可用数量重试 -> "
-                        f"goal={goal_size:.{SELL_SIZE_DP}f} remain={remaining:.{SELL_SIZE_DP}f}"
-                    )
-
-                    if refreshed_remaining < 0.01 or (
-                        api_min_qty and refreshed_remaining + _MIN_FILL_EPS < api_min_qty
-                    ):
-                        final_status = (
-                            "FILLED_TRUNCATED" if filled_total > _MIN_FILL_EPS else "SKIPPED_TOO_SMALL"
-                        )
-                        remaining = max(goal_size - filled_total, 0.0)
-                        print("[MAKER][SELL] 刷新后可卖数量不足最小挂单量，结束卖出流程。")
-                        break
-
-                    consecutive_insufficient_with_position += 1
-                    if consecutive_insufficient_with_position > 10:
-                        final_status = "FAILED"
-                        print("[MAKER][SELL] 仓位数据接口返回数据错误，退出卖出流程。")
-                        break
-                    continue
-                raise
+                shortage = _handle_position_shortage(exc)
+                if shortage is None:
+                    raise
+                if shortage:
+                    break
+                continue
             order_id = str(response.get("orderId"))
             if shortage_retry_count or consecutive_insufficient_with_position:
                 shortage_retry_count = 0
@@ -1262,28 +1706,44 @@ def maker_sell_follow_ask_with_floor_wait(
             orders.append(record)
             records[order_id] = record
             accounted[order_id] = 0.0
+            order_store.add(order_id, token_id, "SELL", px, qty)
             active_order = order_id
-            active_price = px
+            active_units = px_units
+            _prime_requote_ladder(
+                adapter, token_id, "SELL", px, qty, tick=price_grid.step, price_dp=price_dp_active
+            )
             if aggressive_mode:
-                if px <= floor_float + 1e-12:
-                    aggressive_locked_price = floor_float
+                if px_units <= floor_units:
+                    aggressive_locked_units = floor_units
                     aggressive_floor_locked = True
                     aggressive_timer_start = None
                     aggressive_timer_anchor_fill = 0.0
                 else:
-                    aggressive_locked_price = None
+                    aggressive_locked_units = None
                     aggressive_floor_locked = False
                     aggressive_timer_start = time.time()
                     aggressive_timer_anchor_fill = 0.0
-            print(
-                f"[MAKER][SELL] 挂单 -> price={px:.{SELL_PRICE_DP}f} qty={qty:.{SELL_SIZE_DP}f} remaining={remaining:.{SELL_SIZE_DP}f}"
+            LOG.info(
+                "maker.sell.place",
+                f"[MAKER][SELL] 挂单 -> price={px:.{price_dp_active}f} qty={qty:.{SELL_SIZE_DP}f} remaining={remaining:.{SELL_SIZE_DP}f}",
+                token=token_id,
+                order_id=active_order,
+                side="SELL",
+                price=px,
+                size=qty,
+                remaining=remaining,
             )
             if progress_probe:
                 interval = max(progress_probe_interval, poll_sec, 1e-6)
                 try:
                     progress_probe()
                 except Exception as probe_exc:
-                    print(f"[MAKER][SELL] 进度探针执行异常：{probe_exc}")
+                    LOG.warn(
+                        "maker.sell.probe",
+                        f"[MAKER][SELL] 进度探针执行异常：{probe_exc}",
+                        token=token_id,
+                        order_id=active_order,
+                    )
                 next_probe_at = time.time() + interval
             continue
 
@@ -1297,13 +1757,23 @@ def maker_sell_follow_ask_with_floor_wait(
             try:
                 progress_probe()
             except Exception as probe_exc:
-                print(f"[MAKER][SELL] 进度探针执行异常：{probe_exc}")
+                LOG.warn(
+                    "maker.sell.probe",
+                    f"[MAKER][SELL] 进度探针执行异常：{probe_exc}",
+                    token=token_id,
+                    order_id=active_order,
+                )
             interval = max(progress_probe_interval, poll_sec, 1e-6)
             next_probe_at = time.time() + interval
         try:
             status_payload = adapter.get_order_status(active_order)
         except Exception as exc:
-            print(f"[MAKER][SELL] 查询订单状态异常：{exc}")
+            LOG.warn(
+                "maker.sell.status",
+                f"[MAKER][SELL] 查询订单状态异常：{exc}",
+                token=token_id,
+                order_id=active_order,
+            )
             status_payload = {"status": "UNKNOWN", "filledAmount": accounted.get(active_order, 0.0)}
 
         record = records.get(active_order)
@@ -1314,7 +1784,7 @@ def maker_sell_follow_ask_with_floor_wait(
                 record_size = float(record.get("size", 0.0) or 0.0)
             except Exception:
                 record_size = None
-        last_price_hint = active_price
+        last_price_hint = _px(active_units) if active_units is not None else None
         if last_price_hint is None:
             last_price_hint = _coerce_float(status_payload.get("avgPrice"))
         if last_price_hint is None:
@@ -1327,88 +1797,113 @@ def maker_sell_follow_ask_with_floor_wait(
             float(last_price_hint),
             status_text=status_text,
             expected_full_size=record_size,
+            store=order_store,
         )
         prev_filled_total = filled_total
         filled_total = sum(accounted.values())
         remaining = max(goal_size - filled_total, 0.0)
         if filled_total > prev_filled_total + _MIN_FILL_EPS:
+            FILLS.labels("SELL").inc()
+            FILLED_SIZE.labels("SELL").inc(filled_total - prev_filled_total)
             position_refresh_block_until = time.time() + position_refresh_delay_sec
             position_refresh_heartbeat_at = time.time() + position_refresh_heartbeat_interval
-            print("[MAKER][SELL] 检测到成交，延迟5分钟再同步持仓。")
+            LOG.info(
+                "maker.sell.fill",
+                "[MAKER][SELL] 检测到成交，延迟5分钟再同步持仓。",
+                token=token_id,
+                order_id=active_order,
+                filled=filled_total,
+            )
         status_text_upper = status_text.upper()
         if record is not None:
             record["filled"] = filled_amount
             record["status"] = status_text_upper
             if avg_price is not None:
                 record["avg_price"] = avg_price
-            price_display = record.get("price", active_price)
+            price_display = record.get("price")
             total_size = float(record.get("size", 0.0) or 0.0)
             remaining_slice = max(total_size - filled_amount, 0.0)
             if price_display is not None:
-                print(
-                    f"[MAKER][SELL] 挂单状态 -> price={float(price_display):.{SELL_PRICE_DP}f} "
+                LOG.info(
+                    "maker.sell.status",
+                    f"[MAKER][SELL] 挂单状态 -> price={float(price_display):.{price_dp_active}f} "
                     f"sold={filled_amount:.{SELL_SIZE_DP}f} remaining={remaining_slice:.{SELL_SIZE_DP}f} "
-                    f"status={status_text_upper}"
+                    f"status={status_text_upper}",
+                    token=token_id,
+                    order_id=active_order,
+                    side="SELL",
+                    price=float(price_display),
+                    filled=filled_amount,
+                    remaining=remaining_slice,
+                    status=status_text_upper,
                 )
 
         if api_min_qty and remaining < api_min_qty:
             if active_order:
-                _cancel_order(client, active_order)
+                _cancel_order(client, active_order, store=order_store)
                 rec = records.get(active_order)
                 if rec is not None:
                     rec["status"] = "CANCELLED"
                 active_order = None
-                active_price = None
+                active_units = None
                 aggressive_timer_start = None
                 aggressive_timer_anchor_fill = None
-                aggressive_next_price_override = None
-                next_price_override = None
+                aggressive_next_units = None
+                next_units = None
             final_status = "FILLED_TRUNCATED" if filled_total > _MIN_FILL_EPS else "SKIPPED_TOO_SMALL"
             break
 
         if remaining <= 0.0 or _floor_to_dp(remaining, SELL_SIZE_DP) < 0.01:
             if active_order:
-                _cancel_order(client, active_order)
+                _cancel_order(client, active_order, store=order_store)
                 rec = records.get(active_order)
                 if rec is not None:
                     rec["status"] = "CANCELLED"
                 active_order = None
                 aggressive_timer_start = None
                 aggressive_timer_anchor_fill = None
-                aggressive_next_price_override = None
-                next_price_override = None
+                aggressive_next_units = None
+                next_units = None
             final_status = "FILLED"
             break
 
-        ask = _best_ask(client, token_id, best_ask_fn)
+        ask_info = _best_price_info(client, token_id, best_ask_fn, "ask")
+        if ask_info is not None:
+            _maybe_update_price_dp(ask_info.decimals)
+        ask_units = _quote_units(ask_info)
         if not aggressive_mode:
-            if ask is None:
+            if ask_units is None:
                 continue
-            if ask < floor_X - 1e-12:
-                print(
-                    f"[MAKER][SELL] 卖一再次跌破地板，撤单等待 | ask={ask:.{SELL_PRICE_DP}f} floor={floor_X:.{SELL_PRICE_DP}f}"
+            if ask_units < floor_units:
+                LOG.info(
+                    "maker.sell.floor",
+                    f"[MAKER][SELL] 卖一再次跌破地板，撤单等待 | ask={_px(ask_units):.{price_dp_active}f} floor={floor_X:.{price_dp_active}f}",
+                    token=token_id,
+                    order_id=active_order,
+                    price=_px(ask_units),
+                    floor=floor_X,
                 )
-                _cancel_order(client, active_order)
+                _cancel_order(client, active_order, store=order_store)
                 rec = records.get(active_order)
                 if rec is not None:
                     rec["status"] = "CANCELLED"
                 active_order = None
-                active_price = None
+                active_units = None
                 waiting_for_floor = True
                 aggressive_timer_start = None
                 aggressive_timer_anchor_fill = None
-                aggressive_next_price_override = None
-                next_price_override = None
+                aggressive_next_units = None
+                next_units = None
                 continue
         else:
-            if ask is None:
+            if ask_units is None:
                 continue
-            if ask <= floor_float + 1e-12:
+            if ask_units <= floor_units:
                 aggressive_floor_locked = True
-                aggressive_locked_price = floor_float
-            elif aggressive_floor_locked and ask > floor_float + 1e-12:
+                aggressive_locked_units = floor_units
+            elif aggressive_floor_locked and ask_units > floor_units:
                 aggressive_floor_locked = False
-                aggressive_locked_price = None
+                aggressive_locked_units = None
 
         if aggressive_mode and active_order:
             if aggressive_timer_anchor_fill is None:
@@ -1422,105 +1917,172 @@ def maker_sell_follow_ask_with_floor_wait(
                 aggressive_timer_anchor_fill = current_filled
             if not aggressive_floor_locked and aggressive_timer_start is not None:
                 elapsed = time.time() - aggressive_timer_start
-                if elapsed >= aggressive_timeout and active_price is not None:
-                    target_price = active_price - aggressive_step
-                    if target_price <= floor_float + 1e-12:
+                if elapsed >= aggressive_timeout and active_units is not None:
+                    target_units = active_units - step_units
+                    if target_units <= floor_units:
                         aggressive_floor_locked = True
-                        aggressive_locked_price = floor_float
+                        aggressive_locked_units = floor_units
                         aggressive_timer_start = None
                         aggressive_timer_anchor_fill = current_filled
-                        if active_price > floor_float + 1e-12:
-                            print(
-                                "[MAKER][SELL][激进] 触及地板价，保持地板挂单"
+                        if active_units > floor_units:
+                            LOG.info(
+                                "maker.sell.aggressive",
+                                "[MAKER][SELL][激进] 触及地板价，保持地板挂单",
+                                token=token_id,
+                                order_id=active_order,
+                                price=floor_X,
                             )
-                            _cancel_order(client, active_order)
+                            _cancel_order(client, active_order, store=order_store)
                             rec = records.get(active_order)
                             if rec is not None:
                                 rec["status"] = "CANCELLED"
                             active_order = None
-                            active_price = None
-                            aggressive_next_price_override = floor_float
-                            next_price_override = floor_float
+                            active_units = None
+                            aggressive_next_units = floor_units
+                            next_units = floor_units
                         continue
-                    next_px = max(
-                        _round_down_to_dp(target_price, SELL_PRICE_DP),
-                        floor_float,
-                    )
-                    if next_px < active_price - 1e-12:
-                        print(
+                    next_px_units = max(target_units, floor_units)
+                    if next_px_units < active_units:
+                        LOG.info(
+                            "maker.sell.aggressive",
                             "[MAKER][SELL][激进] 挂单超时未成交，下调挂价 -> "
-                            f"old={active_price:.{SELL_PRICE_DP}f} new={next_px:.{SELL_PRICE_DP}f}"
+                            f"old={_px(active_units):.{price_dp_active}f} new={_px(next_px_units):.{price_dp_active}f}",
+                            token=token_id,
+                            order_id=active_order,
+                            old_price=_px(active_units),
+                            price=_px(next_px_units),
                         )
-                        _cancel_order(client, active_order)
+                        _cancel_order(client, active_order, store=order_store)
                         rec = records.get(active_order)
                         if rec is not None:
                             rec["status"] = "CANCELLED"
                         active_order = None
-                        active_price = None
-                        aggressive_next_price_override = next_px
+                        active_units = None
+                        aggressive_next_units = next_px_units
                         aggressive_timer_start = None
                         aggressive_timer_anchor_fill = current_filled
                         continue
 
-        if active_price is not None and ask <= active_price - tick - 1e-12:
-            new_px = max(_round_down_to_dp(ask, SELL_PRICE_DP), float(floor_X))
+        if active_units is not None and ask_units < active_units:
+            new_px_units = max(ask_units, floor_units)
+            new_px = _px(new_px_units)
             if aggressive_mode:
-                if active_price <= floor_float + 1e-12:
+                if active_units <= floor_units:
                     continue
-                if new_px <= floor_float + 1e-12:
+                if new_px_units <= floor_units:
                     aggressive_floor_locked = True
-                    aggressive_locked_price = floor_float
-                    if active_price <= floor_float + 1e-12:
-                        continue
-                    print(
-                        "[MAKER][SELL][激进] 卖一跌至地板价，保持地板挂单"
+                    aggressive_locked_units = floor_units
+                    LOG.info(
+                        "maker.sell.aggressive",
+                        "[MAKER][SELL][激进] 卖一跌至地板价，保持地板挂单",
+                        token=token_id,
+                        order_id=active_order,
+                        price=floor_X,
                     )
-                    _cancel_order(client, active_order)
+                    _cancel_order(client, active_order, store=order_store)
                     rec = records.get(active_order)
                     if rec is not None:
                         rec["status"] = "CANCELLED"
                     active_order = None
-                    active_price = None
+                    active_units = None
                     aggressive_timer_start = None
                     aggressive_timer_anchor_fill = None
-                    aggressive_next_price_override = floor_float
-                    next_price_override = floor_float
+                    aggressive_next_units = floor_units
+                    next_units = floor_units
                     continue
-            print(
-                f"[MAKER][SELL] 卖一下行 -> 撤单重挂 | old={active_price:.{SELL_PRICE_DP}f} new={new_px:.{SELL_PRICE_DP}f}"
+            LOG.info(
+                "maker.sell.requote",
+                f"[MAKER][SELL] 卖一下行 -> 撤单重挂 | old={_px(active_units):.{price_dp_active}f} new={new_px:.{price_dp_active}f}",
+                token=token_id,
+                order_id=active_order,
+                side="SELL",
+                old_price=_px(active_units),
+                price=new_px,
             )
-            if aggressive_mode and new_px > floor_float + 1e-12:
+            REQUOTES.labels("SELL").inc()
+            if aggressive_mode and new_px_units > floor_units:
                 aggressive_floor_locked = False
-                aggressive_locked_price = None
-            _cancel_order(client, active_order)
+                aggressive_locked_units = None
+            new_qty = _floor_to_dp(remaining, SELL_SIZE_DP)
+            if (
+                not aggressive_mode
+                and new_qty >= 0.01
+                and not (api_min_qty and new_qty + _MIN_FILL_EPS < api_min_qty)
+            ):
+                old_order = active_order
+                active_order = None
+                active_units = None
+                replaced, notional_sum, replace_error = _replace_active_order(
+                    adapter,
+                    client,
+                    old_order,
+                    {
+                        "tokenId": token_id,
+                        "side": "SELL",
+                        "price": new_px,
+                        "size": new_qty,
+                        "timeInForce": "GTC",
+                        "type": "GTC",
+                        "allowPartial": True,
+                    },
+                    orders=orders,
+                    records=records,
+                    accounted=accounted,
+                    notional_sum=notional_sum,
+                    size_dp=SELL_SIZE_DP,
+                    order_store=order_store,
+                )
+                filled_total = sum(accounted.values())
+                remaining = max(goal_size - filled_total, 0.0)
+                if replaced is not None:
+                    active_order = replaced
+                    active_units = new_px_units
+                    next_units = None
+                    _prime_requote_ladder(
+                        adapter,
+                        token_id,
+                        "SELL",
+                        new_px,
+                        new_qty,
+                        tick=price_grid.step,
+                        price_dp=price_dp_active,
+                    )
+                else:
+                    next_units = new_px_units
+                    if replace_error is not None:
+                        shortage = _handle_position_shortage(replace_error)
+                        if shortage:
+                            break
+                continue
+            _cancel_order(client, active_order, store=order_store)
             rec = records.get(active_order)
             if rec is not None:
                 rec["status"] = "CANCELLED"
             active_order = None
-            active_price = None
+            active_units = None
             aggressive_timer_start = None
             aggressive_timer_anchor_fill = None
-            aggressive_next_price_override = new_px if aggressive_mode else None
-            next_price_override = new_px
+            aggressive_next_units = new_px_units if aggressive_mode else None
+            next_units = new_px_units
             continue
 
         final_states = {"FILLED", "MATCHED", "COMPLETED", "EXECUTED"}
         cancel_states = {"CANCELLED", "CANCELED", "REJECTED", "EXPIRED"}
         if status_text_upper in final_states:
             active_order = None
-            active_price = None
+            active_units = None
             aggressive_timer_start = None
             aggressive_timer_anchor_fill = None
-            aggressive_next_price_override = None
-            next_price_override = None
+            aggressive_next_units = None
+            next_units = None
             continue
         if status_text_upper in cancel_states:
             active_order = None
-            active_price = None
+            active_units = None
             aggressive_timer_start = None
             aggressive_timer_anchor_fill = None
-            aggressive_next_price_override = None
-            next_price_override = None
+            aggressive_next_units = None
+            next_units = None
             continue
 
     avg_price = notional_sum / filled_total if filled_total > 0 else None
@@ -0,0 +1,79 @@
+from pathlib import Path
+import io
+import json
+import sys
+import threading
+import time
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from trading.async_log import AsyncLogger, parse_rate_limits
+
+
+class _SlowStream(io.StringIO):
+    def write(self, text):
+        time.sleep(0.2)
+        return super().write(text)
+
+
+def test_slow_sink_does_not_block_producers():
+    stream = _SlowStream()
+    logger = AsyncLogger(stream=stream, flush_interval=0.01)
+
+    started = time.perf_counter()
+    for i in range(200):
+        logger.info("maker.sell.status", f"[MAKER][SELL] 挂单状态 -> {i}", order_id=str(i))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.1
+    assert logger.flush(timeout=5.0)
+    logger.close()
+    lines = stream.getvalue().splitlines()
+    assert lines[0] == "[MAKER][SELL] 挂单状态 -> 0"
+    assert len(lines) == 200
+
+
+def test_rate_limit_and_json_records(tmp_path):
+    now = [100.0]
+    path = tmp_path / "log.jsonl"
+    logger = AsyncLogger(
+        stream=io.StringIO(),
+        json_path=str(path),
+        rate_limits=parse_rate_limits("watchdog.orders=5, bad, x=y"),
+        clock=lambda: now[0],
+    )
+
+    assert logger.info("watchdog.orders", "a", token="T")
+    assert not logger.info("watchdog.orders", "b", token="T")
+    assert not logger.info("watchdog.orders", "c", token="T")
+    assert logger.info("other", "d", latency_ms=1.5)
+    now[0] += 5
+    assert logger.info("watchdog.orders", "e", token="T")
+    logger.close()
+
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [r["msg"] for r in records] == ["a", "d", "e"]
+    assert records[1]["latency_ms"] == 1.5
+    assert records[2]["suppressed"] == 2 and records[2]["token"] == "T"
+
+
+def test_crash_in_thread_dumps_ring(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "excepthook", sys.excepthook)
+    monkeypatch.setattr(threading, "excepthook", lambda args: None)
+    logger = AsyncLogger(stream=io.StringIO(), ring_size=3, crash_dir=str(tmp_path))
+    logger.install_crash_dump()
+    for i in range(5):
+        logger.info("tick", f"tick {i}")
+
+    def _boom():
+        raise ValueError("boom")
+
+    worker = threading.Thread(target=_boom, name="maker-sell")
+    worker.start()
+    worker.join()
+    logger.close()
+
+    (dump,) = tmp_path.glob("crash-*.jsonl")
+    records = [json.loads(line) for line in dump.read_text(encoding="utf-8").splitlines()]
+    assert [r["msg"] for r in records[:2]] == ["tick 3", "tick 4"]
+    assert records[-1]["level"] == "ERROR" and "maker-sell" in records[-1]["msg"]
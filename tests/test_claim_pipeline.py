@@ -0,0 +1,121 @@
+from pathlib import Path
+import sys
+import threading
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from trading.claim_pipeline import ClaimJob, ClaimLedger, ClaimPipeline, group_by_market, parse_claim_response
+
+
+def test_group_by_market_merges_tokens_and_keeps_orphans():
+    positions = [
+        {"market": "m1", "token": "yes", "amount": 2.0},
+        {"market": "m2", "token": "no", "amount": 1.0},
+        {"market": "m1", "token": "no", "amount": 3.0},
+        {"market": "m1", "token": "yes", "amount": None},
+        {"market": None, "token": "x", "amount": 5.0},
+    ]
+    jobs, orphans = group_by_market(
+        positions,
+        market_of=lambda p: p["market"],
+        token_of=lambda p: p["token"],
+        amount_of=lambda p: p["amount"],
+    )
+    assert [(j.market_id, j.token_ids, j.amount_hint, j.positions) for j in jobs] == [
+        ("m1", ["yes", "no"], 5.0, 3),
+        ("m2", ["no"], 1.0, 1),
+    ]
+    assert orphans == [positions[-1]]
+
+
+def test_pipeline_retries_with_backoff_and_runs_concurrently():
+    calls = {}
+    lock = threading.Lock()
+    barrier = threading.Barrier(3, timeout=5)
+    sleeps = []
+
+    def _submit(job):
+        with lock:
+            calls[job.market_id] = calls.get(job.market_id, 0) + 1
+            n = calls[job.market_id]
+        if n == 1:
+            barrier.wait()  # all three markets are in flight at once
+        if job.market_id == "flaky" and n < 3:
+            raise RuntimeError("502")
+        if job.market_id == "dead":
+            return False, None
+        return True, 1.5
+
+    pipeline = ClaimPipeline(
+        _submit, workers=3, max_attempts=3, backoff=1.0, max_backoff=1.5,
+        sleep=sleeps.append, jitter=lambda: 1.0,
+    )
+    report = pipeline.run([ClaimJob("ok"), ClaimJob("flaky"), ClaimJob("dead")])
+
+    by_market = {o.market_id: o for o in report.outcomes}
+    assert by_market["ok"].ok and by_market["ok"].attempts == 1
+    assert by_market["flaky"].ok and by_market["flaky"].attempts == 3
+    assert not by_market["dead"].ok and by_market["dead"].attempts == 3
+    assert sorted(sleeps) == [1.0, 1.0, 1.5, 1.5]
+    assert report.total_amount == 3.0 and report.attempts == 7
+
+
+def test_ledger_skips_claimed_markets_on_rerun(tmp_path):
+    path = tmp_path / "progress" / "claims.jsonl"
+    results = {"a": True, "b": False}
+    submit = lambda job: (results[job.market_id], 1.0 if results[job.market_id] else None)  # noqa: E731
+
+    first = ClaimPipeline(submit, max_attempts=1, ledger=ClaimLedger(str(path))).run([ClaimJob("a"), ClaimJob("b")])
+    assert [o.market_id for o in first.claimed] == ["a"]
+
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write('{"market_id": "c", "ok": tr')  # torn tail from a killed run
+
+    results["b"] = True
+    ledger = ClaimLedger(str(path))
+    assert ledger.is_claimed("a") and not ledger.is_claimed("b") and "b" in ledger.failed
+    second = ClaimPipeline(submit, max_attempts=1, ledger=ledger).run([ClaimJob("a"), ClaimJob("b")])
+    assert second.skipped == ["a"]
+    assert [o.market_id for o in second.claimed] == ["b"]
+    assert ClaimLedger(str(path)).claimed.keys() == {"a", "b"}
+
+
+def test_claims_recorded_by_another_process_are_skipped(tmp_path):
+    path = str(tmp_path / "claims.jsonl")
+    ours, theirs = ClaimLedger(path), ClaimLedger(path)
+    submitted = []
+
+    def submit(job):
+        submitted.append(job.market_id)
+        return True, 1.0
+
+    ClaimPipeline(submit, ledger=theirs).run([ClaimJob("a")])
+    report = ClaimPipeline(submit, ledger=ours).run([ClaimJob("a"), ClaimJob("b")])
+
+    assert submitted == ["a", "b"]
+    assert report.skipped == ["a"] and [o.market_id for o in report.claimed] == ["b"]
+
+
+def test_parse_claim_response_requires_a_positive_answer():
+    assert parse_claim_response({"success": True, "payout": "2.5"}) == (True, 2.5)
+    assert parse_claim_response({"positions": [{"claimableAmount": 1}, {"amount": "2"}]}) == (True, 3.0)
+    assert parse_claim_response({"error": "not redeemable"}) == (False, None)
+    assert parse_claim_response({}) == (False, None)
+    assert parse_claim_response(None) == (False, None)
+
+
+def test_old_ledger_claims_are_reverified_against_the_live_list(tmp_path):
+    path = str(tmp_path / "claims.jsonl")
+    now = [1000.0]
+    submit = lambda job: (True, 1.0)  # noqa: E731
+    ClaimPipeline(submit, ledger=ClaimLedger(path, clock=lambda: now[0])).run([ClaimJob("a")])
+
+    now[0] += 60.0
+    recent = ClaimPipeline(submit, ledger=ClaimLedger(path, reverify_after=600.0, clock=lambda: now[0]))
+    assert recent.run([ClaimJob("a")]).skipped == ["a"]
+
+    # Still listed as claimable long after the recorded claim: it did not take.
+    now[0] += 3600.0
+    stale = ClaimPipeline(submit, ledger=ClaimLedger(path, reverify_after=600.0, clock=lambda: now[0]))
+    report = stale.run([ClaimJob("a")])
+    assert report.skipped == [] and [o.market_id for o in report.claimed] == ["a"]
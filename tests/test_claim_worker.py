@@ -0,0 +1,107 @@
+from pathlib import Path
+import sys
+import threading
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from trading.claim_pipeline import ClaimJob, ClaimLedger
+from trading.claim_worker import ClaimWorker, redeemable_jobs
+
+
+def test_redeemable_jobs_only_takes_flagged_positions_with_size():
+    positions = [
+        {"conditionId": "0xa", "asset": "1", "size": 10, "currentValue": 10, "redeemable": True},
+        {"conditionId": "0xa", "asset": "2", "size": "4", "currentValue": 0, "redeemable": "true"},
+        {"conditionId": "0xb", "asset": "3", "size": 5, "currentValue": 2.5, "redeemable": False},
+        {"conditionId": "0xc", "asset": "4", "size": 0, "redeemable": True},
+        {"asset": "5", "size": 3, "redeemable": True},
+    ]
+    jobs = redeemable_jobs(positions)
+    assert [(j.market_id, j.token_ids, j.amount_hint, j.positions) for j in jobs] == [("0xa", ["1", "2"], 10.0, 2)]
+
+
+def test_notifications_are_batched_per_market_and_claimed_once(tmp_path):
+    batches = []
+    lock = threading.Lock()
+
+    def _submit(job):
+        with lock:
+            batches.append((job.market_id, sorted(job.token_ids)))
+        return True, None
+
+    ledger = ClaimLedger(str(tmp_path / "claims.jsonl"))
+    worker = ClaimWorker(_submit, batch_window=0.2, ledger=ledger).start()
+    assert worker.notify("m1", ["yes"])
+    assert worker.notify("m1", ["no"])
+    assert worker.notify("m2", ["yes"])
+    assert worker.wait_idle(5)
+    assert sorted(batches) == [("m1", ["no", "yes"]), ("m2", ["yes"])]
+
+    assert not worker.notify("m1", ["yes"])  # already claimed
+    assert worker.stop(timeout=5)
+    assert ClaimWorker(_submit, ledger=ClaimLedger(ledger.path)).is_claimed("m2")
+
+
+def test_scan_feeds_the_queue_and_failed_markets_are_retried_on_next_scan():
+    attempts = {}
+    scanned = threading.Event()
+
+    def _submit(job):
+        attempts[job.market_id] = attempts.get(job.market_id, 0) + 1
+        return attempts[job.market_id] > 1, None  # first attempt fails
+
+    def _scan():
+        scanned.set()
+        return [ClaimJob("m1", ["yes"])]
+
+    worker = ClaimWorker(_submit, scan=_scan, scan_interval=3600, batch_window=0, max_attempts=1).start()
+    assert scanned.wait(5) and worker.wait_idle(5)
+    assert attempts == {"m1": 1} and not worker.is_claimed("m1")
+
+    scanned.clear()
+    worker.scan_now()
+    assert scanned.wait(5) and worker.wait_idle(5)
+    assert attempts == {"m1": 2} and worker.is_claimed("m1")
+
+    scanned.clear()
+    worker.scan_now()
+    assert scanned.wait(5) and worker.wait_idle(5)
+    assert attempts == {"m1": 2}
+
+    worker.notify("m9", ["yes"])
+    assert worker.stop(drain=True, timeout=5)
+    assert attempts["m9"] == 1
+
+
+def test_runner_claim_is_judged_by_the_response(monkeypatch):
+    import Volatility_arbitrage_run as run
+
+    class Client:
+        def __init__(self, resp):
+            self.resp = resp
+
+        def claim_positions(self, **kwargs):
+            return self.resp
+
+    monkeypatch.setattr(run, "_extract_api_creds", lambda client: None)  # no HTTP fallback
+    assert run._claim_market(Client({"success": True, "payout": 3}), "m1", ["t1"]) == (True, 3.0)
+    assert run._claim_market(Client({"error": "nothing to redeem"}), "m1", ["t1"]) == (False, None)
+
+
+def test_runner_notifies_with_the_condition_id_the_scan_uses(tmp_path):
+    import Volatility_arbitrage_run as run
+
+    meta = run._market_meta_from_obj({"id": "512345", "conditionId": "0xabc", "slug": "btc-up"})
+    assert meta["market_id"] == "512345"
+    assert run._claim_key(meta) == "0xabc"
+
+    claimed = []
+    ledger = ClaimLedger(str(tmp_path / "claims.jsonl"))
+    worker = ClaimWorker(lambda job: (claimed.append(job.market_id) or True, None), batch_window=0, ledger=ledger).start()
+    assert worker.notify(run._claim_key(meta), ["yes"])
+    assert worker.wait_idle(5)
+    (scanned,) = redeemable_jobs([{"conditionId": "0xabc", "asset": "yes", "size": 3, "redeemable": True}])
+    assert worker.is_claimed(scanned.market_id)
+    assert not worker.notify(scanned.market_id, scanned.token_ids)
+    assert worker.stop(timeout=5)
+    assert claimed == ["0xabc"]
@@ -0,0 +1,69 @@
+from pathlib import Path
+import sys
+import threading
+import time
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from Volatility_arbitrage_strategy import ActionType, StrategyConfig, VolArbStrategy
+from trading.conflation import TickConflator, run_worker
+from trading.metrics import TICKS_CONFLATED
+
+
+def test_latest_quote_wins_with_aggregates():
+    conflator = TickConflator()
+    before = TICKS_CONFLATED.labels("A").value
+    for bid, ask in [(0.40, 0.42), (0.30, 0.32), (0.50, 0.52), (0.44, 0.46)]:
+        conflator.offer("A", bid, ask, bid, ts=1.0)
+    conflator.offer("B", 0.1, 0.2, 0.1, ts=2.0)
+
+    ticks = {t.asset_id: t for t in conflator.drain(timeout=0)}
+
+    a = ticks["A"]
+    assert (a.best_bid, a.best_ask, a.count, a.conflated) == (0.44, 0.46, 4, 3)
+    assert abs(a.mid_min - 0.31) < 1e-9 and abs(a.mid_max - 0.51) < 1e-9
+    assert ticks["B"].count == 1
+    assert TICKS_CONFLATED.labels("A").value - before == 3
+    assert conflator.drain(timeout=0.01) == []
+
+
+def test_slow_worker_never_blocks_the_producer():
+    conflator = TickConflator()
+    stop = threading.Event()
+    seen = []
+
+    def _slow_handler(tick):
+        seen.append(tick)
+        time.sleep(0.05)
+
+    worker = threading.Thread(target=run_worker, args=(conflator, _slow_handler, stop), kwargs={"poll_timeout": 0.05})
+    worker.start()
+    started = time.perf_counter()
+    for i in range(5000):
+        conflator.offer("A", i / 10000, i / 10000 + 0.01, 0.0, ts=float(i))
+    produce_seconds = time.perf_counter() - started
+    deadline = time.time() + 2
+    while (not seen or seen[-1].ts != 4999.0) and time.time() < deadline:
+        time.sleep(0.01)
+    stop.set()
+    conflator.close()
+    worker.join(timeout=2)
+
+    assert produce_seconds < 0.5
+    assert seen[-1].ts == 4999.0
+    assert len(seen) < 5000
+    assert sum(t.count for t in seen) == 5000
+
+
+def test_conflated_mid_high_counts_towards_the_drop_window():
+    cfg = StrategyConfig(token_id="T", drop_pct=0.05)
+    seen = VolArbStrategy(cfg)
+    skipped = VolArbStrategy(cfg)
+
+    for strategy in (seen, skipped):
+        strategy.on_tick(best_ask=0.51, best_bid=0.49, ts=1.0)
+    # The spike to 0.60 was overwritten before the worker got to it.
+    assert skipped.on_tick(best_ask=0.51, best_bid=0.49, ts=2.0) is None
+    action = seen.on_tick(best_ask=0.51, best_bid=0.49, ts=2.0, mid_low=0.50, mid_high=0.60)
+
+    assert action is not None and action.action == ActionType.BUY
@@ -0,0 +1,258 @@
+from pathlib import Path
+import multiprocessing
+import sys
+import threading
+import time
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import trading.coordinator as coordinator_module
+from trading.coordinator import Coordinator, CoordinatorServer, HashRing, LeaseWorker, call
+
+MARKETS = {f"m{i}": {"inputs": [f"market-{i}"]} for i in range(12)}
+
+
+def test_ring_moves_only_the_joining_nodes_share():
+    ring = HashRing(["a", "b", "c"])
+    before = {m: ring.owner(m) for m in (f"market-{i}" for i in range(500))}
+    ring.add("d")
+    moved = {m for m in before if ring.owner(m) != before[m]}
+
+    assert moved and all(ring.owner(m) == "d" for m in moved)
+    assert 50 < len(moved) < 250
+    ring.remove("d")
+    assert {m: ring.owner(m) for m in before} == before
+
+
+def test_new_owner_is_granted_only_after_old_owner_releases_or_lease_expires():
+    now = [0.0]
+    coord = Coordinator(MARKETS, lease_ttl=10.0, worker_timeout=10.0, clock=lambda: now[0])
+    grants_a = coord.heartbeat("a", {})["grant"]
+    assert len(grants_a) == len(MARKETS)
+    held_a = {g["market"]: g["epoch"] for g in grants_a}
+
+    assert coord.heartbeat("b", {})["grant"] == []
+    reply_a = coord.heartbeat("a", held_a)
+    moving = set(reply_a["release"])
+    assert moving and moving == {m for m, t in coord.status()["targets"].items() if t == "b"}
+    assert coord.heartbeat("b", {})["grant"] == []
+
+    # a releases one market cleanly; b gets it without cancel_stale.
+    first = sorted(moving)[0]
+    coord.heartbeat("a", {m: e for m, e in held_a.items() if m != first}, [{"market": first, "epoch": 1, "clean": True}])
+    grants_b = coord.heartbeat("b", {})["grant"]
+    assert [(g["market"], g["epoch"], g["cancel_stale"]) for g in grants_b] == [(first, 2, False)]
+
+    # a goes silent: the rest only move after the lease expires, flagged stale.
+    now[0] = 9.0
+    assert {g["market"] for g in coord.heartbeat("b", {first: 2})["grant"]} == set()
+    now[0] = 10.5
+    grants_b = coord.heartbeat("b", {first: 2})["grant"]
+    assert {g["market"] for g in grants_b} == set(MARKETS) - {first}
+    assert all(g["cancel_stale"] and g["epoch"] == 2 for g in grants_b)
+
+
+class _PositionHost:
+    """A runner that still holds shares when it is released."""
+
+    def __init__(self, positions=None):
+        self.positions = dict(positions or {})
+        self.configs = {}
+
+    def acquire(self, market_id, config, cancel_stale):
+        self.configs[market_id] = dict(config)
+
+    def release(self, market_id):
+        return True
+
+    def kill(self, market_id):
+        pass
+
+    def finished(self, market_id):
+        return None
+
+    def handover(self, market_id):
+        return self.positions.get(market_id)
+
+
+def test_handover_passes_the_open_position_to_the_new_owner(monkeypatch):
+    coord = Coordinator(MARKETS, lease_ttl=10.0)
+    monkeypatch.setattr(
+        coordinator_module,
+        "call",
+        lambda address, request, *, timeout=5.0: coord.heartbeat(
+            request["worker"], request["held"], request["released"], draining=request["draining"]
+        ),
+    )
+    inventory = {"position_size": 12.0, "entry_price": 0.41}
+    host_a = _PositionHost({m: inventory for m in MARKETS})
+    host_b = _PositionHost()
+    worker_a = LeaseWorker("a", "coord", host_a)
+    worker_b = LeaseWorker("b", "coord", host_b)
+    worker_a.heartbeat_once()
+    assert all("handover" not in config for config in host_a.configs.values())
+
+    worker_b.heartbeat_once()
+    worker_a.heartbeat_once()
+    moving = {m for m, t in coord.status()["targets"].items() if t == "b"}
+    assert moving
+    assert _wait_for(lambda: set(worker_a.held()) == set(MARKETS) - moving, timeout=5.0)
+    worker_a.heartbeat_once()
+    worker_b.heartbeat_once()
+
+    assert set(host_b.configs) == moving
+    for market_id in moving:
+        assert host_b.configs[market_id]["handover"] == inventory
+        assert host_b.configs[market_id]["inputs"] == MARKETS[market_id]["inputs"]
+
+
+def test_runner_host_reports_the_position_written_at_release(tmp_path):
+    script = (
+        "import json, os, sys\n"
+        "sys.stdin.readline()\n"
+        "state = json.loads(os.environ['POLY_HANDOVER_STATE'] or 'null') or {'position_size': 0.0}\n"
+        "state['position_size'] += 5.0\n"
+        "json.dump(state, open(os.environ['POLY_HANDOVER_FILE'], 'w'))\n"
+    )
+    host = coordinator_module.RunnerProcessHost([sys.executable, "-c", script], release_timeout=10.0)
+    host.acquire("m0", {"handover": {"position_size": 7.0, "entry_price": 0.35}}, False)
+
+    assert host.release("m0") is True
+    assert host.handover("m0") == {"position_size": 12.0, "entry_price": 0.35}
+    assert host.handover("m0") is None
+
+
+class _StuckHost:
+    """A runner whose release never finishes on its own (e.g. its REST calls hang)."""
+
+    def __init__(self):
+        self.killed_at = {}
+        self._killed = {}
+        self.clock = None
+
+    def acquire(self, market_id, config, cancel_stale):
+        self._killed[market_id] = threading.Event()
+
+    def release(self, market_id):
+        self._killed[market_id].wait(5)
+        return False
+
+    def kill(self, market_id):
+        self.killed_at[market_id] = self.clock()
+        self._killed[market_id].set()
+
+    def finished(self, market_id):
+        return None
+
+
+def test_partitioned_worker_kills_its_runners_before_the_lease_expires(monkeypatch):
+    now = [0.0]
+    clock = lambda: now[0]
+    coord = Coordinator(MARKETS, lease_ttl=10.0, clock=clock)
+    partitioned = [False]
+
+    def fake_call(address, request, *, timeout=5.0):
+        if partitioned[0]:
+            raise OSError("coordinator unreachable")
+        return coord.heartbeat(request["worker"], request["held"], request["released"], draining=request["draining"])
+
+    monkeypatch.setattr(coordinator_module, "call", fake_call)
+    host = _StuckHost()
+    host.clock = clock
+    worker = LeaseWorker("a", "coord", host, heartbeat_interval=2.0, clock=clock)
+    worker.heartbeat_once()
+    now[0] = 2.0
+    worker.heartbeat_once()
+    assert len(worker.held()) == len(MARKETS)
+    expires = 2.0 + 10.0
+
+    partitioned[0] = True
+    while len(host.killed_at) < len(MARKETS) and now[0] < expires:
+        now[0] += min(worker._next_wait(), 2.0)
+        worker.heartbeat_once()
+
+    assert set(host.killed_at) == set(MARKETS)
+    assert max(host.killed_at.values()) <= expires - 2.0
+    assert _wait_for(lambda: not worker.held(), timeout=5.0)
+
+class _LogHost:
+    def __init__(self, worker_id, path):
+        self.worker_id = worker_id
+        self.path = path
+
+    def _log(self, event, market_id):
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(f"{time.time():.6f} {self.worker_id} {event} {market_id}\n")
+
+    def acquire(self, market_id, config, cancel_stale):
+        self._log("acquire", market_id)
+
+    def release(self, market_id):
+        time.sleep(0.05)  # cancelling maker orders takes a moment
+        self._log("release", market_id)
+        return True
+
+    def kill(self, market_id):
+        pass
+
+    def finished(self, market_id):
+        return None
+
+
+def _worker_process(worker_id, address, path, stop):
+    worker = LeaseWorker(worker_id, address, _LogHost(worker_id, path), heartbeat_interval=0.1).start()
+    stop.wait(30)
+    worker.stop(timeout=10)
+
+
+def _owners(path):
+    owners = {}
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        _, worker_id, event, market_id = line.split()
+        if event == "acquire":
+            assert market_id not in owners, f"{market_id} acquired by {worker_id} while held by {owners[market_id]}"
+            owners[market_id] = worker_id
+        else:
+            assert owners.pop(market_id) == worker_id
+    return owners
+
+
+def _wait_for(predicate, timeout=20.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_workers_in_separate_processes_rebalance_with_ordered_handover(tmp_path):
+    log = tmp_path / "events.log"
+    log.touch()
+    server = CoordinatorServer(Coordinator(MARKETS, lease_ttl=2.0)).start()
+    ctx = multiprocessing.get_context("spawn")
+    stops = {w: ctx.Event() for w in ("w1", "w2", "w3")}
+    procs = {w: ctx.Process(target=_worker_process, args=(w, server.address, str(log), stops[w])) for w in stops}
+    try:
+        procs["w1"].start()
+        assert _wait_for(lambda: len(_owners(log)) == len(MARKETS))
+        procs["w2"].start()
+        procs["w3"].start()
+
+        def _balanced():
+            status = call(server.address, {"op": "status"})
+            owners = _owners(log)
+            return len(status["workers"]) == 3 and owners == {m: t for m, t in status["targets"].items()}
+
+        assert _wait_for(_balanced)
+        assert set(_owners(log).values()) == {"w1", "w2", "w3"}
+
+        stops["w2"].set()
+        procs["w2"].join(timeout=15)
+        assert _wait_for(lambda: len(_owners(log)) == len(MARKETS) and "w2" not in _owners(log).values())
+    finally:
+        for w, proc in procs.items():
+            stops[w].set()
+        for proc in procs.values():
+            proc.join(timeout=15)
+        server.stop()
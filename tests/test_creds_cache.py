@@ -0,0 +1,96 @@
+from pathlib import Path
+import base64
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from trading.creds_cache import CredsCache
+
+KEY = "0x" + "11" * 32
+HOST = "https://clob.example"
+FUNDER = "0xFunder"
+CREDS = {"api_key": "k", "api_secret": "s", "api_passphrase": "p"}
+
+
+SECRETS = {"api_key": "key-123", "api_secret": "secret-456", "api_passphrase": "pass-789"}
+
+
+def test_roundtrip_is_encrypted_and_private(tmp_path):
+    path = tmp_path / "creds.json"
+    cache = CredsCache(str(path))
+
+    assert cache.store(KEY, HOST, FUNDER, 2, SECRETS)
+    assert cache.load(KEY, HOST, FUNDER, 2) == SECRETS
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    raw = path.read_text()
+    assert "api_secret" not in raw and FUNDER.lower() not in raw.lower()
+    assert not any(value in raw for value in SECRETS.values())
+
+
+def test_tampered_entry_is_a_miss(tmp_path):
+    path = tmp_path / "creds.json"
+    cache = CredsCache(str(path))
+    cache.store(KEY, HOST, FUNDER, 2, SECRETS)
+    doc = json.loads(path.read_text())
+    (entry,) = doc["entries"].values()
+    ct = bytearray(base64.b64decode(entry["ct"]))
+    ct[0] ^= 1
+    entry["ct"] = base64.b64encode(bytes(ct)).decode()
+    path.write_text(json.dumps(doc))
+
+    assert cache.load(KEY, HOST, FUNDER, 2) is None
+
+
+def test_plaintext_cache_is_a_miss_and_gets_replaced(tmp_path):
+    path = tmp_path / "creds.json"
+    path.write_text(json.dumps({"version": 2, "entries": {"x": SECRETS}}))
+    cache = CredsCache(str(path))
+
+    assert cache.load(KEY, HOST, FUNDER, 2) is None
+    cache.store(KEY, HOST, FUNDER, 2, CREDS)
+    assert "secret-456" not in path.read_text()
+
+
+def test_entries_are_scoped_and_keyed(tmp_path):
+    cache = CredsCache(str(tmp_path / "creds.json"))
+    cache.store(KEY, HOST, FUNDER, 2, CREDS)
+
+    assert cache.load(KEY, HOST, FUNDER, 1) is None
+    assert cache.load("0x" + "22" * 32, HOST, FUNDER, 2) is None
+
+    cache.invalidate(KEY, HOST, FUNDER, 2)
+    assert cache.load(KEY, HOST, FUNDER, 2) is None
+
+
+@pytest.mark.parametrize("background", [True, False])
+def test_client_proxy_rederives_once_on_rejection(background):
+    from Volatility_arbitrage_main_rest import LazyClobClient
+
+    class Rejected(Exception):
+        status_code = 401
+
+    class FakeClient:
+        def __init__(self):
+            self.creds = "stale"
+
+        def get_orders(self):
+            if self.creds == "stale":
+                raise Rejected("unauthorized")
+            return ["ok"]
+
+    refreshed = []
+
+    def refresh(client):
+        refreshed.append(client)
+        client.creds = "fresh"
+
+    lazy = LazyClobClient(factory=FakeClient, refresh=refresh, background=background)
+
+    assert lazy.get_orders() == ["ok"]
+    assert lazy.wait().creds == "fresh"
+    assert len(refreshed) == 1
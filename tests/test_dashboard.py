@@ -0,0 +1,102 @@
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from trading.dashboard import HEADER_ROWS, Dashboard, QuoteBoard
+
+
+class _Screen:
+    def __init__(self, rows=10, cols=120):
+        self.rows, self.cols = rows, cols
+        self.writes = []
+        self.grid = {}
+
+    def size(self):
+        return self.rows, self.cols
+
+    def put(self, row, col, text):
+        self.writes.append((row, col, text))
+        self.grid[(row, col)] = text
+
+    def clear(self):
+        self.grid.clear()
+
+    def flush(self):
+        pass
+
+    def poll_key(self):
+        return None
+
+    def row_text(self, row):
+        return "".join(text for (r, _), text in sorted(self.grid.items()) if r == row)
+
+
+def _pc(*changes, ts=1_700_000_000_000):
+    return {
+        "event_type": "price_change",
+        "timestamp": str(ts),
+        "price_changes": [{"asset_id": a, "best_bid": str(b), "best_ask": str(k)} for a, b, k in changes],
+    }
+
+
+def test_board_keeps_latest_quote_per_asset_in_arrays():
+    now = [100.0]
+    board = QuoteBoard(["A", "B", "C"], ["alpha", "beta", "gamma"], clock=lambda: now[0])
+    board.on_event(_pc(("A", 0.40, 0.44), ("B", 0.10, 0.30), ("X", 0.5, 0.6)))
+    now[0] = 110.0
+    board.on_event(_pc(("A", 0.42, 0.44)))
+    board.on_event({"event_type": "book", "asset_id": "C", "bids": [{"price": "0.7"}], "asks": [{"price": "0.71"}]})
+
+    assert list(board.count) == [2, 1, 1] and board.updates == 4
+    assert (board.bid[0], board.ask[0]) == (0.42, 0.44)
+    assert board.volatility_bp(0) > 0 and board.volatility_bp(1) == 0
+    assert board.order("spread", now[0]) == [1, 0, 2]
+    assert board.order("staleness", now[0]) == [1, 0, 2]
+    assert board.order("name", now[0], reverse=True) == [2, 1, 0]
+
+
+def test_dashboard_redraws_only_changed_cells_and_frame_cost_ignores_message_rate():
+    now = [0.0]
+    board = QuoteBoard([f"a{i}" for i in range(50)], clock=lambda: now[0])
+    for i in range(50):
+        board.on_event(_pc((f"a{i}", 0.40, 0.40 + (i + 1) / 1000.0)))
+    screen = _Screen(rows=HEADER_ROWS + 5)
+    dash = Dashboard(board, screen, sort="spread", resort_interval=60.0, clock=lambda: now[0])
+
+    assert dash.frame(now[0]) > 0
+    assert screen.row_text(HEADER_ROWS).startswith("a49")
+    assert dash.frame(now[0]) == 0
+
+    # 10k updates to one visible asset: the next frame rewrites that row's changed cells only
+    for n in range(10_000):
+        board.on_event(_pc(("a48", 0.40 + (n % 3) / 1000.0, 0.449)))
+    before = len(screen.writes)
+    written = dash.frame(now[0])
+    changed_rows = {row for row, _, _ in screen.writes[before:]}
+    assert 0 < written <= 8 and changed_rows <= {0, HEADER_ROWS + 1}
+
+    # off-screen assets never cost a write, however busy they are
+    for n in range(1_000):
+        board.on_event(_pc(("a0", 0.30, 0.30 + (n % 2) / 1000.0)))
+    assert dash.frame(now[0]) <= 1
+
+
+def test_hotkeys_change_sort_and_resize_redraws():
+    now = [0.0]
+    board = QuoteBoard(["A", "B", "C"], ["c-last", "b-mid", "a-first"], clock=lambda: now[0])
+    board.on_event(_pc(("A", 0.1, 0.5), ("B", 0.1, 0.3), ("C", 0.1, 0.2)))
+    screen = _Screen(rows=HEADER_ROWS + 3)
+    dash = Dashboard(board, screen, clock=lambda: now[0])
+    dash.frame(now[0])
+    assert [screen.row_text(HEADER_ROWS + k)[:6] for k in range(3)] == ["c-last", "b-mid ", "a-firs"]
+
+    assert dash.handle_key("n") and dash.sort == "name"
+    dash.frame(now[0])
+    assert [screen.row_text(HEADER_ROWS + k)[:6] for k in range(3)] == ["a-firs", "b-mid ", "c-last"]
+    assert dash.handle_key("n") and dash.reverse
+    assert dash.handle_key("q") is False
+
+    screen.rows = HEADER_ROWS + 1
+    dash.frame(now[0])
+    assert screen.row_text(HEADER_ROWS).startswith("c-last") and screen.row_text(HEADER_ROWS + 1) == ""
@@ -1,6 +1,7 @@
 from collections import deque
 from pathlib import Path
 import sys
+import time
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
@@ -552,3 +553,167 @@ def test_clob_adapter_raises_when_response_contains_only_error(monkeypatch):
         adapter.create_order(payload)
 
     assert "not enough balance / allowance" in str(excinfo.value)
+
+
+def _install_dummy_clob(monkeypatch):
+    import types
+
+    class DummyOrderType(Enum):
+        FAK = "FAK"
+        GTC = "GTC"
+
+    class DummyOrderArgs:
+        def __init__(self, token_id, side, price, size):
+            self.token_id = token_id
+            self.side = side
+            self.price = price
+            self.size = size
+
+    clob_pkg = types.ModuleType("py_clob_client")
+    clob_types = types.ModuleType("py_clob_client.clob_types")
+    clob_types.OrderType = DummyOrderType
+    clob_types.OrderArgs = DummyOrderArgs
+    order_builder = types.ModuleType("py_clob_client.order_builder.constants")
+    order_builder.BUY = "BUY"
+    order_builder.SELL = "SELL"
+
+    monkeypatch.setitem(sys.modules, "py_clob_client", clob_pkg)
+    monkeypatch.setitem(sys.modules, "py_clob_client.clob_types", clob_types)
+    monkeypatch.setitem(sys.modules, "py_clob_client.order_builder.constants", order_builder)
+
+
+class ReplaceClient:
+    def __init__(self, old_filled_after_cancel=0.0):
+        self.events = []
+        self._old_filled_after_cancel = old_filled_after_cancel
+
+    def cancel(self, order_id):
+        self.events.append(("cancel", order_id))
+
+    def create_order(self, order_args):
+        self.events.append(("sign", order_args.price))
+        return {"price": order_args.price, "size": order_args.size}
+
+    def post_order(self, signed, order_type):
+        self.events.append(("post", signed["price"]))
+        return {"orderId": "new-1", "status": "OPEN"}
+
+    def get_order(self, order_id):
+        return {"status": "CANCELED", "filledAmount": self._old_filled_after_cancel}
+
+
+def test_clob_adapter_replace_cancels_before_placing(monkeypatch):
+    _install_dummy_clob(monkeypatch)
+    client = ReplaceClient()
+    adapter = ClobPolymarketAPI(client)
+    adapter._min_interval_seconds = 0.0
+
+    result = adapter.replace_order(
+        "old-1",
+        0.52,
+        2.0,
+        payload={"tokenId": "token", "side": "BUY", "timeInForce": "GTC"},
+    )
+
+    assert result["orderId"] == "new-1"
+    assert result["cancelled"] is True
+    assert client.events[0] == ("cancel", "old-1")
+    assert ("post", 0.52) in client.events
+    assert result["late_fill"] == pytest.approx(0.0)
+    assert adapter.quote_gap_stats.count == 1
+    assert result["quote_gap_seconds"] >= 0.0
+
+
+def test_clob_adapter_replace_reports_late_fill(monkeypatch):
+    _install_dummy_clob(monkeypatch)
+    client = ReplaceClient(old_filled_after_cancel=0.5)
+    adapter = ClobPolymarketAPI(client)
+    adapter._min_interval_seconds = 0.0
+
+    result = adapter.replace_order(
+        "old-1",
+        0.40,
+        1.0,
+        payload={"tokenId": "token", "side": "SELL"},
+        old_filled=0.0,
+    )
+
+    assert result["late_fill"] == pytest.approx(0.5)
+    assert adapter.quote_gap_stats.late_fills == 1
+
+
+class TimedReplaceClient(ReplaceClient):
+    def __init__(self):
+        super().__init__()
+        self.times = []
+
+    def cancel(self, order_id):
+        self.times.append(("cancel", time.monotonic()))
+
+    def create_order(self, order_args):
+        self.times.append(("sign", time.monotonic()))
+        return super().create_order(order_args)
+
+    def post_order(self, signed, order_type):
+        self.times.append(("post", time.monotonic()))
+        return super().post_order(signed, order_type)
+
+    def get_order(self, order_id):
+        self.times.append(("get", time.monotonic()))
+        return super().get_order(order_id)
+
+
+def test_clob_adapter_replace_books_a_slot_per_call(monkeypatch):
+    _install_dummy_clob(monkeypatch)
+    client = TimedReplaceClient()
+    adapter = ClobPolymarketAPI(client)
+    interval = adapter._min_interval_seconds = 0.1
+
+    adapter.replace_order("old-1", 0.52, 2.0, payload={"tokenId": "token", "side": "BUY"})
+
+    (cancel_at,), (sign_at,), (post_at,), (get_at,) = (
+        [t for name, t in client.times if name == wanted] for wanted in ("cancel", "sign", "post", "get")
+    )
+    # Sign and post follow the cancel without waiting for their slots ...
+    assert post_at - cancel_at < interval
+    # ... but they are charged, so the status read waits for all three.
+    assert get_at - cancel_at >= 3 * interval - 0.01
+
+
+class FailingCancelClient(ReplaceClient):
+    def __init__(self, old_status):
+        super().__init__()
+        self._old_status = old_status
+
+    def cancel(self, order_id):
+        self.events.append(("cancel", order_id))
+        raise RuntimeError("timeout")
+
+    def get_order(self, order_id):
+        return {"status": self._old_status, "filledAmount": 0.0}
+
+
+@pytest.mark.parametrize("old_status, placed", [("LIVE", False), ("CANCELED", True)])
+def test_clob_adapter_replace_waits_for_an_unconfirmed_cancel(monkeypatch, old_status, placed):
+    _install_dummy_clob(monkeypatch)
+    client = FailingCancelClient(old_status)
+    adapter = ClobPolymarketAPI(client)
+    adapter._min_interval_seconds = 0.0
+
+    result = adapter.replace_order("old-1", 0.52, 2.0, payload={"tokenId": "token", "side": "BUY"})
+
+    assert result["cancelled"] is False
+    assert (("post", 0.52) in client.events) is placed
+    assert (result["orderId"] == "new-1") is placed
+    assert (result["error"] is None) is placed
+
+
+def test_retry_prices_stay_on_the_tick_grid():
+    config = ExecutionConfig(price_tolerance_step=0.01, price_tick=0.01)
+    engine, _ = build_engine(config, MockAPI())
+
+    # 0.57 * 0.99 = 0.5643 and 0.05 * 1.01 = 0.0505: both off-grid and less than a tick away
+    assert engine._adjust_price("sell", 0.57) == 0.56
+    assert engine._adjust_price("buy", 0.05) == 0.06
+    assert engine._adjust_price("buy", 0.9) == 0.91
+    assert engine._adjust_price("sell", 0.0) == 0.0
@@ -0,0 +1,107 @@
+from pathlib import Path
+import sys
+import threading
+import time
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from trading.fanout import FanoutClient, FanoutServer, FrameDecoder, encode_frame, fanout_watch_by_ids
+from trading.quotes import Quote
+
+
+def _recv_until(client, predicate, timeout=5.0):
+    got = []
+    deadline = time.time() + timeout
+    while time.time() < deadline and not predicate(got):
+        got.extend(client.recv(timeout=0.1))
+    return got
+
+
+def test_snapshot_on_connect_then_per_asset_stream():
+    server = FanoutServer("tcp://127.0.0.1:0").start()
+    try:
+        server.on_event({"event_type": "book", "asset_id": "A", "bids": [{"price": "0.40"}], "asks": [{"price": "0.44"}]})
+        server.publish(Quote("B", 0.10, 0.12, 0.11, 1.0))
+        only_a = FanoutClient(server.address, ["A"]).connect()
+        everything = FanoutClient(server.address).connect()
+
+        snap = _recv_until(only_a, lambda got: only_a.snapshot_done)
+        assert [(q.asset_id, q.seq, q.best_bid, q.best_ask) for q in snap] == [("A", 1, 0.40, 0.44)]
+        assert {q.asset_id for q in _recv_until(everything, lambda got: everything.snapshot_done)} == {"A", "B"}
+
+        server.on_event({"event_type": "price_change", "price_changes": [
+            {"asset_id": "B", "best_bid": "0.2", "best_ask": "0.3"},
+            {"asset_id": "A", "best_bid": "0.41", "best_ask": "0.43"},
+        ]})
+        live = _recv_until(only_a, lambda got: got)
+        assert [(q.asset_id, q.seq, q.best_bid) for q in live] == [("A", 2, 0.41)]
+        live_all = _recv_until(everything, lambda got: len(got) >= 2)
+        assert [(q.asset_id, q.seq) for q in live_all] == [("B", 2), ("A", 2)]
+        server.publish(Quote("C", 0.48, None, 0.48, 2.0))
+        (one_sided,) = _recv_until(everything, lambda got: got)
+        assert one_sided.to_quote() == Quote("C", 0.48, None, 0.48, 2.0)
+        only_a.close()
+        everything.close()
+    finally:
+        server.stop()
+
+
+def test_late_subscription_starts_one_upstream_per_new_asset_batch(tmp_path):
+    started = []
+
+    def _upstream(asset_ids, label="", on_event=None, verbose=False, stop_event=None):
+        started.append(list(asset_ids))
+        for i, aid in enumerate(asset_ids):
+            on_event({"event_type": "price_change", "price_changes": [{"asset_id": aid, "best_bid": 0.1 * (i + 1), "best_ask": 0.9}]})
+
+    server = FanoutServer(f"unix://{tmp_path / 'fanout.sock'}", upstream=_upstream).start()
+    events = []
+    stop = threading.Event()
+    watcher = threading.Thread(
+        target=fanout_watch_by_ids,
+        args=(["X", "Y"],),
+        kwargs={"on_event": events.append, "stop_event": stop, "address": server.address, "poll_timeout": 0.05},
+    )
+    try:
+        watcher.start()
+        deadline = time.time() + 5
+        while len({pc["asset_id"] for ev in events for pc in ev["price_changes"]}) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        second = FanoutClient(server.address, ["X"]).connect()
+        assert [q.best_bid for q in _recv_until(second, lambda got: second.snapshot_done)] == [0.1]
+        second.close()
+    finally:
+        stop.set()
+        watcher.join(timeout=2)
+        server.stop()
+
+    assert started == [["X", "Y"]]
+    changes = [pc for ev in events for pc in ev["price_changes"]]
+    assert {(pc["asset_id"], pc["best_bid"]) for pc in changes} == {("X", 0.1), ("Y", 0.2)}
+    assert all(ev["event_type"] == "price_change" for ev in events)
+
+
+def test_frame_decoder_handles_split_reads():
+    stream = encode_frame(4, b"A\nB") + encode_frame(3) + encode_frame(4, b"C")
+    decoder = FrameDecoder()
+    frames = []
+    for i in range(len(stream)):
+        frames.extend(decoder.feed(stream[i : i + 1]))
+    assert frames == [(4, b"A\nB"), (3, b""), (4, b"C")]
+
+
+def test_upstream_subscriptions_are_capped():
+    started = []
+
+    def _upstream(asset_ids, label="", on_event=None, verbose=False, stop_event=None):
+        started.append(list(asset_ids))
+
+    server = FanoutServer(upstream=_upstream, max_upstreams=2, max_upstream_ids=3)
+
+    assert server.add_upstream(["A", "B"]) == ["A", "B"]
+    assert server.add_upstream(["B", "C", "D"]) == ["C"]
+    assert server.add_upstream(["E"]) == []
+    deadline = time.time() + 5
+    while len(started) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert sorted(started) == [["A", "B"], ["C"]]
@@ -0,0 +1,91 @@
+from pathlib import Path
+import os
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from trading.journal import Journal, WAL_NAME, recover
+from Volatility_arbitrage_strategy import ActionType, StrategyConfig, VolArbStrategy
+
+
+def test_replay_restores_state_after_unclean_stop(tmp_path):
+    journal = Journal(str(tmp_path), fsync_interval=0.0)
+    journal.append("session", {"inputs": ["url", "y"], "token_id": "T"})
+    journal.append("order", {"order_id": "a", "token_id": "T", "side": "SELL", "status": "OPEN"})
+    journal.append("order", {"order_id": "b", "token_id": "T", "side": "SELL", "status": "OPEN"})
+    journal.append("order", {"order_id": "a", "token_id": "T", "side": "SELL", "status": "FILLED"})
+    journal.append("position", {"position_size": 12.5}, sync=True)
+    # Simulate a crash: no close(), just read what is on disk.
+    recovered = recover(str(tmp_path))
+
+    assert recovered.state["session"]["inputs"] == ["url", "y"]
+    assert list(recovered.state["orders"]) == ["b"]
+    assert recovered.state["position"] == {"position_size": 12.5}
+    assert recovered.seq == 5
+    journal.close()
+
+
+def test_torn_tail_is_discarded(tmp_path):
+    with Journal(str(tmp_path), fsync_interval=0.0) as journal:
+        journal.append("position", {"position_size": 1.0})
+        journal.append("position", {"position_size": 2.0})
+    with open(os.path.join(tmp_path, WAL_NAME), "ab") as fh:
+        fh.write(b'deadbeef {"seq": 3, "kind": "posit')
+
+    recovered = recover(str(tmp_path))
+
+    assert recovered.state["position"] == {"position_size": 2.0}
+    assert recovered.truncated_bytes > 0
+    assert recover(str(tmp_path)).truncated_bytes == 0
+
+
+def test_compaction_snapshots_and_truncates_wal(tmp_path):
+    with Journal(str(tmp_path), fsync_interval=0.0, compact_every=10) as journal:
+        for i in range(25):
+            journal.append("position", {"position_size": float(i)})
+        journal.flush()
+
+    assert os.path.getsize(os.path.join(tmp_path, WAL_NAME)) < 25 * 40
+    recovered = recover(str(tmp_path))
+    assert recovered.seq == 25
+    assert recovered.state["position"] == {"position_size": 24.0}
+
+
+def test_strategy_state_roundtrip_through_journal(tmp_path):
+    cfg = StrategyConfig(token_id="T", enable_incremental_drop_pct=True, incremental_drop_pct_step=0.01)
+    strategy = VolArbStrategy(cfg)
+    with Journal(str(tmp_path), fsync_interval=0.0) as journal:
+        strategy.add_listener(lambda event, state: journal.append("strategy", {"event": event, "state": state}))
+        strategy.on_buy_filled(0.4, size=10)
+        strategy.on_sell_filled(0.45, remaining=0)  # bumps drop_pct
+        strategy.on_buy_filled(0.38, size=5)
+        strategy.mark_awaiting(ActionType.SELL)
+
+    restored = VolArbStrategy(StrategyConfig(token_id="T"))
+    restored.restore_state(recover(str(tmp_path)).state["strategy"])
+
+    assert restored.status()["entry_price"] == 0.38
+    assert restored.status()["position_size"] == 5
+    assert restored.status()["awaiting"] == ActionType.SELL
+    assert restored.cfg.drop_pct == strategy.cfg.drop_pct > 0.05
+
+
+def test_failed_fsync_is_not_reported_durable(tmp_path, monkeypatch):
+    import pytest
+    import trading.journal as journal_module
+
+    journal = Journal(str(tmp_path), fsync_interval=0.0)
+    journal.append("position", {"position_size": 1.0}, sync=True)
+
+    def broken_fsync(fd):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(journal_module.os, "fsync", broken_fsync)
+    with pytest.raises(RuntimeError, match="journal writer failed"):
+        journal.append("position", {"position_size": 2.0}, sync=True)
+    assert journal._durable_seq == 1
+    with pytest.raises(RuntimeError):
+        journal.flush(timeout=1.0)
+    with pytest.raises(RuntimeError):
+        journal.append("position", {"position_size": 3.0})
+    journal.close()
@@ -0,0 +1,51 @@
+from pathlib import Path
+import subprocess
+import sys
+import types
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from trading.lazy_import import lazy_module
+
+
+def _run(code):
+    return subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=60
+    )
+
+
+def test_lazy_module_imports_on_first_use_and_forwards_writes(monkeypatch):
+    fake = types.ModuleType("lazy_probe_mod")
+    fake.value = 1
+    monkeypatch.setitem(sys.modules, "lazy_probe_mod", fake)
+
+    proxy = lazy_module("lazy_probe_mod")
+    assert not proxy.loaded
+    assert proxy.value == 1
+
+    monkeypatch.setattr(proxy, "value", 2)
+    assert fake.value == 2
+
+
+def test_entry_points_do_not_import_heavy_dependencies():
+    proc = _run(
+        "import sys, Volatility_arbitrage_run, Volatility_arbitrage_claim;"
+        "heavy = ['requests', 'py_clob_client', 'websocket', 'maker_execution', 'yaml'];"
+        "print([m for m in heavy if m in sys.modules])"
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip() == "[]"
+
+
+def test_ws_module_imports_without_websocket_client():
+    proc = _run(
+        "import sys; sys.modules['websocket'] = None\n"
+        "import Volatility_arbitrage_main_ws as ws\n"
+        "try:\n"
+        "    ws.ws_watch_by_ids(['1'])\n"
+        "except RuntimeError as exc:\n"
+        "    print('missing:', 'websocket-client' in str(exc))\n"
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip() == "missing: True"
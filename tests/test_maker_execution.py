@@ -17,6 +17,24 @@ class StubAdapter:
         return self.client.get_order_status(order_id)
 
 
+class ReplacingStubAdapter(StubAdapter):
+    def __init__(self, client):
+        super().__init__(client)
+        self.replace_calls: List[str] = []
+
+    def replace_order(self, old_id, new_price, new_size, *, payload, old_filled=0.0):
+        self.replace_calls.append(old_id)
+        self.client.cancel_order(old_id)
+        response = self.client.create_order(dict(payload, price=new_price, size=new_size))
+        return {
+            "orderId": response["orderId"],
+            "cancelled": True,
+            "old_status": self.client.get_order_status(old_id),
+            "error": None,
+            "quote_gap_seconds": 0.0,
+        }
+
+
 class DummyClient:
     def __init__(self, status_sequences: List[List[Dict[str, object]]]):
         self._status_sequences: Deque[Deque[Dict[str, object]]] = collections.deque(
@@ -136,6 +154,81 @@ def test_maker_buy_reprices_on_bid_rise():
     assert first_order["price"] == pytest.approx(0.50, rel=0, abs=1e-9)
 
 
+def test_maker_buy_replace_accounts_late_fill(monkeypatch):
+    adapters: List[ReplacingStubAdapter] = []
+
+    def _factory(client):
+        adapter = ReplacingStubAdapter(client)
+        adapters.append(adapter)
+        return adapter
+
+    monkeypatch.setattr(maker, "ClobPolymarketAPI", _factory)
+    client = DummyClient(
+        status_sequences=[
+            [
+                {"status": "OPEN", "filledAmount": 0.0},
+                {"status": "OPEN", "filledAmount": 1.0, "avgPrice": 0.50},
+            ],
+            [{"status": "OPEN", "filledAmount": 0.0}],
+        ]
+    )
+
+    result = maker.maker_buy_follow_bid(
+        client,
+        token_id="asset",
+        target_size=2.0,
+        poll_sec=0.0,
+        min_order_size=0.0,
+        min_quote_amt=0.0,
+        best_bid_fn=_stream([0.50, 0.52, 0.52]),
+        sleep_fn=lambda _: None,
+    )
+
+    assert adapters[0].replace_calls == ["order-1"]
+    # The late fill on order-1 makes the 2.0 replacement too large, so it is
+    # pulled and the remaining 1.0 is quoted instead.
+    assert "order-2" in client.cancelled
+    assert client.created_orders[-1]["size"] == pytest.approx(1.0)
+    assert result["filled"] == pytest.approx(2.0)
+    assert result["status"] == "FILLED"
+
+
+def test_maker_buy_shrinks_on_balance_error_during_replace(monkeypatch):
+    class ShortOnReplaceAdapter(StubAdapter):
+        def replace_order(self, old_id, new_price, new_size, *, payload, old_filled=0.0):
+            self.client.cancel_order(old_id)
+            return {
+                "orderId": None,
+                "cancelled": True,
+                    "old_status": self.client.get_order_status(old_id),
+                "error": RuntimeError("not enough balance / allowance"),
+                "quote_gap_seconds": 0.0,
+            }
+
+    monkeypatch.setattr(maker, "ClobPolymarketAPI", ShortOnReplaceAdapter)
+    client = DummyClient(
+        status_sequences=[
+            [{"status": "OPEN", "filledAmount": 0.0}],
+            [{"status": "FILLED", "filledAmount": 1.9, "avgPrice": 0.52}],
+        ]
+    )
+
+    result = maker.maker_buy_follow_bid(
+        client,
+        token_id="asset",
+        target_size=2.0,
+        poll_sec=0.0,
+        min_order_size=0.0,
+        min_quote_amt=0.0,
+        best_bid_fn=_stream([0.50, 0.52, 0.52]),
+        sleep_fn=lambda _: None,
+    )
+
+    # The failed replacement goes through the same shrink-and-retry path as a failed create.
+    assert client.created_orders[-1]["size"] < 2.0
+    assert result["status"] == "FILLED"
+
+
 def test_maker_buy_handles_missing_fill_amount_on_match():
     client = DummyClient(status_sequences=[[{"status": "MATCHED"}]])
 
@@ -286,6 +379,59 @@ def test_maker_sell_waits_for_floor_before_order():
     assert result["filled"] == pytest.approx(1.5)
 
 
+def test_maker_sell_rounds_floor_up_to_market_tick():
+    client = DummyClient(
+        status_sequences=[[{"status": "FILLED", "filledAmount": 1.0, "avgPrice": 0.71}]]
+    )
+
+    result = maker.maker_sell_follow_ask_with_floor_wait(
+        client,
+        token_id="asset",
+        position_size=1.0,
+        floor_X=0.7012,
+        poll_sec=0.0,
+        min_order_size=0.0,
+        best_ask_fn=lambda: 0.70,
+        sleep_fn=lambda _: None,
+        sell_mode="aggressive",
+    )
+
+    assert result["status"] == "FILLED"
+    assert len(client.created_orders) == 1
+    assert client.created_orders[0]["price"] == pytest.approx(0.71, rel=0, abs=1e-9)
+
+
+def test_maker_sell_detects_precision_from_ask_stream():
+    client = DummyClient(
+        status_sequences=[
+            [
+                {"status": "OPEN", "filledAmount": 0.0},
+                {"status": "OPEN", "filledAmount": 0.0},
+            ],
+            [
+                {"status": "FILLED", "filledAmount": 1.0, "avgPrice": 0.748},
+            ],
+        ]
+    )
+    asks = _stream([0.75, 0.748, 0.748])
+
+    result = maker.maker_sell_follow_ask_with_floor_wait(
+        client,
+        token_id="asset",
+        position_size=1.0,
+        floor_X=0.70,
+        poll_sec=0.0,
+        min_order_size=0.0,
+        best_ask_fn=asks,
+        sleep_fn=lambda _: None,
+    )
+
+    assert result["filled"] == pytest.approx(1.0)
+    assert len(client.created_orders) == 2
+    assert client.created_orders[0]["price"] == pytest.approx(0.75, rel=0, abs=1e-9)
+    assert client.created_orders[1]["price"] == pytest.approx(0.748, rel=0, abs=1e-9)
+
+
 def test_maker_sell_invokes_progress_probe():
     client = DummyClient(
         status_sequences=[
@@ -0,0 +1,67 @@
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from trading.market_catalog import MarketCatalog
+
+
+def _market(idx, event="evt"):
+    return {
+        "id": str(idx),
+        "slug": f"market-{idx}",
+        "conditionId": f"0xcond{idx}",
+        "clobTokenIds": f'["{idx}01", "{idx}02"]',
+        "question": f"Question {idx}?",
+        "events": [{"slug": event}],
+    }
+
+
+class FakeGamma:
+    def __init__(self, markets, events=()):
+        self.markets = list(markets)
+        self.events = list(events)
+        self.calls = []
+
+    def __call__(self, url, params=None):
+        params = params or {}
+        self.calls.append((url, dict(params)))
+        source = self.markets if url.endswith("/markets") else self.events
+        offset = int(params.get("offset", 0))
+        return source[offset: offset + int(params.get("limit", 100))]
+
+
+def test_sync_indexes_every_lookup_key():
+    gamma = FakeGamma([_market(i) for i in range(5)], events=[{"slug": "other", "markets": [_market(9, event="")]}])
+    catalog = MarketCatalog(fetch=gamma, gamma_root="http://gamma")
+
+    assert catalog.sync(page_size=2) == 6
+    assert catalog.by_slug("market-3")["conditionId"] == "0xcond3"
+    assert catalog.by_condition_id("0xcond1")["slug"] == "market-1"
+    assert catalog.by_token_id("402")["slug"] == "market-4"
+    assert [m["slug"] for m in catalog.by_event_slug("evt")] == [f"market-{i}" for i in range(5)]
+    assert catalog.by_event_slug("other")[0]["eventSlug"] == "other"
+    assert catalog.by_slug("missing") is None
+
+
+def test_sync_resumes_from_stored_offset(tmp_path):
+    db = str(tmp_path / "catalog.sqlite3")
+    gamma = FakeGamma([_market(i) for i in range(3)])
+    MarketCatalog(db, fetch=gamma).sync(page_size=10, events=False)
+
+    gamma.markets.append(_market(3))
+    gamma.calls.clear()
+    catalog = MarketCatalog(db, fetch=gamma)
+
+    assert catalog.sync(page_size=10, events=False) == 1
+    assert gamma.calls[0][1]["offset"] == 3
+    assert len(catalog) == 4
+
+
+def test_upsert_refreshes_existing_market():
+    catalog = MarketCatalog(fetch=FakeGamma([]))
+    catalog.upsert_markets([_market(1)])
+    catalog.upsert_markets([dict(_market(1), question="Updated?")])
+
+    assert len(catalog) == 1
+    assert catalog.by_token_id("101")["question"] == "Updated?"
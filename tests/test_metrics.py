@@ -0,0 +1,74 @@
+from pathlib import Path
+import sys
+import threading
+import urllib.request
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from trading.metrics import MetricsRegistry, start_metrics_server
+
+
+def test_counter_sums_per_thread_cells():
+    registry = MetricsRegistry()
+    counter = registry.counter("ticks", "ticks seen", ["asset"])
+
+    def worker():
+        for _ in range(1000):
+            counter.labels("a").inc()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.labels(asset="b").inc(2.5)
+
+    assert counter.labels("a").value == pytest.approx(4000)
+    text = registry.render()
+    assert "# TYPE ticks_total counter" in text
+    assert 'ticks_total{asset="a"} 4000' in text
+    assert 'ticks_total{asset="b"} 2.5' in text
+
+
+def test_cells_of_exited_threads_are_folded():
+    registry = MetricsRegistry()
+    hist = registry.histogram("fold_seconds", "latency", buckets=(1.0,))
+    threads = [threading.Thread(target=hist.observe, args=(0.5,)) for _ in range(50)]
+    for thread in threads:
+        thread.start()
+        thread.join()
+
+    assert hist.totals() == ([50, 0], pytest.approx(25.0))
+    assert hist._cells._cells == []
+    hist.observe(2.0)
+    assert hist.totals() == ([50, 1], pytest.approx(27.0))
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    hist = registry.histogram("latency_seconds", "latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        hist.observe(value)
+
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{le="1"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "latency_seconds_count 4" in lines
+    assert "latency_seconds_sum 3.65" in lines
+
+
+def test_metrics_endpoint_serves_registry():
+    registry = MetricsRegistry()
+    registry.gauge("open_orders", "open orders").set(3)
+    server = start_metrics_server(0, registry=registry)
+    try:
+        port = server.server_address[1]
+        body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert b"open_orders 3" in body
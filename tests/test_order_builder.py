@@ -0,0 +1,182 @@
+from pathlib import Path
+import sys
+import time
+import types
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from enum import Enum
+
+import pytest
+
+from trading.execution import ClobPolymarketAPI
+from trading.order_builder import OrderBuilderCache, PresignedLadder, load_order_types
+
+
+class DummyOrderType(Enum):
+    FAK = "FAK"
+    GTC = "GTC"
+
+
+class DummyOrderArgs:
+    def __init__(self, token_id, side, price, size):
+        self.token_id = token_id
+        self.side = side
+        self.price = price
+        self.size = size
+
+
+def _install_dummy_clob(monkeypatch):
+    clob_pkg = types.ModuleType("py_clob_client")
+    clob_types = types.ModuleType("py_clob_client.clob_types")
+    clob_types.OrderType = DummyOrderType
+    clob_types.OrderArgs = DummyOrderArgs
+    order_builder = types.ModuleType("py_clob_client.order_builder.constants")
+    order_builder.BUY = "BUY"
+    order_builder.SELL = "SELL"
+
+    monkeypatch.setitem(sys.modules, "py_clob_client", clob_pkg)
+    monkeypatch.setitem(sys.modules, "py_clob_client.clob_types", clob_types)
+    monkeypatch.setitem(sys.modules, "py_clob_client.order_builder.constants", order_builder)
+    return clob_types
+
+
+class SigningClient:
+    def __init__(self):
+        self.sign_calls = []
+        self.post_calls = []
+
+    def create_order(self, order_args):
+        self.sign_calls.append((order_args.side, order_args.price, order_args.size))
+        return {"price": order_args.price, "size": order_args.size}
+
+    def post_order(self, signed, order_type):
+        self.post_calls.append(signed)
+        return {"orderId": f"id-{len(self.post_calls)}", "status": "OPEN"}
+
+
+def test_order_types_follow_swapped_modules(monkeypatch):
+    first = _install_dummy_clob(monkeypatch)
+    assert load_order_types().OrderArgs is DummyOrderArgs
+
+    class OtherArgs(DummyOrderArgs):
+        pass
+
+    second = types.ModuleType("py_clob_client.clob_types")
+    second.OrderType = first.OrderType
+    second.OrderArgs = OtherArgs
+    monkeypatch.setitem(sys.modules, "py_clob_client.clob_types", second)
+
+    assert load_order_types().OrderArgs is OtherArgs
+
+
+def test_ladder_signs_neighbouring_ticks():
+    signed = []
+
+    def signer(token_id, side, price, size):
+        signed.append(price)
+        return {"price": price}
+
+    ladder = PresignedLadder(signer, depth=2)
+    try:
+        ladder.prime("token", "BUY", 0.50, 0.01, 10.0, price_dp=2)
+        assert ladder.wait_idle(2.0)
+
+        assert sorted(signed) == [0.48, 0.49, 0.51, 0.52]
+        assert ladder.take("token", "BUY", 0.51, 10.0) == {"price": 0.51}
+        assert ladder.take("token", "BUY", 0.51, 10.0) is None
+        assert ladder.take("token", "BUY", 0.49, 5.0) is None
+        assert ladder.hits == 1
+    finally:
+        ladder.close()
+
+
+def test_adapter_posts_presigned_requote(monkeypatch):
+    _install_dummy_clob(monkeypatch)
+    client = SigningClient()
+    adapter = ClobPolymarketAPI(client)
+    adapter._min_interval_seconds = 0.0
+    adapter._ladder_bucket = None
+
+    payload = {"tokenId": "token", "side": "BUY", "price": 0.50, "size": 10.0}
+    adapter.create_order(payload)
+    assert adapter.prime_ladder("token", "BUY", 0.50, 10.0, tick=0.01, price_dp=2)
+
+    assert OrderBuilderCache.for_client(client).ladder.wait_idle(2.0)
+    signs_before = len(client.sign_calls)
+
+    response = adapter.create_order(dict(payload, price=0.51))
+
+    assert response["orderId"] == "id-2"
+    assert len(client.sign_calls) == signs_before
+    assert client.post_calls[-1]["price"] == 0.51
+
+
+def test_adapter_never_primes_when_create_submits(monkeypatch):
+    _install_dummy_clob(monkeypatch)
+
+    class SubmittingClient:
+        def __init__(self):
+            self.calls = 0
+
+        def create_order(self, order_args):
+            self.calls += 1
+            return {"orderId": f"live-{self.calls}"}
+
+    client = SubmittingClient()
+    adapter = ClobPolymarketAPI(client)
+    adapter._min_interval_seconds = 0.0
+
+    adapter.create_order({"tokenId": "token", "side": "SELL", "price": 0.6, "size": 5.0})
+
+    assert not adapter.prime_ladder("token", "SELL", 0.6, 5.0, tick=0.01, price_dp=2)
+    assert client.calls == 1
+
+
+def test_background_signing_uses_its_own_budget(monkeypatch):
+    _install_dummy_clob(monkeypatch)
+    client = SigningClient()
+    adapter = ClobPolymarketAPI(client)
+    adapter._min_interval_seconds = 0.0
+    ladder_waits = []
+    adapter._enforce_ladder_rate_limit = lambda: ladder_waits.append(len(client.sign_calls))
+    adapter._enforce_rate_limit = lambda: pytest.fail("ladder used the foreground limiter")
+
+    OrderBuilderCache.for_client(client).mark_signs_only()
+    assert adapter.prime_ladder("token", "BUY", 0.50, 10.0, tick=0.01, price_dp=2)
+    assert OrderBuilderCache.for_client(client).ladder.wait_idle(2.0)
+
+    # One ladder-budget pass ahead of each of the four rung signatures.
+    assert ladder_waits == [0, 1, 2, 3]
+
+
+def test_foreground_call_is_not_delayed_by_a_running_prime(monkeypatch):
+    _install_dummy_clob(monkeypatch)
+    client = SigningClient()
+    client.cancel = lambda order_id: {"canceled": [order_id]}
+    adapter = ClobPolymarketAPI(client)
+    adapter._min_interval_seconds = 0.2
+
+    adapter.create_order({"tokenId": "token", "side": "BUY", "price": 0.50, "size": 10.0})
+    assert adapter.prime_ladder("token", "BUY", 0.50, 10.0, tick=0.01, price_dp=2)
+    time.sleep(0.25)  # the foreground interval has passed; the ladder is still signing
+
+    started = time.monotonic()
+    adapter.cancel_order("id-1")
+    assert time.monotonic() - started < 0.1
+    OrderBuilderCache.for_client(client).ladder.close()
+
+
+def test_sell_ladder_precision_follows_the_quote():
+    from maker_execution import _prime_requote_ladder
+
+    primed = []
+
+    class Adapter:
+        def prime_ladder(self, token_id, side, price, size, *, tick, price_dp):
+            primed.append((price_dp, tick))
+
+    for px in (0.5, 0.567, 0.12345):
+        _prime_requote_ladder(Adapter(), "token", "SELL", px, 5.0)
+
+    assert primed == [(2, 0.01), (3, 0.001), (4, 0.0001)]
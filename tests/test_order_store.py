@@ -0,0 +1,75 @@
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from trading.order_store import OrderStore
+
+
+def test_store_indexes_and_incremental_totals():
+    store = OrderStore(clock=lambda: 100.0)
+    store.add("a", "tok", "buy", 0.50, 4.0)
+    store.add("b", "tok", "SELL", 0.60, 2.0)
+    store.add("c", "other", "BUY", 0.30, 1.0)
+
+    assert store.apply_fill("a", 1.0, avg_price=0.50, status="OPEN") == pytest.approx(1.0)
+    assert store.apply_fill("a", 3.0, avg_price=0.50) == pytest.approx(2.0)
+    # Stale polls never move the fill total backwards.
+    assert store.apply_fill("a", 2.0) == pytest.approx(0.0)
+    store.mark_cancelled("b")
+
+    assert [s.order_id for s in store.query(token_id="tok", side="BUY")] == ["a"]
+    assert [s.order_id for s in store.query(status="CANCELLED")] == ["b"]
+    assert {s.order_id for s in store.open_orders()} == {"a", "c"}
+    filled, notional = store.totals("tok", "BUY")
+    assert filled == pytest.approx(3.0)
+    assert notional == pytest.approx(1.5)
+    assert store.get("a").remaining == pytest.approx(1.0)
+
+
+def test_pruning_forgets_closed_orders_but_keeps_totals():
+    now = [100.0]
+    store = OrderStore(clock=lambda: now[0])
+    store.add("a", "tok", "BUY", 0.50, 4.0)
+    store.add("b", "tok", "BUY", 0.50, 1.0)
+    store.apply_fill("a", 4.0, avg_price=0.5, status="FILLED")
+
+    now[0] = 200.0
+    assert store.prune_closed(50.0) == 1
+    assert "a" not in store and "b" in store
+    assert store.totals("tok", "BUY")[0] == pytest.approx(4.0)
+
+
+def test_maker_loop_mirrors_orders_into_store(monkeypatch):
+    import maker_execution as maker
+
+    class Adapter:
+        def __init__(self, client):
+            self.client = client
+
+        def create_order(self, payload):
+            return {"orderId": "m-1"}
+
+        def get_order_status(self, order_id):
+            return {"status": "FILLED", "filledAmount": 2.0, "avgPrice": 0.4}
+
+    monkeypatch.setattr(maker, "ClobPolymarketAPI", Adapter)
+    store = OrderStore()
+
+    result = maker.maker_buy_follow_bid(
+        object(),
+        token_id="tok",
+        target_size=2.0,
+        poll_sec=0.0,
+        min_order_size=0.0,
+        best_bid_fn=lambda: 0.4,
+        sleep_fn=lambda _: None,
+        order_store=store,
+    )
+
+    assert result["status"] == "FILLED"
+    state = store.get("m-1")
+    assert state.status == "FILLED"
+    assert store.totals("tok", "BUY") == (pytest.approx(2.0), pytest.approx(0.8))
@@ -0,0 +1,88 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlencode, urlparse
+from urllib.request import urlopen
+import json
+import sys
+import threading
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from trading.price_history import TickRing, fetch_prices_history
+from Volatility_arbitrage_strategy import StrategyConfig, VolArbStrategy
+
+
+def test_warm_start_matches_tick_by_tick_window():
+    ts_values = [1000.0 + 30 * i for i in range(20)]
+    mids = [0.50, 0.52, 0.55, 0.53, 0.49, 0.47, 0.51, 0.50, 0.48, 0.46] * 2
+    now = ts_values[-1]
+
+    ticked = VolArbStrategy(StrategyConfig(token_id="T"))
+    for ts, mid in zip(ts_values, mids):
+        ticked._prepare_price_history(ts, mid)
+    warmed = VolArbStrategy(StrategyConfig(token_id="T"))
+    loaded = warmed.warm_start(ts_values[::-1], mids[::-1], now=now)
+
+    assert loaded == 20
+    assert warmed.status()["drop_stats"] == ticked.status()["drop_stats"]
+    assert list(warmed._price_history) == list(ticked._price_history)
+    # Points outside the window or newer than live ticks are ignored.
+    assert warmed.warm_start([now - 3600, now + 5], [0.9, 0.9], now=now) == 0
+
+
+def test_tick_ring_persists_and_keeps_newest(tmp_path):
+    path = str(tmp_path / "ticks" / "T.ticks")
+    with TickRing(path, capacity=8, flush_interval=0.0) as ring:
+        for i in range(40):
+            ring.append(float(i), i / 100)
+    with open(path, "ab") as fh:
+        fh.write(b"\x00" * 5)  # torn record from a crash
+
+    ring = TickRing(path, capacity=8)
+    ts_values, mids = ring.load(since=30.0)
+    assert ts_values == [float(i) for i in range(30, 40)]
+    assert mids[-1] == 0.39
+    ring.append(40.0, 0.40)
+    ring.close()
+    assert TickRing(path).load()[0][-2:] == [39.0, 40.0]
+
+
+def test_fetch_prices_history_from_fixture_server():
+    seen = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            seen["path"] = url.path
+            seen["query"] = parse_qs(url.query)
+            body = json.dumps(
+                {"history": [{"t": 1060, "p": 0.41}, {"t": 1000, "p": 0.4}, {"t": 1120, "p": "bad"}]}
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        host = f"http://127.0.0.1:{server.server_address[1]}"
+        ts_values, mids = fetch_prices_history(
+            "T",
+            start_ts=1000,
+            end_ts=1200,
+            host=host,
+            fetch=lambda url, params: json.load(urlopen(f"{url}?{urlencode(params)}", timeout=5)),
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert seen["path"] == "/prices-history"
+    assert seen["query"]["market"] == ["T"]
+    assert ts_values == [1000.0, 1060.0]
+    assert mids == [0.4, 0.41]
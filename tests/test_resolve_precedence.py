@@ -0,0 +1,87 @@
+from pathlib import Path
+import sys
+import threading
+import time
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import Volatility_arbitrage_run as run
+from trading.rate_budget import HostRateBudget, TokenBucket
+
+
+MARKET = {"slug": "will-it-rain", "question": "Will it rain?", "clobTokenIds": '["111", "222"]'}
+
+
+SIBLING = {"slug": "will-it-snow", "eventSlug": "will-it-rain", "question": "Will it snow?", "clobTokenIds": '["333", "444"]'}
+
+
+def test_exact_slug_hit_beats_a_faster_fallback(monkeypatch):
+    def fake_http_json(url, params=None, *, cancel=None):
+        if "/markets/slug/" in url:
+            time.sleep(0.3)
+            return dict(MARKET)
+        if url.endswith("/markets") and (params or {}).get("search"):
+            return [SIBLING]  # eventSlug match: a different sub-market of the event
+        return []
+
+    monkeypatch.setattr(run, "_http_json", fake_http_json)
+    monkeypatch.setattr(run, "_market_catalog", lambda: None)
+
+    yes_id, no_id, title, meta = run._resolve_with_fallback("https://polymarket.com/market/will-it-rain")
+
+    assert (yes_id, no_id, title) == ("111", "222", "Will it rain?")
+    assert meta["slug"] == "will-it-rain"
+
+
+def test_fallback_lookups_run_concurrently_when_exact_lookups_miss(monkeypatch):
+    def fake_http_json(url, params=None, *, cancel=None):
+        if "/markets/slug/" in url or (params or {}).get("slug"):
+            time.sleep(0.3)
+            return None
+        if url.endswith("/markets") and (params or {}).get("search"):
+            time.sleep(0.3)
+            return [MARKET]
+        return []
+
+    monkeypatch.setattr(run, "_http_json", fake_http_json)
+    monkeypatch.setattr(run, "_market_catalog", lambda: None)
+
+    started = time.perf_counter()
+    yes_id, no_id, _title, _meta = run._resolve_with_fallback("https://polymarket.com/market/will-it-rain")
+
+    assert (yes_id, no_id) == ("111", "222")
+    assert time.perf_counter() - started < 0.6
+
+
+def test_fresh_lookup_bypasses_catalog_and_updates_it(monkeypatch):
+    from trading.market_catalog import MarketCatalog
+
+    catalog = MarketCatalog(fetch=lambda url, params=None: [])
+    catalog.upsert_markets([dict(MARKET, endDate="2026-01-01T00:00:00Z")])
+    moved = dict(MARKET, endDate="2026-02-01T00:00:00Z", closed=True)
+
+    monkeypatch.setattr(run, "_http_json", lambda url, params=None, *, cancel=None: dict(moved))
+    monkeypatch.setattr(run, "_market_catalog", lambda: catalog)
+
+    assert run._fetch_market_by_slug("will-it-rain")["endDate"] == "2026-01-01T00:00:00Z"
+    assert run._fetch_market_by_slug("will-it-rain", fresh=True)["endDate"] == "2026-02-01T00:00:00Z"
+    assert run._fetch_market_by_slug("will-it-rain")["endDate"] == "2026-02-01T00:00:00Z"
+
+def test_token_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(rate=20.0, capacity=3)
+    started = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+
+    assert time.monotonic() - started >= 0.04
+
+
+def test_cancelled_waiter_does_not_consume_budget():
+    budget = HostRateBudget(rate=1.0, burst=1.0)
+    assert budget.acquire("https://gamma.example/markets") < 0.1
+
+    cancel = threading.Event()
+    cancel.set()
+    assert budget.acquire("https://gamma.example/events", cancel) is None
+    # A different host has its own bucket.
+    assert budget.acquire("https://data.example/positions") < 0.1
@@ -0,0 +1,119 @@
+from pathlib import Path
+import multiprocessing
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from trading.quotes import QuoteNormalizer, price_change_event
+from trading.shm_feed import ShmQuoteReader, ShmQuoteWriter, run_feed_handler, shm_watch_by_ids
+
+
+def _read_in_child(name, count, results):
+    reader = ShmQuoteReader(name, from_start=True)
+    records = []
+    deadline = time.time() + 10
+    while len(records) < count and time.time() < deadline:
+        records.extend(reader.poll())
+    reader.close()
+    results.put([(r.asset_id, r.asset_seq, r.best_bid) for r in records])
+
+
+def test_reader_in_another_process_sees_every_record():
+    writer = ShmQuoteWriter(capacity=64, max_assets=4)
+    try:
+        for i in range(20):
+            writer.publish("A" if i % 2 else "B", i / 100, i / 100 + 0.01, 0.0, float(i))
+        ctx = multiprocessing.get_context("spawn")
+        results = ctx.Queue()
+        proc = ctx.Process(target=_read_in_child, args=(writer.name, 20, results))
+        proc.start()
+        seen = results.get(timeout=30)
+        proc.join(timeout=5)
+    finally:
+        writer.close()
+
+    assert len(seen) == 20
+    assert [s for a, s, _ in seen if a == "A"] == list(range(1, 11))
+    assert seen[-1] == ("A", 10, 0.19)
+
+
+def test_lapped_reader_counts_loss_and_resyncs_latest_per_asset():
+    writer = ShmQuoteWriter(capacity=8, max_assets=4)
+    reader = ShmQuoteReader(writer.name, asset_ids=["B"])
+    try:
+        writer.publish("B", 0.40, 0.42, 0.41, 1.0)
+        for i in range(30):
+            writer.publish("A", 0.1, 0.2, 0.15, float(i))
+        records = reader.poll()
+    finally:
+        reader.close()
+        writer.close()
+
+    # B's only update fell out of the ring; the latest table still delivers it.
+    assert reader.lost == 23
+    assert [(r.asset_id, r.asset_seq, r.best_bid) for r in records] == [("B", 1, 0.40)]
+
+
+def test_feed_handler_republishes_ws_events_as_price_changes():
+    owner = ShmQuoteWriter(capacity=64, max_assets=4)
+    fed = threading.Event()
+
+    def _fake_ws(asset_ids, label="", on_event=None, verbose=False, stop_event=None):
+        on_event({"event_type": "book", "asset_id": "T", "bids": [{"price": "0.45"}, {"price": "0.47"}],
+                  "asks": [{"price": "0.55"}, {"price": "0.52"}], "timestamp": "1700000000000"})
+        on_event({"event_type": "last_trade_price", "asset_id": "T", "price": "0.50", "timestamp": "1700000001000"})
+        on_event({"event_type": "price_change", "price_changes": [{"asset_id": "U", "best_bid": "0.1"}]})
+        fed.set()
+
+    events = []
+    stop = threading.Event()
+    handler = threading.Thread(target=run_feed_handler, args=(owner.name, ["T"]), kwargs={"watch": _fake_ws})
+    try:
+        handler.start()
+        fed.wait(5)
+        handler.join(5)
+        watcher = threading.Thread(
+            target=shm_watch_by_ids, args=(["T"],), kwargs={"on_event": events.append, "stop_event": stop, "name": owner.name}
+        )
+        watcher.start()
+        watcher.join(5)
+    finally:
+        stop.set()
+        owner.close()
+
+    # The handler closed the feed, so the watcher returned after the snapshot.
+    assert len(events) == 1
+    (pc,) = events[0]["price_changes"]
+    assert events[0]["event_type"] == "price_change"
+    assert (pc["asset_id"], pc["best_bid"], pc["best_ask"], pc["price"]) == ("T", 0.47, 0.52, 0.50)
+    assert QuoteNormalizer().update(events[0])[0].ts == 1700000001.0
+
+
+def test_watch_rejects_assets_the_feed_does_not_carry():
+    owner = ShmQuoteWriter(capacity=64, max_assets=4)
+    try:
+        owner.asset_index("T")
+        with pytest.raises(ValueError, match="U"):
+            shm_watch_by_ids(["T", "U"], name=owner.name)
+    finally:
+        owner.close()
+
+
+def test_unquoted_side_stays_unknown_through_the_feed():
+    (quote,) = QuoteNormalizer().update({"event_type": "book", "asset_id": "A", "bids": [{"price": "0.48"}], "asks": []})
+    assert (quote.best_bid, quote.best_ask, quote.price) == (0.48, None, 0.48)
+    assert price_change_event([quote])["price_changes"] == [{"asset_id": "A", "best_bid": 0.48, "price": 0.48}]
+
+    owner = ShmQuoteWriter(capacity=8, max_assets=2)
+    try:
+        reader = ShmQuoteReader(owner.name)
+        owner.publish_quote(quote)
+        (record,) = reader.poll()
+        assert record.to_quote() == quote
+        reader.close()
+    finally:
+        owner.close()
@@ -0,0 +1,64 @@
+from pathlib import Path
+import sys
+import threading
+import time
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from trading.signal_slot import SignalSlot
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_newest_signal_wins_and_older_reput_is_dropped():
+    clock = _Clock()
+    dropped = []
+    slot = SignalSlot(5.0, on_drop=lambda sig, reason: dropped.append((sig, reason)), clock=clock)
+
+    slot.put("T", "buy@0.40")
+    clock.now += 1
+    newer = slot.put("T", "buy@0.38")
+    slot.put("T", "deferred", created_at=newer.created_at - 0.5)
+
+    entry = slot.take(timeout=0)
+    assert entry.signal == "buy@0.38"
+    assert slot.take(timeout=0) is None
+    assert dropped == [("buy@0.40", "superseded"), ("deferred", "superseded")]
+    assert slot.stats() == {"superseded": 2, "expired": 0}
+
+
+def test_stale_signals_expire_instead_of_executing():
+    clock = _Clock()
+    dropped = []
+    slot = SignalSlot(3.0, on_drop=lambda sig, reason: dropped.append(reason), clock=clock)
+
+    slot.put("A", "old")
+    clock.now += 2
+    slot.put("B", "fresh")
+    clock.now += 2  # "old" is now 4s old, "fresh" 2s
+
+    assert slot.take(timeout=0).signal == "fresh"
+    assert slot.take(timeout=0) is None
+    assert dropped == ["expired"]
+    assert slot.stats()["expired"] == 1
+
+
+def test_deferred_entry_waits_until_not_before():
+    slot = SignalSlot(10.0)
+    start = time.monotonic()
+    slot.put("T", "later", not_before=start + 0.1)
+    assert slot.take(timeout=0) is None
+
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(slot.take(timeout=2.0)))
+    waiter.start()
+    waiter.join(timeout=3.0)
+
+    assert result[0].signal == "later"
+    assert time.monotonic() - start >= 0.1
@@ -0,0 +1,55 @@
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from trading.status_normalizer import StatusNormalizer, normalize_status_full
+
+
+SHAPES = [
+    {"status": "LIVE", "price": "0.45", "original_size": "10"},
+    {"data": {"order": {"state": "MATCHED", "size": "3", "price": "0.4"}}},
+    [{"orderStatus": "OPEN", "filledAmount": "2.5", "avgPrice": "0.51"}],
+    {"result": {"state": "PARTIAL", "fills": [{"size": "1", "price": "0.5"}, {"size": "2", "price": "0.52"}]}},
+    {"meta": {"page": 1}, "order": {"status": "OPEN", "filled": 1.0}},
+]
+
+
+@pytest.mark.parametrize("payload", SHAPES)
+def test_memoized_path_matches_full_walk(payload):
+    normalizer = StatusNormalizer()
+    expected = normalize_status_full(payload)
+
+    assert normalizer.normalize_status(payload) == expected
+    assert normalizer.normalize_status(payload) == expected
+
+
+def test_repeated_shape_takes_direct_path():
+    normalizer = StatusNormalizer()
+    normalizer.normalize_status({"data": {"status": "OPEN", "filledAmount": 0.0}})
+    result = normalizer.normalize_status({"data": {"status": "FILLED", "filledAmount": 2.0}})
+
+    assert result == {"status": "FILLED", "filledAmount": 2.0}
+    assert normalizer.misses == 1
+    assert normalizer.hits == 1
+
+
+def test_schema_change_falls_back_to_full_walk():
+    normalizer = StatusNormalizer()
+    normalizer.normalize_status({"data": {"status": "OPEN", "filledAmount": 0.0}})
+    # Same outer keys, but the status moved one level deeper.
+    moved = {"data": {"order": {"status": "FILLED", "filledAmount": 1.0}}}
+
+    assert normalizer.normalize_status(moved) == normalize_status_full(moved)
+    assert normalizer.misses == 2
+
+
+def test_extract_order_id_prefers_known_keys():
+    normalizer = StatusNormalizer()
+
+    assert normalizer.extract_order_id({"success": True, "orderID": "0x1"}) == "0x1"
+    assert normalizer.extract_order_id({"success": True, "orderID": ""}) is None
+    assert normalizer.extract_order_id({"response": {"order_id": "nested"}}) == "nested"
+    assert normalizer.extract_order_id("plain-id") == "plain-id"
@@ -0,0 +1,59 @@
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from trading.ticks import ROUND_DOWN, ROUND_UP, TickGrid, decimals_of, grid_for
+from Volatility_arbitrage_strategy import ActionType, StrategyConfig, VolArbStrategy
+
+
+def test_grid_snaps_float_error_and_rounds_off_grid_values():
+    grid = grid_for(2)
+    assert grid.to_units(0.4 * 1.1, ROUND_UP) == 44  # 0.44000000000000006
+    assert grid.to_units(0.29, ROUND_DOWN) == 29  # 28.999999999999996 before snapping
+    assert grid.to_units(0.571, ROUND_UP) == 58 and grid.to_units(0.579, ROUND_DOWN) == 57
+    assert grid.floor(0.1 + 0.2) == 0.3 and grid_for(0).ceil(1 / 0.3) == 4.0
+    assert grid_for(4).to_units(123456.7891, ROUND_DOWN) == 1234567891
+
+    assert [grid.parse(t) for t in ("0.57", ".5", "1", "0.575", "-0.571")] == [57, 50, 100, 58, -57]
+    assert grid.parse("0.571", ROUND_UP) == 58 and grid.parse("-0.571", ROUND_DOWN) == -58
+    with pytest.raises(ValueError):
+        grid.parse("0.5x")
+
+    assert TickGrid.for_tick_size("0.010") == grid and TickGrid.for_tick_size(0.001).decimals == 3
+    with pytest.raises(ValueError):
+        TickGrid.for_tick_size(0.005)
+
+
+def test_decimals_of_matches_the_written_precision():
+    assert decimals_of("0.570") == 3
+    assert decimals_of(0.57) == 2 and decimals_of(5) == 0 and decimals_of("0.00") == 2
+    assert decimals_of(1e-05) == 5 and decimals_of(0.1 + 0.2) == 6
+    assert decimals_of("abc") is None and decimals_of(True) is None and decimals_of("") is None
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("1", 0), (100, 0), (0.0, 0), ("0", 0), ("0.010", 2), (0.001, 3), ("1e-7", 7), ("abc", None), (None, None)],
+)
+def test_market_precision_counts_normalized_decimals(value, expected):
+    from Volatility_arbitrage_run import _count_decimal_places
+
+    assert _count_decimal_places(value) == expected
+
+
+def test_strategy_compares_targets_in_ticks():
+    def _sell_signal(price_tick):
+        strategy = VolArbStrategy(StrategyConfig(token_id="T", profit_pct=0.1, price_tick=price_tick))
+        strategy.on_buy_filled(avg_price=0.4, size=10.0)
+        return strategy.on_tick(best_ask=0.45, best_bid=0.44, ts=1.0)
+
+    # 0.4 * 1.1 == 0.44000000000000006: float comparison misses the target by one ulp
+    assert _sell_signal(None) is None
+    action = _sell_signal(0.01)
+    assert action is not None and action.action == ActionType.SELL
+
+    strategy = VolArbStrategy(StrategyConfig(token_id="T", buy_price_threshold=0.3, price_tick=0.01))
+    assert strategy.on_tick(best_ask=0.301, best_bid=0.3, ts=1.0).action == ActionType.BUY
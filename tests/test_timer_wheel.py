@@ -0,0 +1,93 @@
+from pathlib import Path
+import asyncio
+import random
+import sys
+import threading
+import time
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from trading.timer_wheel import TimerWheel
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _manual_wheel(clock, **kwargs):
+    wheel = TimerWheel(clock=clock, **kwargs)
+    wheel._thread = threading.current_thread()  # drive it by hand via advance()
+    return wheel
+
+
+def test_timers_fire_on_their_tick_across_cascades_and_cancel():
+    clock = _Clock()
+    wheel = _manual_wheel(clock, tick=1.0, wheel_size=4, levels=2)
+    rng = random.Random(7)
+    fired = []
+    handles = []
+    for i in range(2000):
+        delay = rng.randint(1, 300)  # well past the 16-tick span, exercising overflow
+        handles.append(wheel.call_later(delay, lambda i=i, d=delay: fired.append((i, d, clock.now))))
+    cancelled = set(rng.sample(range(2000), 200))
+    for i in cancelled:
+        assert handles[i].cancel()
+    assert len(wheel) == 1800
+
+    for t in range(1, 320):
+        clock.now = float(t)
+        wheel.advance()
+
+    assert len(fired) == 1800
+    assert all(at == delay for _, delay, at in fired)
+    assert not cancelled & {i for i, _, _ in fired}
+    assert len(wheel) == 0
+
+
+def test_periodic_timer_until_cancelled():
+    clock = _Clock()
+    wheel = _manual_wheel(clock, tick=0.5)
+    hits = []
+    state = {}
+
+    def _tick():
+        hits.append(clock.now)
+        if len(hits) == 3:
+            state["handle"].cancel()
+
+    state["handle"] = wheel.call_later(1.0, _tick, interval=2.0)
+    for step in range(1, 30):
+        clock.now = step * 0.5
+        wheel.advance()
+
+    assert hits == [1.0, 3.0, 5.0]
+    assert len(wheel) == 0
+
+
+def test_thread_driven_wheel_with_blocking_and_asyncio_callbacks():
+    wheel = TimerWheel(tick=0.01).start()
+    done = threading.Event()
+    worker_names = []
+
+    def _blocking():
+        worker_names.append(threading.current_thread().name)
+        done.set()
+
+    started = time.monotonic()
+    wheel.call_later(0.05, _blocking, blocking=True)
+    assert done.wait(2.0)
+    assert time.monotonic() - started >= 0.05
+    assert worker_names[0].startswith("timer-worker")
+
+    async def _main():
+        t0 = asyncio.get_running_loop().time()
+        value = await wheel.sleep(0.03, result="woke")
+        return value, asyncio.get_running_loop().time() - t0
+
+    value, elapsed = asyncio.run(_main())
+    wheel.stop()
+    assert value == "woke" and elapsed >= 0.03
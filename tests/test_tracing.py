@@ -0,0 +1,84 @@
+from pathlib import Path
+import json
+import sys
+import threading
+import time
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from trading.tracing import Tracer
+
+
+def test_spans_follow_the_active_trace_across_threads():
+    tracer = Tracer()
+    trace_id = tracer.new_trace()
+
+    @tracer.traced("order.post")
+    def _post():
+        time.sleep(0.001)
+
+    def _worker():
+        with tracer.activate(trace_id):
+            _post()
+        _post()  # outside the trace again
+
+    tracer.record("strategy.on_tick", time.perf_counter(), trace_id=trace_id)
+    thread = threading.Thread(target=_worker)
+    thread.start()
+    thread.join()
+
+    spans = tracer.spans()
+    assert [(s[0], s[1]) for s in spans] == [(trace_id, "strategy.on_tick"), (trace_id, "order.post"), (0, "order.post")]
+    assert spans[1][4] == spans[2][4] != spans[0][4]
+
+
+def test_chrome_export_and_summary(tmp_path):
+    tracer = Tracer(path=str(tmp_path / "out" / "trace.json"))
+    trace_id = tracer.new_trace()
+    now = time.perf_counter()
+    tracer.mark_frame(now - 0.002, now - 0.001)
+    tracer.frame_spans(trace_id, tracer._wall_offset + now - 0.012)
+    for i in range(100):
+        tracer.record("order.sign", now, now + (i + 1) / 1000.0, trace_id=trace_id, side="BUY")
+
+    path = tracer.export_chrome()
+    events = json.loads(Path(path).read_text(encoding="utf-8"))["traceEvents"]
+    complete = [e for e in events if e["ph"] == "X"]
+    assert [e["name"] for e in complete[:2]] == ["ws.network", "ws.decode"]
+    assert abs(complete[0]["dur"] - 10_000) < 50
+    assert complete[-1]["args"] == {"trace": trace_id, "side": "BUY"}
+    assert any(e["ph"] == "M" and e["name"] == "thread_name" for e in events)
+
+    stats = tracer.summary()["order.sign"]
+    assert stats["count"] == 100
+    assert abs(stats["p50_ms"] - 50.5) < 1e-6
+    assert abs(stats["p99_ms"] - 99.01) < 1e-6
+    assert abs(stats["max_ms"] - 100.0) < 1e-6
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer(enabled=False)
+    assert tracer.new_trace() == 0
+    with tracer.span("order.post"):
+        pass
+    tracer.record("order.sign", time.perf_counter())
+    assert tracer.spans() == [] and tracer.export_chrome() is None
+
+
+def test_exited_threads_share_one_bounded_buffer():
+    tracer = Tracer(max_spans_per_thread=5)
+
+    def worker(i):
+        tracer.record(f"w{i}", 0.0, 1.0)
+        tracer.record(f"w{i}", 1.0, 2.0)
+
+    for i in range(10):
+        thread = threading.Thread(target=worker, args=(i,), name=f"worker-{i}")
+        thread.start()
+        thread.join()
+
+    spans = tracer.spans()
+    assert len(spans) == 5
+    assert tracer._buffers == []
+    names = {ev["args"]["name"] for ev in tracer.chrome_trace()["traceEvents"] if ev["ph"] == "M"}
+    assert names <= {f"worker-{i}" for i in range(10)} and "worker-9" in names
@@ -0,0 +1,289 @@
+"""Asynchronous structured logging for hot paths.
+
+``print()`` on the maker loops and the websocket callback thread blocks on
+stdout; when stdout is piped to a slow collector the trading threads stall
+with it. :class:`AsyncLogger` moves the write off those threads::
+
+    from trading.async_log import LOG
+
+    LOG.info("maker.sell.status", "[MAKER][SELL] 挂单状态 -> ...",
+             token=token_id, order_id=order_id, price=px, latency_ms=12.5)
+
+* ``log()`` builds a record dict and appends it to a ``collections.deque``.
+  ``deque.append`` is atomic under the GIL, so producers never take a lock.
+  A daemon writer thread drains the queue every ``flush_interval`` seconds
+  (or sooner when a batch piles up) and writes a whole batch at once.
+* Records are JSON lines (``ts``, ``level``, ``key``, ``msg`` plus any
+  fields such as ``market``, ``token``, ``order_id``, ``latency_ms``). The
+  console keeps the familiar text line; set ``POLY_LOG_JSON`` to a file path
+  to also write JSON lines there, or to ``-`` to write JSON to stdout.
+* Each record has a message ``key``. ``interval`` (per call, or per key via
+  ``rate_limits`` / ``POLY_LOG_RATE_LIMITS="maker.sell.status=5,..."``)
+  drops repeats of a key within that many seconds; the next record that
+  gets through carries ``suppressed=<n>``.
+* The last ``ring_size`` records (``POLY_LOG_RING``, default 2000) stay in
+  a ring buffer. :meth:`AsyncLogger.install_crash_dump` hooks uncaught
+  exceptions in any thread and dumps the ring as JSON lines to
+  ``POLY_LOG_CRASH_DIR`` (default: stderr).
+* When the queue holds ``max_queue`` records, new records are dropped and
+  counted rather than blocking the caller.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, IO, List, Mapping, Optional
+
+Record = Dict[str, Any]
+
+
+class AsyncLogger:
+    """Lock-free producer side, single background writer."""
+
+    def __init__(
+        self,
+        *,
+        stream: Optional[IO[str]] = None,
+        json_path: Optional[str] = None,
+        ring_size: int = 2000,
+        max_queue: int = 100_000,
+        flush_interval: float = 0.05,
+        batch_size: int = 256,
+        rate_limits: Optional[Mapping[str, float]] = None,
+        crash_dir: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._stream = stream
+        self.json_path = json_path
+        self.max_queue = max(int(max_queue), 1)
+        self.flush_interval = max(float(flush_interval), 0.001)
+        self.batch_size = max(int(batch_size), 1)
+        self.rate_limits: Dict[str, float] = dict(rate_limits or {})
+        self.crash_dir = crash_dir
+        self._clock = clock
+        self._queue: Deque[Record] = deque()
+        self._ring: Deque[Record] = deque(maxlen=max(int(ring_size), 1))
+        self._last_emit: Dict[str, float] = {}
+        self._suppressed: Dict[str, int] = {}
+        self.dropped = 0
+        self._wakeup = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._start_lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._json_fh: Optional[IO[str]] = None
+        self._closed = False
+
+    @classmethod
+    def from_env(cls) -> "AsyncLogger":
+        return cls(
+            json_path=os.getenv("POLY_LOG_JSON") or None,
+            ring_size=int(os.getenv("POLY_LOG_RING", "2000") or 2000),
+            crash_dir=os.getenv("POLY_LOG_CRASH_DIR") or None,
+            rate_limits=parse_rate_limits(os.getenv("POLY_LOG_RATE_LIMITS", "")),
+        )
+
+    # ------------------------------------------------------------------
+    # Producer side
+    def log(
+        self,
+        key: str,
+        message: str,
+        *,
+        level: str = "INFO",
+        interval: Optional[float] = None,
+        **fields: Any,
+    ) -> bool:
+        """Queue one record; returns False if it was rate limited or dropped."""
+
+        now = self._clock()
+        if interval is None:
+            interval = self.rate_limits.get(key)
+        if interval:
+            last = self._last_emit.get(key)
+            if last is not None and now - last < interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            self._last_emit[key] = now
+        record: Record = {"ts": now, "level": level, "key": key, "msg": message}
+        if fields:
+            record.update(fields)
+        suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record["suppressed"] = suppressed
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return False
+        self._queue.append(record)
+        self._ring.append(record)
+        if self._writer is None:
+            self._start_writer()
+        elif len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def info(self, key: str, message: str, **fields: Any) -> bool:
+        return self.log(key, message, level="INFO", **fields)
+
+    def warn(self, key: str, message: str, **fields: Any) -> bool:
+        return self.log(key, message, level="WARN", **fields)
+
+    def error(self, key: str, message: str, **fields: Any) -> bool:
+        return self.log(key, message, level="ERROR", **fields)
+
+    # ------------------------------------------------------------------
+    # Control
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far has been written."""
+
+        if self._writer is None or not self._writer.is_alive():
+            self._drain()
+            return True
+        deadline = time.monotonic() + timeout
+        while self._queue or not self._idle.is_set():
+            self._wakeup.set()
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def close(self) -> None:
+        self._closed = True
+        self._wakeup.set()
+        if self._writer is not None:
+            self._writer.join(timeout=5.0)
+        self._drain()
+        if self._json_fh is not None:
+            self._json_fh.close()
+            self._json_fh = None
+
+    def recent(self) -> List[Record]:
+        return list(self._ring)
+
+    def dump_ring(self, target: Optional[IO[str]] = None) -> int:
+        records = self.recent()
+        out = target or sys.stderr
+        for record in records:
+            out.write(_to_json(record) + "\n")
+        out.flush()
+        return len(records)
+
+    def install_crash_dump(self) -> None:
+        """Dump the ring buffer when any thread dies with an uncaught exception."""
+
+        previous_hook = sys.excepthook
+        previous_thread_hook = threading.excepthook
+
+        def _excepthook(exc_type, exc, tb) -> None:
+            self._dump_crash(exc_type, exc, "MainThread")
+            previous_hook(exc_type, exc, tb)
+
+        def _thread_hook(args) -> None:
+            if args.exc_type is not SystemExit:
+                thread_name = args.thread.name if args.thread is not None else "?"
+                self._dump_crash(args.exc_type, args.exc_value, thread_name)
+            previous_thread_hook(args)
+
+        sys.excepthook = _excepthook
+        threading.excepthook = _thread_hook
+
+    # ------------------------------------------------------------------
+    # Writer side
+    def _start_writer(self) -> None:
+        with self._start_lock:
+            if self._writer is not None:
+                return
+            self._writer = threading.Thread(target=self._run, name="async-log", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._idle.clear()
+            try:
+                self._drain()
+            finally:
+                self._idle.set()
+            if self._closed and not self._queue:
+                return
+
+    def _drain(self) -> None:
+        batch: List[Record] = []
+        queue = self._queue
+        while queue:
+            batch.append(queue.popleft())
+        if not batch:
+            return
+        json_to_stdout = self.json_path == "-"
+        stream = self._stream or sys.stdout
+        try:
+            if json_to_stdout:
+                stream.write("".join(_to_json(r) + "\n" for r in batch))
+            else:
+                stream.write("".join(_to_text(r) + "\n" for r in batch))
+            stream.flush()
+        except (OSError, ValueError):
+            pass
+        if self.json_path and not json_to_stdout:
+            try:
+                if self._json_fh is None:
+                    self._json_fh = open(self.json_path, "a", encoding="utf-8")
+                self._json_fh.write("".join(_to_json(r) + "\n" for r in batch))
+                self._json_fh.flush()
+            except OSError:
+                pass
+
+    def _dump_crash(self, exc_type, exc, thread_name: str) -> None:
+        self.log("crash", f"[CRASH] {thread_name}: {exc_type.__name__}: {exc}", level="ERROR")
+        try:
+            if self.crash_dir:
+                os.makedirs(self.crash_dir, exist_ok=True)
+                path = os.path.join(self.crash_dir, f"crash-{int(time.time() * 1000)}.jsonl")
+                with open(path, "w", encoding="utf-8") as fh:
+                    count = self.dump_ring(fh)
+                sys.stderr.write(f"[CRASH] 最近 {count} 条日志已写入 {path}\n")
+            else:
+                self.dump_ring(sys.stderr)
+        except Exception:
+            pass
+
+
+def parse_rate_limits(text: str) -> Dict[str, float]:
+    """Parse ``"maker.sell.status=5,watchdog.orders=10"`` into ``{key: seconds}``."""
+
+    limits: Dict[str, float] = {}
+    for item in text.split(","):
+        key, sep, value = item.partition("=")
+        if not sep or not key.strip():
+            continue
+        try:
+            limits[key.strip()] = float(value)
+        except ValueError:
+            continue
+    return limits
+
+
+def _to_text(record: Record) -> str:
+    text = str(record.get("msg", ""))
+    suppressed = record.get("suppressed")
+    if suppressed:
+        text += f" (+{suppressed} 条同类日志已抑制)"
+    return text
+
+
+def _to_json(record: Record) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+LOG = AsyncLogger.from_env()
+
+
+__all__ = ["AsyncLogger", "LOG", "Record", "parse_rate_limits"]
@@ -0,0 +1,390 @@
+"""Concurrent, resumable batch claims.
+
+Positions are grouped per market, claimed on a small thread pool with
+backoff retries, and recorded in a :class:`ClaimLedger` shared across
+processes. Claims older than ``reverify_after`` are checked against the live
+positions again.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+SubmitFn = Callable[["ClaimJob"], Tuple[bool, Optional[float]]]
+
+# The positions API can lag a claim by a few minutes; past this a ledger entry
+# no longer overrides a live "claimable" listing.
+DEFAULT_REVERIFY_AFTER = 900.0
+
+
+@dataclass
+class ClaimJob:
+    market_id: str
+    token_ids: List[str] = field(default_factory=list)
+    amount_hint: float = 0.0
+    positions: int = 0
+
+
+@dataclass
+class ClaimOutcome:
+    market_id: str
+    ok: bool
+    amount: Optional[float]
+    attempts: int
+    elapsed: float
+    error: Optional[str] = None
+
+
+_AMOUNT_KEYS = (
+    "claimableAmount",
+    "claimable_amount",
+    "pendingPayout",
+    "pending_payout",
+    "payout",
+    "amount",
+    "value",
+)
+
+
+def _to_float(val: Any) -> Optional[float]:
+    if val is None:
+        return None
+    if isinstance(val, (int, float, Decimal)):
+        return float(val)
+    if isinstance(val, str):
+        val = val.strip()
+        if not val:
+            return None
+        try:
+            return float(val)
+        except ValueError:
+            return None
+    return None
+
+
+def normalize_positions(raw: Any) -> List[Dict[str, Any]]:
+    """Coerce a positions response of any known shape into a list of dicts."""
+
+    if raw is None:
+        return []
+    if isinstance(raw, dict):
+        for key in ("positions", "data", "results", "items", "list"):
+            val = raw.get(key)
+            if isinstance(val, list):
+                return [item for item in val if isinstance(item, dict)]
+        if all(k in raw for k in ("market", "token_id")):
+            return [raw]
+        # Some endpoints answer {"YES": {...}, "NO": {...}}.
+        if all(isinstance(v, dict) for v in raw.values()):
+            return [dict(v, **{"token_side": k}) for k, v in raw.items()]
+        return []
+    if isinstance(raw, Iterable):
+        return [item for item in raw if isinstance(item, dict)]
+    return []
+
+
+def claim_amount(position: Dict[str, Any]) -> Optional[float]:
+    for key in _AMOUNT_KEYS:
+        val = _to_float(position.get(key))
+        if val is not None:
+            return val
+    return None
+
+
+def parse_claim_response(resp: Any) -> Tuple[bool, Optional[float]]:
+    """``(ok, amount)`` from a ``claim_positions`` or HTTP claim response.
+
+    A call that merely did not raise is not a claim: the response must say
+    so (``success``/``status``) or list claimed amounts.
+    """
+
+    if resp is None:
+        return False, None
+    if isinstance(resp, dict):
+        success_flags = {
+            str(resp.get("success")).lower(),
+            str(resp.get("status")).lower(),
+        }
+        if "true" in success_flags or "ok" in success_flags or "success" in success_flags:
+            amount = claim_amount(resp)
+            if amount is None:
+                for key in ("claimedAmount", "amountClaimed", "payout"):
+                    if resp.get(key) is not None:
+                        amount = _to_float(resp[key])
+                        break
+            return True, amount
+        if resp.get("error"):
+            return False, None
+        if "positions" in resp:
+            try:
+                totals = [amt for amt in map(claim_amount, normalize_positions(resp["positions"])) if amt]
+                return bool(totals), sum(totals) if totals else None
+            except Exception:
+                pass
+    if isinstance(resp, list):
+        totals: List[float] = []
+        for item in resp:
+            amt = claim_amount(item) if isinstance(item, dict) else None
+            amt = amt or _to_float(item)
+            if amt:
+                totals.append(amt)
+        if totals:
+            return True, sum(totals)
+    return False, None
+
+
+def group_by_market(
+    positions: Iterable[Dict[str, Any]],
+    *,
+    market_of: Callable[[Dict[str, Any]], Optional[str]],
+    token_of: Callable[[Dict[str, Any]], Optional[str]],
+    amount_of: Callable[[Dict[str, Any]], Optional[float]],
+) -> Tuple[List[ClaimJob], List[Dict[str, Any]]]:
+    """One :class:`ClaimJob` per market (first-seen order) plus positions without a market id."""
+
+    jobs: Dict[str, ClaimJob] = {}
+    orphans: List[Dict[str, Any]] = []
+    for pos in positions:
+        market_id = market_of(pos)
+        if not market_id:
+            orphans.append(pos)
+            continue
+        job = jobs.get(market_id)
+        if job is None:
+            job = jobs[market_id] = ClaimJob(market_id)
+        token_id = token_of(pos)
+        if token_id and token_id not in job.token_ids:
+            job.token_ids.append(token_id)
+        job.amount_hint += amount_of(pos) or 0.0
+        job.positions += 1
+    return list(jobs.values()), orphans
+
+
+class ClaimLedger:
+    """Append-only record of finished markets; recent claims are skipped on rerun."""
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        reverify_after: float = DEFAULT_REVERIFY_AFTER,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = path
+        self.reverify_after = float(reverify_after)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.claimed: Dict[str, Dict[str, Any]] = {}
+        self.failed: Dict[str, Dict[str, Any]] = {}
+        self._offset = 0
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "rb") as fh:
+                data = fh.read()
+        except FileNotFoundError:
+            return
+        if data and not data.endswith(b"\n"):
+            # Torn tail from an interrupted run: drop it so the next append starts on a fresh line.
+            keep = data.rfind(b"\n") + 1
+            with open(self.path, "r+b") as fh:
+                fh.truncate(keep)
+            data = data[:keep]
+        self._offset = len(data)
+        self._apply_lines(data)
+
+    def refresh(self) -> None:
+        """Pick up records other processes appended since the last read."""
+
+        with self._lock:
+            try:
+                with open(self.path, "rb") as fh:
+                    fh.seek(self._offset)
+                    data = fh.read()
+            except FileNotFoundError:
+                return
+            # A record still being written has no newline yet; read it next time.
+            data = data[: data.rfind(b"\n") + 1]
+            self._offset += len(data)
+            self._apply_lines(data)
+
+    def _apply_lines(self, data: bytes) -> None:
+        for line in data.decode("utf-8", errors="replace").splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            market_id = record.get("market_id")
+            if not market_id:
+                continue
+            if record.get("ok"):
+                self.claimed[market_id] = record
+                self.failed.pop(market_id, None)
+            elif market_id not in self.claimed:
+                self.failed[market_id] = record
+
+    def is_claimed(self, market_id: str) -> bool:
+        """True if ``market_id`` was claimed less than ``reverify_after`` seconds ago."""
+
+        record = self.claimed.get(market_id)
+        if record is None:
+            return False
+        return self._clock() - float(record.get("ts") or 0.0) < self.reverify_after
+
+    def record(self, outcome: ClaimOutcome) -> None:
+        record = dict(asdict(outcome), ts=self._clock())
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as fh:
+                fh.write(line)
+                fh.flush()
+                os.fsync(fh.fileno())
+            if outcome.ok:
+                self.claimed[outcome.market_id] = record
+                self.failed.pop(outcome.market_id, None)
+            else:
+                self.failed[outcome.market_id] = record
+
+
+@dataclass
+class ClaimReport:
+    outcomes: List[ClaimOutcome] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def claimed(self) -> List[ClaimOutcome]:
+        return [o for o in self.outcomes if o.ok]
+
+    @property
+    def failed(self) -> List[ClaimOutcome]:
+        return [o for o in self.outcomes if not o.ok]
+
+    @property
+    def total_amount(self) -> float:
+        return sum(o.amount or 0.0 for o in self.claimed)
+
+    @property
+    def attempts(self) -> int:
+        return sum(o.attempts for o in self.outcomes)
+
+    def throughput(self) -> float:
+        """Finished markets per second of wall time."""
+
+        return len(self.outcomes) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary_lines(self) -> List[str]:
+        latencies = sorted(o.elapsed for o in self.outcomes)
+        lines = [
+            f"markets: {len(self.claimed)} claimed, {len(self.failed)} failed, {len(self.skipped)} skipped (already claimed)",
+            f"attempts: {self.attempts} ({self.attempts - len(self.outcomes)} retries)",
+            f"wall time: {self.elapsed:.2f}s, throughput {self.throughput():.2f} markets/s",
+        ]
+        if latencies:
+            lines.append(
+                f"per-market time: p50 {latencies[len(latencies) // 2]:.2f}s, max {latencies[-1]:.2f}s"
+            )
+        return lines
+
+
+class ClaimPipeline:
+    """Claims markets concurrently with per-market retry and a progress ledger."""
+
+    def __init__(
+        self,
+        submit: SubmitFn,
+        *,
+        workers: int = 4,
+        max_attempts: int = 3,
+        backoff: float = 2.0,
+        max_backoff: float = 30.0,
+        ledger: Optional[ClaimLedger] = None,
+        on_result: Optional[Callable[[ClaimOutcome], None]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+        jitter: Callable[[], float] = random.random,
+    ) -> None:
+        self.submit = submit
+        self.workers = max(int(workers), 1)
+        self.max_attempts = max(int(max_attempts), 1)
+        self.backoff = float(backoff)
+        self.max_backoff = float(max_backoff)
+        self.ledger = ledger
+        self.on_result = on_result
+        self._sleep = sleep
+        self._clock = clock
+        self._jitter = jitter
+
+    def run(self, jobs: Iterable[ClaimJob]) -> ClaimReport:
+        report = ClaimReport()
+        pending: List[ClaimJob] = []
+        for job in jobs:
+            if self.ledger is not None and self.ledger.is_claimed(job.market_id):
+                report.skipped.append(job.market_id)
+            else:
+                pending.append(job)
+        started = self._clock()
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(pending)), thread_name_prefix="claim") as pool:
+                futures = {pool.submit(self._claim_unless_claimed, job): job for job in pending}
+                for future in as_completed(futures):
+                    outcome = future.result()
+                    if outcome is None:
+                        report.skipped.append(futures[future].market_id)
+                        continue
+                    report.outcomes.append(outcome)
+                    if self.ledger is not None:
+                        self.ledger.record(outcome)
+                    if self.on_result is not None:
+                        self.on_result(outcome)
+        report.elapsed = self._clock() - started
+        return report
+
+    def _claim_unless_claimed(self, job: ClaimJob) -> Optional[ClaimOutcome]:
+        # Other processes share the ledger: re-read it right before claiming.
+        if self.ledger is not None:
+            self.ledger.refresh()
+            if self.ledger.is_claimed(job.market_id):
+                return None
+        return self._claim(job)
+
+    def _claim(self, job: ClaimJob) -> ClaimOutcome:
+        started = self._clock()
+        error: Optional[str] = None
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                ok, amount = self.submit(job)
+                error = None
+            except Exception as exc:  # one market's failure must not stop the batch
+                ok, amount, error = False, None, f"{type(exc).__name__}: {exc}"
+            if ok:
+                return ClaimOutcome(job.market_id, True, amount, attempt, self._clock() - started)
+            if attempt < self.max_attempts:
+                delay = min(self.backoff * (2 ** (attempt - 1)), self.max_backoff)
+                self._sleep(delay * (0.5 + self._jitter() / 2.0))
+        return ClaimOutcome(job.market_id, False, None, self.max_attempts, self._clock() - started, error)
+
+
+__all__ = [
+    "ClaimJob",
+    "ClaimLedger",
+    "ClaimOutcome",
+    "ClaimPipeline",
+    "ClaimReport",
+    "DEFAULT_REVERIFY_AFTER",
+    "claim_amount",
+    "group_by_market",
+    "normalize_positions",
+    "parse_claim_response",
+]
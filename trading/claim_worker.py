@@ -0,0 +1,290 @@
+"""Background claim worker for the trading process.
+
+Markets arrive from :meth:`ClaimWorker.notify`, periodic scans of the
+position snapshot, and :meth:`ClaimWorker.scan_now`. Notifications within
+``batch_window`` are merged into one
+:class:`~trading.claim_pipeline.ClaimPipeline` run, and claimed markets are
+not claimed again for ``reverify_after`` seconds.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from trading.claim_pipeline import (
+    DEFAULT_REVERIFY_AFTER,
+    ClaimJob,
+    ClaimLedger,
+    ClaimOutcome,
+    ClaimPipeline,
+    ClaimReport,
+    SubmitFn,
+)
+
+ScanFn = Callable[[], Iterable[ClaimJob]]
+
+_TRUE_STRINGS = {"true", "yes", "1"}
+
+
+def _first(entry: Dict[str, Any], *keys: str) -> Any:
+    for key in keys:
+        val = entry.get(key)
+        if val is not None and val != "":
+            return val
+    return None
+
+
+def _as_float(val: Any) -> float:
+    if isinstance(val, bool):
+        return 0.0
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _flag(val: Any) -> bool:
+    if isinstance(val, str):
+        return val.strip().lower() in _TRUE_STRINGS
+    return val is True
+
+
+def redeemable_jobs(positions: Iterable[Dict[str, Any]]) -> List[ClaimJob]:
+    """Group data-api position entries that are ``redeemable`` with a non-zero size.
+
+    This is stricter than the manual script's ``_is_claimable``: any open
+    position has a positive ``value``, and the worker must only act on
+    positions the API marks as redeemable.
+    """
+
+    jobs: Dict[str, ClaimJob] = {}
+    for entry in positions:
+        if not isinstance(entry, dict):
+            continue
+        if not _flag(_first(entry, "redeemable", "isRedeemable", "claimable")):
+            continue
+        size = _as_float(_first(entry, "size", "shares", "balance"))
+        if size <= 0:
+            continue
+        market_id = _first(entry, "conditionId", "condition_id", "market", "market_id")
+        if not market_id or isinstance(market_id, dict):
+            continue
+        market_id = str(market_id)
+        job = jobs.get(market_id)
+        if job is None:
+            job = jobs[market_id] = ClaimJob(market_id)
+        token_id = _first(entry, "asset", "asset_id", "token_id", "tokenId")
+        if token_id is not None and str(token_id) not in job.token_ids:
+            job.token_ids.append(str(token_id))
+        job.amount_hint += _as_float(_first(entry, "currentValue", "current_value", "size"))
+        job.positions += 1
+    return list(jobs.values())
+
+
+class ClaimWorker:
+    """Queues markets as they resolve and claims them off the trading thread."""
+
+    def __init__(
+        self,
+        submit: SubmitFn,
+        *,
+        scan: Optional[ScanFn] = None,
+        scan_interval: float = 60.0,
+        batch_window: float = 1.0,
+        workers: int = 2,
+        max_attempts: int = 3,
+        backoff: float = 2.0,
+        ledger: Optional[ClaimLedger] = None,
+        reverify_after: Optional[float] = None,
+        on_result: Optional[Callable[[ClaimOutcome], None]] = None,
+        on_error: Optional[Callable[[str, BaseException], None]] = None,
+        name: str = "claim-worker",
+    ) -> None:
+        self.scan = scan
+        self.scan_interval = float(scan_interval)
+        self.batch_window = max(float(batch_window), 0.0)
+        self.ledger = ledger
+        if reverify_after is None:
+            reverify_after = ledger.reverify_after if ledger is not None else DEFAULT_REVERIFY_AFTER
+        self.reverify_after = float(reverify_after)
+        self.on_error = on_error
+        self.name = name
+        self._pipeline = ClaimPipeline(
+            submit,
+            workers=workers,
+            max_attempts=max_attempts,
+            backoff=backoff,
+            ledger=ledger,
+            on_result=on_result,
+        )
+        self._cond = threading.Condition()
+        self._pending: Dict[str, ClaimJob] = {}
+        self._first_pending_at = 0.0
+        # market id -> wall-clock time of the claim
+        self._claimed: Dict[str, float] = (
+            {m: float(r.get("ts") or 0.0) for m, r in ledger.claimed.items()} if ledger is not None else {}
+        )
+        self._in_flight: set = set()
+        self._busy = False
+        self._stopping = False
+        self._drain = True
+        # Scan soon after start: the snapshot may already hold redeemable positions.
+        self._next_scan_at = time.monotonic() if scan is not None and self.scan_interval > 0 else float("inf")
+        self._thread: Optional[threading.Thread] = None
+        self.reports: List[ClaimReport] = []
+
+    # ------------------------------------------------------------------
+    def start(self) -> "ClaimWorker":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def notify(
+        self,
+        market_id: str,
+        token_ids: Sequence[str] = (),
+        *,
+        amount_hint: float = 0.0,
+    ) -> bool:
+        """Queue ``market_id``; returns ``False`` if it is already claimed."""
+
+        if not market_id:
+            return False
+        with self._cond:
+            if self._recently_claimed(market_id):
+                return False
+            self._merge(ClaimJob(market_id, list(token_ids), float(amount_hint or 0.0), 1))
+            self._cond.notify_all()
+        return True
+
+    def scan_now(self, delay: float = 0.0) -> None:
+        """Run the position scan at most ``delay`` seconds from now."""
+
+        if self.scan is None:
+            return
+        with self._cond:
+            self._next_scan_at = min(self._next_scan_at, time.monotonic() + max(delay, 0.0))
+            self._cond.notify_all()
+
+    def is_claimed(self, market_id: str) -> bool:
+        with self._cond:
+            return self._recently_claimed(market_id)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until nothing is queued or being claimed."""
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def stop(self, *, drain: bool = True, timeout: Optional[float] = None) -> bool:
+        """Stop the worker. With ``drain`` it claims what is queued first.
+
+        Returns ``False`` if the thread did not finish within ``timeout``.
+        """
+
+        with self._cond:
+            self._stopping = True
+            self._drain = drain
+            self._cond.notify_all()
+        thread = self._thread
+        if thread is None:
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    # ------------------------------------------------------------------
+    def _recently_claimed(self, market_id: str) -> bool:
+        # Caller holds self._cond.
+        claimed_at = self._claimed.get(market_id)
+        return claimed_at is not None and time.time() - claimed_at < self.reverify_after
+
+    def _merge(self, job: ClaimJob) -> None:
+        # Caller holds self._cond.
+        current = self._pending.get(job.market_id)
+        if current is None:
+            if not self._pending:
+                self._first_pending_at = time.monotonic()
+            self._pending[job.market_id] = job
+            return
+        for token_id in job.token_ids:
+            if token_id not in current.token_ids:
+                current.token_ids.append(token_id)
+        current.amount_hint = max(current.amount_hint, job.amount_hint)
+        current.positions += job.positions
+
+    def _run_scan(self) -> None:
+        try:
+            jobs = list(self.scan()) if self.scan is not None else []
+        except Exception as exc:  # a failed snapshot must not kill the worker
+            if self.on_error is not None:
+                self.on_error("scan", exc)
+            return
+        with self._cond:
+            for job in jobs:
+                if not self._recently_claimed(job.market_id) and job.market_id not in self._in_flight:
+                    self._merge(job)
+
+    def _take_batch(self) -> Optional[List[ClaimJob]]:
+        """Wait for the next batch; ``None`` once stopped. Returns ``[]`` when a scan is due."""
+
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self._stopping and (not self._drain or not self._pending):
+                    return None
+                if self._pending:
+                    ready_at = self._first_pending_at + self.batch_window
+                    if self._stopping or now >= ready_at:
+                        batch = list(self._pending.values())
+                        self._pending.clear()
+                        self._in_flight.update(job.market_id for job in batch)
+                        self._busy = True
+                        return batch
+                    wait = ready_at - now
+                else:
+                    wait = None
+                if not self._stopping and now >= self._next_scan_at:
+                    self._next_scan_at = now + self.scan_interval
+                    self._busy = True
+                    return []
+                if self._next_scan_at != float("inf") and not self._stopping:
+                    until_scan = max(self._next_scan_at - now, 0.0)
+                    wait = until_scan if wait is None else min(wait, until_scan)
+                self._cond.wait(wait)
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                break
+            try:
+                if batch:
+                    report = self._pipeline.run(batch)
+                    self.reports.append(report)
+                    with self._cond:
+                        now = time.time()
+                        self._claimed.update((outcome.market_id, now) for outcome in report.claimed)
+                        # Skipped: the shared ledger shows another process claimed it.
+                        self._claimed.update((market_id, now) for market_id in report.skipped)
+                else:
+                    self._run_scan()
+            except Exception as exc:
+                if self.on_error is not None:
+                    self.on_error("claim", exc)
+            finally:
+                with self._cond:
+                    self._in_flight.clear()
+                    self._busy = False
+                    self._cond.notify_all()
+
+
+__all__ = ["ClaimWorker", "redeemable_jobs"]
@@ -0,0 +1,130 @@
+"""Per-asset tick conflation between the websocket thread and the strategy.
+
+``offer`` overwrites the asset's slot in O(1) and ``drain`` takes every dirty
+slot; ``mid_min`` / ``mid_max`` keep the range of the quotes overwritten in
+between.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from trading.metrics import TICKS_CONFLATED
+
+
+@dataclass
+class ConflatedTick:
+    """Latest quote for one asset plus aggregates since the previous drain."""
+
+    asset_id: str
+    best_bid: float
+    best_ask: float
+    price: float
+    ts: float
+    received_at: float
+    first_received_at: float
+    count: int = 1
+    mid_min: float = 0.0
+    mid_max: float = 0.0
+    trace_id: int = 0
+
+    @property
+    def mid(self) -> float:
+        return (self.best_bid + self.best_ask) / 2.0
+
+    @property
+    def conflated(self) -> int:
+        return self.count - 1
+
+
+class TickConflator:
+    """Latest-value slots keyed by asset id, drained by one consumer."""
+
+    def __init__(self, *, clock: Callable[[], float] = time.perf_counter) -> None:
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._slots: Dict[str, ConflatedTick] = {}
+        self._closed = False
+        self.offered = 0
+        self.conflated = 0
+
+    def offer(
+        self,
+        asset_id: str,
+        best_bid: float,
+        best_ask: float,
+        price: float,
+        ts: float,
+        *,
+        received_at: Optional[float] = None,
+        trace_id: int = 0,
+    ) -> None:
+        if received_at is None:
+            received_at = self._clock()
+        mid = (best_bid + best_ask) / 2.0
+        with self._lock:
+            self.offered += 1
+            slot = self._slots.get(asset_id)
+            if slot is None:
+                self._slots[asset_id] = ConflatedTick(
+                    asset_id, best_bid, best_ask, price, ts, received_at, received_at, 1, mid, mid, trace_id
+                )
+                self._ready.notify()
+                return
+            slot.best_bid = best_bid
+            slot.best_ask = best_ask
+            slot.price = price
+            slot.ts = ts
+            slot.received_at = received_at
+            slot.trace_id = trace_id
+            slot.count += 1
+            if mid < slot.mid_min:
+                slot.mid_min = mid
+            if mid > slot.mid_max:
+                slot.mid_max = mid
+            self.conflated += 1
+        TICKS_CONFLATED.labels(asset_id).inc()
+
+    def drain(self, timeout: Optional[float] = None) -> List[ConflatedTick]:
+        """Take all pending slots, waiting up to ``timeout`` for the first one."""
+
+        with self._lock:
+            if not self._slots and not self._closed:
+                self._ready.wait(timeout)
+            if not self._slots:
+                return []
+            slots = self._slots
+            self._slots = {}
+        return list(slots.values())
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._slots)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._ready.notify_all()
+
+
+def run_worker(
+    conflator: TickConflator,
+    handler: Callable[[ConflatedTick], None],
+    stop_event: threading.Event,
+    *,
+    poll_timeout: float = 0.5,
+) -> None:
+    """Drain ``conflator`` into ``handler`` until ``stop_event`` is set."""
+
+    while not stop_event.is_set():
+        for tick in conflator.drain(timeout=poll_timeout):
+            if stop_event.is_set():
+                return
+            handler(tick)
+
+
+__all__ = ["ConflatedTick", "TickConflator", "run_worker"]
@@ -0,0 +1,792 @@
+"""Lease-based assignment of markets to strategy workers across processes and hosts.
+
+``Volatility_arbitrage_run.main()`` drives a single market, so a host can
+only run as many markets as it can run runner processes by hand. With this
+module a :class:`Coordinator` owns the market configs and leases each market
+to exactly one :class:`LeaseWorker`:
+
+* **placement** - a consistent-hash ring (:class:`HashRing`, virtual nodes)
+  over the live workers decides which worker should own each market. A
+  worker joining or leaving moves only its share of the markets;
+* **heartbeats** - workers heartbeat every ``heartbeat_interval`` over a
+  JSON-lines request/response socket. The heartbeat reports the leases
+  the worker holds and the markets it has released. A worker silent for
+  ``worker_timeout`` drops off the ring;
+* **leases** - each grant carries an epoch and a TTL. Heartbeats renew the
+  leases whose epoch still matches. A worker that cannot renew fences
+  itself: it releases the market and kills the runner if the release has
+  not finished ``fence_timeout`` later, all before the TTL runs out. The
+  coordinator only re-grants after expiry;
+* **ordered handover** - when the ring moves a market, the coordinator
+  first asks the current owner to release it. The owner stops its runner,
+  which cancels its maker orders, and then reports the release together
+  with the position the runner still holds (``handover``). Only then is the
+  market granted to the new owner, and the grant carries that position so
+  the new runner sells it instead of starting flat. If the old owner vanished
+  instead, the lease runs out and the grant carries ``cancel_stale``: the
+  new owner cancels whatever the old one left on the book and takes over the
+  position it finds in the account before it quotes.
+
+Markets that finish on their own (the runner exits cleanly, e.g. after the
+market closed) are reported as ``done`` and are not re-granted.
+
+Run it with::
+
+    python -m trading.coordinator serve --markets markets.json --listen 127.0.0.1:9200
+    python -m trading.coordinator work --connect 127.0.0.1:9200 --id node-a
+
+``markets.json`` maps market ids to configs. ``inputs`` are the answers the
+runner would otherwise prompt for; ``env`` is optional. For example
+``{"btc-up": {"inputs": ["https://polymarket.com/event/...", "YES", ...]}}``.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Protocol, Sequence, Set, Tuple
+
+from trading.async_log import LOG
+
+DEFAULT_LEASE_TTL = 10.0
+DEFAULT_HEARTBEAT_INTERVAL = 2.0
+# Default share of the lease TTL a fenced runner gets to stop before it is killed.
+DEFAULT_FENCE_SHARE = 0.25
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.sha1(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent-hash ring with ``vnodes`` points per node."""
+
+    def __init__(self, nodes: Iterable[str] = (), *, vnodes: int = 64) -> None:
+        self.vnodes = max(int(vnodes), 1)
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self._nodes: Set[str] = set()
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> Set[str]:
+        return set(self._nodes)
+
+    def add(self, node: str) -> None:
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        for i in range(self.vnodes):
+            point = _hash(f"{node}#{i}")
+            at = bisect.bisect(self._points, point)
+            self._points.insert(at, point)
+            self._owners.insert(at, node)
+
+    def remove(self, node: str) -> None:
+        if node not in self._nodes:
+            return
+        self._nodes.discard(node)
+        keep = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [p for p, _ in keep]
+        self._owners = [o for _, o in keep]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        at = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[at]
+
+
+@dataclass
+class Lease:
+    market_id: str
+    owner: str
+    epoch: int
+    expires: float
+    cancel_stale: bool = False
+
+
+class Coordinator:
+    """Assignment state machine; transport-agnostic and clock-injectable."""
+
+    def __init__(
+        self,
+        markets: Mapping[str, Mapping[str, Any]],
+        *,
+        lease_ttl: float = DEFAULT_LEASE_TTL,
+        worker_timeout: Optional[float] = None,
+        vnodes: int = 64,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.lease_ttl = float(lease_ttl)
+        self.worker_timeout = float(worker_timeout if worker_timeout is not None else lease_ttl)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._markets: Dict[str, Dict[str, Any]] = {str(k): dict(v) for k, v in markets.items()}
+        self._ring = HashRing(vnodes=vnodes)
+        self._workers: Dict[str, float] = {}
+        self._leases: Dict[str, Lease] = {}
+        self._epochs: Dict[str, int] = {}
+        self._stale: Set[str] = set()
+        self._done: Set[str] = set()
+        self._draining: Set[str] = set()
+        self._handover: Dict[str, Dict[str, Any]] = {}
+
+    # ------------------------------------------------------------------
+    def set_markets(self, markets: Mapping[str, Mapping[str, Any]]) -> None:
+        """Replace the market list; owners of removed markets are asked to release."""
+
+        with self._lock:
+            self._markets = {str(k): dict(v) for k, v in markets.items()}
+            self._reconcile(self._clock())
+
+    def heartbeat(
+        self,
+        worker_id: str,
+        held: Mapping[str, int],
+        released: Sequence[Mapping[str, Any]] = (),
+        *,
+        draining: bool = False,
+    ) -> Dict[str, Any]:
+        """Record a worker heartbeat and return its orders.
+
+        ``held`` maps market id -> epoch for every lease the worker still
+        acts on (including ones it is in the middle of releasing). A
+        ``draining`` worker leaves the ring at once but keeps renewing the
+        leases it is still releasing.
+        """
+
+        with self._lock:
+            now = self._clock()
+            if draining:
+                if worker_id not in self._draining:
+                    LOG.info("coord.drain", f"[COORD] 节点下线中 {worker_id}", worker=worker_id)
+                    self._draining.add(worker_id)
+                    self._ring.remove(worker_id)
+            elif worker_id not in self._workers or worker_id in self._draining:
+                LOG.info("coord.join", f"[COORD] 节点加入 {worker_id}", worker=worker_id)
+                self._draining.discard(worker_id)
+                self._ring.add(worker_id)
+            self._workers[worker_id] = now
+            for item in released:
+                self._release(worker_id, str(item.get("market")), item)
+            renewed, revoked = [], []
+            for market_id, epoch in held.items():
+                lease = self._leases.get(market_id)
+                if lease is not None and lease.owner == worker_id and lease.epoch == int(epoch):
+                    lease.expires = now + self.lease_ttl
+                    renewed.append(market_id)
+                else:
+                    revoked.append(market_id)
+            self._reconcile(now)
+            grants, release = [], []
+            for market_id, lease in list(self._leases.items()):
+                if lease.owner != worker_id:
+                    continue
+                if market_id not in held and draining:
+                    # Granted but never started: hand it straight to the next owner.
+                    del self._leases[market_id]
+                elif market_id not in held:
+                    grants.append(
+                        {
+                            "market": market_id,
+                            "epoch": lease.epoch,
+                            "config": self._markets.get(market_id, {}),
+                            "cancel_stale": lease.cancel_stale,
+                            "handover": self._handover.get(market_id),
+                        }
+                    )
+                elif self._target(market_id) != worker_id:
+                    release.append(market_id)
+            if draining:
+                self._reconcile(now)
+            return {
+                "ok": True,
+                "ttl": self.lease_ttl,
+                "grant": grants,
+                "renewed": renewed,
+                "release": release,
+                "revoked": revoked,
+            }
+
+    def leave(self, worker_id: str) -> None:
+        with self._lock:
+            if self._workers.pop(worker_id, None) is not None:
+                LOG.info("coord.leave", f"[COORD] 节点退出 {worker_id}", worker=worker_id)
+            self._draining.discard(worker_id)
+            self._ring.remove(worker_id)
+            self._reconcile(self._clock())
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            self._reconcile(self._clock())
+            return {
+                "workers": sorted(self._workers),
+                "leases": {m: {"owner": l.owner, "epoch": l.epoch} for m, l in self._leases.items()},
+                "targets": {m: self._target(m) for m in self._markets},
+                "done": sorted(self._done),
+            }
+
+    # ------------------------------------------------------------------
+    # Internals (lock held)
+    def _target(self, market_id: str) -> Optional[str]:
+        if market_id not in self._markets or market_id in self._done:
+            return None
+        return self._ring.owner(market_id)
+
+    def _release(self, worker_id: str, market_id: str, item: Mapping[str, Any]) -> None:
+        lease = self._leases.get(market_id)
+        if lease is None or lease.owner != worker_id or lease.epoch != int(item.get("epoch", -1)):
+            return
+        del self._leases[market_id]
+        if item.get("done"):
+            self._done.add(market_id)
+        if not item.get("clean", True):
+            self._stale.add(market_id)
+        handover = item.get("handover")
+        if handover and not item.get("done"):
+            self._handover[market_id] = dict(handover)
+        else:
+            self._handover.pop(market_id, None)
+        LOG.info(
+            "coord.released",
+            f"[COORD] {worker_id} 已释放 {market_id} (epoch {lease.epoch})",
+            worker=worker_id,
+            market=market_id,
+            clean=bool(item.get("clean", True)),
+        )
+
+    def _reconcile(self, now: float) -> None:
+        for worker_id, seen in list(self._workers.items()):
+            if now - seen > self.worker_timeout:
+                LOG.warn("coord.timeout", f"[COORD] 节点心跳超时 {worker_id}", worker=worker_id)
+                del self._workers[worker_id]
+                self._draining.discard(worker_id)
+                self._ring.remove(worker_id)
+        for market_id, lease in list(self._leases.items()):
+            if lease.expires <= now:
+                # Owner never confirmed a release: its orders may still be live.
+                del self._leases[market_id]
+                self._stale.add(market_id)
+                # The owner may have traded since its last report; the next one reads the live position.
+                self._handover.pop(market_id, None)
+                LOG.warn(
+                    "coord.expired",
+                    f"[COORD] {market_id} 租约过期（原持有者 {lease.owner}）",
+                    market=market_id,
+                )
+        for market_id in self._markets:
+            if market_id in self._leases:
+                continue
+            target = self._target(market_id)
+            if target is None:
+                continue
+            epoch = self._epochs.get(market_id, 0) + 1
+            self._epochs[market_id] = epoch
+            self._leases[market_id] = Lease(
+                market_id, target, epoch, now + self.lease_ttl, cancel_stale=market_id in self._stale
+            )
+            self._stale.discard(market_id)
+
+
+# ----------------------------------------------------------------------
+# Transport: one JSON line per request and per response
+def parse_hostport(address: str) -> Tuple[str, int]:
+    host, sep, port = address.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"invalid address: {address!r}")
+    return host or "127.0.0.1", int(port)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        coordinator: Coordinator = self.server.coordinator  # type: ignore[attr-defined]
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                op = request.get("op")
+                if op == "heartbeat":
+                    reply = coordinator.heartbeat(
+                        str(request["worker"]),
+                        request.get("held") or {},
+                        request.get("released") or (),
+                        draining=bool(request.get("draining")),
+                    )
+                elif op == "leave":
+                    coordinator.leave(str(request["worker"]))
+                    reply = {"ok": True}
+                elif op == "status":
+                    reply = dict(coordinator.status(), ok=True)
+                else:
+                    reply = {"ok": False, "error": f"unknown op {op!r}"}
+            except Exception as exc:
+                reply = {"ok": False, "error": repr(exc)}
+            self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+
+
+class CoordinatorServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, coordinator: Coordinator, address: str = "127.0.0.1:0") -> None:
+        super().__init__(parse_hostport(address), _Handler)
+        self.coordinator = coordinator
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        host, port = self.server_address[:2]
+        return f"{host}:{port}"
+
+    def start(self) -> "CoordinatorServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="coordinator", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def call(address: str, request: Mapping[str, Any], *, timeout: float = 5.0) -> Dict[str, Any]:
+    with socket.create_connection(parse_hostport(address), timeout=timeout) as sock:
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError("coordinator closed the connection")
+    reply = json.loads(line)
+    if not reply.get("ok"):
+        raise RuntimeError(reply.get("error") or "coordinator error")
+    return reply
+
+
+# ----------------------------------------------------------------------
+# Worker side
+class MarketHost(Protocol):
+    """Runs the strategy for the markets a worker holds."""
+
+    def acquire(self, market_id: str, config: Mapping[str, Any], cancel_stale: bool) -> None:
+        ...
+
+    def release(self, market_id: str) -> bool:
+        """Stop quoting and cancel resting orders; True when that is confirmed."""
+        ...
+
+    def kill(self, market_id: str) -> None:
+        """Stop the market at once, without cancelling; an in-flight ``release`` returns False."""
+        ...
+
+    def finished(self, market_id: str) -> Optional[bool]:
+        """None while running, else whether it exited cleanly on its own."""
+        ...
+
+    # Optional: ``handover(market_id)`` returns the position a released market
+    # still holds (``{"position_size", "entry_price"}``) or None. It is reported
+    # with the release and passed to the next owner as ``config["handover"]``.
+
+
+@dataclass
+class _Held:
+    epoch: int
+    deadline: float
+    fence: float
+    releasing: bool = False
+    killed: bool = False
+
+
+class LeaseWorker:
+    """Heartbeats to the coordinator and starts/stops markets on a host."""
+
+    def __init__(
+        self,
+        worker_id: str,
+        address: str,
+        host: MarketHost,
+        *,
+        heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL,
+        fence_timeout: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.worker_id = worker_id
+        self.address = address
+        self.host = host
+        self.heartbeat_interval = float(heartbeat_interval)
+        self.fence_timeout = None if fence_timeout is None else float(fence_timeout)
+        # A heartbeat blocked on an unreachable coordinator must not delay fencing for long.
+        self.call_timeout = max(self.heartbeat_interval / 2.0, 0.25)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._held: Dict[str, _Held] = {}
+        self._released: List[Dict[str, Any]] = []
+        self._wake = threading.Event()
+        self._draining = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def held(self) -> Dict[str, int]:
+        with self._lock:
+            return {m: h.epoch for m, h in self._held.items()}
+
+    def start(self) -> "LeaseWorker":
+        self._thread = threading.Thread(target=self.run, name=f"lease-worker-{self.worker_id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def run(self, *, deadline: Optional[float] = None) -> None:
+        """Heartbeat until drained (see :meth:`stop`) or ``deadline`` passes."""
+
+        while deadline is None or self._clock() < deadline:
+            self.heartbeat_once()
+            if self._draining.is_set():
+                with self._lock:
+                    drained = not self._held and not self._released
+                if drained:
+                    break
+            self._wake.wait(self._next_wait())
+            self._wake.clear()
+        if self._draining.is_set():
+            try:
+                call(self.address, {"op": "leave", "worker": self.worker_id})
+            except (OSError, RuntimeError, ValueError):
+                pass
+
+    def stop(self, *, timeout: float = 120.0) -> None:
+        """Drain: leave the ring, release every market, report it, then leave.
+
+        Heartbeats continue while runners shut down, so leases being
+        released do not expire underneath them.
+        """
+
+        self._draining.set()
+        for market_id in list(self.held()):
+            self._begin_release(market_id, "shutdown")
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        else:
+            self.run(deadline=self._clock() + timeout)
+
+    def heartbeat_once(self) -> Optional[Dict[str, Any]]:
+        self._check_finished()
+        with self._lock:
+            held = {m: h.epoch for m, h in self._held.items()}
+            released = list(self._released)
+        sent_at = self._clock()
+        request = {
+            "op": "heartbeat",
+            "worker": self.worker_id,
+            "held": held,
+            "released": released,
+            "draining": self._draining.is_set(),
+        }
+        try:
+            reply = call(self.address, request, timeout=self.call_timeout)
+        except (OSError, RuntimeError, ValueError) as exc:
+            LOG.warn("worker.heartbeat", f"[WORKER] 心跳失败：{exc}", interval=10.0)
+            reply = None
+        if reply is not None:
+            self._apply(reply, sent_at, len(released))
+        self._fence()
+        return reply
+
+    # ------------------------------------------------------------------
+    def _apply(self, reply: Mapping[str, Any], sent_at: float, reported: int) -> None:
+        ttl = float(reply.get("ttl", DEFAULT_LEASE_TTL))
+        fence = self.fence_timeout if self.fence_timeout is not None else ttl * DEFAULT_FENCE_SHARE
+        # Fencing starts at ``deadline`` and the runner is dead by ``deadline + fence``.
+        # That must land before the coordinator's expiry even when the fence check
+        # runs late behind a heartbeat that blocks for ``call_timeout``.
+        deadline = sent_at + ttl - fence - self.heartbeat_interval - self.call_timeout
+        with self._lock:
+            del self._released[:reported]
+            for market_id in reply.get("renewed", ()):
+                held = self._held.get(market_id)
+                if held is not None:
+                    held.deadline = deadline
+                    held.fence = fence
+        for grant in reply.get("grant", ()) if not self._draining.is_set() else ():
+            market_id = str(grant["market"])
+            with self._lock:
+                if market_id in self._held:
+                    continue
+                self._held[market_id] = _Held(int(grant["epoch"]), deadline, fence)
+            LOG.info(
+                "worker.acquire",
+                f"[WORKER] 获得 {market_id} (epoch {grant['epoch']}, cancel_stale={bool(grant.get('cancel_stale'))})",
+                market=market_id,
+            )
+            config = dict(grant.get("config") or {})
+            if grant.get("handover"):
+                config["handover"] = grant["handover"]
+            try:
+                self.host.acquire(market_id, config, bool(grant.get("cancel_stale")))
+            except Exception as exc:
+                LOG.error("worker.acquire", f"[WORKER] 启动 {market_id} 失败：{exc!r}", market=market_id)
+                self._finish(market_id, clean=False)
+        for market_id in reply.get("release", ()):
+            self._begin_release(str(market_id), "rebalance")
+        for market_id in reply.get("revoked", ()):
+            self._begin_release(str(market_id), "revoked")
+
+    def _fence(self) -> None:
+        now = self._clock()
+        with self._lock:
+            expired = [m for m, h in self._held.items() if not h.releasing and now >= h.deadline]
+            # A release still running at the fence bound is killed: a runner that
+            # outlives its lease could cancel or quote over the next owner.
+            overdue = [m for m, h in self._held.items() if h.releasing and not h.killed and now >= h.deadline + h.fence]
+            for market_id in overdue:
+                self._held[market_id].killed = True
+        for market_id in expired:
+            self._begin_release(market_id, "lease expiring")
+        for market_id in overdue:
+            LOG.warn("worker.fence", f"[WORKER] {market_id} 租约将到期仍未释放完，强制终止", market=market_id)
+            try:
+                self.host.kill(market_id)
+            except Exception as exc:
+                LOG.error("worker.fence", f"[WORKER] 终止 {market_id} 失败：{exc!r}", market=market_id)
+
+    def _next_wait(self) -> float:
+        """Sleep until the next heartbeat or fence step, whichever comes first."""
+
+        now = self._clock()
+        wait = self.heartbeat_interval
+        with self._lock:
+            for held in self._held.values():
+                if held.killed:
+                    continue
+                due = held.deadline + held.fence if held.releasing else held.deadline
+                wait = min(wait, due - now)
+        return max(wait, 0.01)
+
+    def _check_finished(self) -> None:
+        with self._lock:
+            running = [m for m, h in self._held.items() if not h.releasing]
+        for market_id in running:
+            outcome = self.host.finished(market_id)
+            if outcome is not None:
+                self._finish(market_id, clean=outcome, done=outcome)
+
+    def _begin_release(self, market_id: str, reason: str) -> None:
+        with self._lock:
+            held = self._held.get(market_id)
+            if held is None or held.releasing:
+                return
+            held.releasing = True
+        LOG.info("worker.release", f"[WORKER] 释放 {market_id}（{reason}）", market=market_id)
+
+        def _release() -> None:
+            try:
+                clean = bool(self.host.release(market_id))
+            except Exception as exc:
+                LOG.error("worker.release", f"[WORKER] 释放 {market_id} 失败：{exc!r}", market=market_id)
+                clean = False
+            handover = None
+            report = getattr(self.host, "handover", None)
+            if report is not None:
+                try:
+                    handover = report(market_id)
+                except Exception as exc:
+                    LOG.error("worker.release", f"[WORKER] 读取 {market_id} 交接仓位失败：{exc!r}", market=market_id)
+            self._finish(market_id, clean=clean, handover=handover)
+            self._wake.set()
+
+        threading.Thread(target=_release, name=f"release-{market_id}", daemon=True).start()
+
+    def _finish(
+        self, market_id: str, *, clean: bool, done: bool = False, handover: Optional[Mapping[str, Any]] = None
+    ) -> None:
+        with self._lock:
+            held = self._held.pop(market_id, None)
+            if held is not None:
+                item: Dict[str, Any] = {"market": market_id, "epoch": held.epoch, "clean": clean, "done": done}
+                if handover:
+                    item["handover"] = dict(handover)
+                self._released.append(item)
+
+
+class RunnerProcessHost:
+    """Runs one ``Volatility_arbitrage_run.py`` process per held market.
+
+    The market config's ``inputs`` are fed to the runner's prompts over
+    stdin. Releasing sends ``release``: the runner stops its maker loops,
+    cancels the orders it placed, writes the position it still holds to
+    ``POLY_HANDOVER_FILE`` and exits. :meth:`kill` ends it at once. A
+    ``handover`` in the config reaches the next runner as ``POLY_HANDOVER_STATE``.
+    """
+
+    def __init__(
+        self,
+        command: Optional[Sequence[str]] = None,
+        *,
+        release_timeout: float = 120.0,
+        log_dir: Optional[str] = None,
+    ) -> None:
+        import sys
+
+        runner = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Volatility_arbitrage_run.py")
+        self.command = list(command) if command else [sys.executable, "-u", runner]
+        self.release_timeout = float(release_timeout)
+        self.log_dir = log_dir
+        self._procs: Dict[str, Any] = {}
+        self._state_dir: Optional[str] = None
+
+    def _handover_path(self, market_id: str) -> str:
+        import tempfile
+
+        if self._state_dir is None:
+            self._state_dir = tempfile.mkdtemp(prefix="coordinator-handover-")
+        return os.path.join(self._state_dir, f"{_hash(market_id):016x}.json")
+
+    def acquire(self, market_id: str, config: Mapping[str, Any], cancel_stale: bool) -> None:
+        import subprocess
+
+        env = dict(os.environ)
+        env.update({str(k): str(v) for k, v in (config.get("env") or {}).items()})
+        env["POLY_CANCEL_STALE_ORDERS"] = "1" if cancel_stale else "0"
+        handover_path = self._handover_path(market_id)
+        if os.path.exists(handover_path):
+            os.remove(handover_path)
+        env["POLY_HANDOVER_FILE"] = handover_path
+        env["POLY_HANDOVER_STATE"] = json.dumps(config["handover"]) if config.get("handover") else ""
+        stdout = None
+        if self.log_dir:
+            os.makedirs(self.log_dir, exist_ok=True)
+            stdout = open(os.path.join(self.log_dir, f"{market_id}.log"), "a", encoding="utf-8")
+        proc = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=stdout,
+            stderr=subprocess.STDOUT if stdout else None,
+            env=env,
+            text=True,
+        )
+        if stdout is not None:
+            stdout.close()
+        answers = [str(x) for x in config.get("inputs") or ()]
+        if answers:
+            proc.stdin.write("\n".join(answers) + "\n")
+            proc.stdin.flush()
+        self._procs[market_id] = proc
+
+    def release(self, market_id: str) -> bool:
+        import subprocess
+
+        proc = self._procs.get(market_id)
+        if proc is None:
+            return True
+        try:
+            if proc.poll() is None:
+                try:
+                    proc.stdin.write("release\n")
+                    proc.stdin.flush()
+                except (BrokenPipeError, OSError):
+                    pass
+                try:
+                    proc.wait(timeout=self.release_timeout)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    proc.wait()
+                    return False
+            return proc.returncode == 0
+        finally:
+            self._procs.pop(market_id, None)
+
+    def handover(self, market_id: str) -> Optional[Dict[str, Any]]:
+        path = self._handover_path(market_id)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                state = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+        return state if isinstance(state, dict) else None
+
+    def kill(self, market_id: str) -> None:
+        proc = self._procs.get(market_id)
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+
+    def finished(self, market_id: str) -> Optional[bool]:
+        proc = self._procs.get(market_id)
+        if proc is None or proc.poll() is None:
+            return None
+        del self._procs[market_id]
+        return proc.returncode == 0
+
+
+def load_markets(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as fh:
+        data = json.load(fh)
+    if isinstance(data, list):
+        return {str(item["id"]): item for item in data}
+    return {str(k): v for k, v in data.items()}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Coordinate market leases across strategy workers.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    serve = sub.add_parser("serve", help="run the coordinator")
+    serve.add_argument("--markets", required=True, help="JSON file of market configs")
+    serve.add_argument("--listen", default="127.0.0.1:9200")
+    serve.add_argument("--lease-ttl", type=float, default=DEFAULT_LEASE_TTL)
+    work = sub.add_parser("work", help="run a worker node")
+    work.add_argument("--connect", default="127.0.0.1:9200")
+    work.add_argument("--id", default=f"{socket.gethostname()}-{os.getpid()}")
+    work.add_argument("--heartbeat", type=float, default=DEFAULT_HEARTBEAT_INTERVAL)
+    work.add_argument("--log-dir", default=None, help="write each runner's output to <dir>/<market>.log")
+    status = sub.add_parser("status", help="print the current assignment")
+    status.add_argument("--connect", default="127.0.0.1:9200")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "status":
+        print(json.dumps(call(args.connect, {"op": "status"}), indent=2, ensure_ascii=False))
+        return 0
+    if args.cmd == "serve":
+        server = CoordinatorServer(Coordinator(load_markets(args.markets), lease_ttl=args.lease_ttl), args.listen)
+        print(f"coordinator listening on {server.address}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return 0
+    worker = LeaseWorker(args.id, args.connect, RunnerProcessHost(log_dir=args.log_dir), heartbeat_interval=args.heartbeat)
+    print(f"worker {args.id} -> {args.connect}")
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.stop()
+    return 0
+
+
+__all__ = [
+    "Coordinator",
+    "CoordinatorServer",
+    "HashRing",
+    "Lease",
+    "LeaseWorker",
+    "MarketHost",
+    "RunnerProcessHost",
+    "call",
+    "load_markets",
+]
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,195 @@
+"""Encrypted on-disk cache of derived CLOB L2 API credentials.
+
+``create_or_derive_api_creds()`` costs a signed network round trip on every
+process start. The derived key/secret/passphrase are stable for a given
+``(host, funder, signature type)``, so :class:`CredsCache` stores them in a
+local file that:
+
+* is created with mode ``0600`` and replaced atomically,
+* holds one entry per ``(host, funder, signature type)``; the entry id is an
+  HMAC of that tuple, so the file does not reveal which wallet it belongs to,
+* encrypts every entry with keys derived from the wallet private key
+  (HKDF-SHA256, HMAC-SHA256 keystream, encrypt-then-MAC), so a copied file is
+  useless without the key that produced it. Only the standard library is used.
+
+The cache is only an optimisation: any decode, MAC or I/O problem is treated
+as a miss and callers fall back to deriving fresh credentials. Callers should
+:meth:`~CredsCache.invalidate` an entry once the server rejects it.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import tempfile
+from typing import Any, Dict, Optional
+
+_VERSION = 3
+_CONTEXT = b"polymarket-maker/clob-creds-cache/v1"
+_FIELDS = ("api_key", "api_secret", "api_passphrase")
+
+
+def _hkdf(ikm: bytes, *, salt: bytes, info: bytes, length: int) -> bytes:
+    """HKDF-SHA256 (RFC 5869) extract-and-expand."""
+
+    prk = hmac.new(salt, ikm, hashlib.sha256).digest()
+    okm = b""
+    block = b""
+    counter = 1
+    while len(okm) < length:
+        block = hmac.new(prk, block + info + bytes([counter]), hashlib.sha256).digest()
+        okm += block
+        counter += 1
+    return okm[:length]
+
+
+def default_cache_path() -> str:
+    override = os.getenv("POLY_CREDS_CACHE")
+    if override is not None:
+        return override
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "polymarket_maker", "clob_creds.json")
+
+
+def creds_to_dict(creds: Any) -> Optional[Dict[str, str]]:
+    """Extract ``api_key``/``api_secret``/``api_passphrase`` from an SDK object or dict."""
+
+    if creds is None:
+        return None
+    if isinstance(creds, dict):
+        values = {field: creds.get(field) for field in _FIELDS}
+    else:
+        values = {field: getattr(creds, field, None) for field in _FIELDS}
+    if not values["api_key"] or not values["api_secret"]:
+        return None
+    return {field: str(value or "") for field, value in values.items()}
+
+
+class CredsCache:
+    """Per-(host, funder, signature type) credential store keyed off the private key."""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = default_cache_path() if path is None else path
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path) and self.path.lower() != "off"
+
+    # ------------------------------------------------------------------
+    # Key material
+    @staticmethod
+    def _keys(private_key: str) -> tuple:
+        raw = private_key[2:] if private_key.startswith(("0x", "0X")) else private_key
+        okm = _hkdf(raw.encode("utf-8"), salt=_CONTEXT, info=b"enc+mac", length=64)
+        return okm[:32], okm[32:]
+
+    @staticmethod
+    def _entry_id(mac_key: bytes, host: str, funder: str, signature_type: int) -> str:
+        ident = f"{host.rstrip('/').lower()}|{funder.lower()}|{int(signature_type)}"
+        return hmac.new(mac_key, ident.encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+
+    @staticmethod
+    def _keystream_xor(enc_key: bytes, nonce: bytes, data: bytes) -> bytes:
+        out = bytearray()
+        for counter in range((len(data) + 31) // 32):
+            block = hmac.new(enc_key, nonce + counter.to_bytes(8, "big"), hashlib.sha256).digest()
+            out.extend(block)
+        return bytes(a ^ b for a, b in zip(data, out))
+
+    # ------------------------------------------------------------------
+    # File I/O
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                doc = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(doc, dict) or doc.get("version") != _VERSION:
+            return {}
+        entries = doc.get("entries")
+        return entries if isinstance(entries, dict) else {}
+
+    def _write(self, entries: Dict[str, Any]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".creds-", dir=directory)
+        try:
+            os.chmod(tmp_path, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump({"version": _VERSION, "entries": entries}, fh)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    # ------------------------------------------------------------------
+    # Public API
+    def load(
+        self, private_key: str, host: str, funder: str, signature_type: int
+    ) -> Optional[Dict[str, str]]:
+        if not self.enabled:
+            return None
+        enc_key, mac_key = self._keys(private_key)
+        entry_id = self._entry_id(mac_key, host, funder, signature_type)
+        entry = self._read().get(entry_id)
+        if not isinstance(entry, dict):
+            return None
+        try:
+            nonce = base64.b64decode(entry["nonce"])
+            ciphertext = base64.b64decode(entry["ct"])
+            tag = base64.b64decode(entry["tag"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        expected = hmac.new(mac_key, entry_id.encode() + nonce + ciphertext, hashlib.sha256).digest()
+        if not hmac.compare_digest(tag, expected):
+            return None
+        try:
+            payload = json.loads(self._keystream_xor(enc_key, nonce, ciphertext))
+        except ValueError:
+            return None
+        return creds_to_dict(payload)
+
+    def store(
+        self, private_key: str, host: str, funder: str, signature_type: int, creds: Any
+    ) -> bool:
+        values = creds_to_dict(creds)
+        if not self.enabled or values is None:
+            return False
+        enc_key, mac_key = self._keys(private_key)
+        entry_id = self._entry_id(mac_key, host, funder, signature_type)
+        nonce = secrets.token_bytes(16)
+        ciphertext = self._keystream_xor(enc_key, nonce, json.dumps(values).encode("utf-8"))
+        tag = hmac.new(mac_key, entry_id.encode() + nonce + ciphertext, hashlib.sha256).digest()
+        entries = self._read()
+        entries[entry_id] = {
+            "nonce": base64.b64encode(nonce).decode("ascii"),
+            "ct": base64.b64encode(ciphertext).decode("ascii"),
+            "tag": base64.b64encode(tag).decode("ascii"),
+        }
+        try:
+            self._write(entries)
+        except OSError:
+            return False
+        return True
+
+    def invalidate(self, private_key: str, host: str, funder: str, signature_type: int) -> None:
+        if not self.enabled:
+            return
+        _, mac_key = self._keys(private_key)
+        entry_id = self._entry_id(mac_key, host, funder, signature_type)
+        entries = self._read()
+        if entries.pop(entry_id, None) is not None:
+            try:
+                self._write(entries)
+            except OSError:
+                pass
+
+
+__all__ = ["CredsCache", "creds_to_dict", "default_cache_path"]
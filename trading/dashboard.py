@@ -0,0 +1,402 @@
+"""Multi-market terminal dashboard with diff rendering.
+
+``watch_prices`` prints one line per interval for a single YES/NO pair. The
+dashboard watches hundreds of assets from one subscription instead:
+
+* :class:`QuoteBoard` is the ``on_event`` sink. Events go through
+  :class:`~trading.quotes.QuoteNormalizer` and each quote is written into
+  per-asset ``array`` columns (bid, ask, last, mid, EWMA variance of mid
+  log-returns, last update time, update count, version). Ingest is a handful
+  of array stores per quote and allocates nothing per asset.
+* :class:`Dashboard` draws at most ``refresh_hz`` frames per second. Rows are
+  re-sorted (by spread, volatility, staleness or name) at most once per
+  ``resort_interval`` so they do not jump around. Only visible rows are
+  formatted, and a row's cells are reformatted only when its version has
+  changed. :class:`DiffRenderer` then writes only the cells whose text
+  differs from what is on screen. The cost of a frame depends on the screen
+  size, not on the message rate.
+
+Screens are tiny adapters (``size``/``put``/``clear``/``flush``/``poll_key``):
+:class:`CursesScreen` when ``curses`` is available, :class:`AnsiScreen`
+(cursor-addressed escape codes, one write per frame) otherwise.
+"""
+
+from __future__ import annotations
+
+import math
+import shutil
+import sys
+import threading
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Sequence, TextIO, Tuple
+
+from trading.lazy_import import optional_import
+from trading.quotes import Quote, QuoteNormalizer
+
+SORT_KEYS = ("spread", "volatility", "staleness", "name")
+_SORT_HOTKEYS = {"s": "spread", "v": "volatility", "t": "staleness", "n": "name"}
+
+# (title, width, right-aligned)
+COLUMNS: Tuple[Tuple[str, int, bool], ...] = (
+    ("market", 44, False),
+    ("bid", 7, True),
+    ("ask", 7, True),
+    ("spread", 7, True),
+    ("last", 7, True),
+    ("vol bp", 7, True),
+    ("updates", 8, True),
+    ("age s", 6, True),
+)
+HEADER_ROWS = 2
+
+
+class QuoteBoard:
+    """Latest top of book per asset in parallel arrays."""
+
+    def __init__(
+        self,
+        asset_ids: Sequence[str],
+        labels: Optional[Sequence[str]] = None,
+        *,
+        vol_span: int = 50,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.asset_ids = [str(a) for a in asset_ids]
+        self.labels = [str(x) for x in labels] if labels is not None else list(self.asset_ids)
+        n = len(self.asset_ids)
+        self._index = {aid: i for i, aid in enumerate(self.asset_ids)}
+        self.bid = array("d", bytes(8 * n))
+        self.ask = array("d", bytes(8 * n))
+        self.last = array("d", bytes(8 * n))
+        self.mid = array("d", bytes(8 * n))
+        self.var = array("d", bytes(8 * n))
+        self.updated = array("d", bytes(8 * n))
+        self.count = array("q", bytes(8 * n))
+        self.version = array("q", bytes(8 * n))
+        self.closed = bytearray(n)
+        self.updates = 0
+        self._alpha = 2.0 / (max(int(vol_span), 1) + 1.0)
+        self._normalizer = QuoteNormalizer()
+        self._clock = clock
+
+    def __len__(self) -> int:
+        return len(self.asset_ids)
+
+    def on_event(self, ev: Dict[str, Any]) -> None:
+        for quote in self._normalizer.update(ev):
+            self.apply(quote)
+
+    def apply(self, quote: Quote) -> None:
+        i = self._index.get(quote.asset_id)
+        if i is None:
+            return
+        # The columns keep 0.0 for a side or print the feed has not quoted yet.
+        bid, ask = quote.best_bid or 0.0, quote.best_ask or 0.0
+        if bid > 0 and ask > 0:
+            mid = (bid + ask) / 2.0
+            prev = self.mid[i]
+            if prev > 0:
+                r = math.log(mid / prev)
+                self.var[i] += self._alpha * (r * r - self.var[i])
+            self.mid[i] = mid
+        self.bid[i] = bid
+        self.ask[i] = ask
+        self.last[i] = quote.price or 0.0
+        self.closed[i] = 1 if quote.closed else 0
+        self.updated[i] = self._clock()
+        self.count[i] += 1
+        self.version[i] += 1
+        self.updates += 1
+
+    def spread(self, i: int) -> float:
+        bid, ask = self.bid[i], self.ask[i]
+        return ask - bid if bid > 0 and ask > 0 else math.nan
+
+    def volatility_bp(self, i: int) -> float:
+        return math.sqrt(self.var[i]) * 1e4
+
+    def age(self, i: int, now: float) -> float:
+        updated = self.updated[i]
+        return now - updated if updated else math.inf
+
+    def _spread_key(self, i: int) -> float:
+        spread = self.spread(i)
+        # assets without a two-sided book go last
+        return math.inf if spread != spread else -spread
+
+    def order(self, key: str, now: float, *, reverse: bool = False) -> List[int]:
+        """Asset indexes sorted by ``key``; widest / most volatile / stalest first."""
+
+        indexes = range(len(self.asset_ids))
+        if key == "name":
+            ordered = sorted(indexes, key=lambda i: self.labels[i])
+        elif key == "spread":
+            ordered = sorted(indexes, key=self._spread_key)
+        elif key == "volatility":
+            ordered = sorted(indexes, key=lambda i: -self.var[i])
+        elif key == "staleness":
+            ordered = sorted(indexes, key=lambda i: -self.age(i, now))
+        else:
+            raise ValueError(f"unknown sort key {key!r}; expected one of {SORT_KEYS}")
+        if reverse:
+            ordered.reverse()
+        return ordered
+
+
+class DiffRenderer:
+    """Writes a cell only when its text differs from what is on screen."""
+
+    def __init__(self, screen: Any) -> None:
+        self.screen = screen
+        self._shown: Dict[Tuple[int, int], str] = {}
+        self.writes = 0
+
+    def invalidate(self) -> None:
+        self._shown.clear()
+
+    def put(self, row: int, col: int, text: str) -> None:
+        key = (row, col)
+        if self._shown.get(key) == text:
+            return
+        self._shown[key] = text
+        self.screen.put(row, col, text)
+        self.writes += 1
+
+
+def _cell(value: float, decimals: int = 3) -> str:
+    if value != value or value <= 0:
+        return "-"
+    return f"{value:.{decimals}f}"
+
+
+class Dashboard:
+    """Throttled, sorted, diff-rendered view of a :class:`QuoteBoard`."""
+
+    def __init__(
+        self,
+        board: QuoteBoard,
+        screen: Any,
+        *,
+        refresh_hz: float = 4.0,
+        sort: str = "spread",
+        resort_interval: float = 1.0,
+        stale_after: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if sort not in SORT_KEYS:
+            raise ValueError(f"unknown sort key {sort!r}; expected one of {SORT_KEYS}")
+        self.board = board
+        self.screen = screen
+        self.renderer = DiffRenderer(screen)
+        self.refresh_interval = 1.0 / max(float(refresh_hz), 0.1)
+        self.sort = sort
+        self.reverse = False
+        self.resort_interval = float(resort_interval)
+        self.stale_after = float(stale_after)
+        self._clock = clock
+        self._size: Tuple[int, int] = (0, 0)
+        self._order: List[int] = []
+        self._next_sort = 0.0
+        self._row_cache: Dict[int, Tuple[int, List[str]]] = {}
+        self._rate = 0.0
+        self._rate_mark = (0.0, 0)
+        self.frames = 0
+        positions = []
+        x = 0
+        for _, width, right in COLUMNS:
+            positions.append((x, width, right))
+            x += width + 1
+        self._layout = positions
+
+    # ------------------------------------------------------------------
+    def set_sort(self, key: str) -> None:
+        if key not in SORT_KEYS:
+            raise ValueError(f"unknown sort key {key!r}; expected one of {SORT_KEYS}")
+        self.reverse = (not self.reverse) if key == self.sort else False
+        self.sort = key
+        self._next_sort = 0.0
+
+    def handle_key(self, key: Optional[str]) -> bool:
+        """Apply a hotkey; returns ``False`` when the user asked to quit."""
+
+        if not key:
+            return True
+        key = key.lower()
+        if key == "q":
+            return False
+        if key == "r":
+            self.reverse = not self.reverse
+            self._next_sort = 0.0
+        elif key in _SORT_HOTKEYS:
+            self.set_sort(_SORT_HOTKEYS[key])
+        return True
+
+    def _row_cells(self, i: int) -> List[str]:
+        board = self.board
+        version = board.version[i]
+        cached = self._row_cache.get(i)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        label = board.labels[i]
+        if board.closed[i]:
+            label = "[closed] " + label
+        cells = [
+            label,
+            _cell(board.bid[i]),
+            _cell(board.ask[i]),
+            _cell(board.spread(i)),
+            _cell(board.last[i]),
+            f"{board.volatility_bp(i):.1f}" if board.count[i] > 1 else "-",
+            str(board.count[i]),
+        ]
+        self._row_cache[i] = (version, cells)
+        return cells
+
+    def _put_row(self, row: int, cells: Sequence[str], width: int) -> None:
+        for (x, col_width, right), text in zip(self._layout, cells):
+            if x >= width:
+                break
+            text = text[:col_width]
+            text = text.rjust(col_width) if right else text.ljust(col_width)
+            self.renderer.put(row, x, text[: width - x])
+
+    def frame(self, now: Optional[float] = None) -> int:
+        """Draw one frame; returns the number of cells written."""
+
+        if now is None:
+            now = self._clock()
+        writes_before = self.renderer.writes
+        height, width = self.screen.size()
+        if (height, width) != self._size:
+            self._size = (height, width)
+            self.screen.clear()
+            self.renderer.invalidate()
+        if now >= self._next_sort:
+            self._order = self.board.order(self.sort, now, reverse=self.reverse)
+            self._next_sort = now + self.resort_interval
+
+        mark_at, mark_updates = self._rate_mark
+        if now - mark_at >= 1.0:
+            if mark_at:
+                self._rate = (self.board.updates - mark_updates) / (now - mark_at)
+            self._rate_mark = (now, self.board.updates)
+
+        arrow = "^" if self.reverse else "v"
+        status = (
+            f"{len(self.board)} assets | {self._rate:,.0f} upd/s | sort {self.sort} {arrow}"
+            " | s/v/t/n sort, r reverse, q quit"
+        )
+        self.renderer.put(0, 0, status[:width].ljust(width))
+        self._put_row(1, [title for title, _, _ in COLUMNS], width)
+
+        visible = self._order[: max(height - HEADER_ROWS, 0)]
+        for offset, i in enumerate(visible):
+            age = self.board.age(i, now)
+            if age == math.inf:
+                age_text = "-"
+            elif age >= self.stale_after:
+                age_text = f"!{int(age)}"
+            else:
+                age_text = str(int(age))
+            self._put_row(HEADER_ROWS + offset, self._row_cells(i) + [age_text], width)
+        self.screen.flush()
+        self.frames += 1
+        return self.renderer.writes - writes_before
+
+    def run(self, stop_event: Optional[threading.Event] = None) -> None:
+        """Redraw every ``refresh_interval`` until ``q`` or ``stop_event``."""
+
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            started = self._clock()
+            self.frame(started)
+            if not self.handle_key(self.screen.poll_key()):
+                return
+            stop_event.wait(max(self.refresh_interval - (self._clock() - started), 0.0))
+
+
+class CursesScreen:
+    def __init__(self, stdscr: Any) -> None:
+        self._curses = optional_import("curses")
+        self._win = stdscr
+        self._win.nodelay(True)
+        try:
+            self._curses.curs_set(0)
+        except self._curses.error:
+            pass
+
+    def size(self) -> Tuple[int, int]:
+        return self._win.getmaxyx()
+
+    def put(self, row: int, col: int, text: str) -> None:
+        try:
+            self._win.addstr(row, col, text)
+        except self._curses.error:
+            pass  # bottom-right cell; curses raises after writing it
+
+    def clear(self) -> None:
+        self._win.erase()
+
+    def flush(self) -> None:
+        self._win.noutrefresh()
+        self._curses.doupdate()
+
+    def poll_key(self) -> Optional[str]:
+        ch = self._win.getch()
+        return chr(ch) if 0 <= ch < 256 else None
+
+
+class AnsiScreen:
+    """Cursor-addressed output for terminals without ``curses`` (one write per frame)."""
+
+    def __init__(self, stream: TextIO = sys.stdout) -> None:
+        self._stream = stream
+        self._pending: List[str] = []
+
+    def size(self) -> Tuple[int, int]:
+        cols, rows = shutil.get_terminal_size((120, 40))
+        return rows, cols
+
+    def put(self, row: int, col: int, text: str) -> None:
+        self._pending.append(f"\x1b[{row + 1};{col + 1}H{text}")
+
+    def clear(self) -> None:
+        self._pending.append("\x1b[2J")
+
+    def flush(self) -> None:
+        if self._pending:
+            self._stream.write("".join(self._pending))
+            self._stream.flush()
+            self._pending.clear()
+
+    def poll_key(self) -> Optional[str]:
+        return None
+
+
+def run_dashboard(board: QuoteBoard, stop_event: Optional[threading.Event] = None, **kwargs: Any) -> None:
+    """Run a :class:`Dashboard` on the terminal (curses when available)."""
+
+    curses = optional_import("curses")
+    if curses is not None and sys.stdout.isatty():
+        curses.wrapper(lambda stdscr: Dashboard(board, CursesScreen(stdscr), **kwargs).run(stop_event))
+        return
+    screen = AnsiScreen()
+    sys.stdout.write("\x1b[?25l")
+    try:
+        Dashboard(board, screen, **kwargs).run(stop_event)
+    finally:
+        sys.stdout.write("\x1b[?25h\n")
+        sys.stdout.flush()
+
+
+__all__ = [
+    "AnsiScreen",
+    "COLUMNS",
+    "CursesScreen",
+    "Dashboard",
+    "DiffRenderer",
+    "QuoteBoard",
+    "SORT_KEYS",
+    "run_dashboard",
+]
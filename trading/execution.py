@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import math
 import threading
 import time
 from collections import deque
@@ -15,6 +14,14 @@ try:  # pragma: no cover - optional dependency
 except ImportError:  # pragma: no cover - fallback to lightweight parser
     yaml = None
 
+from trading.metrics import QUOTE_GAP_SECONDS, RATE_LIMIT_WAIT_SECONDS, REST_LATENCY_SECONDS
+from trading.ticks import ROUND_DOWN, ROUND_UP, TickGrid, grid_for
+from trading.tracing import TRACER
+from trading.order_builder import OrderBuilderCache
+from trading.order_store import CLOSED_STATUSES
+from trading.rate_budget import TokenBucket
+from trading.status_normalizer import default_normalizer
+
 
 Number = float
 
@@ -32,6 +39,9 @@ class ExecutionConfig:
     order_interval_seconds: Optional[float] = None
     min_quote_amount: Number = 1.0
     min_market_order_size: Number = 0.0
+    # Market tick size (e.g. 0.01). When set, retry prices are moved on the
+    # integer tick grid instead of drifting off-grid via ``price * (1 ± step)``.
+    price_tick: Optional[Number] = None
 
     @classmethod
     def from_yaml(cls, path: str) -> "ExecutionConfig":
@@ -120,6 +130,30 @@ class ExecutionResult:
         return max(self.requested - self.filled, 0.0)
 
 
+@dataclass
+class QuoteGapStats:
+    """Running totals of the time spent without a live quote during replaces."""
+
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    last_seconds: float = 0.0
+    late_fills: int = 0
+
+    def record(self, gap_seconds: float, *, late_fill: bool = False) -> None:
+        gap = max(float(gap_seconds), 0.0)
+        self.count += 1
+        self.total_seconds += gap
+        self.max_seconds = max(self.max_seconds, gap)
+        self.last_seconds = gap
+        if late_fill:
+            self.late_fills += 1
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.count if self.count else 0.0
+
+
 class ExecutionEngine:
     """Batch scheduler for Polymarket orders with retry management."""
 
@@ -277,9 +311,19 @@ class ExecutionEngine:
         step = max(0.0, self.config.price_tolerance_step)
         if step == 0:
             return price
-        if side.lower() == "sell":
-            return max(0.0, price * (1 - step))
-        return price * (1 + step)
+        sell = side.lower() == "sell"
+        adjusted = max(0.0, price * (1 - step)) if sell else price * (1 + step)
+        tick = getattr(self.config, "price_tick", None)
+        if not tick:
+            return adjusted
+        # Sells round down and buys round up, and each retry moves at least one tick.
+        grid = TickGrid.for_tick_size(tick)
+        current = grid.to_units(price)
+        if sell:
+            units = max(min(grid.to_units(adjusted, ROUND_DOWN), current - 1), 0)
+        else:
+            units = max(grid.to_units(adjusted, ROUND_UP), current + 1)
+        return grid.to_value(units)
 
     def _create_order(self, order: OrderRequest) -> str:
         payload: Dict[str, object] = {
@@ -419,9 +463,7 @@ class ExecutionEngine:
 
     @staticmethod
     def _ceil_precision(value: float, decimals: int = 4) -> float:
-        factor = 10 ** decimals
-        scaled = value * factor
-        return math.ceil(scaled - 1e-12) / factor
+        return grid_for(decimals).ceil(value)
 
 
 class PolymarketAPI:
@@ -442,6 +484,10 @@ class ClobPolymarketAPI(PolymarketAPI):
         self._min_interval_seconds = 1.0
         self._last_call_ts = 0.0
         self._rate_lock = threading.Lock()
+        # Background ladder signing has its own budget so it never queues
+        # behind (or ahead of) the loop's cancels, status reads and placements.
+        self._ladder_bucket: Optional[TokenBucket] = TokenBucket(rate=1.0, capacity=1.0)
+        self.quote_gap_stats = QuoteGapStats()
 
     def _enforce_rate_limit(self) -> None:
         if self._min_interval_seconds <= 0:
@@ -452,14 +498,29 @@ class ClobPolymarketAPI(PolymarketAPI):
             remaining = self._min_interval_seconds - elapsed
             if remaining > 0:
                 time.sleep(remaining)
+            RATE_LIMIT_WAIT_SECONDS.labels("clob_adapter").observe(max(remaining, 0.0))
             self._last_call_ts = time.monotonic()
 
+    def _book_rate_limit(self, calls: int) -> None:
+        """Charge ``calls`` slots that were spent without waiting for them."""
+
+        if self._min_interval_seconds <= 0 or calls <= 0:
+            return
+        with self._rate_lock:
+            self._last_call_ts += calls * self._min_interval_seconds
+
+    def _enforce_ladder_rate_limit(self) -> None:
+        if self._ladder_bucket is None:
+            return
+        waited = self._ladder_bucket.acquire()
+        RATE_LIMIT_WAIT_SECONDS.labels("clob_ladder").observe(waited or 0.0)
+
     def create_order(self, payload: Dict[str, object]) -> Dict[str, object]:
-        try:
-            from py_clob_client.clob_types import OrderArgs, OrderType
-            from py_clob_client.order_builder.constants import BUY, SELL
-        except ImportError as exc:  # pragma: no cover - runtime dependency
-            raise RuntimeError("py_clob_client is required to submit orders") from exc
+        return self._submit_order(payload, throttle=self._enforce_rate_limit)
+
+    def _submit_order(self, payload: Dict[str, object], *, throttle: Callable[[], None]) -> Dict[str, object]:
+        builder = OrderBuilderCache.for_client(self._client)
+        order_types = builder.types()
 
         side_raw = str(payload.get("side", "")).upper()
         if side_raw not in {"BUY", "SELL"}:
@@ -472,21 +533,25 @@ class ClobPolymarketAPI(PolymarketAPI):
         price = float(payload.get("price"))
         size = float(payload.get("size"))
 
-        side_const = SELL if side_raw == "SELL" else BUY
-        order_args = OrderArgs(token_id=token_id, side=side_const, price=price, size=size)
-
-        order_type = self._resolve_order_type(payload, OrderType)
+        order_type = self._resolve_order_type(payload, order_types.OrderType)
 
-        self._enforce_rate_limit()
-        signed_or_response = self._client.create_order(order_args)
+        signed_or_response = builder.take_presigned(token_id, side_raw, price, size)
+        if signed_or_response is None:
+            order_args = builder.build_args(token_id, side_raw, price, size)
+            throttle()
+            with REST_LATENCY_SECONDS.labels("clob:create_order").time(), TRACER.span("order.sign", side=side_raw):
+                signed_or_response = self._client.create_order(order_args)
 
         order_id = self._extract_order_id(signed_or_response)
         if order_id is not None:
+            builder.mark_submits_on_create()
             raw_response = signed_or_response
         else:
+            builder.mark_signs_only()
             self._apply_order_metadata(signed_or_response, order_type, payload)
-            self._enforce_rate_limit()
-            raw_response = self._client.post_order(signed_or_response, order_type)
+            throttle()
+            with REST_LATENCY_SECONDS.labels("clob:post_order").time(), TRACER.span("order.post", side=side_raw):
+                raw_response = self._client.post_order(signed_or_response, order_type)
             order_id = self._extract_order_id(raw_response)
             if order_id is None:
                 raise RuntimeError(
@@ -499,6 +564,160 @@ class ClobPolymarketAPI(PolymarketAPI):
             return response
         return {"orderId": order_id, "rawResponse": raw_response}
 
+    def cancel_order(self, order_id: str) -> bool:
+        self._enforce_rate_limit()
+        return self._cancel(order_id)
+
+    def _cancel(self, order_id: str) -> bool:
+        with REST_LATENCY_SECONDS.labels("clob:cancel").time(), TRACER.span("order.cancel"):
+            return self._cancel_via_client(order_id)
+
+    def _cancel_via_client(self, order_id: str) -> bool:
+        targets = [self._client, getattr(self._client, "private", None)]
+        for target in targets:
+            if target is None:
+                continue
+            for attr in ("cancel", "cancel_order"):
+                method = getattr(target, attr, None)
+                if not callable(method):
+                    continue
+                try:
+                    method(order_id)
+                    return True
+                except TypeError:
+                    try:
+                        method(order_id=order_id)
+                        return True
+                    except Exception:
+                        continue
+                except Exception:
+                    continue
+            method = getattr(target, "cancel_orders", None)
+            if callable(method):
+                try:
+                    method([order_id])
+                    return True
+                except Exception:
+                    continue
+        return False
+
+    def replace_order(
+        self,
+        old_id: str,
+        new_price: float,
+        new_size: float,
+        *,
+        payload: Dict[str, object],
+        old_filled: float = 0.0,
+    ) -> Dict[str, object]:
+        """Cancel ``old_id`` and place its replacement back to back.
+
+        ``payload`` carries the usual ``create_order`` fields (token, side,
+        time-in-force); price and size are taken from ``new_price`` and
+        ``new_size``. The placement is sent right after the cancel
+        acknowledgement, without an intervening status read. If the cancel is
+        not confirmed, the old order's status is read instead, and the
+        replacement is only placed once the old order is closed. Otherwise
+        ``error`` is set and nothing is placed, so the two orders are never
+        live together.
+
+        Rate budget: every REST call costs one slot of ``_min_interval_seconds``,
+        as it would through ``cancel_order``/``create_order``/``get_order_status``.
+        The cancel waits for its slot. The placement calls that follow do not
+        wait, but their slots are booked, so the next call on the adapter waits
+        for them and the average rate stays within the limit.
+
+        The old order is re-read afterwards so that fills which landed while
+        it was being cancelled are reported as ``late_fill``. Placement errors
+        are returned under ``error`` rather than raised so the caller can
+        still account for the old order's fills.
+        """
+
+        new_payload = dict(payload)
+        new_payload["price"] = float(new_price)
+        new_payload["size"] = float(new_size)
+        result: Dict[str, object] = {
+            "orderId": None,
+            "response": None,
+            "error": None,
+            "cancelled": False,
+            "old_status": None,
+            "late_fill": 0.0,
+            "quote_gap_seconds": 0.0,
+        }
+        replace_started = time.perf_counter()
+
+        self._enforce_rate_limit()
+        result["cancelled"] = self._cancel(old_id)
+        cancel_ack = time.monotonic()
+        old_status: Optional[Dict[str, object]] = None
+        place = True
+        if not result["cancelled"]:
+            try:
+                old_status = self.get_order_status(old_id)
+            except Exception:
+                old_status = None
+            place = old_status is not None and str(old_status.get("status", "")).upper() in CLOSED_STATUSES
+        if place:
+            placement_calls: List[None] = []
+            try:
+                response = self._submit_order(new_payload, throttle=lambda: placement_calls.append(None))
+                result["response"] = response
+                result["orderId"] = response.get("orderId")
+            except Exception as exc:
+                result["error"] = exc
+            finally:
+                self._book_rate_limit(len(placement_calls))
+        else:
+            result["error"] = RuntimeError(f"cancel of {old_id} not confirmed; replacement not placed")
+
+        # The quote is missing from the cancel acknowledgement until the new
+        # order is acknowledged.
+        gap = max(time.monotonic() - cancel_ack, 0.0)
+        result["quote_gap_seconds"] = gap
+
+        late_fill = 0.0
+        if old_status is None or place:
+            try:
+                old_status = self.get_order_status(old_id)
+            except Exception:
+                old_status = None
+        if old_status is not None:
+            result["old_status"] = old_status
+            try:
+                filled_now = float(old_status.get("filledAmount", 0.0) or 0.0)
+            except (TypeError, ValueError):
+                filled_now = float(old_filled)
+            late_fill = max(filled_now - float(old_filled), 0.0)
+        result["late_fill"] = late_fill
+
+        self.quote_gap_stats.record(gap, late_fill=late_fill > 0)
+        QUOTE_GAP_SECONDS.labels(str(new_payload.get("side", "")).upper()).observe(gap)
+        TRACER.record("order.replace", replace_started)
+        return result
+
+    def prime_ladder(
+        self,
+        token_id: str,
+        side: str,
+        price: float,
+        size: float,
+        *,
+        tick: float,
+        price_dp: int,
+    ) -> bool:
+        """Pre-sign requote candidates around ``price`` in the background.
+
+        Returns ``False`` when the client has not been confirmed to sign without
+        submitting, in which case nothing is scheduled. Background signatures
+        are paced by a separate ladder budget, never by the foreground limiter.
+        """
+
+        builder = OrderBuilderCache.for_client(self._client)
+        return builder.prime(
+            token_id, side, price, tick, size, price_dp=price_dp, throttle=self._enforce_ladder_rate_limit
+        )
+
     @staticmethod
     def _resolve_order_type(payload: Dict[str, object], order_type_cls) -> object:
         desired = str(
@@ -584,7 +803,8 @@ class ClobPolymarketAPI(PolymarketAPI):
         for method in candidate_methods:
             try:
                 self._enforce_rate_limit()
-                raw = method(order_id)
+                with REST_LATENCY_SECONDS.labels("clob:get_order").time():
+                    raw = method(order_id)
                 normalized = self._normalize_status(raw)
                 if normalized:
                     return normalized
@@ -598,300 +818,11 @@ class ClobPolymarketAPI(PolymarketAPI):
 
     @staticmethod
     def _extract_order_id(response: object) -> Optional[str]:
-        candidates = (
-            "order_id",
-            "orderId",
-            "orderID",
-            "id",
-            "orderHash",
-            "order_hash",
-            "hash",
-        )
-
-        visited: set[int] = set()
-
-        def walk(obj: object, allow_plain_string: bool = False) -> Optional[str]:
-            if obj is None:
-                return None
-
-            if isinstance(obj, (str, bytes, bytearray)):
-                if not allow_plain_string:
-                    return None
-                text = obj.decode() if isinstance(obj, (bytes, bytearray)) else obj
-                text = text.strip()
-                return text or None
-
-            obj_id = id(obj)
-            if obj_id in visited:
-                return None
-            visited.add(obj_id)
-
-            if isinstance(obj, dict):
-                for key in candidates:
-                    cand = obj.get(key)
-                    if cand not in (None, ""):
-                        return str(cand)
-                for value in obj.values():
-                    found = walk(value, allow_plain_string=False)
-                    if found:
-                        return found
-                return None
-
-            if isinstance(obj, (list, tuple, set)):
-                for item in obj:
-                    found = walk(item, allow_plain_string=False)
-                    if found:
-                        return found
-                return None
-
-            for key in candidates:
-                try:
-                    cand = getattr(obj, key)
-                except AttributeError:
-                    continue
-                if cand not in (None, ""):
-                    return str(cand)
-
-            try:
-                from dataclasses import asdict, is_dataclass
-
-                if is_dataclass(obj):
-                    return walk(asdict(obj), allow_plain_string=False)
-            except Exception:
-                pass
-
-            to_dict = getattr(obj, "_asdict", None)
-            if callable(to_dict):
-                try:
-                    return walk(to_dict(), allow_plain_string=False)
-                except Exception:
-                    pass
-
-            if hasattr(obj, "__dict__"):
-                return walk(vars(obj), allow_plain_string=False)
-
-            return None
-
-        return walk(response, allow_plain_string=True)
+        return default_normalizer.extract_order_id(response)
 
     @staticmethod
     def _normalize_status(raw: object) -> Dict[str, object]:
-        def locate_payload(obj: object, visited: Set[int]) -> Optional[Dict[str, object]]:
-            if obj is None:
-                return None
-
-            obj_id = id(obj)
-            if obj_id in visited:
-                return None
-            visited.add(obj_id)
-
-            if isinstance(obj, dict):
-                status = obj.get("status") or obj.get("state") or obj.get("orderStatus")
-                filled_keys = (
-                    "filledAmount",
-                    "filled",
-                    "filledQuantity",
-                    "filledSize",
-                    "filledAmountQuote",
-                    "filled_amount",
-                    "totalFilled",
-                )
-                has_filled = any(key in obj for key in filled_keys) or isinstance(
-                    obj.get("fills"), (list, tuple)
-                )
-
-                if status is not None or has_filled:
-                    return obj
-
-                nested_keys = (
-                    "data",
-                    "order",
-                    "result",
-                    "response",
-                    "value",
-                    "payload",
-                )
-                for key in nested_keys:
-                    if key in obj:
-                        payload = locate_payload(obj[key], visited)
-                        if payload is not None:
-                            return payload
-
-                for value in obj.values():
-                    payload = locate_payload(value, visited)
-                    if payload is not None:
-                        return payload
-                return None
-
-            if isinstance(obj, (list, tuple, set)):
-                for item in obj:
-                    payload = locate_payload(item, visited)
-                    if payload is not None:
-                        return payload
-            return None
-
-        payload = locate_payload(raw, set())
-        if payload is None:
-            raise RuntimeError(f"Unable to locate order status payload: {raw!r}")
-
-        status_value = (
-            payload.get("status")
-            or payload.get("state")
-            or payload.get("orderStatus")
-        )
-        if status_value is None:
-            raise RuntimeError(f"Order status payload missing status: {payload!r}")
-        def coerce_float(value: object) -> Optional[float]:
-            if value in (None, ""):
-                return None
-            try:
-                return float(value)
-            except (TypeError, ValueError):
-                return None
-
-        primary_filled_keys = (
-            "filledAmount",
-            "filled",
-            "filledQuantity",
-            "filledSize",
-            "filledAmountQuote",
-            "filled_amount",
-            "totalFilled",
-            "matchedShares",
-            "shares",
-            "baseAmount",
-        )
-
-        filled_amount: Optional[float] = None
-        filled_amount_quote: Optional[float] = None
-        for key in primary_filled_keys:
-            candidate = coerce_float(payload.get(key))
-            if candidate is None:
-                continue
-            if key == "filledAmountQuote" and filled_amount_quote is None:
-                filled_amount_quote = candidate
-                continue
-            filled_amount = candidate
-            break
-
-        price_keys = (
-            "avgPrice",
-            "averagePrice",
-            "avg_price",
-            "filledAvgPrice",
-            "filledAveragePrice",
-            "executionPrice",
-            "averageExecutionPrice",
-            "fillPrice",
-            "matchedPrice",
-            "price",
-            "lastPrice",
-            "lastTradePrice",
-            "markPrice",
-        )
-
-        size_keys = (
-            "size",
-            "quantity",
-            "qty",
-            "amount",
-            "filledAmount",
-            "filled",
-            "filledQuantity",
-            "filledSize",
-            "matchedShares",
-            "shares",
-            "baseAmount",
-            "takingAmount",
-            "takerAmount",
-            "taker_amount",
-        )
-
-        fills_payload = payload.get("fills")
-        fills_sequence = fills_payload if isinstance(fills_payload, (list, tuple)) else None
-
-        total_from_fills = 0.0
-        total_notional = 0.0
-
-        if fills_sequence is not None:
-            for entry in fills_sequence:
-                if not isinstance(entry, dict):
-                    continue
-                size_val: Optional[float] = None
-                for key in size_keys:
-                    size_val = coerce_float(entry.get(key))
-                    if size_val is not None and size_val > 0:
-                        break
-                if size_val is None or size_val <= 0:
-                    continue
-                total_from_fills += size_val
-
-                price_val: Optional[float] = None
-                for key in price_keys:
-                    price_val = coerce_float(entry.get(key))
-                    if price_val is not None:
-                        break
-                if price_val is not None:
-                    total_notional += price_val * size_val
-
-        if filled_amount is None:
-            if total_from_fills > 0:
-                filled_amount = total_from_fills
-            else:
-                filled_amount = 0.0
-
-        status_upper = str(status_value).upper()
-
-        average_price: Optional[float] = None
-
-        for key in price_keys:
-            candidate = coerce_float(payload.get(key))
-            if candidate is not None:
-                average_price = candidate
-                break
-
-        if average_price is None and total_from_fills > 0 and total_notional > 0:
-            average_price = total_notional / total_from_fills
-
-        if (filled_amount is None or filled_amount <= 1e-12) and average_price is not None:
-            if filled_amount_quote is not None and filled_amount_quote > 0:
-                filled_amount = filled_amount_quote / max(average_price, 1e-12)
-
-        if (filled_amount is None or filled_amount <= 1e-12) and status_upper in {
-            "FILLED",
-            "MATCHED",
-            "COMPLETED",
-            "EXECUTED",
-        }:
-            fallback_keys = (
-                "takingAmount",
-                "takerAmount",
-                "taker_amount",
-                "size",
-                "quantity",
-                "qty",
-                "matchedShares",
-                "shares",
-                "baseAmount",
-            )
-            for key in fallback_keys:
-                candidate = coerce_float(payload.get(key))
-                if candidate is not None:
-                    filled_amount = candidate
-                    break
-
-        if filled_amount is None:
-            raise RuntimeError(
-                f"Unable to coerce filled amount to float from payload: {payload!r}"
-            )
-
-        result: Dict[str, object] = {
-            "status": str(status_value),
-            "filledAmount": filled_amount,
-        }
-        if average_price is not None:
-            result["avgPrice"] = average_price
-        return result
+        return default_normalizer.normalize_status(raw)
 
 
 def load_default_config(path: Optional[str] = None) -> ExecutionConfig:
@@ -907,6 +838,7 @@ __all__ = [
     "ExecutionEngine",
     "ExecutionResult",
     "PolymarketAPI",
+    "QuoteGapStats",
     "ClobPolymarketAPI",
     "load_default_config",
 ]
@@ -0,0 +1,624 @@
+"""Rebroadcast normalized market data to many consumers over TCP or Unix sockets.
+
+One :class:`FanoutServer` holds the market-channel subscriptions (through
+``ws_watch_by_ids`` or any function with the same signature). It reduces
+events to top-of-book quotes (:mod:`trading.quotes`) and streams them to
+every connected consumer that subscribed to the asset. A consumer that
+connects or subscribes late first receives a snapshot from the server's
+book cache, so N nodes do not each open a websocket and wait for books to
+fill in.
+
+Wire format: every frame is ``kind u8 | length u32 | payload`` (little endian).
+
+=============  ======  =====================================================
+kind           dir     payload
+=============  ======  =====================================================
+QUOTE (1)      s -> c  ``asset_index u32, seq u64, bid, ask, last, ts f64, flags u8``
+ASSET (2)      s -> c  ``asset_index u32`` + utf-8 asset id, sent once per
+                       connection before the first QUOTE of that asset
+SNAPSHOT_END   s -> c  empty; closes the snapshot that answers a SUBSCRIBE
+SUBSCRIBE      c -> s  newline separated asset ids (``*`` = every asset)
+UNSUBSCRIBE    c -> s  same
+=============  ======  =====================================================
+
+``seq`` is per asset and increases by one on every update the server sees.
+The server never blocks on a consumer. Output is buffered per connection,
+and a connection whose buffer grows past ``max_buffer`` is dropped. It
+reconnects and resyncs from the snapshot.
+
+:func:`fanout_watch_by_ids` is a drop-in for ``ws_watch_by_ids``: it hands
+each received batch to ``on_event`` as one ``price_change`` event.
+"""
+
+from __future__ import annotations
+
+import os
+import selectors
+import socket
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from trading.metrics import FANOUT_CLIENTS, FANOUT_DISCONNECTS
+from trading.quotes import (
+    FLAG_NO_ASK,
+    FLAG_NO_BID,
+    FLAG_NO_PRICE,
+    Quote,
+    QuoteNormalizer,
+    pack_prices,
+    price_change_event,
+    unpack_price,
+)
+
+QUOTE = 1
+ASSET = 2
+SNAPSHOT_END = 3
+SUBSCRIBE = 4
+UNSUBSCRIBE = 5
+ALL_ASSETS = "*"
+FLAG_CLOSED = 0x1
+
+_FRAME = struct.Struct("<BI")
+_QUOTE = struct.Struct("<IQddddB")
+_INDEX = struct.Struct("<I")
+_MAX_FRAME = 1 << 20
+
+WatchFn = Callable[..., None]
+
+
+class FanoutQuote(NamedTuple):
+    asset_id: str
+    seq: int
+    best_bid: Optional[float]
+    best_ask: Optional[float]
+    price: Optional[float]
+    ts: float
+    closed: bool = False
+
+    def to_quote(self) -> Quote:
+        return Quote(self.asset_id, self.best_bid, self.best_ask, self.price, self.ts, self.closed)
+
+
+def parse_address(address: str) -> Tuple[int, Any]:
+    """``tcp://host:port``, ``host:port`` or ``unix:///path`` -> (family, sockaddr)."""
+
+    if address.startswith("unix://"):
+        return socket.AF_UNIX, address[len("unix://") :]
+    if address.startswith("tcp://"):
+        address = address[len("tcp://") :]
+    host, sep, port = address.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"invalid fan-out address: {address!r}")
+    return socket.AF_INET, (host.strip("[]") or "127.0.0.1", int(port))
+
+
+def encode_frame(kind: int, payload: bytes = b"") -> bytes:
+    return _FRAME.pack(kind, len(payload)) + payload
+
+
+def encode_ids(asset_ids: Iterable[str]) -> bytes:
+    return "\n".join(str(a) for a in asset_ids).encode("utf-8")
+
+
+class FrameDecoder:
+    """Incremental frame splitter for a byte stream."""
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+
+    def feed(self, data: bytes) -> List[Tuple[int, bytes]]:
+        buf = self._buf
+        buf.extend(data)
+        frames = []
+        pos = 0
+        while len(buf) - pos >= _FRAME.size:
+            kind, length = _FRAME.unpack_from(buf, pos)
+            if length > _MAX_FRAME:
+                raise ValueError(f"frame too large: {length}")
+            end = pos + _FRAME.size + length
+            if end > len(buf):
+                break
+            frames.append((kind, bytes(buf[pos + _FRAME.size : end])))
+            pos = end
+        del buf[:pos]
+        return frames
+
+
+class _Connection:
+    __slots__ = ("sock", "peer", "out", "decoder", "assets", "all_assets", "sent", "writing", "overflow")
+
+    def __init__(self, sock: socket.socket, peer: str) -> None:
+        self.sock = sock
+        self.peer = peer
+        self.out = bytearray()
+        self.decoder = FrameDecoder()
+        self.assets: Set[str] = set()
+        self.all_assets = False
+        self.sent: Set[int] = set()
+        self.writing = False
+        self.overflow = False
+
+    def wants(self, asset_id: str) -> bool:
+        return self.all_assets or asset_id in self.assets
+
+
+class FanoutServer:
+    """Selector-driven fan-out of normalized quotes with a snapshot cache."""
+
+    def __init__(
+        self,
+        address: str = "tcp://127.0.0.1:0",
+        *,
+        upstream: Optional[WatchFn] = None,
+        auto_subscribe: bool = True,
+        max_buffer: int = 4 << 20,
+        max_upstreams: int = 16,
+        max_upstream_ids: int = 2000,
+        verbose: bool = False,
+    ) -> None:
+        self._family, self._sockaddr = parse_address(address)
+        self.upstream = upstream
+        self.auto_subscribe = auto_subscribe
+        self.max_buffer = int(max_buffer)
+        self.max_upstreams = int(max_upstreams)
+        self.max_upstream_ids = int(max_upstream_ids)
+        self.verbose = verbose
+        self._normalizer = QuoteNormalizer()
+        self._lock = threading.Lock()
+        self._book: Dict[str, Tuple[Quote, int]] = {}
+        self._index: Dict[str, int] = {}
+        self._connections: Dict[int, _Connection] = {}
+        self._upstream_ids: Set[str] = set()
+        self._upstreams = 0
+        self._stop = threading.Event()
+        self._selector = selectors.DefaultSelector()
+        self._listener: Optional[socket.socket] = None
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._thread: Optional[threading.Thread] = None
+        self.published = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    @property
+    def address(self) -> str:
+        if self._family == socket.AF_UNIX:
+            return f"unix://{self._sockaddr}"
+        host, port = self._listener.getsockname()[:2] if self._listener else self._sockaddr
+        return f"tcp://{host}:{port}"
+
+    def start(self) -> "FanoutServer":
+        if self._family == socket.AF_UNIX:
+            if os.path.exists(self._sockaddr):
+                os.unlink(self._sockaddr)
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            listener.bind(self._sockaddr)
+            listener.listen(128)
+        else:
+            listener = socket.create_server(self._sockaddr, backlog=128)
+        listener.setblocking(False)
+        self._listener = listener
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector.register(listener, selectors.EVENT_READ, "accept")
+        self._selector.register(self._wake_r, selectors.EVENT_READ, "wake")
+        self._thread = threading.Thread(target=self._run, name="fanout-server", daemon=True)
+        self._thread.start()
+        if self.verbose:
+            print(f"[FANOUT] 监听 {self.address}")
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        with self._lock:
+            connections = list(self._connections.values())
+        for conn in connections:
+            self._drop(conn, None)
+        if self._listener is not None:
+            self._listener.close()
+            if self._family == socket.AF_UNIX and os.path.exists(self._sockaddr):
+                os.unlink(self._sockaddr)
+        self._selector.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def add_upstream(self, asset_ids: Iterable[str]) -> List[str]:
+        """Open an upstream subscription for ids not already covered.
+
+        At most ``max_upstreams`` subscriptions covering ``max_upstream_ids``
+        ids are opened; ids past either cap are refused and not returned.
+        """
+
+        if self.upstream is None:
+            return []
+        with self._lock:
+            new = list(dict.fromkeys(str(a) for a in asset_ids if a and a != ALL_ASSETS and str(a) not in self._upstream_ids))
+            room = self.max_upstream_ids - len(self._upstream_ids) if self._upstreams < self.max_upstreams else 0
+            refused = new[max(room, 0) :]
+            new = new[: max(room, 0)]
+            self._upstream_ids.update(new)
+            if new:
+                self._upstreams += 1
+        if refused and self.verbose:
+            print(f"[FANOUT][WARN] 上游订阅已达上限，拒绝 {len(refused)} 个资产")
+        if new:
+            threading.Thread(
+                target=self.upstream,
+                kwargs={
+                    "asset_ids": new,
+                    "label": f"fanout:{len(self._upstream_ids)}",
+                    "on_event": self.on_event,
+                    "verbose": self.verbose,
+                    "stop_event": self._stop,
+                },
+                name="fanout-upstream",
+                daemon=True,
+            ).start()
+        return new
+
+    # ------------------------------------------------------------------
+    # Publishing (any thread)
+    def on_event(self, ev: Dict[str, Any]) -> None:
+        """``on_event`` callback for the upstream websocket."""
+
+        for quote in self._normalizer.update(ev):
+            self.publish(quote)
+
+    def publish(self, quote: Quote) -> int:
+        asset_id = quote.asset_id
+        with self._lock:
+            seq = self._book[asset_id][1] + 1 if asset_id in self._book else 1
+            self._book[asset_id] = (quote, seq)
+            index = self._asset_index(asset_id)
+            frame = self._quote_frame(index, seq, quote)
+            for conn in self._connections.values():
+                if conn.wants(asset_id):
+                    self._queue(conn, asset_id, index, frame)
+            self.published += 1
+        self._wake()
+        return seq
+
+    def snapshot(self) -> List[FanoutQuote]:
+        with self._lock:
+            return [
+                FanoutQuote(a, seq, q.best_bid, q.best_ask, q.price, q.ts, q.closed)
+                for a, (q, seq) in self._book.items()
+            ]
+
+    def connections(self) -> int:
+        with self._lock:
+            return len(self._connections)
+
+    # ------------------------------------------------------------------
+    # Internals (lock held unless noted)
+    def _asset_index(self, asset_id: str) -> int:
+        index = self._index.get(asset_id)
+        if index is None:
+            index = self._index[asset_id] = len(self._index)
+        return index
+
+    @staticmethod
+    def _quote_frame(index: int, seq: int, quote: Quote) -> bytes:
+        bid, ask, price, flags = pack_prices(quote)
+        payload = _QUOTE.pack(
+            index,
+            seq,
+            bid,
+            ask,
+            price,
+            quote.ts,
+            flags | (FLAG_CLOSED if quote.closed else 0),
+        )
+        return encode_frame(QUOTE, payload)
+
+    def _queue(self, conn: _Connection, asset_id: str, index: int, frame: bytes) -> None:
+        if index not in conn.sent:
+            conn.sent.add(index)
+            conn.out += encode_frame(ASSET, _INDEX.pack(index) + asset_id.encode("utf-8"))
+        conn.out += frame
+        if len(conn.out) > self.max_buffer:
+            conn.overflow = True
+
+    def _subscribe(self, conn: _Connection, asset_ids: List[str]) -> None:
+        with self._lock:
+            if ALL_ASSETS in asset_ids:
+                conn.all_assets = True
+                asset_ids = list(self._book)
+            else:
+                conn.assets.update(asset_ids)
+            for asset_id in asset_ids:
+                cached = self._book.get(asset_id)
+                if cached is not None:
+                    quote, seq = cached
+                    index = self._asset_index(asset_id)
+                    self._queue(conn, asset_id, index, self._quote_frame(index, seq, quote))
+            conn.out += encode_frame(SNAPSHOT_END)
+        if self.auto_subscribe:
+            self.add_upstream(asset_ids)
+
+    def _unsubscribe(self, conn: _Connection, asset_ids: List[str]) -> None:
+        with self._lock:
+            if ALL_ASSETS in asset_ids:
+                conn.all_assets = False
+                conn.assets.clear()
+            else:
+                conn.assets.difference_update(asset_ids)
+
+    def _wake(self) -> None:
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    # ------------------------------------------------------------------
+    # Event loop (server thread only)
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            for key, mask in self._selector.select(timeout=0.5):
+                if key.data == "accept":
+                    self._accept()
+                elif key.data == "wake":
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+                elif mask & selectors.EVENT_READ:
+                    self._read(key.data)
+            self._flush()
+
+    def _accept(self) -> None:
+        try:
+            sock, peer = self._listener.accept()
+        except (BlockingIOError, OSError):
+            return
+        sock.setblocking(False)
+        if self._family != socket.AF_UNIX:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = _Connection(sock, str(peer))
+        with self._lock:
+            self._connections[sock.fileno()] = conn
+        self._selector.register(sock, selectors.EVENT_READ, conn)
+        FANOUT_CLIENTS.inc()
+        if self.verbose:
+            print(f"[FANOUT] 新连接 {conn.peer}")
+
+    def _read(self, conn: _Connection) -> None:
+        try:
+            data = conn.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(conn, "closed")
+            return
+        try:
+            frames = conn.decoder.feed(data)
+        except ValueError:
+            self._drop(conn, "protocol")
+            return
+        for kind, payload in frames:
+            ids = [x for x in payload.decode("utf-8", "replace").split("\n") if x]
+            if kind == SUBSCRIBE:
+                self._subscribe(conn, ids)
+            elif kind == UNSUBSCRIBE:
+                self._unsubscribe(conn, ids)
+
+    def _flush(self) -> None:
+        slow: List[_Connection] = []
+        failed: List[_Connection] = []
+        with self._lock:
+            for conn in self._connections.values():
+                if conn.overflow:
+                    slow.append(conn)
+                    continue
+                if conn.out:
+                    try:
+                        sent = conn.sock.send(conn.out)
+                    except (BlockingIOError, InterruptedError):
+                        sent = 0
+                    except OSError:
+                        failed.append(conn)
+                        continue
+                    del conn.out[:sent]
+                writing = bool(conn.out)
+                if writing != conn.writing:
+                    conn.writing = writing
+                    events = selectors.EVENT_READ | (selectors.EVENT_WRITE if writing else 0)
+                    self._selector.modify(conn.sock, events, conn)
+        for conn in slow:
+            self._drop(conn, "slow")
+        for conn in failed:
+            self._drop(conn, "error")
+
+    def _drop(self, conn: _Connection, reason: Optional[str]) -> None:
+        with self._lock:
+            if self._connections.pop(conn.sock.fileno(), None) is None:
+                return
+        try:
+            self._selector.unregister(conn.sock)
+        except (KeyError, ValueError):
+            pass
+        conn.sock.close()
+        FANOUT_CLIENTS.dec()
+        if reason is not None:
+            FANOUT_DISCONNECTS.labels(reason).inc()
+            if self.verbose:
+                print(f"[FANOUT] 断开 {conn.peer}: {reason}")
+
+
+class FanoutClient:
+    """Blocking consumer connection; :meth:`recv` returns decoded quotes."""
+
+    def __init__(self, address: str, asset_ids: Optional[Sequence[str]] = None, *, timeout: float = 5.0) -> None:
+        self.address = address
+        self.asset_ids = [str(a) for a in asset_ids] if asset_ids else [ALL_ASSETS]
+        self.timeout = timeout
+        self.snapshot_done = False
+        self.last_seq: Dict[str, int] = {}
+        self._sock: Optional[socket.socket] = None
+        self._decoder = FrameDecoder()
+        self._names: Dict[int, str] = {}
+
+    def connect(self) -> "FanoutClient":
+        family, sockaddr = parse_address(self.address)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(sockaddr)
+        if family != socket.AF_UNIX:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._decoder = FrameDecoder()
+        self._names = {}
+        self.snapshot_done = False
+        self.subscribe(self.asset_ids)
+        return self
+
+    def subscribe(self, asset_ids: Iterable[str]) -> None:
+        self._sock.sendall(encode_frame(SUBSCRIBE, encode_ids(asset_ids)))
+
+    def unsubscribe(self, asset_ids: Iterable[str]) -> None:
+        self._sock.sendall(encode_frame(UNSUBSCRIBE, encode_ids(asset_ids)))
+
+    def recv(self, timeout: Optional[float] = None) -> List[FanoutQuote]:
+        """Quotes from the next chunk read; ``[]`` on timeout.
+
+        Raises ``ConnectionError`` once the server closes the connection.
+        """
+
+        self._sock.settimeout(timeout)
+        try:
+            data = self._sock.recv(65536)
+        except socket.timeout:
+            return []
+        if not data:
+            raise ConnectionError("fan-out server closed the connection")
+        quotes = []
+        for kind, payload in self._decoder.feed(data):
+            if kind == QUOTE:
+                index, seq, bid, ask, last, ts, flags = _QUOTE.unpack(payload)
+                asset_id = self._names.get(index, str(index))
+                self.last_seq[asset_id] = seq
+                quotes.append(
+                    FanoutQuote(
+                        asset_id,
+                        seq,
+                        unpack_price(bid, flags, FLAG_NO_BID),
+                        unpack_price(ask, flags, FLAG_NO_ASK),
+                        unpack_price(last, flags, FLAG_NO_PRICE),
+                        ts,
+                        bool(flags & FLAG_CLOSED),
+                    )
+                )
+            elif kind == ASSET:
+                self._names[_INDEX.unpack_from(payload)[0]] = payload[_INDEX.size :].decode("utf-8")
+            elif kind == SNAPSHOT_END:
+                self.snapshot_done = True
+        return quotes
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+def fanout_watch_by_ids(
+    asset_ids: List[str],
+    label: str = "",
+    on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+    verbose: bool = False,
+    stop_event: Optional[threading.Event] = None,
+    *,
+    address: str,
+    poll_timeout: float = 0.5,
+) -> None:
+    """Drop-in for ``ws_watch_by_ids`` that reads from a :class:`FanoutServer`."""
+
+    ids = [str(x) for x in asset_ids if x]
+    if not ids:
+        raise ValueError("asset_ids 为空")
+    stop_event = stop_event or threading.Event()
+    if verbose and label:
+        print(f"[INIT] 订阅: {label} (fan-out {address})")
+
+    reconnect_delay = 1
+    max_reconnect_delay = 60
+    while not stop_event.is_set():
+        client = FanoutClient(address, ids)
+        try:
+            client.connect()
+            reconnect_delay = 1
+            while not stop_event.is_set():
+                quotes = client.recv(timeout=poll_timeout)
+                if quotes and on_event is not None:
+                    try:
+                        on_event(price_change_event(q.to_quote() for q in quotes))
+                    except Exception:
+                        pass
+        except OSError as exc:
+            if verbose:
+                print(f"[FANOUT][CLOSED] {exc}")
+        finally:
+            client.close()
+        if stop_event.is_set():
+            break
+        if verbose:
+            print(f"[FANOUT] 连接结束，{reconnect_delay}s 后重试…")
+        stop_event.wait(reconnect_delay)
+        reconnect_delay = min(reconnect_delay * 2, max_reconnect_delay)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebroadcast market-channel quotes to fan-out consumers.")
+    parser.add_argument("asset_ids", nargs="*", help="token ids to subscribe upfront")
+    parser.add_argument("--listen", default="tcp://127.0.0.1:9100", help="tcp://host:port or unix:///path")
+    parser.add_argument("--no-auto-subscribe", action="store_true", help="only serve the ids given upfront")
+    parser.add_argument("--max-upstreams", type=int, default=16, help="cap on upstream websocket subscriptions")
+    parser.add_argument("--max-upstream-ids", type=int, default=2000, help="cap on asset ids subscribed upstream")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    from Volatility_arbitrage_main_ws import ws_watch_by_ids
+
+    server = FanoutServer(
+        args.listen,
+        upstream=ws_watch_by_ids,
+        auto_subscribe=not args.no_auto_subscribe,
+        max_upstreams=args.max_upstreams,
+        max_upstream_ids=args.max_upstream_ids,
+        verbose=args.verbose,
+    ).start()
+    server.add_upstream(args.asset_ids)
+    print(f"fan-out listening on {server.address}")
+    try:
+        while True:
+            time.sleep(60)
+            print(f"{server.connections()} consumers, {server.published} quotes published")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+__all__ = [
+    "ALL_ASSETS",
+    "FanoutClient",
+    "FanoutQuote",
+    "FanoutServer",
+    "FrameDecoder",
+    "encode_frame",
+    "fanout_watch_by_ids",
+    "parse_address",
+]
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,338 @@
+"""Crash-safe write-ahead journal for runner state.
+
+``journal.wal`` holds ``<crc32 hex> <json>`` lines written by a group-commit
+background writer; ``snapshot.json`` holds the reduced state and the ``seq``
+it covers. Recovery replays the WAL past the snapshot and stops at the first
+torn line. :func:`apply_record` reduces ``session``, ``session_closed``,
+``strategy``, ``order``, ``position`` and ``signal`` records; other kinds are
+kept under ``state["extra"][kind]``.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import os
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from trading.order_store import CLOSED_STATUSES
+
+WAL_NAME = "journal.wal"
+SNAPSHOT_NAME = "snapshot.json"
+
+
+def empty_state() -> Dict[str, Any]:
+    return {"session": None, "strategy": None, "orders": {}, "position": None, "last_signal": None}
+
+
+def apply_record(state: Dict[str, Any], kind: str, data: Dict[str, Any]) -> None:
+    """Fold one journal record into ``state`` (in place)."""
+
+    if kind == "session":
+        state["session"] = dict(data)
+    elif kind == "session_closed":
+        if state.get("session") is not None:
+            state["session"]["closed"] = True
+    elif kind == "strategy":
+        state["strategy"] = data.get("state")
+        state["strategy_event"] = data.get("event")
+    elif kind == "order":
+        order_id = data.get("order_id")
+        if not order_id:
+            return
+        orders = state.setdefault("orders", {})
+        if str(data.get("status", "")).upper() in CLOSED_STATUSES:
+            orders.pop(order_id, None)
+        else:
+            orders[order_id] = dict(data)
+    elif kind == "position":
+        state["position"] = dict(data)
+    elif kind == "signal":
+        state["last_signal"] = dict(data)
+    else:
+        state.setdefault("extra", {})[kind] = data
+
+
+def _encode(record: Dict[str, Any]) -> bytes:
+    body = json.dumps(record, separators=(",", ":"), default=str).encode("utf-8")
+    return b"%08x " % zlib.crc32(body) + body + b"\n"
+
+
+def _decode(line: bytes) -> Optional[Dict[str, Any]]:
+    if not line.endswith(b"\n") or len(line) < 10 or line[8:9] != b" ":
+        return None
+    body = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(body):
+            return None
+        record = json.loads(body)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+
+def _fsync_dir(path: str) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@dataclass
+class Recovered:
+    seq: int
+    state: Dict[str, Any]
+    replayed: int
+    truncated_bytes: int
+
+
+def recover(directory: str, *, repair: bool = True) -> Recovered:
+    """Rebuild state from ``directory``; with ``repair`` cut off a torn WAL tail."""
+
+    state = empty_state()
+    seq = 0
+    snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+    try:
+        with open(snapshot_path, "r", encoding="utf-8") as fh:
+            snap = json.load(fh)
+        if isinstance(snap, dict) and isinstance(snap.get("state"), dict):
+            state = snap["state"]
+            seq = int(snap.get("seq", 0))
+    except (OSError, ValueError):
+        pass
+
+    replayed = 0
+    truncated = 0
+    wal_path = os.path.join(directory, WAL_NAME)
+    try:
+        with open(wal_path, "rb") as fh:
+            good_offset = 0
+            for line in fh:
+                record = _decode(line)
+                if record is None:
+                    break
+                good_offset += len(line)
+                rec_seq = int(record.get("seq", 0))
+                if rec_seq <= seq:
+                    continue
+                apply_record(state, str(record.get("kind")), record.get("data") or {})
+                seq = rec_seq
+                replayed += 1
+            fh.seek(0, os.SEEK_END)
+            truncated = fh.tell() - good_offset
+        if truncated and repair:
+            with open(wal_path, "r+b") as fh:
+                fh.truncate(good_offset)
+                fh.flush()
+                os.fsync(fh.fileno())
+    except OSError:
+        pass
+    return Recovered(seq=seq, state=state, replayed=replayed, truncated_bytes=truncated)
+
+
+class Journal:
+    """Append-only, fsync-batched journal with periodic compacted snapshots."""
+
+    def __init__(
+        self,
+        directory: str,
+        *,
+        fsync_interval: float = 0.05,
+        compact_every: int = 1000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.directory = directory
+        self.fsync_interval = max(float(fsync_interval), 0.0)
+        self.compact_every = max(int(compact_every), 1)
+        self._clock = clock
+        os.makedirs(directory, exist_ok=True)
+
+        recovered = recover(directory)
+        self.recovered = recovered
+        self._state = copy.deepcopy(recovered.state)
+        self._seq = recovered.seq
+        self._durable_seq = recovered.seq
+        self._since_snapshot = recovered.replayed
+
+        self._wal = open(os.path.join(directory, WAL_NAME), "ab")
+        self._pending: List[Tuple[int, bytes]] = []
+        self._compact_requested = 0
+        self._compact_done = 0
+        self._flush_now = False
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._durable = threading.Condition(self._lock)
+        self._writer = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+        self._writer.start()
+
+    # ------------------------------------------------------------------
+    # Public API
+    @property
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            return copy.deepcopy(self._state)
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def append(self, kind: str, data: Optional[Dict[str, Any]] = None, *, sync: bool = False) -> int:
+        payload = dict(data or {})
+        with self._lock:
+            self._raise_if_failed_locked()
+            if self._closed:
+                raise RuntimeError("journal is closed")
+            self._seq += 1
+            seq = self._seq
+            apply_record(self._state, kind, payload)
+            line = _encode({"seq": seq, "ts": self._clock(), "kind": kind, "data": payload})
+            self._pending.append((seq, line))
+            self._since_snapshot += 1
+            if self._since_snapshot >= self.compact_every and self._compact_requested == self._compact_done:
+                self._compact_requested += 1
+            if sync:
+                self._flush_now = True
+            self._wakeup.notify()
+            if sync:
+                self._wait_durable(seq)
+        return seq
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        with self._lock:
+            self._flush_now = True
+            self._wakeup.notify()
+            return self._wait_durable(self._seq, timeout)
+
+    def compact(self) -> None:
+        """Force a snapshot + WAL truncation and wait for it."""
+
+        with self._lock:
+            self._request_compaction_locked()
+
+    def reset(self) -> None:
+        """Start a fresh session: forget all state (durably)."""
+
+        with self._lock:
+            self._state = empty_state()
+            self._pending.clear()
+            self._request_compaction_locked()
+
+    def _request_compaction_locked(self) -> None:
+        self._raise_if_failed_locked()
+        self._compact_requested += 1
+        target = self._compact_requested
+        self._wakeup.notify()
+        while self._compact_done < target and self._writer.is_alive():
+            self._durable.wait()
+        self._raise_if_failed_locked()
+
+    def _raise_if_failed_locked(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"journal writer failed: {self._error!r}") from self._error
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify()
+        self._writer.join()
+        self._wal.close()
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    def _wait_durable(self, seq: int, timeout: Optional[float] = None) -> bool:
+        """Wait until ``seq`` is fsynced; raises if the writer failed first."""
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._durable_seq < seq and self._writer.is_alive() and self._error is None:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self._durable.wait(remaining)
+        if self._durable_seq < seq:
+            self._raise_if_failed_locked()
+        return self._durable_seq >= seq
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._pending and not self._compaction_due() and not self._closed:
+                    self._wakeup.wait()
+                # Group commit: let appends arriving within fsync_interval share one fsync.
+                deadline = time.monotonic() + self.fsync_interval
+                while not (self._closed or self._flush_now or self._compaction_due()):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._wakeup.wait(remaining)
+                self._flush_now = False
+                batch = self._pending
+                self._pending = []
+                seq = self._seq
+                snapshot = None
+                compact_target = self._compact_requested
+                if self._compaction_due():
+                    snapshot = copy.deepcopy(self._state)
+                    self._since_snapshot = 0
+                closing = self._closed
+            try:
+                if snapshot is not None:
+                    self._write_snapshot(seq, snapshot)
+                elif batch:
+                    self._wal.write(b"".join(line for _, line in batch))
+                    self._wal.flush()
+                    os.fsync(self._wal.fileno())
+            except BaseException as exc:
+                # The WAL tail may now be torn; appending after it would hide later
+                # records from recovery. Stop here and fail every waiter.
+                with self._lock:
+                    self._error = exc
+                    self._durable.notify_all()
+                return
+            with self._lock:
+                self._durable_seq = max(self._durable_seq, seq)
+                if snapshot is not None:
+                    self._compact_done = compact_target
+                self._durable.notify_all()
+            if closing:
+                return
+
+    def _compaction_due(self) -> bool:
+        return self._compact_requested > self._compact_done
+
+    def _write_snapshot(self, seq: int, state: Dict[str, Any]) -> None:
+        path = os.path.join(self.directory, SNAPSHOT_NAME)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump({"seq": seq, "ts": self._clock(), "state": state}, fh, default=str)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, path)
+        _fsync_dir(self.directory)
+        # Everything up to ``seq`` now lives in the snapshot.
+        self._wal.truncate(0)
+        self._wal.seek(0)
+        self._wal.flush()
+        os.fsync(self._wal.fileno())
+
+
+__all__ = ["Journal", "Recovered", "apply_record", "empty_state", "recover"]
@@ -0,0 +1,84 @@
+"""Deferred module imports for the entry-point scripts.
+
+``lazy_module("requests")`` returns a stand-in that imports the real module
+on first attribute access, so importing a script no longer pays for its
+heavy dependencies up front. Attribute writes are forwarded as well, which
+keeps ``monkeypatch.setattr(module.requests, "get", fake)`` working.
+
+The module is looked up through :func:`importlib.import_module` at first use,
+so whatever is in ``sys.modules`` at that point (including test stubs) wins.
+"""
+
+from __future__ import annotations
+
+import importlib
+import threading
+from types import ModuleType
+from typing import Any, Optional
+
+
+class LazyModule:
+    """Proxy that imports ``name`` the first time one of its attributes is used."""
+
+    __slots__ = ("_lazy_name", "_lazy_module", "_lazy_lock")
+
+    def __init__(self, name: str) -> None:
+        object.__setattr__(self, "_lazy_name", name)
+        object.__setattr__(self, "_lazy_module", None)
+        object.__setattr__(self, "_lazy_lock", threading.Lock())
+
+    def _load(self) -> ModuleType:
+        module = self._lazy_module
+        if module is None:
+            with self._lazy_lock:
+                module = self._lazy_module
+                if module is None:
+                    module = importlib.import_module(self._lazy_name)
+                    object.__setattr__(self, "_lazy_module", module)
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        return self._lazy_module is not None
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self._load(), attr, value)
+
+    def __delattr__(self, attr: str) -> None:
+        delattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<lazy module {self._lazy_name!r} ({state})>"
+
+
+def lazy_module(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def module_available(name: str) -> bool:
+    """Return True when ``name`` can be imported, without importing it."""
+
+    import sys
+
+    if name in sys.modules:
+        return sys.modules[name] is not None
+    from importlib.util import find_spec
+
+    try:
+        return find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def optional_import(name: str) -> Optional[ModuleType]:
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+__all__ = ["LazyModule", "lazy_module", "module_available", "optional_import"]
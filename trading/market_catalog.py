@@ -0,0 +1,351 @@
+"""Local SQLite catalog of gamma-api markets.
+
+Markets are indexed by ``slug``, ``eventSlug``, ``conditionId`` and every
+``clobTokenIds`` entry. ``sync()`` pages the gamma listings incrementally and
+``upsert_markets()`` stores objects fetched elsewhere. Run
+``python -m trading.market_catalog --db PATH`` to bulk sync.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+DEFAULT_GAMMA_ROOT = "https://gamma-api.polymarket.com"
+DEFAULT_PAGE_SIZE = 500
+
+FetchFn = Callable[[str, Optional[Dict[str, Any]]], Any]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS markets (
+    market_key   TEXT PRIMARY KEY,
+    slug         TEXT,
+    event_slug   TEXT,
+    condition_id TEXT,
+    closed       INTEGER,
+    updated_at   REAL NOT NULL,
+    raw          TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_markets_slug ON markets(slug);
+CREATE INDEX IF NOT EXISTS idx_markets_event_slug ON markets(event_slug);
+CREATE INDEX IF NOT EXISTS idx_markets_condition_id ON markets(condition_id);
+CREATE TABLE IF NOT EXISTS tokens (
+    token_id      TEXT PRIMARY KEY,
+    market_key    TEXT NOT NULL,
+    outcome_index INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tokens_market_key ON tokens(market_key);
+CREATE TABLE IF NOT EXISTS sync_state (
+    listing TEXT PRIMARY KEY,
+    offset  INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def _default_fetch(url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    import requests
+
+    resp = requests.get(url, params=params or {}, timeout=10)
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _as_list(data: Any) -> List[dict]:
+    if isinstance(data, dict) and "data" in data:
+        data = data["data"]
+    if isinstance(data, list):
+        return [item for item in data if isinstance(item, dict)]
+    return []
+
+
+def token_ids_of(market: Mapping[str, Any]) -> List[str]:
+    """Return the CLOB token ids of *market* in outcome order."""
+
+    ids = market.get("clobTokenIds") or market.get("clobTokens")
+    if isinstance(ids, str):
+        try:
+            ids = json.loads(ids)
+        except ValueError:
+            ids = None
+    if isinstance(ids, (list, tuple)):
+        return [str(tid) for tid in ids if tid not in (None, "")]
+    tokens = market.get("tokens")
+    if isinstance(tokens, list):
+        result = []
+        for token in tokens:
+            if isinstance(token, dict):
+                tid = token.get("token_id") or token.get("tokenId") or token.get("clobTokenId")
+                if tid:
+                    result.append(str(tid))
+        return result
+    return []
+
+
+def event_slug_of(market: Mapping[str, Any]) -> Optional[str]:
+    slug = market.get("eventSlug")
+    if slug:
+        return str(slug)
+    events = market.get("events")
+    if isinstance(events, list):
+        for event in events:
+            if isinstance(event, dict) and event.get("slug"):
+                return str(event["slug"])
+    return None
+
+
+def _market_key(market: Mapping[str, Any]) -> Optional[str]:
+    for key in ("id", "conditionId", "slug"):
+        value = market.get(key)
+        if value not in (None, ""):
+            return f"{key}:{value}"
+    return None
+
+
+class MarketCatalog:
+    """SQLite-backed index of gamma market objects."""
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        *,
+        fetch: Optional[FetchFn] = None,
+        gamma_root: str = DEFAULT_GAMMA_ROOT,
+    ) -> None:
+        self.path = path
+        self.gamma_root = gamma_root.rstrip("/")
+        self._fetch = fetch or _default_fetch
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Writes
+    def upsert_markets(
+        self, markets: Iterable[Mapping[str, Any]], *, event_slug: Optional[str] = None
+    ) -> int:
+        """Insert or refresh *markets*; returns the number of rows written.
+
+        ``event_slug`` fills in the event for market objects nested inside an
+        ``/events`` payload, which do not always carry ``eventSlug``.
+        """
+
+        now = time.time()
+        rows: List[Tuple[Any, ...]] = []
+        token_rows: List[Tuple[str, str, int]] = []
+        for market in markets:
+            if not isinstance(market, Mapping):
+                continue
+            key = _market_key(market)
+            if key is None:
+                continue
+            ev_slug = event_slug_of(market) or event_slug
+            raw = dict(market)
+            if ev_slug and not raw.get("eventSlug"):
+                raw["eventSlug"] = ev_slug
+            closed = market.get("closed")
+            rows.append(
+                (
+                    key,
+                    market.get("slug") or None,
+                    ev_slug,
+                    market.get("conditionId") or None,
+                    None if closed is None else int(bool(closed)),
+                    now,
+                    json.dumps(raw, separators=(",", ":"), default=str),
+                )
+            )
+            for index, token_id in enumerate(token_ids_of(market)):
+                token_rows.append((token_id, key, index))
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO markets"
+                " (market_key, slug, event_slug, condition_id, closed, updated_at, raw)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tokens (token_id, market_key, outcome_index)"
+                " VALUES (?, ?, ?)",
+                token_rows,
+            )
+        return len(rows)
+
+    def upsert_events(self, events: Iterable[Mapping[str, Any]]) -> int:
+        written = 0
+        for event in events:
+            if not isinstance(event, Mapping):
+                continue
+            markets = event.get("markets")
+            if isinstance(markets, list):
+                written += self.upsert_markets(markets, event_slug=event.get("slug"))
+        return written
+
+    # ------------------------------------------------------------------
+    # Incremental sync
+    def _offset(self, listing: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT offset FROM sync_state WHERE listing = ?", (listing,)
+            ).fetchone()
+        return int(row["offset"]) if row else 0
+
+    def _store_offset(self, listing: str, offset: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (listing, offset, updated_at) VALUES (?, ?, ?)",
+                (listing, offset, time.time()),
+            )
+
+    def _sync_listing(
+        self,
+        endpoint: str,
+        params: Mapping[str, Any],
+        upsert: Callable[[List[dict]], int],
+        *,
+        page_size: int,
+        max_pages: Optional[int],
+        full: bool,
+    ) -> int:
+        listing = endpoint + "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+        offset = 0 if full else self._offset(listing)
+        written = 0
+        pages = 0
+        while max_pages is None or pages < max_pages:
+            query = dict(params)
+            query.update({"limit": page_size, "offset": offset, "order": "id", "ascending": "true"})
+            items = _as_list(self._fetch(f"{self.gamma_root}/{endpoint}", query))
+            pages += 1
+            if not items:
+                break
+            written += upsert(items)
+            offset += len(items)
+            self._store_offset(listing, offset)
+            if len(items) < page_size:
+                break
+        return written
+
+    def sync(
+        self,
+        *,
+        closed: Optional[bool] = False,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_pages: Optional[int] = None,
+        full: bool = False,
+        events: bool = True,
+    ) -> int:
+        """Page the gamma listings from the stored offset; returns rows written.
+
+        ``closed=False`` (the default) only syncs tradable markets; pass
+        ``None`` to sync every market regardless of state.
+        """
+
+        params: Dict[str, Any] = {}
+        if closed is not None:
+            params["closed"] = "true" if closed else "false"
+        written = self._sync_listing(
+            "markets",
+            params,
+            self.upsert_markets,
+            page_size=page_size,
+            max_pages=max_pages,
+            full=full,
+        )
+        if events:
+            written += self._sync_listing(
+                "events",
+                params,
+                self.upsert_events,
+                page_size=page_size,
+                max_pages=max_pages,
+                full=full,
+            )
+        return written
+
+    # ------------------------------------------------------------------
+    # Lookups
+    def _rows(self, sql: str, args: Sequence[Any]) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [json.loads(row["raw"]) for row in rows]
+
+    def _one(self, sql: str, args: Sequence[Any]) -> Optional[dict]:
+        rows = self._rows(sql + " ORDER BY updated_at DESC LIMIT 1", args)
+        return rows[0] if rows else None
+
+    def by_slug(self, slug: str) -> Optional[dict]:
+        return self._one("SELECT raw FROM markets WHERE slug = ?", (slug,))
+
+    def by_condition_id(self, condition_id: str) -> Optional[dict]:
+        return self._one("SELECT raw FROM markets WHERE condition_id = ?", (condition_id,))
+
+    def by_token_id(self, token_id: str) -> Optional[dict]:
+        return self._one(
+            "SELECT m.raw FROM tokens t JOIN markets m ON m.market_key = t.market_key"
+            " WHERE t.token_id = ?",
+            (str(token_id),),
+        )
+
+    def by_event_slug(self, event_slug: str) -> List[dict]:
+        return self._rows(
+            "SELECT raw FROM markets WHERE event_slug = ? ORDER BY market_key", (event_slug,)
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM markets").fetchone()[0])
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sync the local gamma market catalog.")
+    parser.add_argument("--db", required=True, help="SQLite file to create or update")
+    parser.add_argument("--gamma-root", default=DEFAULT_GAMMA_ROOT)
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--max-pages", type=int, default=None)
+    parser.add_argument("--all", action="store_true", help="include closed markets")
+    parser.add_argument("--full", action="store_true", help="restart from offset 0")
+    args = parser.parse_args(argv)
+
+    catalog = MarketCatalog(args.db, gamma_root=args.gamma_root)
+    try:
+        started = time.perf_counter()
+        written = catalog.sync(
+            closed=None if args.all else False,
+            page_size=args.page_size,
+            max_pages=args.max_pages,
+            full=args.full,
+        )
+        elapsed = time.perf_counter() - started
+        print(f"synced {written} rows in {elapsed:.1f}s; catalog holds {len(catalog)} markets")
+    finally:
+        catalog.close()
+    return 0
+
+
+__all__ = [
+    "DEFAULT_GAMMA_ROOT",
+    "MarketCatalog",
+    "event_slug_of",
+    "token_ids_of",
+]
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,444 @@
+"""In-process metrics registry with Prometheus text exposition.
+
+Counters, gauges and fixed-bucket histograms, plus a tiny HTTP server that
+serves ``/metrics`` on localhost from a daemon thread::
+
+    from trading.metrics import REST_LATENCY_SECONDS, start_metrics_server
+
+    start_metrics_server(9464)
+    with REST_LATENCY_SECONDS.labels("gamma:/markets").time():
+        ...
+
+Counters and histograms accumulate into a per-thread cell: the first update
+from a thread registers its cell under a lock, every later update is a plain
+in-place add on memory only that thread writes, so the websocket and trading
+threads never contend. A scrape sums the cells of all threads and folds the
+cells of exited threads into one base cell. Gauges hold a single value (a
+``set`` is one attribute store) and are not meant for hot paths.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+DECODE_BUCKETS: Tuple[float, ...] = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+)
+
+
+class _ThreadCells:
+    """Per-thread mutable cells created by ``factory`` and summed on read.
+
+    Cells of threads that have exited are folded into one base cell on the
+    next snapshot, so short-lived threads do not grow the list.
+    """
+
+    __slots__ = ("_factory", "_local", "_cells", "_base", "_lock")
+
+    def __init__(self, factory: Callable[[], List[Any]]) -> None:
+        self._factory = factory
+        self._local = threading.local()
+        self._cells: List[Tuple[threading.Thread, List[Any]]] = []
+        self._base = factory()
+        self._lock = threading.Lock()
+
+    def cell(self) -> List[Any]:
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._factory()
+            with self._lock:
+                self._cells.append((threading.current_thread(), cell))
+            self._local.cell = cell
+            return cell
+
+    def snapshot(self) -> List[List[Any]]:
+        with self._lock:
+            live = []
+            for thread, cell in self._cells:
+                if thread.is_alive():
+                    live.append((thread, cell))
+                    continue
+                # The owner is gone, so nothing writes this cell any more.
+                for idx, value in enumerate(cell):
+                    self._base[idx] += value
+            self._cells = live
+            return [list(self._base)] + [cell for _, cell in live]
+
+
+class Counter:
+    """Monotonically increasing value."""
+
+    def __init__(self) -> None:
+        self._cells = _ThreadCells(lambda: [0.0])
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("counters can only increase")
+        self._cells.cell()[0] += amount
+
+    @property
+    def value(self) -> float:
+        return sum(cell[0] for cell in self._cells.snapshot())
+
+    def _samples(self, name: str, labels: str) -> Iterable[str]:
+        yield f"{name}{labels} {_fmt(self.value)}"
+
+
+class Gauge:
+    """Value that can go up and down."""
+
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        self._value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def _samples(self, name: str, labels: str) -> Iterable[str]:
+        yield f"{name}{labels} {_fmt(self._value)}"
+
+
+class _Timer:
+    __slots__ = ("_hist", "_start")
+
+    def __init__(self, hist: "Histogram") -> None:
+        self._hist = hist
+        self._start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._hist.observe(time.perf_counter() - self._start)
+
+
+class Histogram:
+    """Fixed-bucket histogram (buckets are upper bounds, ``+Inf`` implied)."""
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self._bounds = tuple(sorted(float(b) for b in buckets))
+        width = len(self._bounds) + 1
+        # cell layout: [count per bucket..., sum]
+        self._cells = _ThreadCells(lambda: [0] * width + [0.0])
+
+    def observe(self, value: float) -> None:
+        cell = self._cells.cell()
+        cell[bisect.bisect_left(self._bounds, value)] += 1
+        cell[-1] += value
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+    def totals(self) -> Tuple[List[int], float]:
+        width = len(self._bounds) + 1
+        counts = [0] * width
+        total = 0.0
+        for cell in self._cells.snapshot():
+            for idx in range(width):
+                counts[idx] += cell[idx]
+            total += cell[-1]
+        return counts, total
+
+    @property
+    def count(self) -> int:
+        return sum(self.totals()[0])
+
+    def _samples(self, name: str, labels: str) -> Iterable[str]:
+        counts, total = self.totals()
+        inner = labels[1:-1] if labels else ""
+        sep = "," if inner else ""
+        running = 0
+        for bound, bucket_count in zip(self._bounds + (math.inf,), counts):
+            running += bucket_count
+            le = "+Inf" if bound == math.inf else _fmt(bound)
+            yield f'{name}_bucket{{{inner}{sep}le="{le}"}} {running}'
+        yield f"{name}_sum{labels} {_fmt(total)}"
+        yield f"{name}_count{labels} {running}"
+
+
+class MetricFamily:
+    """A named metric, optionally split by label values."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        factory: Callable[[], Any],
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = factory()
+
+    def labels(self, *values: Any, **kwargs: Any) -> Any:
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._factory()
+                    self._children[key] = child
+        return child
+
+    def __getattr__(self, attr: str) -> Any:
+        # Unlabelled families proxy inc/set/observe/time to their single child.
+        children = self.__dict__.get("_children")
+        if children is not None and () in children:
+            return getattr(children[()], attr)
+        raise AttributeError(attr)
+
+    def render(self) -> List[str]:
+        exposed = f"{self.name}_total" if self.kind == "counter" else self.name
+        lines = [
+            f"# HELP {exposed} {self.documentation}",
+            f"# TYPE {exposed} {self.kind}",
+        ]
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in children:
+            labels = ""
+            if key:
+                pairs = ",".join(
+                    f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)
+                )
+                labels = "{" + pairs + "}"
+            lines.extend(child._samples(exposed, labels))
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._families: Dict[str, MetricFamily] = {}
+        self._lock = threading.Lock()
+
+    def _register(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        factory: Callable[[], Any],
+        labelnames: Sequence[str],
+    ) -> MetricFamily:
+        with self._lock:
+            existing = self._families.get(name)
+            if existing is not None:
+                if existing.kind != kind or existing.labelnames != tuple(labelnames):
+                    raise ValueError(f"metric {name} already registered differently")
+                return existing
+            family = MetricFamily(name, documentation, kind, factory, labelnames)
+            self._families[name] = family
+            return family
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._register(name, documentation, "counter", Counter, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._register(name, documentation, "gauge", Gauge, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> MetricFamily:
+        bounds = tuple(buckets)
+        return self._register(
+            name, documentation, "histogram", lambda: Histogram(bounds), labelnames
+        )
+
+    def get(self, name: str) -> Optional[MetricFamily]:
+        with self._lock:
+            return self._families.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            families = list(self._families.values())
+        lines: List[str] = []
+        for family in families:
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+def _fmt(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+REGISTRY = MetricsRegistry()
+
+WS_MESSAGES = REGISTRY.counter(
+    "polymarket_ws_messages", "Market-channel websocket events received", ["asset"]
+)
+WS_DECODE_SECONDS = REGISTRY.histogram(
+    "polymarket_ws_decode_seconds", "Time spent decoding one websocket frame", buckets=DECODE_BUCKETS
+)
+TICKS_CONFLATED = REGISTRY.counter(
+    "polymarket_ticks_conflated", "Ticks superseded before the strategy evaluated them", ["asset"]
+)
+TICK_TO_ACTION_SECONDS = REGISTRY.histogram(
+    "polymarket_tick_to_action_seconds", "Websocket tick receipt to strategy action emitted"
+)
+SIGNALS_DROPPED = REGISTRY.counter(
+    "polymarket_signals_dropped", "Strategy signals dropped before execution", ["reason"]
+)
+ACTION_TO_ACK_SECONDS = REGISTRY.histogram(
+    "polymarket_action_to_ack_seconds", "Strategy action emitted to first order acknowledgement", ["side"]
+)
+REST_LATENCY_SECONDS = REGISTRY.histogram(
+    "polymarket_rest_latency_seconds", "REST call latency by endpoint", ["endpoint"]
+)
+RATE_LIMIT_WAIT_SECONDS = REGISTRY.histogram(
+    "polymarket_rate_limit_wait_seconds", "Time spent sleeping in rate limiters", ["limiter"]
+)
+REQUOTES = REGISTRY.counter("polymarket_requotes", "Maker cancel/replace requotes", ["side"])
+QUOTE_GAP_SECONDS = REGISTRY.histogram(
+    "polymarket_quote_gap_seconds", "Time without a live quote during a requote", ["side"]
+)
+FILLS = REGISTRY.counter("polymarket_fills", "Polls that observed new fills", ["side"])
+FILLED_SIZE = REGISTRY.counter("polymarket_filled_size", "Filled shares", ["side"])
+POSITION_SYNC_SECONDS = REGISTRY.histogram(
+    "polymarket_position_sync_seconds", "Duration of a position sync against the data API"
+)
+FEED_RECORDS_LOST = REGISTRY.counter(
+    "polymarket_feed_records_lost", "Republished quote records a consumer fell too far behind to read", ["feed"]
+)
+FANOUT_CLIENTS = REGISTRY.gauge("polymarket_fanout_clients", "Consumers connected to the quote fan-out server")
+FANOUT_DISCONNECTS = REGISTRY.counter(
+    "polymarket_fanout_disconnects", "Fan-out consumer connections closed by the server or peer", ["reason"]
+)
+
+
+def _handler_class(registry: MetricsRegistry) -> type:
+    # http.server pulls in email/http.client; import it only when serving.
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802 - http.server API
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            return
+
+    return MetricsHandler
+
+
+def start_metrics_server(
+    port: int,
+    host: str = "127.0.0.1",
+    registry: Optional[MetricsRegistry] = None,
+) -> "ThreadingHTTPServer":
+    """Serve ``registry`` on ``http://host:port/metrics`` from a daemon thread."""
+
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, int(port)), _handler_class(registry or REGISTRY))
+    server.daemon_threads = True
+    thread = threading.Thread(
+        target=server.serve_forever, name="metrics-http", daemon=True
+    )
+    thread.start()
+    return server
+
+
+__all__ = [
+    "ACTION_TO_ACK_SECONDS",
+    "Counter",
+    "DECODE_BUCKETS",
+    "FANOUT_CLIENTS",
+    "FANOUT_DISCONNECTS",
+    "FEED_RECORDS_LOST",
+    "FILLED_SIZE",
+    "FILLS",
+    "Gauge",
+    "Histogram",
+    "LATENCY_BUCKETS",
+    "MetricFamily",
+    "MetricsRegistry",
+    "POSITION_SYNC_SECONDS",
+    "QUOTE_GAP_SECONDS",
+    "RATE_LIMIT_WAIT_SECONDS",
+    "REGISTRY",
+    "REQUOTES",
+    "REST_LATENCY_SECONDS",
+    "SIGNALS_DROPPED",
+    "TICKS_CONFLATED",
+    "TICK_TO_ACTION_SECONDS",
+    "WS_DECODE_SECONDS",
+    "WS_MESSAGES",
+    "start_metrics_server",
+]
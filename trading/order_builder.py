@@ -0,0 +1,328 @@
+"""Order signing cache and pre-signed requote ladder for maker loops.
+
+The ladder is only enabled once a client's ``create_order`` has been seen to
+sign without submitting; otherwise priming would place real orders.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+
+_CLOB_TYPES_MODULE = "py_clob_client.clob_types"
+_CLOB_CONSTANTS_MODULE = "py_clob_client.order_builder.constants"
+
+
+class OrderTypes(NamedTuple):
+    """Resolved ``py_clob_client`` symbols needed to build an order."""
+
+    OrderArgs: Any
+    OrderType: Any
+    BUY: Any
+    SELL: Any
+
+
+_types_lock = threading.Lock()
+_types_cache: Optional[Tuple[Any, Any, OrderTypes]] = None
+
+
+def load_order_types() -> OrderTypes:
+    """Return the SDK order types, importing them only on first use.
+
+    The cache is keyed on the identity of the loaded modules so that a swapped
+    ``sys.modules`` entry (tests, hot reload) is picked up instead of serving a
+    stale class.
+    """
+
+    global _types_cache
+    cached = _types_cache
+    if cached is not None:
+        types_mod, const_mod, resolved = cached
+        if (
+            sys.modules.get(_CLOB_TYPES_MODULE) is types_mod
+            and sys.modules.get(_CLOB_CONSTANTS_MODULE) is const_mod
+        ):
+            return resolved
+
+    with _types_lock:
+        try:
+            from py_clob_client.clob_types import OrderArgs, OrderType
+            from py_clob_client.order_builder.constants import BUY, SELL
+        except ImportError as exc:  # pragma: no cover - runtime dependency
+            raise RuntimeError("py_clob_client is required to submit orders") from exc
+        resolved = OrderTypes(OrderArgs, OrderType, BUY, SELL)
+        _types_cache = (
+            sys.modules.get(_CLOB_TYPES_MODULE),
+            sys.modules.get(_CLOB_CONSTANTS_MODULE),
+            resolved,
+        )
+        return resolved
+
+
+def _price_key(value: float) -> int:
+    return int(round(float(value) * 1_000_000))
+
+
+LadderKey = Tuple[str, str, int, int]
+
+
+class PresignedLadder:
+    """Background worker that signs candidate requote orders ahead of time.
+
+    ``prime`` schedules a ladder of ``depth`` prices on each side of ``center``
+    for one ``(token_id, side)``; a newer prime for the same pair supersedes the
+    older one. ``take`` pops a signed order when the requested price and size
+    match a ladder rung exactly.
+    """
+
+    def __init__(
+        self,
+        signer: Callable[[str, str, float, float], Any],
+        *,
+        depth: int = 2,
+        max_entries: int = 64,
+    ) -> None:
+        self._signer = signer
+        self._depth = max(int(depth), 0)
+        self._max_entries = max(int(max_entries), 1)
+        self._entries: "OrderedDict[LadderKey, Any]" = OrderedDict()
+        self._jobs: Dict[Tuple[str, str], Tuple[float, float, float, int]] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._worker: Optional[threading.Thread] = None
+        self._busy = False
+        self.hits = 0
+        self.misses = 0
+        self.signed = 0
+        self.errors = 0
+
+    def prime(
+        self,
+        token_id: str,
+        side: str,
+        center: float,
+        tick: float,
+        size: float,
+        *,
+        price_dp: int,
+    ) -> None:
+        if self._depth <= 0 or tick <= 0 or size <= 0:
+            return
+        pair = (str(token_id), str(side).upper())
+        with self._cond:
+            if self._closed:
+                return
+            self._jobs[pair] = (float(center), float(tick), float(size), int(price_dp))
+            self._drop_stale_locked(pair, _price_key(size))
+            self._ensure_worker_locked()
+            self._cond.notify()
+
+    def take(self, token_id: str, side: str, price: float, size: float) -> Optional[Any]:
+        key = (str(token_id), str(side).upper(), _price_key(price), _price_key(size))
+        with self._cond:
+            signed = self._entries.pop(key, None)
+            if signed is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return signed
+
+    def invalidate(self, token_id: str, side: Optional[str] = None) -> None:
+        with self._cond:
+            for key in list(self._entries):
+                if key[0] == str(token_id) and (side is None or key[1] == str(side).upper()):
+                    del self._entries[key]
+            for pair in list(self._jobs):
+                if pair[0] == str(token_id) and (side is None or pair[1] == str(side).upper()):
+                    del self._jobs[pair]
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._jobs)
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._entries)
+
+    def wait_idle(self, timeout: float = 1.0) -> bool:
+        """Block until queued primes are signed (used by tests/benchmarks)."""
+
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._jobs and not self._busy, timeout=timeout
+            )
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._jobs.clear()
+            self._entries.clear()
+            self._cond.notify_all()
+
+    def _drop_stale_locked(self, pair: Tuple[str, str], size_key: int) -> None:
+        for key in list(self._entries):
+            if (key[0], key[1]) == pair and key[3] != size_key:
+                del self._entries[key]
+
+    def _ensure_worker_locked(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(
+            target=self._run, name="presigned-ladder", daemon=True
+        )
+        self._worker.start()
+
+    def _candidate_prices(self, center: float, tick: float, price_dp: int):
+        for step in range(1, self._depth + 1):
+            for direction in (1, -1):
+                price = round(center + direction * step * tick, price_dp)
+                if 0.0 < price < 1.0:
+                    yield price
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._jobs or self._closed)
+                if self._closed:
+                    return
+                pair, job = next(iter(self._jobs.items()))
+                del self._jobs[pair]
+                self._busy = True
+                center, tick, size, price_dp = job
+                size_key = _price_key(size)
+                wanted = [
+                    price
+                    for price in self._candidate_prices(center, tick, price_dp)
+                    if (pair[0], pair[1], _price_key(price), size_key) not in self._entries
+                ]
+
+            for price in wanted:
+                with self._cond:
+                    # A newer prime for the same pair makes this rung obsolete.
+                    if self._closed or pair in self._jobs:
+                        break
+                try:
+                    signed = self._signer(pair[0], pair[1], price, size)
+                except Exception:
+                    with self._cond:
+                        self.errors += 1
+                    continue
+                with self._cond:
+                    if self._closed or pair in self._jobs:
+                        break
+                    self._entries[(pair[0], pair[1], _price_key(price), size_key)] = signed
+                    self.signed += 1
+                    while len(self._entries) > self._max_entries:
+                        self._entries.popitem(last=False)
+
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+
+class OrderBuilderCache:
+    """Per-client order builder with an optional pre-signed requote ladder."""
+
+    _registry: "weakref.WeakKeyDictionary[Any, OrderBuilderCache]" = weakref.WeakKeyDictionary()
+    _fallback_registry: Dict[int, "OrderBuilderCache"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, client: Any, *, ladder_depth: int = 2) -> None:
+        try:
+            ref = weakref.ref(client)
+            self._client_ref: Callable[[], Any] = ref
+        except TypeError:
+            self._client_ref = lambda: client
+        # None = unknown, True = create_order only signs, False = it also submits.
+        self.signs_only: Optional[bool] = None
+        # Called before every background signature; ``create_order`` may hit the
+        # API (tick size / neg-risk lookups), so the ladder is paced by its caller.
+        self.throttle: Optional[Callable[[], None]] = None
+        self.ladder = PresignedLadder(self._presign, depth=ladder_depth)
+
+    @classmethod
+    def for_client(cls, client: Any) -> "OrderBuilderCache":
+        with cls._registry_lock:
+            try:
+                cached = cls._registry.get(client)
+            except TypeError:
+                cached = cls._fallback_registry.get(id(client))
+                if cached is None or cached._client_ref() is not client:
+                    cached = cls(client)
+                    cls._fallback_registry[id(client)] = cached
+                return cached
+            if cached is None:
+                cached = cls(client)
+                cls._registry[client] = cached
+            return cached
+
+    @staticmethod
+    def types() -> OrderTypes:
+        return load_order_types()
+
+    def build_args(self, token_id: str, side: str, price: float, size: float) -> Any:
+        types = load_order_types()
+        side_const = types.SELL if str(side).upper() == "SELL" else types.BUY
+        return types.OrderArgs(
+            token_id=str(token_id), side=side_const, price=float(price), size=float(size)
+        )
+
+    def sign(self, token_id: str, side: str, price: float, size: float) -> Any:
+        client = self._client_ref()
+        if client is None:
+            raise RuntimeError("order builder client has been released")
+        return client.create_order(self.build_args(token_id, side, price, size))
+
+    def _presign(self, token_id: str, side: str, price: float, size: float) -> Any:
+        throttle = self.throttle
+        if throttle is not None:
+            throttle()
+        return self.sign(token_id, side, price, size)
+
+    def take_presigned(self, token_id: str, side: str, price: float, size: float) -> Optional[Any]:
+        if not self.signs_only:
+            return None
+        return self.ladder.take(token_id, side, price, size)
+
+    def mark_signs_only(self) -> None:
+        self.signs_only = True
+
+    def mark_submits_on_create(self) -> None:
+        if self.signs_only is not False:
+            self.signs_only = False
+            self.ladder.close()
+
+    def prime(
+        self,
+        token_id: str,
+        side: str,
+        center: float,
+        tick: float,
+        size: float,
+        *,
+        price_dp: int,
+        throttle: Optional[Callable[[], None]] = None,
+    ) -> bool:
+        """Schedule background signing around ``center``; False when disabled.
+
+        ``throttle`` (e.g. the adapter's ladder budget) runs before each signature.
+        """
+
+        if not self.signs_only:
+            return False
+        if throttle is not None:
+            self.throttle = throttle
+        self.ladder.prime(token_id, side, center, tick, size, price_dp=price_dp)
+        return True
+
+
+__all__ = [
+    "OrderBuilderCache",
+    "OrderTypes",
+    "PresignedLadder",
+    "load_order_types",
+]
@@ -0,0 +1,316 @@
+"""Process-wide order state store with indexed lookups.
+
+Fill totals never go backwards, whether updates come from status polls
+(``apply_fill``) or cancellations (``mark_cancelled``).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+_FILL_EPS = 1e-9
+
+FINAL_STATUSES = frozenset({"FILLED", "MATCHED", "COMPLETED", "EXECUTED"})
+CLOSED_STATUSES = FINAL_STATUSES | frozenset(
+    {"CANCELLED", "CANCELED", "REJECTED", "EXPIRED", "INVALID"}
+)
+
+
+@dataclass
+class OrderState:
+    """Latest known state of a single order."""
+
+    order_id: str
+    token_id: str
+    side: str
+    price: float
+    size: float
+    status: str = "OPEN"
+    filled: float = 0.0
+    notional: float = 0.0
+    created_at: float = 0.0
+    updated_at: float = 0.0
+    source: str = "create"
+
+    @property
+    def avg_price(self) -> Optional[float]:
+        if self.filled <= _FILL_EPS:
+            return None
+        return self.notional / self.filled
+
+    @property
+    def remaining(self) -> float:
+        return max(self.size - self.filled, 0.0)
+
+    @property
+    def is_open(self) -> bool:
+        return self.status not in CLOSED_STATUSES
+
+
+Listener = Callable[[OrderState], None]
+
+
+class OrderStore:
+    """Thread-safe order registry shared by the maker loops and the runner."""
+
+    def __init__(self, *, clock: Callable[[], float] = time.time) -> None:
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._orders: Dict[str, OrderState] = {}
+        self._by_token: Dict[str, Set[str]] = {}
+        self._by_side: Dict[str, Set[str]] = {}
+        self._by_status: Dict[str, Set[str]] = {}
+        self._filled: Dict[Tuple[str, str], float] = {}
+        self._notional: Dict[Tuple[str, str], float] = {}
+        self._listeners: List[Listener] = []
+
+    # ------------------------------------------------------------------
+    # writers
+    def add(
+        self,
+        order_id: str,
+        token_id: str,
+        side: str,
+        price: float,
+        size: float,
+        *,
+        status: str = "OPEN",
+        source: str = "create",
+    ) -> OrderState:
+        """Register a freshly placed order (replacing any entry with the same id)."""
+
+        now = self._clock()
+        state = OrderState(
+            order_id=str(order_id),
+            token_id=str(token_id),
+            side=str(side).upper(),
+            price=float(price),
+            size=float(size),
+            status=str(status).upper(),
+            created_at=now,
+            updated_at=now,
+            source=source,
+        )
+        with self._lock:
+            previous = self._orders.get(state.order_id)
+            if previous is not None:
+                self._unindex(previous)
+                self._adjust_totals(previous, -previous.filled, -previous.notional)
+            self._orders[state.order_id] = state
+            self._index(state)
+            snapshot = replace(state)
+        self._notify(snapshot)
+        return snapshot
+
+    def apply_fill(
+        self,
+        order_id: str,
+        filled_total: float,
+        *,
+        avg_price: Optional[float] = None,
+        status: Optional[str] = None,
+        source: str = "poll",
+    ) -> float:
+        """Record the cumulative filled size reported for ``order_id``.
+
+        Returns the newly filled delta. The delta is valued at ``avg_price``
+        when given, otherwise at the order's limit price.
+        """
+
+        with self._lock:
+            state = self._orders.get(str(order_id))
+            if state is None:
+                return 0.0
+            delta = max(float(filled_total) - state.filled, 0.0)
+            if delta > _FILL_EPS:
+                px = avg_price if avg_price is not None and avg_price > 0 else state.price
+                state.filled += delta
+                state.notional += delta * px
+                self._adjust_totals(state, delta, delta * px)
+            else:
+                delta = 0.0
+            if status:
+                self._set_status(state, status)
+            state.updated_at = self._clock()
+            state.source = source
+            snapshot = replace(state)
+        self._notify(snapshot)
+        return delta
+
+    def apply_status(self, order_id: str, status: str, *, source: str = "poll") -> None:
+        with self._lock:
+            state = self._orders.get(str(order_id))
+            if state is None:
+                return
+            self._set_status(state, status)
+            state.updated_at = self._clock()
+            state.source = source
+            snapshot = replace(state)
+        self._notify(snapshot)
+
+    def mark_cancelled(self, order_id: str, *, source: str = "cancel") -> None:
+        with self._lock:
+            state = self._orders.get(str(order_id))
+            if state is None or state.status in FINAL_STATUSES:
+                return
+        self.apply_status(order_id, "CANCELLED", source=source)
+
+    def discard(self, order_id: str) -> None:
+        with self._lock:
+            state = self._orders.pop(str(order_id), None)
+            if state is not None:
+                self._unindex(state)
+                self._adjust_totals(state, -state.filled, -state.notional)
+
+    def prune_closed(self, older_than: float) -> int:
+        """Forget closed orders last updated more than ``older_than`` seconds ago.
+
+        The per-token totals keep the fills of pruned orders.
+        """
+
+        cutoff = self._clock() - float(older_than)
+        with self._lock:
+            stale = [
+                oid
+                for oid, state in self._orders.items()
+                if not state.is_open and state.updated_at < cutoff
+            ]
+            for oid in stale:
+                state = self._orders.pop(oid)
+                self._unindex(state)
+        return len(stale)
+
+    # ------------------------------------------------------------------
+    # readers
+    def get(self, order_id: str) -> Optional[OrderState]:
+        with self._lock:
+            state = self._orders.get(str(order_id))
+            return replace(state) if state is not None else None
+
+    def query(
+        self,
+        *,
+        token_id: Optional[str] = None,
+        side: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> List[OrderState]:
+        with self._lock:
+            ids: Optional[Set[str]] = None
+            for index, key in (
+                (self._by_token, None if token_id is None else str(token_id)),
+                (self._by_side, None if side is None else str(side).upper()),
+                (self._by_status, None if status is None else str(status).upper()),
+            ):
+                if key is None:
+                    continue
+                bucket = index.get(key, set())
+                ids = set(bucket) if ids is None else ids & bucket
+                if not ids:
+                    return []
+            if ids is None:
+                ids = set(self._orders)
+            states = [replace(self._orders[oid]) for oid in ids]
+        states.sort(key=lambda state: state.created_at)
+        return states
+
+    def open_orders(
+        self, *, token_id: Optional[str] = None, side: Optional[str] = None
+    ) -> List[OrderState]:
+        return [state for state in self.query(token_id=token_id, side=side) if state.is_open]
+
+    def totals(self, token_id: str, side: Optional[str] = None) -> Tuple[float, float]:
+        """Return ``(filled, notional)`` for a token, optionally for one side."""
+
+        sides: Iterable[str] = (str(side).upper(),) if side else ("BUY", "SELL")
+        with self._lock:
+            filled = sum(self._filled.get((str(token_id), s), 0.0) for s in sides)
+            notional = sum(self._notional.get((str(token_id), s), 0.0) for s in sides)
+        return filled, notional
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Plain-dict view of every tracked order, suitable for a status endpoint."""
+
+        return [
+            dict(asdict(state), avg_price=state.avg_price, remaining=state.remaining)
+            for state in self.query()
+        ]
+
+    def subscribe(self, listener: Listener) -> Callable[[], None]:
+        with self._lock:
+            self._listeners.append(listener)
+
+        def _unsubscribe() -> None:
+            with self._lock:
+                if listener in self._listeners:
+                    self._listeners.remove(listener)
+
+        return _unsubscribe
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._orders)
+
+    def __contains__(self, order_id: object) -> bool:
+        with self._lock:
+            return str(order_id) in self._orders
+
+    # ------------------------------------------------------------------
+    # internals
+    def _set_status(self, state: OrderState, status: str) -> None:
+        status_upper = str(status).upper()
+        if status_upper == state.status:
+            return
+        self._by_status.get(state.status, set()).discard(state.order_id)
+        state.status = status_upper
+        self._by_status.setdefault(status_upper, set()).add(state.order_id)
+
+    def _index(self, state: OrderState) -> None:
+        self._by_token.setdefault(state.token_id, set()).add(state.order_id)
+        self._by_side.setdefault(state.side, set()).add(state.order_id)
+        self._by_status.setdefault(state.status, set()).add(state.order_id)
+
+    def _unindex(self, state: OrderState) -> None:
+        self._by_token.get(state.token_id, set()).discard(state.order_id)
+        self._by_side.get(state.side, set()).discard(state.order_id)
+        self._by_status.get(state.status, set()).discard(state.order_id)
+
+    def _adjust_totals(self, state: OrderState, filled: float, notional: float) -> None:
+        key = (state.token_id, state.side)
+        self._filled[key] = self._filled.get(key, 0.0) + filled
+        self._notional[key] = self._notional.get(key, 0.0) + notional
+
+    def _notify(self, state: OrderState) -> None:
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(state)
+            except Exception:
+                continue
+
+
+_default_store: Optional[OrderStore] = None
+_default_lock = threading.Lock()
+
+
+def default_store() -> OrderStore:
+    """Return the process-wide store, creating it on first use."""
+
+    global _default_store
+    if _default_store is None:
+        with _default_lock:
+            if _default_store is None:
+                _default_store = OrderStore()
+    return _default_store
+
+
+__all__ = [
+    "CLOSED_STATUSES",
+    "FINAL_STATUSES",
+    "OrderState",
+    "OrderStore",
+    "default_store",
+]
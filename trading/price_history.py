@@ -0,0 +1,200 @@
+"""Warm-start sources for the strategy's drop window.
+
+After a restart ``VolArbStrategy`` has an empty price window, so drop
+triggers stay silent until ``drop_window_minutes`` of fresh ticks arrive.
+This module provides the two sources the runner feeds into
+``VolArbStrategy.warm_start``:
+
+* :class:`TickRing` - a small on-disk ring of recent ``(ts, mid)`` ticks for
+  one token. Ticks are buffered in memory and appended as fixed 16-byte
+  native double pairs at most once per ``flush_interval``; once the
+  file holds twice ``capacity`` records it is rewritten with the newest
+  ``capacity``. Loading is a single ``array('d').frombytes`` call.
+* :func:`fetch_prices_history` - the CLOB ``/prices-history`` endpoint
+  (``{"history": [{"t": <sec>, "p": <price>}, ...]}``). The host defaults to
+  ``POLY_PRICES_HISTORY_HOST`` / ``POLY_HOST`` and can be pointed at a local
+  fixture server.
+
+Both return parallel ``(timestamps, mids)`` lists, oldest first.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_HOST = "https://clob.polymarket.com"
+
+_RECORD_BYTES = 16  # two native doubles: ts, mid
+
+FetchFn = Callable[[str, Optional[Dict[str, Any]]], Any]
+Series = Tuple[List[float], List[float]]
+
+
+def _default_fetch(url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    import requests
+
+    resp = requests.get(url, params=params or {}, timeout=10)
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+    return resp.json()
+
+
+def prices_history_host() -> str:
+    host = os.getenv("POLY_PRICES_HISTORY_HOST") or os.getenv("POLY_HOST") or DEFAULT_HOST
+    return host.strip().rstrip("/")
+
+
+def fetch_prices_history(
+    token_id: str,
+    *,
+    start_ts: float,
+    end_ts: Optional[float] = None,
+    fidelity: int = 1,
+    host: Optional[str] = None,
+    fetch: Optional[FetchFn] = None,
+) -> Series:
+    """Mid-price history for ``token_id`` between ``start_ts`` and ``end_ts``.
+
+    ``fidelity`` is the bucket size in minutes. Malformed points are skipped.
+    """
+
+    if end_ts is None:
+        end_ts = time.time()
+    params = {
+        "market": str(token_id),
+        "startTs": int(start_ts),
+        "endTs": int(end_ts) + 1,
+        "fidelity": max(int(fidelity), 1),
+    }
+    data = (fetch or _default_fetch)(f"{host or prices_history_host()}/prices-history", params)
+    history = data.get("history") if isinstance(data, dict) else data
+    points = []
+    for item in history or []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            ts = float(item["t"])
+            px = float(item["p"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if start_ts <= ts <= end_ts:
+            points.append((ts, px))
+    points.sort()
+    return [ts for ts, _ in points], [px for _, px in points]
+
+
+class TickRing:
+    """Persisted ring of recent ``(ts, mid)`` ticks for one token."""
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        capacity: int = 4096,
+        flush_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.path = path
+        self.capacity = max(int(capacity), 1)
+        self.flush_interval = max(float(flush_interval), 0.0)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buffer = array("d")
+        self._last_flush = clock()
+        self._records = 0
+        self._fh = None
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+
+    def load(self, since: Optional[float] = None) -> Series:
+        """Ticks on disk (plus unflushed ones) with ``ts >= since``, oldest first."""
+
+        with self._lock:
+            values = self._read_locked()
+            values.extend(self._buffer)
+        ts_values = values[0::2].tolist()
+        mids = values[1::2].tolist()
+        if since is not None:
+            start = next((i for i, ts in enumerate(ts_values) if ts >= since), len(ts_values))
+            ts_values, mids = ts_values[start:], mids[start:]
+        return ts_values, mids
+
+    def append(self, ts: float, mid: float) -> None:
+        with self._lock:
+            self._buffer.append(float(ts))
+            self._buffer.append(float(mid))
+            if self._clock() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    def __enter__(self) -> "TickRing":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    def _read_locked(self) -> array:
+        values = array("d")
+        try:
+            with open(self.path, "rb") as fh:
+                data = fh.read()
+        except OSError:
+            return values
+        usable = len(data) - len(data) % _RECORD_BYTES  # drop a torn trailing record
+        values.frombytes(data[:usable])
+        self._records = len(values) // 2
+        return values
+
+    def _flush_locked(self) -> None:
+        self._last_flush = self._clock()
+        if not self._buffer:
+            return
+        if self._fh is None:
+            self._open_locked()
+        self._fh.write(self._buffer.tobytes())
+        self._fh.flush()
+        self._records += len(self._buffer) // 2
+        self._buffer = array("d")
+        if self._records > 2 * self.capacity:
+            self._compact_locked()
+
+    def _open_locked(self) -> None:
+        self._fh = open(self.path, "ab")
+        size = self._fh.tell()
+        if size % _RECORD_BYTES:
+            # A crash mid-write left a partial record; cut it so appends stay aligned.
+            self._fh.truncate(size - size % _RECORD_BYTES)
+            self._fh.seek(0, os.SEEK_END)
+        self._records = self._fh.tell() // _RECORD_BYTES
+
+    def _compact_locked(self) -> None:
+        values = self._read_locked()
+        keep = values[-2 * self.capacity:]
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as fh:
+            fh.write(keep.tobytes())
+        if self._fh is not None:
+            self._fh.close()
+        os.replace(tmp_path, self.path)
+        self._fh = open(self.path, "ab")
+        self._records = len(keep) // 2
+
+
+__all__ = ["DEFAULT_HOST", "TickRing", "fetch_prices_history", "prices_history_host"]
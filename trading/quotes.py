@@ -0,0 +1,208 @@
+"""Normalize market-channel events into flat per-asset quotes.
+
+``ws_watch_by_ids`` hands over raw market-channel dicts: ``price_change``
+batches, full ``book`` snapshots and ``last_trade_price`` prints. Feed
+processes that republish market data (shared memory, socket fan-out) only
+need the top of book per asset. :class:`QuoteNormalizer` reduces every event
+to :class:`Quote` tuples and keeps the latest one per asset. That cache is
+what a late subscriber gets as its snapshot. A side the feed has not quoted
+yet stays ``None``; it is never reported as a 0.0 price.
+
+:func:`price_change_event` goes the other way. It rebuilds the
+``{"event_type": "price_change", ...}`` dict that the runner's and
+``watch_prices``' ``on_event`` callbacks already parse, so a republished
+feed can stand in for the websocket without touching their parsers. Unknown
+prices are left out of that dict. On the binary wire they travel as NaN with a
+``FLAG_NO_*`` bit (:func:`pack_prices` / :func:`unpack_price`).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+_CLOSED_STATUSES = {"closed", "settled", "resolved", "expired"}
+_CLOSED_FLAGS = ("is_closed", "market_closed", "closed", "isMarketClosed")
+_PRICE_FIELDS = ("last_trade_price", "last_price", "mark_price", "price")
+
+# Wire flag bits for prices a quote does not have; the float slot holds NaN.
+FLAG_NO_BID = 0x2
+FLAG_NO_ASK = 0x4
+FLAG_NO_PRICE = 0x8
+_NAN = float("nan")
+
+
+class Quote(NamedTuple):
+    asset_id: str
+    best_bid: Optional[float]
+    best_ask: Optional[float]
+    price: Optional[float]
+    ts: float
+    closed: bool = False
+
+    @property
+    def mid(self) -> Optional[float]:
+        if self.best_bid is None or self.best_ask is None:
+            return None
+        return (self.best_bid + self.best_ask) / 2.0
+
+
+def _to_float(val: Any) -> Optional[float]:
+    if val is None:
+        return None
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return None
+
+
+def _event_ts(ev: Dict[str, Any]) -> float:
+    ts = _to_float(ev.get("timestamp") or ev.get("ts") or ev.get("time"))
+    if ts is None:
+        return time.time()
+    return ts / 1000.0 if ts > 1e12 else ts
+
+
+def _is_closed(payload: Dict[str, Any]) -> bool:
+    for key in ("status", "market_status", "marketStatus"):
+        val = payload.get(key)
+        if isinstance(val, str) and val.lower() in _CLOSED_STATUSES:
+            return True
+    for key in _CLOSED_FLAGS:
+        val = payload.get(key)
+        if val is True or (isinstance(val, str) and val.strip().lower() in {"true", "1", "yes"}):
+            return True
+    return False
+
+
+def _best_level(levels: Any, *, highest: bool) -> Optional[float]:
+    best: Optional[float] = None
+    for level in levels or ():
+        if isinstance(level, dict):
+            price = _to_float(level.get("price"))
+        elif isinstance(level, (list, tuple)) and level:
+            price = _to_float(level[0])
+        else:
+            price = None
+        if price is None:
+            continue
+        if best is None or (price > best if highest else price < best):
+            best = price
+    return best
+
+
+class QuoteNormalizer:
+    """Turns raw market-channel events into :class:`Quote` updates."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._latest: Dict[str, Quote] = {}
+
+    def update(self, ev: Dict[str, Any]) -> List[Quote]:
+        """Quotes changed by ``ev`` (empty for events without prices)."""
+
+        if not isinstance(ev, dict):
+            return []
+        ts = _event_ts(ev)
+        closed = _is_closed(ev)
+        kind = ev.get("event_type")
+        out: List[Quote] = []
+        with self._lock:
+            if kind == "price_change" or "price_changes" in ev:
+                for pc in ev.get("price_changes") or ():
+                    if isinstance(pc, dict) and pc.get("asset_id") is not None:
+                        out.append(self._merge(pc, ts, closed or _is_closed(pc)))
+            elif kind == "book" and ev.get("asset_id") is not None:
+                levels = {
+                    "asset_id": ev.get("asset_id"),
+                    "best_bid": _best_level(ev.get("bids") or ev.get("buys"), highest=True),
+                    "best_ask": _best_level(ev.get("asks") or ev.get("sells"), highest=False),
+                }
+                out.append(self._merge(levels, ts, closed))
+            elif kind == "last_trade_price" and ev.get("asset_id") is not None:
+                out.append(self._merge({"asset_id": ev.get("asset_id"), "price": ev.get("price")}, ts, closed))
+        return out
+
+    def _merge(self, fields: Dict[str, Any], ts: float, closed: bool) -> Quote:
+        asset_id = str(fields["asset_id"])
+        prev = self._latest.get(asset_id)
+        bid = _to_float(fields.get("best_bid"))
+        ask = _to_float(fields.get("best_ask"))
+        if bid is None and prev is not None:
+            bid = prev.best_bid
+        if ask is None and prev is not None:
+            ask = prev.best_ask
+        price: Optional[float] = None
+        for key in _PRICE_FIELDS:
+            price = _to_float(fields.get(key))
+            if price is not None:
+                break
+        if price is None:
+            if prev is not None and prev.price is not None:
+                price = prev.price
+            elif bid is not None and ask is not None:
+                price = (bid + ask) / 2.0
+            else:
+                price = bid if bid is not None else ask
+        quote = Quote(asset_id, bid, ask, price, ts, closed)
+        self._latest[asset_id] = quote
+        return quote
+
+    def latest(self, asset_id: str) -> Optional[Quote]:
+        with self._lock:
+            return self._latest.get(str(asset_id))
+
+    def snapshot(self, asset_ids: Optional[Iterable[str]] = None) -> List[Quote]:
+        with self._lock:
+            if asset_ids is None:
+                return list(self._latest.values())
+            return [q for q in (self._latest.get(str(a)) for a in asset_ids) if q is not None]
+
+
+def price_change_event(quotes: Iterable[Quote]) -> Dict[str, Any]:
+    """Rebuild a market-channel ``price_change`` dict from quotes."""
+
+    quotes = list(quotes)
+    changes = []
+    for q in quotes:
+        pc: Dict[str, Any] = {"asset_id": q.asset_id}
+        for key, value in (("best_bid", q.best_bid), ("best_ask", q.best_ask), ("price", q.price)):
+            if value is not None:
+                pc[key] = value
+        if q.closed:
+            pc["market_closed"] = True
+        changes.append(pc)
+    ts = max((q.ts for q in quotes), default=time.time())
+    return {"event_type": "price_change", "price_changes": changes, "timestamp": ts}
+
+
+def pack_prices(quote: Quote) -> Tuple[float, float, float, int]:
+    """``(bid, ask, price, flags)`` for a binary record; unknown prices become NaN."""
+
+    flags = 0
+    values = []
+    for value, bit in ((quote.best_bid, FLAG_NO_BID), (quote.best_ask, FLAG_NO_ASK), (quote.price, FLAG_NO_PRICE)):
+        if value is None:
+            flags |= bit
+            value = _NAN
+        values.append(value)
+    return values[0], values[1], values[2], flags
+
+
+def unpack_price(value: float, flags: int, bit: int) -> Optional[float]:
+    """Inverse of :func:`pack_prices` for one slot."""
+
+    return None if flags & bit else value
+
+
+__all__ = [
+    "FLAG_NO_ASK",
+    "FLAG_NO_BID",
+    "FLAG_NO_PRICE",
+    "Quote",
+    "QuoteNormalizer",
+    "pack_prices",
+    "price_change_event",
+    "unpack_price",
+]
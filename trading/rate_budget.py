@@ -0,0 +1,97 @@
+"""Per-host token-bucket request budget.
+
+A :class:`HostRateBudget` keeps one :class:`TokenBucket` per host, so
+independent hosts do not share a gate. Waiters can pass a
+:class:`threading.Event`; once it is set they stop waiting without consuming
+a token.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at ``rate`` tokens/second."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = max(float(capacity), 1.0)
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def try_acquire(self) -> Tuple[bool, float]:
+        """Take a token if available; otherwise return the seconds to wait."""
+
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True, 0.0
+            return False, (1.0 - self._tokens) / self.rate
+
+    def acquire(self, cancel: Optional[threading.Event] = None) -> Optional[float]:
+        """Block until a token is taken; returns seconds waited or ``None`` if cancelled."""
+
+        started = time.monotonic()
+        while True:
+            if cancel is not None and cancel.is_set():
+                return None
+            ok, wait = self.try_acquire()
+            if ok:
+                return time.monotonic() - started
+            if cancel is not None:
+                if cancel.wait(wait):
+                    return None
+            else:
+                time.sleep(wait)
+
+
+def host_of(url_or_host: str) -> str:
+    if "://" in url_or_host:
+        return (urlsplit(url_or_host).hostname or "").lower()
+    return url_or_host.lower()
+
+
+class HostRateBudget:
+    """Lazily creates one :class:`TokenBucket` per host."""
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        burst: float = 1.0,
+        overrides: Optional[Mapping[str, Tuple[float, float]]] = None,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._overrides = {host_of(k): v for k, v in (overrides or {}).items()}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url_or_host: str) -> TokenBucket:
+        host = host_of(url_or_host)
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate, burst = self._overrides.get(host, (self.rate, self.burst))
+                bucket = self._buckets[host] = TokenBucket(rate, burst)
+            return bucket
+
+    def acquire(
+        self, url_or_host: str, cancel: Optional[threading.Event] = None
+    ) -> Optional[float]:
+        return self.bucket(url_or_host).acquire(cancel)
+
+
+__all__ = ["HostRateBudget", "TokenBucket", "host_of"]
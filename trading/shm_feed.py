@@ -0,0 +1,541 @@
+"""Shared-memory quote ring between one feed handler and many worker processes.
+
+Segment layout (little endian)::
+
+    header   64 B    magic, capacity, max_assets, asset_count, closed, write_seq
+    assets   max_assets x 96 B      asset id (utf-8, NUL padded), by index
+    latest   max_assets x RECORD    last record per asset
+    ring     capacity x RECORD      global ring, slot = seq & (capacity - 1)
+
+    RECORD (64 B) = seq u64, asset_seq u64, asset_index u32, flags u32,
+                    bid, ask, last, ts, written_at (f64)
+
+``flags`` carries ``FLAG_CLOSED`` and the ``FLAG_NO_*`` bits from
+:mod:`trading.quotes`. A price whose bit is set is NaN in the record and
+``None`` in :class:`QuoteRecord`.
+
+Readers check a slot's ``seq`` before and after unpacking (seqlock style) and
+resync from the ``latest`` table when the single writer laps them.
+"""
+
+from __future__ import annotations
+
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from trading.metrics import FEED_RECORDS_LOST
+from trading.quotes import (
+    FLAG_NO_ASK,
+    FLAG_NO_BID,
+    FLAG_NO_PRICE,
+    Quote,
+    QuoteNormalizer,
+    pack_prices,
+    price_change_event,
+    unpack_price,
+)
+
+MAGIC = b"PQF1"
+DEFAULT_CAPACITY = 1 << 16
+DEFAULT_MAX_ASSETS = 1024
+ASSET_ID_SIZE = 96
+FLAG_CLOSED = 0x1
+
+_HEADER = struct.Struct("<4sIIII")
+_HEADER_SIZE = 64
+_ASSET_COUNT_OFF = 12
+_CLOSED_OFF = 16
+_WRITE_SEQ_OFF = 24
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+RECORD = struct.Struct("<QQIIddddd")
+RECORD_SIZE = RECORD.size
+
+
+class QuoteRecord(NamedTuple):
+    seq: int
+    asset_id: str
+    asset_seq: int
+    best_bid: Optional[float]
+    best_ask: Optional[float]
+    price: Optional[float]
+    ts: float
+    written_at: float
+    flags: int
+
+    @property
+    def closed(self) -> bool:
+        return bool(self.flags & FLAG_CLOSED)
+
+    def to_quote(self) -> Quote:
+        return Quote(self.asset_id, self.best_bid, self.best_ask, self.price, self.ts, self.closed)
+
+
+def segment_size(capacity: int, max_assets: int) -> int:
+    return _HEADER_SIZE + max_assets * (ASSET_ID_SIZE + RECORD_SIZE) + capacity * RECORD_SIZE
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # Before Python 3.13 every attach registers with the resource tracker,
+    # which unlinks the segment when the attaching process exits. Only the
+    # creator should unlink.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # type: ignore[call-arg]
+    except TypeError:
+        pass
+    from multiprocessing import resource_tracker
+
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class _Segment:
+    """Offsets shared by writer and reader."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool) -> None:
+        magic, capacity, max_assets, _count, _closed = _HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"shared memory {shm.name!r} is not a quote feed")
+        self.shm = shm
+        self.owner = owner
+        self.buf = shm.buf
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.max_assets = max_assets
+        self.assets_off = _HEADER_SIZE
+        self.latest_off = self.assets_off + max_assets * ASSET_ID_SIZE
+        self.ring_off = self.latest_off + max_assets * RECORD_SIZE
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write_seq(self) -> int:
+        return _U64.unpack_from(self.buf, _WRITE_SEQ_OFF)[0]
+
+    def asset_count(self) -> int:
+        return _U32.unpack_from(self.buf, _ASSET_COUNT_OFF)[0]
+
+    def closed(self) -> bool:
+        return bool(_U32.unpack_from(self.buf, _CLOSED_OFF)[0])
+
+    def asset_id(self, index: int) -> str:
+        off = self.assets_off + index * ASSET_ID_SIZE
+        raw = bytes(self.buf[off : off + ASSET_ID_SIZE])
+        return raw.split(b"\0", 1)[0].decode("utf-8")
+
+    def close(self) -> None:
+        self.buf = None  # type: ignore[assignment]
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class ShmQuoteWriter:
+    """Single producer; the feed handler publishes every normalized quote."""
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        *,
+        capacity: int = DEFAULT_CAPACITY,
+        max_assets: int = DEFAULT_MAX_ASSETS,
+        create: bool = True,
+    ) -> None:
+        if create:
+            if capacity < 2 or capacity & (capacity - 1):
+                raise ValueError("capacity must be a power of two")
+            shm = shared_memory.SharedMemory(name=name, create=True, size=segment_size(capacity, max_assets))
+            _HEADER.pack_into(shm.buf, 0, MAGIC, capacity, max_assets, 0, 0)
+        else:
+            if name is None:
+                raise ValueError("name is required to attach to an existing feed")
+            shm = _attach(name)
+        self._seg = _Segment(shm, owner=create)
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._asset_seqs: List[int] = [0] * self._seg.max_assets
+        # Re-attaching (e.g. a restarted feed handler) continues the sequences.
+        self._seq = self._seg.write_seq()
+        for index in range(self._seg.asset_count()):
+            self._index[self._seg.asset_id(index)] = index
+            off = self._seg.latest_off + index * RECORD_SIZE
+            self._asset_seqs[index] = RECORD.unpack_from(self._seg.buf, off)[1]
+
+    @property
+    def name(self) -> str:
+        return self._seg.name
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def asset_index(self, asset_id: str) -> int:
+        index = self._index.get(asset_id)
+        if index is not None:
+            return index
+        count = len(self._index)
+        if count >= self._seg.max_assets:
+            raise ValueError(f"quote feed is full ({count} assets)")
+        encoded = str(asset_id).encode("utf-8")
+        if len(encoded) >= ASSET_ID_SIZE:
+            raise ValueError(f"asset id too long: {asset_id!r}")
+        off = self._seg.assets_off + count * ASSET_ID_SIZE
+        self._seg.buf[off : off + ASSET_ID_SIZE] = encoded.ljust(ASSET_ID_SIZE, b"\0")
+        _U32.pack_into(self._seg.buf, _ASSET_COUNT_OFF, count + 1)
+        self._index[asset_id] = count
+        return count
+
+    def publish(
+        self,
+        asset_id: str,
+        best_bid: float,
+        best_ask: float,
+        price: float,
+        ts: float,
+        *,
+        flags: int = 0,
+    ) -> int:
+        """Append one quote and update the asset's latest slot; returns its seq."""
+
+        with self._lock:
+            index = self._index.get(asset_id)
+            if index is None:
+                index = self.asset_index(asset_id)
+            seq = self._seq + 1
+            asset_seq = self._asset_seqs[index] + 1
+            self._asset_seqs[index] = asset_seq
+            written_at = time.monotonic()
+            buf = self._seg.buf
+            for off in (
+                self._seg.ring_off + (seq & self._seg.mask) * RECORD_SIZE,
+                self._seg.latest_off + index * RECORD_SIZE,
+            ):
+                RECORD.pack_into(
+                    buf, off, 0, asset_seq, index, flags, best_bid, best_ask, price, ts, written_at
+                )
+                _U64.pack_into(buf, off, seq)
+            _U64.pack_into(buf, _WRITE_SEQ_OFF, seq)
+            self._seq = seq
+            return seq
+
+    def publish_quote(self, quote: Quote) -> int:
+        bid, ask, price, flags = pack_prices(quote)
+        return self.publish(
+            quote.asset_id,
+            bid,
+            ask,
+            price,
+            quote.ts,
+            flags=flags | (FLAG_CLOSED if quote.closed else 0),
+        )
+
+    def close(self) -> None:
+        """Mark the feed finished; the creating writer also unlinks it."""
+
+        if self._seg.buf is None:
+            return
+        _U32.pack_into(self._seg.buf, _CLOSED_OFF, 1)
+        self._seg.close()
+
+
+class ShmQuoteReader:
+    """Maps a feed segment and reads records in place."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        asset_ids: Optional[Iterable[str]] = None,
+        from_start: bool = False,
+    ) -> None:
+        self._seg = _Segment(_attach(name), owner=False)
+        self._wanted: Optional[Set[str]] = None if asset_ids is None else {str(a) for a in asset_ids}
+        self._names: List[str] = []
+        self._asset_seqs: Dict[int, int] = {}
+        head = self._seg.write_seq()
+        self._next = max(head - self._seg.mask, 1) if from_start else head + 1
+        self.read = 0
+        self.lost = 0
+
+    @property
+    def name(self) -> str:
+        return self._seg.name
+
+    @property
+    def closed(self) -> bool:
+        return self._seg.closed()
+
+    def lag(self) -> int:
+        return self._seg.write_seq() + 1 - self._next
+
+    def _asset_id(self, index: int) -> str:
+        names = self._names
+        if index >= len(names):
+            count = self._seg.asset_count()
+            names.extend(self._seg.asset_id(i) for i in range(len(names), count))
+        return names[index]
+
+    def _record(self, values: Tuple[Any, ...]) -> QuoteRecord:
+        seq, asset_seq, index, flags, bid, ask, last, ts, written_at = values
+        return QuoteRecord(
+            seq,
+            self._asset_id(index),
+            asset_seq,
+            unpack_price(bid, flags, FLAG_NO_BID),
+            unpack_price(ask, flags, FLAG_NO_ASK),
+            unpack_price(last, flags, FLAG_NO_PRICE),
+            ts,
+            written_at,
+            flags,
+        )
+
+    def _read_latest(self, index: int) -> Optional[Tuple[Any, ...]]:
+        off = self._seg.latest_off + index * RECORD_SIZE
+        buf = self._seg.buf
+        for _ in range(100):
+            values = RECORD.unpack_from(buf, off)
+            if values[0] and _U64.unpack_from(buf, off)[0] == values[0]:
+                return values
+        return None
+
+    def asset_ids(self) -> List[str]:
+        """Asset ids registered in the segment, in index order."""
+
+        return [self._asset_id(index) for index in range(self._seg.asset_count())]
+
+    def latest(self, asset_id: str) -> Optional[QuoteRecord]:
+        asset_id = str(asset_id)
+        for index in range(self._seg.asset_count()):
+            if self._asset_id(index) == asset_id:
+                values = self._read_latest(index)
+                return None if values is None else self._record(values)
+        return None
+
+    def snapshot(self) -> List[QuoteRecord]:
+        """Latest record of every wanted asset (what a new reader starts from)."""
+
+        out = []
+        for index in range(self._seg.asset_count()):
+            if self._wanted is not None and self._asset_id(index) not in self._wanted:
+                continue
+            values = self._read_latest(index)
+            if values is not None:
+                self._asset_seqs[index] = values[1]
+                out.append(self._record(values))
+        return out
+
+    def _resync(self, out: List[QuoteRecord]) -> None:
+        # Lapped by the writer: emit the newest quote of every asset that moved.
+        for index in range(self._seg.asset_count()):
+            if self._wanted is not None and self._asset_id(index) not in self._wanted:
+                continue
+            values = self._read_latest(index)
+            if values is not None and values[1] > self._asset_seqs.get(index, 0):
+                self._asset_seqs[index] = values[1]
+                out.append(self._record(values))
+
+    def poll(self, max_records: Optional[int] = None) -> List[QuoteRecord]:
+        """Records published since the previous poll (non-blocking)."""
+
+        seg = self._seg
+        buf = seg.buf
+        head = seg.write_seq()
+        out: List[QuoteRecord] = []
+        if head < self._next:
+            return out
+        lapped = False
+        lost_before = self.lost
+        if head - self._next > seg.mask:
+            skipped = head - seg.mask - self._next
+            self.lost += skipped
+            self._next = head - seg.mask
+            lapped = True
+        if max_records is not None:
+            head = min(head, self._next + max_records - 1)
+        wanted = self._wanted
+        seqs = self._asset_seqs
+        seq = self._next
+        while seq <= head:
+            off = seg.ring_off + (seq & seg.mask) * RECORD_SIZE
+            values = RECORD.unpack_from(buf, off)
+            if values[0] != seq or _U64.unpack_from(buf, off)[0] != seq:
+                # Overwritten while we were reading it: skip to what is still intact.
+                head = seg.write_seq()
+                new_next = max(seq + 1, head - seg.mask)
+                self.lost += new_next - seq
+                seq = new_next
+                lapped = True
+                continue
+            seq += 1
+            index = values[2]
+            if wanted is not None and self._asset_id(index) not in wanted:
+                continue
+            if values[1] <= seqs.get(index, 0):
+                continue
+            seqs[index] = values[1]
+            out.append(self._record(values))
+        self._next = seq
+        if lapped:
+            FEED_RECORDS_LOST.labels("shm").inc(self.lost - lost_before)
+            self._resync(out)
+        self.read += len(out)
+        return out
+
+    def close(self) -> None:
+        if self._seg.buf is not None:
+            self._seg.close()
+
+
+def shm_watch_by_ids(
+    asset_ids: List[str],
+    label: str = "",
+    on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+    verbose: bool = False,
+    stop_event: Optional[threading.Event] = None,
+    *,
+    name: str,
+    idle_sleep: float = 0.0005,
+) -> None:
+    """Drop-in for ``ws_watch_by_ids`` backed by a shared-memory feed.
+
+    Each poll batch is handed to ``on_event`` as one ``price_change`` event,
+    starting with the current snapshot of ``asset_ids``. Raises
+    ``ValueError`` if an id is not in the feed's asset table: the feed
+    handler only publishes the assets it was started with, so the watcher
+    would otherwise wait forever.
+    """
+
+    ids = [str(x) for x in asset_ids if x]
+    if not ids:
+        raise ValueError("asset_ids 为空")
+    stop_event = stop_event or threading.Event()
+    reader = ShmQuoteReader(name, asset_ids=ids)
+    known = set(reader.asset_ids())
+    missing = [x for x in ids if x not in known]
+    if missing:
+        reader.close()
+        raise ValueError(f"共享内存行情 {name} 未包含资产：{','.join(missing)}")
+    if verbose:
+        print(f"[INIT] 共享内存行情 {name}: {label or ','.join(ids)}")
+    try:
+        batch = reader.snapshot()
+        while not stop_event.is_set():
+            if batch and on_event is not None:
+                on_event(price_change_event(r.to_quote() for r in batch))
+            batch = reader.poll()
+            if not batch:
+                if reader.closed:
+                    if verbose:
+                        print(f"[WS][CLOSED] 共享内存行情 {name} 已关闭")
+                    return
+                time.sleep(idle_sleep)
+    finally:
+        reader.close()
+
+
+def run_feed_handler(
+    name: str,
+    asset_ids: Sequence[str],
+    *,
+    stop_event: Optional[threading.Event] = None,
+    watch: Optional[Callable[..., None]] = None,
+    verbose: bool = False,
+) -> None:
+    """Own the websocket for ``asset_ids`` and publish into segment ``name``."""
+
+    if watch is None:
+        from Volatility_arbitrage_main_ws import ws_watch_by_ids as watch
+
+    writer = ShmQuoteWriter(name, create=False)
+    normalizer = QuoteNormalizer()
+
+    def _on_event(ev: Dict[str, Any]) -> None:
+        for quote in normalizer.update(ev):
+            writer.publish_quote(quote)
+
+    try:
+        watch(list(asset_ids), label=f"shm:{name}", on_event=_on_event, verbose=verbose, stop_event=stop_event)
+    finally:
+        writer.close()
+
+
+def start_feed_handler(
+    asset_ids: Sequence[str],
+    *,
+    name: Optional[str] = None,
+    capacity: int = DEFAULT_CAPACITY,
+    max_assets: int = DEFAULT_MAX_ASSETS,
+    verbose: bool = False,
+) -> Tuple[ShmQuoteWriter, Any]:
+    """Create the segment here and run the websocket side in a child process.
+
+    Returns ``(owner, process)``; ``owner.close()`` unlinks the segment once
+    the process has been stopped.
+    """
+
+    import multiprocessing
+
+    owner = ShmQuoteWriter(name, capacity=capacity, max_assets=max_assets)
+    for asset_id in asset_ids:
+        owner.asset_index(str(asset_id))
+    process = multiprocessing.Process(
+        target=run_feed_handler,
+        args=(owner.name, [str(a) for a in asset_ids]),
+        kwargs={"verbose": verbose},
+        name=f"feed-handler-{owner.name}",
+        daemon=True,
+    )
+    process.start()
+    return owner, process
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a market-channel feed handler into shared memory.")
+    parser.add_argument("asset_ids", nargs="+", help="token ids to subscribe")
+    parser.add_argument("--name", default="poly-quotes", help="shared memory segment name")
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY)
+    parser.add_argument("--max-assets", type=int, default=DEFAULT_MAX_ASSETS)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    owner = ShmQuoteWriter(args.name, capacity=args.capacity, max_assets=args.max_assets)
+    for asset_id in args.asset_ids:
+        owner.asset_index(asset_id)
+    print(f"feed {owner.name}: {len(args.asset_ids)} assets, ring {args.capacity} records")
+    try:
+        run_feed_handler(owner.name, args.asset_ids, verbose=args.verbose)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        owner.close()
+    return 0
+
+
+__all__ = [
+    "FLAG_CLOSED",
+    "QuoteRecord",
+    "RECORD_SIZE",
+    "ShmQuoteReader",
+    "ShmQuoteWriter",
+    "run_feed_handler",
+    "segment_size",
+    "shm_watch_by_ids",
+    "start_feed_handler",
+]
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
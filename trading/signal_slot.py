@@ -0,0 +1,140 @@
+"""Coalescing, expiring signal mailbox between the strategy and the runner.
+
+At most one signal is pending per token: the newest wins, entries expire
+after ``max_age`` seconds, and ``not_before`` defers an entry without
+resetting its age. Dropped signals are reported to ``on_drop`` and
+``polymarket_signals_dropped{reason}``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from trading.metrics import SIGNALS_DROPPED
+
+
+@dataclass
+class SignalEntry:
+    token_id: str
+    signal: Any
+    created_at: float
+    not_before: float = 0.0
+
+    def age(self, now: float) -> float:
+        return now - self.created_at
+
+
+DropCallback = Callable[[Any, str], None]
+
+
+class SignalSlot:
+    """One pending signal per token; newest wins, stale entries expire."""
+
+    def __init__(
+        self,
+        max_age: float = 3.0,
+        *,
+        on_drop: Optional[DropCallback] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_age = float(max_age)
+        self.on_drop = on_drop
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._entries: Dict[str, SignalEntry] = {}
+        self.superseded = 0
+        self.expired = 0
+
+    def put(
+        self,
+        token_id: str,
+        signal: Any,
+        *,
+        created_at: Optional[float] = None,
+        not_before: float = 0.0,
+    ) -> SignalEntry:
+        """Store ``signal`` for ``token_id`` unless a newer one is pending."""
+
+        entry = SignalEntry(
+            str(token_id),
+            signal,
+            self._clock() if created_at is None else float(created_at),
+            float(not_before),
+        )
+        dropped: Optional[SignalEntry] = None
+        with self._lock:
+            current = self._entries.get(entry.token_id)
+            if current is not None and current.created_at > entry.created_at:
+                dropped, entry = entry, current
+            else:
+                dropped = current
+                self._entries[entry.token_id] = entry
+                self._changed.notify_all()
+            if dropped is not None:
+                self.superseded += 1
+        if dropped is not None:
+            self._dropped(dropped, "superseded")
+        return entry
+
+    def take(self, timeout: Optional[float] = None) -> Optional[SignalEntry]:
+        """Pop the oldest ready, unexpired entry, waiting up to ``timeout``."""
+
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            expired = []
+            with self._lock:
+                now = self._clock()
+                ready: Optional[SignalEntry] = None
+                next_ready: Optional[float] = None
+                for token_id, entry in list(self._entries.items()):
+                    if entry.age(now) > self.max_age:
+                        del self._entries[token_id]
+                        expired.append(entry)
+                    elif entry.not_before > now:
+                        if next_ready is None or entry.not_before < next_ready:
+                            next_ready = entry.not_before
+                    elif ready is None or entry.created_at < ready.created_at:
+                        ready = entry
+                if ready is not None:
+                    del self._entries[ready.token_id]
+                self.expired += len(expired)
+                if ready is None and not expired:
+                    wait = None if deadline is None else deadline - now
+                    if next_ready is not None:
+                        wait = next_ready - now if wait is None else min(wait, next_ready - now)
+                    if wait is not None and wait <= 0:
+                        return None
+                    self._changed.wait(wait)
+                    continue
+            for entry in expired:
+                self._dropped(entry, "expired")
+            if ready is not None:
+                return ready
+
+    def clear(self, token_id: Optional[str] = None) -> int:
+        with self._lock:
+            if token_id is None:
+                count = len(self._entries)
+                self._entries.clear()
+            else:
+                count = 1 if self._entries.pop(str(token_id), None) is not None else 0
+        return count
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {"superseded": self.superseded, "expired": self.expired}
+
+    def _dropped(self, entry: SignalEntry, reason: str) -> None:
+        SIGNALS_DROPPED.labels(reason).inc()
+        if self.on_drop is not None:
+            self.on_drop(entry.signal, reason)
+
+
+__all__ = ["SignalEntry", "SignalSlot"]
@@ -0,0 +1,501 @@
+"""Order status / order id normalisation with per-shape memoisation.
+
+``ClobPolymarketAPI`` accepts whatever the client library returns for an order
+lookup and has to find the status, filled size and average price somewhere
+inside it. The generic search walks the payload recursively and probes long
+key tuples on every poll, even though a given client returns the same shape
+every time.
+
+:class:`StatusNormalizer` does the full walk once per response shape and
+remembers the route to the status object (the chain of keys/indices) together
+with the subset of candidate keys that the object actually carries. Later
+payloads whose nodes along that route have the same key sets take the direct
+route and only probe the keys known to be present. Any mismatch falls back to
+the full walk and re-learns the shape, so the result is always the same as the
+generic search.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import asdict, dataclass, is_dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple, Union
+
+STATUS_KEYS: Tuple[str, ...] = ("status", "state", "orderStatus")
+
+LOCATE_FILLED_KEYS: Tuple[str, ...] = (
+    "filledAmount",
+    "filled",
+    "filledQuantity",
+    "filledSize",
+    "filledAmountQuote",
+    "filled_amount",
+    "totalFilled",
+)
+
+NESTED_KEYS: Tuple[str, ...] = ("data", "order", "result", "response", "value", "payload")
+
+PRIMARY_FILLED_KEYS: Tuple[str, ...] = (
+    "filledAmount",
+    "filled",
+    "filledQuantity",
+    "filledSize",
+    "filledAmountQuote",
+    "filled_amount",
+    "totalFilled",
+    "matchedShares",
+    "shares",
+    "baseAmount",
+)
+
+PRICE_KEYS: Tuple[str, ...] = (
+    "avgPrice",
+    "averagePrice",
+    "avg_price",
+    "filledAvgPrice",
+    "filledAveragePrice",
+    "executionPrice",
+    "averageExecutionPrice",
+    "fillPrice",
+    "matchedPrice",
+    "price",
+    "lastPrice",
+    "lastTradePrice",
+    "markPrice",
+)
+
+FILL_SIZE_KEYS: Tuple[str, ...] = (
+    "size",
+    "quantity",
+    "qty",
+    "amount",
+    "filledAmount",
+    "filled",
+    "filledQuantity",
+    "filledSize",
+    "matchedShares",
+    "shares",
+    "baseAmount",
+    "takingAmount",
+    "takerAmount",
+    "taker_amount",
+)
+
+FALLBACK_FILLED_KEYS: Tuple[str, ...] = (
+    "takingAmount",
+    "takerAmount",
+    "taker_amount",
+    "size",
+    "quantity",
+    "qty",
+    "matchedShares",
+    "shares",
+    "baseAmount",
+)
+
+ORDER_ID_KEYS: Tuple[str, ...] = (
+    "order_id",
+    "orderId",
+    "orderID",
+    "id",
+    "orderHash",
+    "order_hash",
+    "hash",
+)
+
+_FINAL_STATUSES = frozenset({"FILLED", "MATCHED", "COMPLETED", "EXECUTED"})
+_CONTAINERS = (dict, list, tuple, set)
+
+# A route step is either a dict key (with the node's key set) or index 0 of a list/tuple.
+Step = Tuple[str, Any, Optional[FrozenSet[Any]]]
+
+
+@dataclass(frozen=True)
+class _PayloadKeys:
+    """Candidate keys filtered down to those present in a learned payload."""
+
+    keyset: FrozenSet[Any]
+    filled: Tuple[str, ...]
+    price: Tuple[str, ...]
+    fallback: Tuple[str, ...]
+    has_locate_filled: bool
+
+    @classmethod
+    def full(cls) -> "_PayloadKeys":
+        return cls(
+            keyset=frozenset(),
+            filled=PRIMARY_FILLED_KEYS,
+            price=PRICE_KEYS,
+            fallback=FALLBACK_FILLED_KEYS,
+            has_locate_filled=False,
+        )
+
+    @classmethod
+    def learn(cls, payload: Dict[Any, Any]) -> "_PayloadKeys":
+        keyset = frozenset(payload.keys())
+        return cls(
+            keyset=keyset,
+            filled=tuple(k for k in PRIMARY_FILLED_KEYS if k in keyset),
+            price=tuple(k for k in PRICE_KEYS if k in keyset),
+            fallback=tuple(k for k in FALLBACK_FILLED_KEYS if k in keyset),
+            has_locate_filled=any(k in keyset for k in LOCATE_FILLED_KEYS),
+        )
+
+
+@dataclass(frozen=True)
+class _StatusPlan:
+    route: Tuple[Step, ...]
+    keys: _PayloadKeys
+
+
+def _coerce_float(value: object) -> Optional[float]:
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return None
+
+
+def _status_value(obj: Dict[Any, Any]) -> Any:
+    # Same semantics as ``obj.get("status") or obj.get("state") or obj.get("orderStatus")``.
+    value = None
+    for key in STATUS_KEYS:
+        value = obj.get(key)
+        if value:
+            return value
+    return value
+
+
+def _is_status_node(obj: Dict[Any, Any]) -> bool:
+    if _status_value(obj) is not None:
+        return True
+    return any(key in obj for key in LOCATE_FILLED_KEYS) or isinstance(
+        obj.get("fills"), (list, tuple)
+    )
+
+
+def _locate_payload(
+    obj: object, visited: Set[int], route: List[Step]
+) -> Optional[Dict[Any, Any]]:
+    """Depth-first search for the status object, recording the route taken."""
+
+    if obj is None:
+        return None
+    obj_id = id(obj)
+    if obj_id in visited:
+        return None
+    visited.add(obj_id)
+
+    if isinstance(obj, dict):
+        if _is_status_node(obj):
+            return obj
+        keyset = frozenset(obj.keys())
+        for key in NESTED_KEYS:
+            if key in obj:
+                route.append(("key", key, keyset))
+                payload = _locate_payload(obj[key], visited, route)
+                if payload is not None:
+                    return payload
+                route.pop()
+        for key, value in obj.items():
+            route.append(("key", key, keyset))
+            payload = _locate_payload(value, visited, route)
+            if payload is not None:
+                return payload
+            route.pop()
+        return None
+
+    if isinstance(obj, (list, tuple, set)):
+        for index, item in enumerate(obj):
+            route.append(("index", index, None))
+            payload = _locate_payload(item, visited, route)
+            if payload is not None:
+                return payload
+            route.pop()
+    return None
+
+
+def _route_is_unambiguous(raw: object, route: Tuple[Step, ...]) -> bool:
+    """True when the search could not have been diverted by sibling nodes.
+
+    Every dict on the route must have exactly one container value (the one
+    followed) and no status/filled keys, and every sequence step must be
+    index 0 of a list or tuple. Under those conditions equal key sets imply
+    the generic search takes the same route.
+    """
+
+    node = raw
+    for kind, key, keyset in route:
+        if kind == "key":
+            if not isinstance(node, dict) or frozenset(node.keys()) != keyset:
+                return False
+            if any(k in node for k in STATUS_KEYS) or any(k in node for k in LOCATE_FILLED_KEYS):
+                return False
+            if "fills" in node:
+                return False
+            if sum(1 for value in node.values() if isinstance(value, _CONTAINERS)) != 1:
+                return False
+            node = node[key]
+        else:
+            if key != 0 or not isinstance(node, (list, tuple)) or not node:
+                return False
+            node = node[0]
+    return True
+
+
+def _normalize_payload(payload: Dict[Any, Any], keys: _PayloadKeys) -> Dict[str, object]:
+    status_value = _status_value(payload)
+    if status_value is None:
+        raise RuntimeError(f"Order status payload missing status: {payload!r}")
+
+    filled_amount: Optional[float] = None
+    filled_amount_quote: Optional[float] = None
+    for key in keys.filled:
+        candidate = _coerce_float(payload.get(key))
+        if candidate is None:
+            continue
+        if key == "filledAmountQuote" and filled_amount_quote is None:
+            filled_amount_quote = candidate
+            continue
+        filled_amount = candidate
+        break
+
+    fills_payload = payload.get("fills")
+    fills_sequence = fills_payload if isinstance(fills_payload, (list, tuple)) else None
+
+    total_from_fills = 0.0
+    total_notional = 0.0
+    if fills_sequence is not None:
+        for entry in fills_sequence:
+            if not isinstance(entry, dict):
+                continue
+            size_val: Optional[float] = None
+            for key in FILL_SIZE_KEYS:
+                size_val = _coerce_float(entry.get(key))
+                if size_val is not None and size_val > 0:
+                    break
+            if size_val is None or size_val <= 0:
+                continue
+            total_from_fills += size_val
+
+            price_val: Optional[float] = None
+            for key in PRICE_KEYS:
+                price_val = _coerce_float(entry.get(key))
+                if price_val is not None:
+                    break
+            if price_val is not None:
+                total_notional += price_val * size_val
+
+    if filled_amount is None:
+        filled_amount = total_from_fills if total_from_fills > 0 else 0.0
+
+    status_upper = str(status_value).upper()
+
+    average_price: Optional[float] = None
+    for key in keys.price:
+        candidate = _coerce_float(payload.get(key))
+        if candidate is not None:
+            average_price = candidate
+            break
+
+    if average_price is None and total_from_fills > 0 and total_notional > 0:
+        average_price = total_notional / total_from_fills
+
+    if filled_amount <= 1e-12 and average_price is not None:
+        if filled_amount_quote is not None and filled_amount_quote > 0:
+            filled_amount = filled_amount_quote / max(average_price, 1e-12)
+
+    if filled_amount <= 1e-12 and status_upper in _FINAL_STATUSES:
+        for key in keys.fallback:
+            candidate = _coerce_float(payload.get(key))
+            if candidate is not None:
+                filled_amount = candidate
+                break
+
+    result: Dict[str, object] = {
+        "status": str(status_value),
+        "filledAmount": filled_amount,
+    }
+    if average_price is not None:
+        result["avgPrice"] = average_price
+    return result
+
+
+def normalize_status_full(raw: object) -> Dict[str, object]:
+    """Generic (uncached) normalisation: full walk plus full key probing."""
+
+    payload = _locate_payload(raw, set(), [])
+    if payload is None:
+        raise RuntimeError(f"Unable to locate order status payload: {raw!r}")
+    return _normalize_payload(payload, _PayloadKeys.full())
+
+
+def _root_signature(raw: object) -> Optional[Tuple[Any, ...]]:
+    if isinstance(raw, dict):
+        return ("dict", frozenset(raw.keys()))
+    if isinstance(raw, (list, tuple)):
+        return ("seq",)
+    return None
+
+
+def _order_id_walk(response: object) -> Optional[str]:
+    visited: Set[int] = set()
+
+    def walk(obj: object, allow_plain_string: bool = False) -> Optional[str]:
+        if obj is None:
+            return None
+
+        if isinstance(obj, (str, bytes, bytearray)):
+            if not allow_plain_string:
+                return None
+            text = obj.decode() if isinstance(obj, (bytes, bytearray)) else obj
+            text = text.strip()
+            return text or None
+
+        obj_id = id(obj)
+        if obj_id in visited:
+            return None
+        visited.add(obj_id)
+
+        if isinstance(obj, dict):
+            for key in ORDER_ID_KEYS:
+                cand = obj.get(key)
+                if cand not in (None, ""):
+                    return str(cand)
+            for value in obj.values():
+                found = walk(value, allow_plain_string=False)
+                if found:
+                    return found
+            return None
+
+        if isinstance(obj, (list, tuple, set)):
+            for item in obj:
+                found = walk(item, allow_plain_string=False)
+                if found:
+                    return found
+            return None
+
+        for key in ORDER_ID_KEYS:
+            try:
+                cand = getattr(obj, key)
+            except AttributeError:
+                continue
+            if cand not in (None, ""):
+                return str(cand)
+
+        try:
+            if is_dataclass(obj):
+                return walk(asdict(obj), allow_plain_string=False)
+        except Exception:
+            pass
+
+        to_dict = getattr(obj, "_asdict", None)
+        if callable(to_dict):
+            try:
+                return walk(to_dict(), allow_plain_string=False)
+            except Exception:
+                pass
+
+        if hasattr(obj, "__dict__"):
+            return walk(vars(obj), allow_plain_string=False)
+
+        return None
+
+    return walk(response, allow_plain_string=True)
+
+
+class StatusNormalizer:
+    """Normalise order status payloads and order-creation responses.
+
+    ``hits``/``misses`` count direct-route and full-walk normalisations.
+    """
+
+    def __init__(self, *, max_shapes: int = 64) -> None:
+        self._max_shapes = max(int(max_shapes), 1)
+        self._status_plans: Dict[Tuple[Any, ...], _StatusPlan] = {}
+        self._id_keys: Dict[FrozenSet[Any], Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def normalize_status(self, raw: object) -> Dict[str, object]:
+        signature = _root_signature(raw)
+        plan = self._status_plans.get(signature) if signature is not None else None
+        if plan is not None:
+            payload = self._follow(raw, plan)
+            if payload is not None:
+                self.hits += 1
+                return _normalize_payload(payload, plan.keys)
+
+        self.misses += 1
+        route: List[Step] = []
+        payload = _locate_payload(raw, set(), route)
+        if payload is None:
+            raise RuntimeError(f"Unable to locate order status payload: {raw!r}")
+        result = _normalize_payload(payload, _PayloadKeys.full())
+        if signature is not None and _route_is_unambiguous(raw, tuple(route)):
+            self._remember(
+                self._status_plans,
+                signature,
+                _StatusPlan(route=tuple(route), keys=_PayloadKeys.learn(payload)),
+            )
+        return result
+
+    def extract_order_id(self, response: object) -> Optional[str]:
+        if isinstance(response, dict):
+            keyset = frozenset(response.keys())
+            present = self._id_keys.get(keyset)
+            if present is None:
+                present = tuple(k for k in ORDER_ID_KEYS if k in keyset)
+                self._remember(self._id_keys, keyset, present)
+            for key in present:
+                cand = response.get(key)
+                if cand not in (None, ""):
+                    return str(cand)
+        return _order_id_walk(response)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._status_plans.clear()
+            self._id_keys.clear()
+
+    def _remember(self, table: Dict[Any, Any], key: Any, value: Any) -> None:
+        with self._lock:
+            if key not in table and len(table) >= self._max_shapes:
+                table.clear()
+            table[key] = value
+
+    @staticmethod
+    def _follow(raw: object, plan: _StatusPlan) -> Optional[Dict[Any, Any]]:
+        node: Union[object, Dict[Any, Any]] = raw
+        for kind, key, keyset in plan.route:
+            if kind == "key":
+                if not isinstance(node, dict) or node.keys() != keyset:
+                    return None
+                child = node[key]
+                # A sibling that turned into a container could divert the search.
+                for value in node.values():
+                    if value is not child and isinstance(value, _CONTAINERS):
+                        return None
+                node = child
+            else:
+                if not isinstance(node, (list, tuple)) or not node:
+                    return None
+                node = node[0]
+        if not isinstance(node, dict) or node.keys() != plan.keys.keyset:
+            return None
+        if not plan.keys.has_locate_filled and not isinstance(node.get("fills"), (list, tuple)):
+            if _status_value(node) is None:
+                return None
+        return node
+
+
+default_normalizer = StatusNormalizer()
+
+
+__all__ = [
+    "StatusNormalizer",
+    "default_normalizer",
+    "normalize_status_full",
+]
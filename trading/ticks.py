@@ -0,0 +1,174 @@
+"""Integer tick / lot arithmetic for prices and sizes.
+
+A :class:`TickGrid` snaps a value to integer units once; comparisons and
+steps are then exact integer operations. :func:`decimals_of` reads the
+precision from a value's written form.
+"""
+
+from __future__ import annotations
+
+import math
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Optional
+
+ROUND_NEAREST = 0
+ROUND_UP = 1
+ROUND_DOWN = -1
+
+# Float error of ``value * scale`` is a few ulps; anything within this many
+# units of a grid point (relative for large magnitudes) is that grid point.
+_SNAP_UNITS = 1e-9
+_SNAP_RELATIVE = 1e-12
+
+
+class TickGrid:
+    """A decimal grid with step ``10**-decimals``. Values map to integer units."""
+
+    __slots__ = ("decimals", "scale", "step")
+
+    def __init__(self, decimals: int) -> None:
+        decimals = int(decimals)
+        if decimals < 0:
+            raise ValueError("decimals must be >= 0")
+        self.decimals = decimals
+        self.scale = 10 ** decimals
+        self.step = 1.0 / self.scale
+
+    @classmethod
+    def for_tick_size(cls, tick_size: Any) -> "TickGrid":
+        """Grid for a market tick size such as ``0.01`` or ``"0.001"`` (powers of ten only)."""
+
+        tick = _to_float(tick_size)
+        decimals = decimals_of(tick, max_dp=12) if tick is not None else None
+        if decimals is None or tick is None or tick <= 0:
+            raise ValueError(f"invalid tick size: {tick_size!r}")
+        grid = grid_for(decimals)
+        if grid.to_units(tick) != 1:
+            raise ValueError(f"tick size {tick_size!r} is not a power of ten")
+        return grid
+
+    def to_units(self, value: float, rounding: int = ROUND_NEAREST) -> int:
+        """Convert ``value`` to grid units.
+
+        Values within float error of a grid point snap to it. Other values
+        round to the nearest unit, or up/down per ``rounding``.
+        """
+
+        scaled = value * self.scale
+        nearest = round(scaled)
+        if rounding == ROUND_NEAREST or abs(scaled - nearest) <= max(_SNAP_UNITS, abs(scaled) * _SNAP_RELATIVE):
+            return int(nearest)
+        return math.ceil(scaled) if rounding == ROUND_UP else math.floor(scaled)
+
+    def to_value(self, units: int) -> float:
+        return units / self.scale
+
+    def ceil(self, value: float) -> float:
+        return self.to_units(value, ROUND_UP) / self.scale
+
+    def floor(self, value: float) -> float:
+        return self.to_units(value, ROUND_DOWN) / self.scale
+
+    def round(self, value: float) -> float:
+        return self.to_units(value) / self.scale
+
+    def parse(self, text: str, rounding: int = ROUND_NEAREST) -> int:
+        """Exact units from a decimal string such as a WS ``"0.57"``.
+
+        Exponent notation falls back to :meth:`to_units`.
+        """
+
+        raw = text.strip()
+        if not raw or "e" in raw or "E" in raw:
+            return self.to_units(float(raw), rounding)
+        negative = raw.startswith("-")
+        if raw[0] in "+-":
+            raw = raw[1:]
+        whole, _, frac = raw.partition(".")
+        if not (whole or frac) or (whole and not whole.isdigit()) or (frac and not frac.isdigit()):
+            raise ValueError(f"not a decimal number: {text!r}")
+        kept, dropped = frac[: self.decimals], frac[self.decimals :]
+        units = int(whole or "0") * self.scale + int(kept.ljust(self.decimals, "0") or "0")
+        if dropped.strip("0"):
+            if rounding == ROUND_NEAREST:
+                bump = dropped[0] >= "5"
+            else:
+                # Rounding away from zero is "up" for positives and "down" for negatives.
+                bump = (rounding == ROUND_UP) != negative
+            units += 1 if bump else 0
+        return -units if negative else units
+
+    def format(self, units: int) -> str:
+        return f"{units / self.scale:.{self.decimals}f}"
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, TickGrid) and other.decimals == self.decimals
+
+    def __hash__(self) -> int:
+        return hash(self.decimals)
+
+    def __repr__(self) -> str:
+        return f"TickGrid(decimals={self.decimals})"
+
+
+_GRIDS: Dict[int, TickGrid] = {}
+
+
+def grid_for(decimals: int) -> TickGrid:
+    """Shared :class:`TickGrid` for ``decimals`` (grids are immutable, so they are cached)."""
+
+    grid = _GRIDS.get(decimals)
+    if grid is None:
+        grid = _GRIDS[decimals] = TickGrid(decimals)
+    return grid
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def decimals_of(value: Any, *, max_dp: int = 6) -> Optional[int]:
+    """Number of decimal places written in ``value`` (``"0.570"`` -> 3, ``0.57`` -> 2), capped at ``max_dp``.
+
+    Strings keep trailing zeros because they are what the API sent. Floats use
+    their shortest ``repr``. Returns ``None`` for values that are not numbers.
+    """
+
+    if isinstance(value, str):
+        text = value.strip()
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        if isinstance(value, float) and not math.isfinite(value):
+            return None
+        text = repr(value)
+    else:
+        return None
+    if not text:
+        return None
+    if "e" in text or "E" in text:
+        try:
+            exponent = Decimal(text).normalize().as_tuple().exponent
+        except (InvalidOperation, ValueError):
+            return None
+        if not isinstance(exponent, int):
+            return None
+        return min(max(-exponent, 0), max_dp)
+    body = text[1:] if text[0] in "+-" else text
+    whole, dot, frac = body.partition(".")
+    if not (whole.isdigit() or (not whole and frac)) or (frac and not frac.isdigit()):
+        return None
+    return min(len(frac), max_dp) if dot else 0
+
+
+__all__ = [
+    "ROUND_DOWN",
+    "ROUND_NEAREST",
+    "ROUND_UP",
+    "TickGrid",
+    "decimals_of",
+    "grid_for",
+]
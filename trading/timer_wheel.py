@@ -0,0 +1,331 @@
+"""Hierarchical timer wheel shared by every market in the process.
+
+Timers fire at tick granularity (default 50ms), never early. Callbacks run on
+the wheel thread; pass ``blocking=True`` for anything that does I/O, or
+``loop=`` to run on an asyncio loop.
+"""
+
+from __future__ import annotations
+
+import itertools
+import math
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from trading.async_log import LOG
+
+if TYPE_CHECKING:
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+
+class TimerHandle:
+    """A scheduled callback; :meth:`cancel` is O(1)."""
+
+    __slots__ = ("id", "expires", "callback", "args", "interval", "blocking", "loop", "cancelled", "_wheel", "_bucket")
+
+    def __init__(
+        self,
+        wheel: "TimerWheel",
+        timer_id: int,
+        expires: int,
+        callback: Callable[..., Any],
+        args: tuple,
+        interval: Optional[float],
+        blocking: bool,
+        loop: Optional["asyncio.AbstractEventLoop"],
+    ) -> None:
+        self.id = timer_id
+        self.expires = expires
+        self.callback = callback
+        self.args = args
+        self.interval = interval
+        self.blocking = blocking
+        self.loop = loop
+        self.cancelled = False
+        self._wheel = wheel
+        self._bucket: Optional[Dict[int, "TimerHandle"]] = None
+
+    @property
+    def when(self) -> float:
+        """Clock time at which the timer fires."""
+
+        return self._wheel._tick_time(self.expires)
+
+    def cancel(self) -> bool:
+        return self._wheel._cancel(self)
+
+
+class TimerWheel:
+    """Thread-driven hierarchical timer wheel (O(1) insert/cancel)."""
+
+    def __init__(
+        self,
+        *,
+        tick: float = 0.05,
+        wheel_size: int = 256,
+        levels: int = 4,
+        max_workers: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if wheel_size < 2 or wheel_size & (wheel_size - 1):
+            raise ValueError("wheel_size must be a power of two")
+        self.tick = float(tick)
+        self.wheel_size = wheel_size
+        self.levels = max(int(levels), 1)
+        self.max_workers = max(int(max_workers), 1)
+        self._bits = wheel_size.bit_length() - 1
+        self._mask = wheel_size - 1
+        self._clock = clock
+        self._origin = clock()
+        self._current = 0
+        self._wheels: List[List[Dict[int, TimerHandle]]] = [
+            [{} for _ in range(wheel_size)] for _ in range(self.levels)
+        ]
+        self._overflow: Dict[int, TimerHandle] = {}
+        self._ids = itertools.count(1)
+        self._count = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self._executor: Optional["ThreadPoolExecutor"] = None
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    def call_later(
+        self,
+        delay: float,
+        callback: Callable[..., Any],
+        *args: Any,
+        interval: Optional[float] = None,
+        blocking: bool = False,
+        loop: Optional["asyncio.AbstractEventLoop"] = None,
+    ) -> TimerHandle:
+        """Run ``callback(*args)`` after ``delay`` seconds (then every ``interval``)."""
+
+        return self.call_at(
+            self._clock() + max(float(delay), 0.0),
+            callback,
+            *args,
+            interval=interval,
+            blocking=blocking,
+            loop=loop,
+        )
+
+    def call_at(
+        self,
+        when: float,
+        callback: Callable[..., Any],
+        *args: Any,
+        interval: Optional[float] = None,
+        blocking: bool = False,
+        loop: Optional["asyncio.AbstractEventLoop"] = None,
+    ) -> TimerHandle:
+        if interval is not None and interval <= 0:
+            raise ValueError("interval must be positive")
+        with self._lock:
+            if self._count == 0:
+                # Idle wheel: jump to the present instead of stepping through the gap.
+                self._current = max(
+                    self._current, int(math.floor((self._clock() - self._origin) / self.tick))
+                )
+            handle = TimerHandle(
+                self,
+                next(self._ids),
+                self._ticks_for(when),
+                callback,
+                args,
+                interval,
+                blocking,
+                loop,
+            )
+            self._insert(handle)
+            self._count += 1
+            self._wakeup.notify()
+        if self._thread is None:
+            self.start()
+        return handle
+
+    def sleep(self, delay: float, result: Any = None) -> "asyncio.Future":
+        """Awaitable that resolves after ``delay`` (call from a running loop)."""
+
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def _wake() -> None:
+            if not future.done():
+                future.set_result(result)
+
+        handle = self.call_later(delay, _wake, loop=loop)
+        future.add_done_callback(lambda f: handle.cancel() if f.cancelled() else None)
+        return future
+
+    def __len__(self) -> int:
+        return self._count
+
+    # ------------------------------------------------------------------
+    # Driving
+    def start(self) -> "TimerWheel":
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="timer-wheel", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stopped = True
+            self._wakeup.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """Fire everything due by ``now``; returns the number of callbacks run."""
+
+        if now is None:
+            now = self._clock()
+        target = int(math.floor((now - self._origin) / self.tick + 1e-9))
+        fired = 0
+        while True:
+            with self._lock:
+                if self._current >= target:
+                    return fired
+                due = self._step()
+            for handle in due:
+                self._dispatch(handle)
+            fired += len(due)
+
+    # ------------------------------------------------------------------
+    # Internals (lock held unless noted)
+    def _ticks_for(self, when: float) -> int:
+        ticks = int(math.ceil((when - self._origin) / self.tick - 1e-9))
+        return max(ticks, self._current + 1)
+
+    def _tick_time(self, ticks: int) -> float:
+        return self._origin + ticks * self.tick
+
+    def _insert(self, handle: TimerHandle) -> None:
+        distance = handle.expires - self._current
+        for level in range(self.levels):
+            if distance < 1 << (self._bits * (level + 1)):
+                slot = (handle.expires >> (self._bits * level)) & self._mask
+                bucket = self._wheels[level][slot]
+                break
+        else:
+            bucket = self._overflow
+        bucket[handle.id] = handle
+        handle._bucket = bucket
+
+    def _cancel(self, handle: TimerHandle) -> bool:
+        with self._lock:
+            if handle.cancelled:
+                return False
+            handle.cancelled = True
+            bucket = handle._bucket
+            if bucket is not None and bucket.pop(handle.id, None) is not None:
+                self._count -= 1
+            handle._bucket = None
+            return True
+
+    def _cascade(self, bucket: Dict[int, TimerHandle]) -> None:
+        handles = list(bucket.values())
+        bucket.clear()
+        for handle in handles:
+            self._insert(handle)
+
+    def _step(self) -> List[TimerHandle]:
+        self._current += 1
+        current = self._current
+        # Re-file upper levels whose lower wheel just wrapped (outermost first).
+        if current & self._mask == 0:
+            wrapped = 1
+            while wrapped < self.levels and (current >> (self._bits * wrapped)) & self._mask == 0:
+                wrapped += 1
+            if wrapped == self.levels and self._overflow:
+                self._cascade(self._overflow)
+            for level in range(min(wrapped, self.levels - 1), 0, -1):
+                slot = (current >> (self._bits * level)) & self._mask
+                self._cascade(self._wheels[level][slot])
+        bucket = self._wheels[0][current & self._mask]
+        due = [h for h in bucket.values() if h.expires <= current]
+        for handle in due:
+            del bucket[handle.id]
+            handle._bucket = None
+            if handle.interval is not None:
+                handle.expires = self._ticks_for(self._tick_time(current) + handle.interval)
+                self._insert(handle)
+            else:
+                self._count -= 1
+        return due
+
+    def _dispatch(self, handle: TimerHandle) -> None:
+        # Runs without the lock held.
+        if handle.cancelled:
+            return
+        if handle.loop is not None:
+            handle.loop.call_soon_threadsafe(self._invoke, handle)
+        elif handle.blocking:
+            self._pool().submit(self._invoke, handle)
+        else:
+            self._invoke(handle)
+
+    def _invoke(self, handle: TimerHandle) -> None:
+        if handle.cancelled:
+            return
+        try:
+            handle.callback(*handle.args)
+        except Exception as exc:
+            LOG.error(
+                "timer.error",
+                f"[TIMER] 回调异常 {getattr(handle.callback, '__name__', handle.callback)}: {exc!r}",
+            )
+
+    def _pool(self) -> "ThreadPoolExecutor":
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="timer-worker"
+                    )
+        return self._executor
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if self._stopped:
+                    return
+                if self._count == 0:
+                    self._wakeup.wait()
+                    continue
+                wait = self._tick_time(self._current + 1) - self._clock()
+                if wait > 0:
+                    self._wakeup.wait(wait)
+                    continue
+            self.advance()
+
+
+_default_wheel: Optional[TimerWheel] = None
+_default_lock = threading.Lock()
+
+
+def default_wheel() -> TimerWheel:
+    """Process-wide wheel shared by all markets (started lazily)."""
+
+    global _default_wheel
+    with _default_lock:
+        if _default_wheel is None:
+            _default_wheel = TimerWheel()
+        return _default_wheel
+
+
+__all__ = ["TimerHandle", "TimerWheel", "default_wheel"]
@@ -0,0 +1,302 @@
+"""Low-overhead span tracing from websocket frame to order acknowledgement.
+
+Histograms such as ``polymarket_tick_to_action_seconds`` show how long a
+whole hop takes but not where the time goes. When enabled
+(``POLY_TRACE=<path>``), :data:`TRACER` records one span per stage of every
+tick, tagged with the tick's trace id:
+
+``ws.network`` (exchange timestamp -> socket receive), ``ws.decode``,
+``strategy.wait`` (conflation hand-off), ``strategy.on_tick``,
+``signal.queue`` (enqueue -> dequeue by the main loop), ``position.probe``,
+``order.sign`` (``create_order``), ``order.post``, ``order.cancel`` /
+``order.replace`` and ``signal.to_ack`` (action emitted -> first order
+acknowledged). The maker loops add ``maker.cancel`` / ``maker.requote``.
+
+Spans go into a bounded per-thread deque, so recording takes no lock: it is a
+``perf_counter`` call and a tuple append. Buffers of exited threads are moved
+into one shared deque of the same bound. Code deep in the call stack (order
+signing, maker loops) attaches to the trace the thread is currently working
+on (:meth:`Tracer.set_current` / :meth:`Tracer.activate`), so ids do not
+have to be passed through every signature. :meth:`Tracer.export_chrome`
+writes Chrome trace-event JSON (``chrome://tracing`` / Perfetto).
+:meth:`Tracer.summary` gives p50/p99 per stage.
+
+Disabled tracers return immediately from every call.
+"""
+
+from __future__ import annotations
+
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+# (trace_id, name, start, end, thread_id, args)
+Span = Tuple[int, str, float, float, int, Optional[Dict[str, Any]]]
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class _ThreadBuffer(threading.local):
+    def __init__(self) -> None:
+        self.spans: Optional[Deque[Span]] = None
+        self.current = 0
+        self.frame: Optional[Tuple[float, float]] = None
+
+
+class Tracer:
+    """Per-thread span buffers with Chrome trace export."""
+
+    def __init__(self, *, enabled: bool = True, path: Optional[str] = None, max_spans_per_thread: int = 200_000) -> None:
+        self.enabled = bool(enabled)
+        self.path = path
+        self.max_spans_per_thread = int(max_spans_per_thread)
+        self._local = _ThreadBuffer()
+        self._buffers: List[Tuple[threading.Thread, Deque[Span]]] = []
+        # spans of exited threads, shared and bounded like one thread's buffer
+        self._retired: Deque[Span] = deque(maxlen=self.max_spans_per_thread)
+        self._retired_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        # perf_counter -> wall clock offset, for spans that start at an exchange timestamp
+        self._wall_offset = time.time() - time.perf_counter()
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        path = os.getenv("POLY_TRACE", "").strip()
+        return cls(enabled=bool(path) and path.lower() != "off", path=path or None)
+
+    # ------------------------------------------------------------------
+    # Recording (hot path)
+    def _buffer(self) -> Deque[Span]:
+        spans = self._local.spans
+        if spans is None:
+            spans = self._local.spans = deque(maxlen=self.max_spans_per_thread)
+            thread = threading.current_thread()
+            with self._lock:
+                self._retire_dead_locked()
+                self._buffers.append((thread, spans))
+        return spans
+
+    def _retire_dead_locked(self) -> None:
+        # Caller holds self._lock. A dead thread no longer appends, so its
+        # deque can be drained without the copy retry.
+        live = []
+        retired = False
+        for thread, spans in self._buffers:
+            if thread.is_alive():
+                live.append((thread, spans))
+                continue
+            if spans:
+                self._retired.extend(spans)
+                self._retired_names[thread.ident or 0] = thread.name
+            retired = True
+        if not retired:
+            return
+        self._buffers = live
+        tids = {span[4] for span in self._retired}
+        self._retired_names = {tid: name for tid, name in self._retired_names.items() if tid in tids}
+
+    def new_trace(self) -> int:
+        return next(self._ids) if self.enabled else 0
+
+    def current(self) -> int:
+        return self._local.current if self.enabled else 0
+
+    def set_current(self, trace_id: Optional[int]) -> None:
+        if self.enabled:
+            self._local.current = int(trace_id or 0)
+
+    @contextmanager
+    def activate(self, trace_id: Optional[int]) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        previous = self._local.current
+        self._local.current = int(trace_id or 0)
+        try:
+            yield
+        finally:
+            self._local.current = previous
+
+    def record(
+        self,
+        name: str,
+        start: float,
+        end: Optional[float] = None,
+        *,
+        trace_id: Optional[int] = None,
+        **args: Any,
+    ) -> None:
+        """Record a span measured with ``time.perf_counter`` timestamps."""
+
+        if not self.enabled:
+            return
+        if trace_id is None:
+            trace_id = self._local.current
+        if end is None:
+            end = time.perf_counter()
+        self._buffer().append(
+            (trace_id, name, start, end, threading.get_ident(), args or None)
+        )
+
+    @contextmanager
+    def span(self, name: str, *, trace_id: Optional[int] = None, **args: Any) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), trace_id=trace_id, **args)
+
+    def traced(self, name: str) -> Callable[[F], F]:
+        """Decorator: record every call of the function as span ``name``."""
+
+        def decorator(fn: F) -> F:
+            @functools.wraps(fn)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.record(name, start)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorator
+
+    def wall_to_perf(self, wall_ts: float) -> float:
+        return wall_ts - self._wall_offset
+
+    def mark_frame(self, received_at: float, decoded_at: float) -> None:
+        """Remember the timing of the frame being dispatched on this thread."""
+
+        if self.enabled:
+            self._local.frame = (received_at, decoded_at)
+
+    def frame_spans(self, trace_id: int, server_ts: Optional[float] = None) -> None:
+        """Record ``ws.network`` / ``ws.decode`` for the frame set by :meth:`mark_frame`."""
+
+        if not self.enabled:
+            return
+        frame = self._local.frame
+        if frame is None:
+            return
+        received_at, decoded_at = frame
+        if server_ts:
+            sent_at = self.wall_to_perf(server_ts)
+            if sent_at < received_at:
+                self.record("ws.network", sent_at, received_at, trace_id=trace_id)
+        self.record("ws.decode", received_at, decoded_at, trace_id=trace_id)
+
+    # ------------------------------------------------------------------
+    # Export
+    def spans(self) -> List[Span]:
+        with self._lock:
+            self._retire_dead_locked()
+            buffers = [list(self._retired)] + [_copy(spans) for _, spans in self._buffers]
+        merged = [span for spans in buffers for span in spans]
+        merged.sort(key=lambda s: s[2])
+        return merged
+
+    def clear(self) -> None:
+        with self._lock:
+            self._retire_dead_locked()
+            self._retired.clear()
+            self._retired_names.clear()
+            for _, spans in self._buffers:
+                spans.clear()
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        pid = os.getpid()
+        with self._lock:
+            self._retire_dead_locked()
+            threads = list(self._retired_names.items())
+            threads += [(thread.ident or 0, thread.name) for thread, _ in self._buffers]
+        events: List[Dict[str, Any]] = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": ident, "args": {"name": name}}
+            for ident, name in threads
+        ]
+        for trace_id, name, start, end, tid, args in self.spans():
+            event_args = {"trace": trace_id}
+            if args:
+                event_args.update(args)
+            events.append(
+                {
+                    "name": name,
+                    "cat": name.split(".", 1)[0],
+                    "ph": "X",
+                    "ts": round((start + self._wall_offset) * 1e6, 3),
+                    "dur": round(max(end - start, 0.0) * 1e6, 3),
+                    "pid": pid,
+                    "tid": tid,
+                    "args": event_args,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome(self, path: Optional[str] = None) -> Optional[str]:
+        path = path or self.path
+        if not path:
+            return None
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.chrome_trace(), fh)
+        return path
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """``{stage: {count, p50_ms, p99_ms, max_ms}}`` over the buffered spans."""
+
+        durations: Dict[str, List[float]] = {}
+        for _, name, start, end, _, _ in self.spans():
+            durations.setdefault(name, []).append((end - start) * 1000.0)
+        out: Dict[str, Dict[str, float]] = {}
+        for name, values in durations.items():
+            values.sort()
+            out[name] = {
+                "count": len(values),
+                "p50_ms": _percentile(values, 50.0),
+                "p99_ms": _percentile(values, 99.0),
+                "max_ms": values[-1],
+            }
+        return out
+
+    def format_summary(self) -> List[str]:
+        rows = sorted(self.summary().items(), key=lambda kv: kv[0])
+        return [
+            f"{name:<18} n={s['count']:<7} p50={s['p50_ms']:.3f}ms p99={s['p99_ms']:.3f}ms max={s['max_ms']:.3f}ms"
+            for name, s in rows
+        ]
+
+
+def _copy(spans: Deque[Span]) -> List[Span]:
+    # The owning thread may append while we copy; retry until a clean pass.
+    while True:
+        try:
+            return list(spans)
+        except RuntimeError:
+            continue
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = pct / 100.0 * (len(sorted_values) - 1)
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+TRACER = Tracer.from_env()
+
+
+__all__ = ["Span", "TRACER", "Tracer"]